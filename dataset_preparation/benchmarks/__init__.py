@@ -0,0 +1,3 @@
+# Dream-Team-core/dataset_preparation/benchmarks/__init__.py
+# Скрипты для замера производительности этапов подготовки датасета.
+# Запуск: python -m dataset_preparation.benchmarks.<имя_модуля>
@@ -0,0 +1,110 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_checkpoints.py
+# Контрольные точки внутри файла (checkpoints): корпус из нескольких больших файлов (.txt и .docx)
+# обрабатывается отдельным процессом
+#   - без контрольных точек (эталон) и с контрольными точками разной частоты - стоимость fsync;
+#   - с аварийным завершением процесса (SIGKILL) посреди обработки и повторным запуском, который
+#     продолжает файлы с контрольных точек - сравнивается с повторной обработкой с начала.
+#     По умолчанию процесс завершается, как только на диске появилась контрольная точка
+#     (детерминированная проверка с os._exit после N абзацев - tests/test_checkpoints.py).
+# Результат после сбоя и продолжения сверяется с эталоном побайтно (вместе с индексами .idx).
+# Запуск: python -m dataset_preparation.benchmarks.bench_checkpoints [--files N] [--paragraphs N]
+#         [--stages S] [--output-format jsonl|msgpack] [--kill-after X] [--seed N]
+# Код возврата 1, если результат после сбоя отличается от эталона.
+import argparse
+import filecmp
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+_RUN_SCRIPT = """
+import sys
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+run_dataset_creation_pipeline(sys.argv[1], sys.argv[2], stages=sys.argv[3], output_format=sys.argv[4],
+                              checkpoint_interval=float(sys.argv[5]), use_ner_cache=False)
+"""
+
+def start_run(corpus_dir: str, output_dir: str, stages: str, output_format: str,
+              checkpoint_interval: float) -> subprocess.Popen:
+    environment = dict(os.environ, DREAM_TEAM_JSON_BACKEND="json")
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, environment.get("PYTHONPATH")]))
+    return subprocess.Popen([sys.executable, "-c", _RUN_SCRIPT, corpus_dir, output_dir, stages, output_format,
+                             str(checkpoint_interval)], env=environment,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def timed_run(corpus_dir: str, output_dir: str, stages: str, output_format: str, checkpoint_interval: float,
+              kill_after: Optional[float] = None, kill_at_checkpoint: bool = False) -> float:
+    """
+    Время запуска; при kill_after процесс завершается SIGKILL через столько секунд,
+    при kill_at_checkpoint - как только в output_dir появится первая контрольная точка.
+    """
+    start = time.perf_counter()
+    process = start_run(corpus_dir, output_dir, stages, output_format, checkpoint_interval)
+    if kill_at_checkpoint:
+        while process.poll() is None and not count_checkpoints(output_dir):
+            time.sleep(0.01)
+        kill_after = 0
+    try:
+        process.wait(timeout=kill_after)
+    except subprocess.TimeoutExpired:
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+    return time.perf_counter() - start
+
+def same_outputs(first_dir: str, second_dir: str) -> bool:
+    for root, _, names in os.walk(first_dir):
+        for name in names:
+            if not name.startswith("_"):
+                first = os.path.join(root, name)
+                second = os.path.join(second_dir, os.path.relpath(first, first_dir))
+                if not os.path.exists(second) or not filecmp.cmp(first, second, shallow=False):
+                    return False
+    return True
+
+def count_checkpoints(output_dir: str) -> int:
+    return sum(name.endswith(".ckpt") for _, _, names in os.walk(output_dir) for name in names)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Контрольные точки и продолжение обработки после сбоя.")
+    parser.add_argument("--files", type=int, default=2, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=20000, help="Абзацев в файле")
+    parser.add_argument("--stages", default="split,dialogue", help="Этапы обработки")
+    parser.add_argument("--output-format", choices=("jsonl", "msgpack"), default="jsonl", help="Формат вывода")
+    parser.add_argument("--kill-after", type=float, help="Через сколько секунд завершить процесс "
+                                                        "(по умолчанию - при первой контрольной точке)")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, docx_share=0.5, seed=args.seed)
+        run = lambda name, interval, kill_after=None: timed_run(
+            corpus_dir, os.path.join(tmp_dir, name), args.stages, args.output_format, interval, kill_after)
+
+        reference_seconds = run("reference", 0)
+        print(f"Корпус: файлов {args.files}, абзацев в файле {args.paragraphs}, этапы: {args.stages}, "
+              f"формат: {args.output_format}")
+        print(f"  без контрольных точек:          {reference_seconds:.2f} сек")
+        for interval in (10.0, 1.0, 0.1):
+            seconds = run(f"interval_{interval:g}", interval)
+            print(f"  контрольная точка раз в {interval:>4g} сек: {seconds:.2f} сек")
+
+        killed_seconds = timed_run(corpus_dir, os.path.join(tmp_dir, "crash"), args.stages, args.output_format,
+                                   0.1, args.kill_after, kill_at_checkpoint=args.kill_after is None)
+        checkpoints = count_checkpoints(os.path.join(tmp_dir, "crash"))
+        if not checkpoints:
+            print("Предупреждение: процесс завершился (или был завершен) до первой контрольной точки; "
+                  "увеличьте --paragraphs или --kill-after")
+        resume_seconds = run("crash", 0.1)
+        same = same_outputs(os.path.join(tmp_dir, "reference"), os.path.join(tmp_dir, "crash"))
+        print(f"Сбой через {killed_seconds:.2f} сек (контрольных точек на диске: {checkpoints}):")
+        print(f"  повторный запуск с продолжением: {resume_seconds:.2f} сек "
+              f"(обработка с начала: {reference_seconds:.2f} сек)")
+        print(f"Результат совпадает с эталоном: {'да' if same else 'НЕТ'}")
+    sys.exit(0 if same else 1)
@@ -0,0 +1,46 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_cold_import.py
+# Замер "холодного" импорта пакета dataset_preparation.src в чистом процессе и проверка,
+# что при импорте не загружаются тяжелые зависимости (Natasha, NLTK, python-docx).
+# Запуск: python -m dataset_preparation.benchmarks.bench_cold_import [число_повторов]
+# Код возврата 1, если при импорте загрузился хотя бы один тяжелый модуль.
+import json
+import os
+import subprocess
+import sys
+
+# Модули, которые не должны попадать в sys.modules при импорте пакета
+HEAVY_MODULES = ["natasha", "slovnet", "navec", "nltk", "docx", "lxml"]
+
+_MEASURE_CODE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import dataset_preparation.src\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = [m for m in {heavy!r} if m in sys.modules]\n"
+    "print(json.dumps({{'seconds': elapsed, 'heavy_modules_loaded': heavy}}))\n"
+)
+
+def measure_cold_import(repeats: int = 5) -> dict:
+    """Импортирует пакет в отдельных процессах repeats раз и возвращает лучшее время."""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, DREAM_TEAM_OFFLINE="1") # Импорт не должен обращаться к сети в любом случае
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _MEASURE_CODE.format(heavy=HEAVY_MODULES)],
+            cwd=project_root, env=env, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        runs.append(json.loads(output))
+    return {
+        "best_seconds": min(r["seconds"] for r in runs),
+        "heavy_modules_loaded": sorted({m for r in runs for m in r["heavy_modules_loaded"]}),
+    }
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    result = measure_cold_import(repeats)
+    print(f"Холодный импорт dataset_preparation.src: {result['best_seconds'] * 1000:.1f} мс (лучшее из {repeats})")
+    if result["heavy_modules_loaded"]:
+        print(f"Ошибка: при импорте загружены тяжелые модули: {', '.join(result['heavy_modules_loaded'])}")
+        sys.exit(1)
+    print("Тяжелые модули при импорте не загружаются.")
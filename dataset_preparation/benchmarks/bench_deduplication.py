@@ -0,0 +1,123 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_deduplication.py
+# Замер поиска почти одинаковых абзацев (deduplication) на синтетическом корпусе, в который
+# подложены слегка отредактированные копии части файлов (как черновики и пересохранения книг).
+# Отчет: полнота на подложенных копиях, точность найденных пар (доля пар с точным коэффициентом
+# Жаккара по 5-граммам не ниже порога минус 0.1), время поиска и время конвейера без и с
+# дедупликацией (режим "skip").
+# Запуск: python -m dataset_preparation.benchmarks.bench_deduplication [--files N] [--paragraphs N]
+#         [--copies-share X] [--edit-rate X] [--threshold X] [--seed N]
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.deduplication import find_duplicate_paragraphs, normalize_for_dedup
+    from dataset_preparation.src.file_loaders import load_paragraphs_from_txt
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+
+def edit_paragraph(paragraph: str, edit_rate: float, rng: random.Random) -> str:
+    """Легкая правка: часть слов удаляется, дублируется или меняет регистр."""
+    words = paragraph.split(' ')
+    edited = []
+    for word in words:
+        roll = rng.random()
+        if roll < edit_rate / 3:
+            continue
+        if roll < 2 * edit_rate / 3:
+            edited.extend([word, word])
+        elif roll < edit_rate:
+            edited.append(word.upper())
+        else:
+            edited.append(word)
+    return ' '.join(edited)
+
+def plant_copies(corpus_dir: str, share: float, edit_rate: float, rng: random.Random) -> dict:
+    """Создает отредактированные копии части .txt файлов; возвращает {копия: оригинал} (относительные пути)."""
+    txt_files = sorted(
+        os.path.relpath(os.path.join(root, name), corpus_dir).replace(os.path.sep, '/')
+        for root, _, names in os.walk(corpus_dir) for name in names if name.endswith('.txt')
+    )
+    copies = {}
+    for relative_path in rng.sample(txt_files, max(1, int(len(txt_files) * share))):
+        paragraphs = load_paragraphs_from_txt(os.path.join(corpus_dir, relative_path))
+        copy_path = relative_path[:-len('.txt')] + '_draft.txt'
+        with open(os.path.join(corpus_dir, copy_path), 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(edit_paragraph(p, edit_rate, rng) for p in paragraphs))
+        copies[copy_path] = relative_path
+    return copies
+
+def _shingles(text: str) -> set:
+    normalized = normalize_for_dedup(text)
+    return {normalized[i:i + 5] for i in range(max(1, len(normalized) - 4))}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Поиск почти одинаковых абзацев в корпусе.")
+    parser.add_argument("--files", type=int, default=20, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=100, help="Абзацев в файле")
+    parser.add_argument("--copies-share", type=float, default=0.3, help="Доля .txt файлов, получающих копию")
+    parser.add_argument("--edit-rate", type=float, default=0.05, help="Доля измененных слов в копии")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Порог сходства")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        copies = plant_copies(corpus_dir, args.copies_share, args.edit_rate, rng)
+        files = [
+            (os.path.relpath(os.path.join(root, name), corpus_dir).replace(os.path.sep, '/'), os.path.join(root, name))
+            for root, _, names in os.walk(corpus_dir) for name in names
+        ]
+        texts = {}
+        for relative_path, file_path in files:
+            if file_path.endswith('.txt'):
+                texts[relative_path] = load_paragraphs_from_txt(file_path)
+
+        start = time.perf_counter()
+        duplicates, checked = find_duplicate_paragraphs(files, threshold=args.threshold)
+        search_seconds = time.perf_counter() - start
+
+        planted = found_planted = 0
+        for copy_path, original_path in copies.items():
+            for paragraph_index, paragraph in enumerate(texts[copy_path]):
+                if len(normalize_for_dedup(paragraph)) < 40:
+                    continue
+                planted += 1
+                found = duplicates.get(copy_path, {}).get(paragraph_index)
+                found_planted += found is not None
+        pairs = correct_pairs = 0
+        for relative_path, file_duplicates in duplicates.items():
+            if relative_path not in texts:
+                continue
+            for paragraph_index, info in file_duplicates.items():
+                original = info["duplicate_of"]
+                if original["source"] not in texts:
+                    continue
+                a = _shingles(texts[relative_path][paragraph_index])
+                b = _shingles(texts[original["source"]][original["paragraph_index"]])
+                pairs += 1
+                correct_pairs += len(a & b) / len(a | b) >= args.threshold - 0.1
+        print(f"Абзацев проверено: {checked}, копий файлов: {len(copies)}, найдено дубликатов: "
+              f"{sum(len(d) for d in duplicates.values())}")
+        print(f"Полнота на подложенных копиях: {found_planted / planted if planted else 1.0:.3f} "
+              f"({found_planted} из {planted}), точность пар: {correct_pairs / pairs if pairs else 1.0:.3f}")
+        print(f"Поиск дубликатов: {search_seconds:.2f} сек ({search_seconds / checked * 1e6:.0f} мкс на абзац)")
+
+        timings = {}
+        for deduplicate in (False, True):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_dataset_creation_pipeline(corpus_dir, os.path.join(tmp_dir, f"output_{deduplicate}"),
+                                              incremental=False, use_ner_cache=False, deduplicate=deduplicate,
+                                              dedup_threshold=args.threshold)
+            timings[deduplicate] = time.perf_counter() - start
+        print(f"Конвейер: без дедупликации {timings[False]:.2f} сек, с дедупликацией {timings[True]:.2f} сек "
+              f"(x{timings[False] / timings[True]:.2f})")
@@ -0,0 +1,40 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_dialogue_identifier.py
+# Замер скорости extract_dialogue_info: новая реализация против исходной (на регулярных выражениях,
+# см. reference_extract_dialogue_info) на диалогах, на прозе и на "враждебных" длинных входах,
+# на которых исходные выражения работают за квадратичное время. Эталон и корпуса - из
+# tests/dialogue_reference.py (совпадение результатов проверяется тестом tests/test_dialogue_identifier.py).
+# Запуск: python -m dataset_preparation.benchmarks.bench_dialogue_identifier
+import time
+from typing import Callable, Dict, List
+
+from dataset_preparation.src.dialogue_identifier import extract_dialogue_info
+from dataset_preparation.tests.dialogue_reference import (
+    PROSE_SENTENCES,
+    REGRESSION_CORPUS,
+    reference_extract_dialogue_info,
+    make_adversarial_inputs,
+)
+
+def _time_calls(function: Callable[[str], Dict], texts: List[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        function(text)
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    workloads = {
+        "только диалоги (регрессионный корпус)": REGRESSION_CORPUS * 2000,
+        "проза с 20% диалогов": (PROSE_SENTENCES * 4 + REGRESSION_CORPUS[:len(PROSE_SENTENCES)]) * 2000,
+    }
+    for workload_name, sentences in workloads.items():
+        reference_seconds = _time_calls(reference_extract_dialogue_info, sentences)
+        new_seconds = _time_calls(extract_dialogue_info, sentences)
+        print(f"{workload_name} ({len(sentences)}): исходная {len(sentences) / reference_seconds:.0f} предл./сек, "
+              f"новая {len(sentences) / new_seconds:.0f} предл./сек (x{reference_seconds / new_seconds:.2f})")
+
+    print("Длинные \"враждебные\" входы:")
+    for length in (2_000, 20_000):
+        for name, text in make_adversarial_inputs(length).items():
+            reference_seconds = _time_calls(reference_extract_dialogue_info, [text])
+            new_seconds = _time_calls(extract_dialogue_info, [text])
+            print(f"  {name} ({len(text)} симв.): исходная {reference_seconds * 1000:.1f} мс, новая {new_seconds * 1000:.2f} мс")
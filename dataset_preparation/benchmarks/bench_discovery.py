@@ -0,0 +1,137 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_discovery.py
+# Поиск входных файлов в большом дереве (discovery): синтетическое дерево из множества директорий
+# с пустыми файлами .txt/.docx (и файлами других типов, которые нужно пропустить) обходится
+#   - прежним способом: os.walk, os.path.relpath на каждый файл, полный словарь файлов до обработки;
+#   - потоковым обходом через os.scandir в одном потоке и пулом потоков;
+#   - с кешем списков директорий: первый запуск (кеш заполняется) и повторный (дерево не менялось).
+# Для каждого способа замеряются время до первого файла (когда может начаться обработка), время
+# полного обхода и пиковая память (tracemalloc, отдельным проходом). --latency-ms добавляет задержку
+# к каждому чтению каталога, имитируя сетевой диск (на нем и окупается параллельный обход).
+# Проверяется, что все способы находят одни и те же файлы.
+# Запуск: python -m dataset_preparation.benchmarks.bench_discovery [--dirs N] [--files-per-dir N]
+#         [--depth N] [--threads N] [--latency-ms X]
+# Код возврата 1, если наборы найденных файлов различаются.
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Set
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.discovery import INPUT_EXTENSIONS, InputDiscovery
+
+def generate_tree(root: str, dirs: int, files_per_dir: int, depth: int) -> None:
+    """Дерево из dirs директорий глубиной до depth, в каждой files_per_dir входных файлов и один лишний."""
+    for number in range(dirs):
+        parts = [f"d{(number // 10 ** level) % 10}" for level in range(depth - 1, 0, -1)] + [f"leaf{number}"]
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+        for index in range(files_per_dir):
+            extension = ".docx" if index % 5 == 0 else ".txt"
+            open(os.path.join(directory, f"file{index}{extension}"), 'w').close()
+        open(os.path.join(directory, "notes.md"), 'w').close()
+
+def legacy_discovery(input_dir: str) -> Iterable[str]:
+    """Прежний поиск из run_dataset_creation_pipeline: полный словарь {выходная поддиректория: [файлы]}."""
+    files_to_process_map: Dict[str, List[str]] = {}
+    for root, _, filenames in os.walk(input_dir):
+        for filename in filenames:
+            if filename.lower().endswith(INPUT_EXTENSIONS):
+                relative_subdir = os.path.relpath(root, input_dir)
+                files_to_process_map.setdefault(relative_subdir, []).append(os.path.join(root, filename))
+    for file_paths in files_to_process_map.values():
+        for file_path in file_paths:
+            yield os.path.relpath(file_path, input_dir).replace(os.path.sep, '/')
+
+def measure(make_files: Callable[[], Iterable[str]], trace_memory: bool) -> Dict:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    first_file_seconds = None
+    found: Set[str] = set() if not trace_memory else None
+    count = 0
+    for relative_path in make_files():
+        if first_file_seconds is None:
+            first_file_seconds = time.perf_counter() - start
+        if found is not None:
+            found.add(relative_path)
+        count += 1
+    result = {"seconds": time.perf_counter() - start, "first_file_seconds": first_file_seconds or 0.0,
+              "files": count, "found": found}
+    if trace_memory:
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return result
+
+@contextlib.contextmanager
+def directory_latency(seconds: float):
+    """Задержка каждого os.scandir (в том числе внутри os.walk) - как у сетевого диска."""
+    if seconds <= 0:
+        yield
+        return
+    original_scandir = os.scandir
+
+    def slow_scandir(*args, **kwargs):
+        time.sleep(seconds)
+        return original_scandir(*args, **kwargs)
+
+    os.scandir = slow_scandir
+    try:
+        yield
+    finally:
+        os.scandir = original_scandir
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Поиск входных файлов в большом дереве.")
+    parser.add_argument("--dirs", type=int, default=2000, help="Число директорий с файлами")
+    parser.add_argument("--files-per-dir", type=int, default=50, help="Входных файлов в директории")
+    parser.add_argument("--depth", type=int, default=3, help="Глубина дерева")
+    parser.add_argument("--threads", type=int, default=8, help="Потоки параллельного обхода")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Задержка чтения каталога, мс")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_dir = os.path.join(tmp_dir, "input")
+        generate_tree(input_dir, args.dirs, args.files_per_dir, args.depth)
+        cache_path = os.path.join(tmp_dir, "_listing_cache.sqlite3")
+        # Каталоги только что созданы: кеш не сохраняет директории моложе нескольких секунд
+        past = time.time() - 60
+        for root, _, _ in os.walk(input_dir):
+            os.utime(root, (past, past))
+
+        streaming = lambda threads, cache=None: lambda: (
+            input_file.relative_path for input_file in InputDiscovery(input_dir, threads=threads, cache_path=cache))
+        methods = [
+            ("os.walk + relpath, полный список", lambda: legacy_discovery(input_dir)),
+            ("os.scandir, поток", streaming(1)),
+            (f"os.scandir, {args.threads} потоков", streaming(args.threads)),
+            ("кеш списков, первый запуск", streaming(1, cache_path)),
+            ("кеш списков, повторный запуск", streaming(1, cache_path)),
+            (f"кеш списков, повторный, {args.threads} потоков", streaming(args.threads, cache_path)),
+        ]
+        print(f"Дерево: директорий {args.dirs}, входных файлов {args.dirs * args.files_per_dir}, "
+              f"глубина {args.depth}, задержка чтения каталога {args.latency_ms:g} мс")
+        expected = None
+        failed = False
+        with directory_latency(args.latency_ms / 1000):
+            for description, make_files in methods:
+                if description.startswith("кеш списков, первый") and os.path.exists(cache_path):
+                    os.remove(cache_path)
+                result = measure(make_files, trace_memory=False)
+                memory = measure(make_files, trace_memory=True) if not description.startswith("кеш") else None
+                line = (f"  {description:<42} первый файл через {result['first_file_seconds'] * 1000:8.1f} мс, "
+                        f"весь обход {result['seconds']:.2f} сек")
+                if memory is not None:
+                    line += f", пик памяти {memory['peak_mb']:.1f} МБ"
+                print(line)
+                if expected is None:
+                    expected = result["found"]
+                elif result["found"] != expected:
+                    print(f"    ОШИБКА: найдено {len(result['found'])} файлов вместо {len(expected)} "
+                          f"(отличаются: {len(result['found'] ^ expected)})")
+                    failed = True
+        print(f"Найдено файлов: {len(expected)}; кеш списков: {os.path.getsize(cache_path) / (1024 * 1024):.1f} МБ")
+    sys.exit(1 if failed else 0)
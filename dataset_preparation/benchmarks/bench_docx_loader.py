@@ -0,0 +1,169 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_docx_loader.py
+# Регрессионная проверка и замер потокового чтения .docx (iter_paragraphs_from_docx)
+# против исходного загрузчика на python-docx (см. _reference_load_paragraphs_from_docx).
+# Набор документов: файлы синтетического корпуса и документ с пограничными случаями разметки
+# (гиперссылки, табуляции, разрывы разных типов, таблицы, исправления, поля, пустые абзацы).
+# Время и пиковая память замеряются на большом документе; пиковый RSS - в отдельном процессе
+# для каждого загрузчика, т.к. память lxml не видна tracemalloc. Оба загрузчика возвращают полный
+# список абзацев, так что в пик входит и сам результат (iter_paragraphs_from_docx его не накапливает).
+# Запуск: python -m dataset_preparation.benchmarks.bench_docx_loader [абзацев_в_большом_документе]
+# Код возврата 1, если результаты хотя бы на одном документе расходятся.
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import docx
+from docx.oxml import parse_xml
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+from dataset_preparation.src.file_loaders import load_paragraphs_from_docx
+from dataset_preparation.src.text_cleaner import clean_text
+
+try:
+    import resource
+except ImportError: # Windows: пиковый RSS не замеряется
+    resource = None
+
+_W_NS_DECLARATION = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+def _reference_load_paragraphs_from_docx(file_path: str) -> List[str]:
+    """Исходная реализация load_paragraphs_from_docx на python-docx (эталон для регрессионной проверки)."""
+    doc = docx.Document(file_path)
+    return [clean_text(para.text) for para in doc.paragraphs if clean_text(para.text)]
+
+def _append_paragraph_xml(document, inner_xml: str) -> None:
+    """Добавляет в тело документа абзац w:p с произвольным содержимым."""
+    paragraph = document.add_paragraph()
+    for element in parse_xml(f'<w:p {_W_NS_DECLARATION}>{inner_xml}</w:p>'):
+        paragraph._p.append(element)
+
+def make_edge_case_document(path: str) -> None:
+    """Документ с разметкой, на которой легко разойтись с Paragraph.text из python-docx."""
+    document = docx.Document()
+    document.add_paragraph("  Обычный   абзац   с лишними пробелами.  ")
+    document.add_paragraph("")
+    document.add_paragraph("   \t  ")
+    paragraph = document.add_paragraph("Несколько ")
+    paragraph.add_run("форматированных ").bold = True
+    paragraph.add_run("фрагментов.").italic = True
+    paragraph = document.add_paragraph("Строка\tс табуляцией\nи переносом")
+    paragraph.add_run().add_break(docx.enum.text.WD_BREAK.PAGE)
+    paragraph.add_run("после разрыва страницы")
+    _append_paragraph_xml(document, '<w:r><w:t>Слитно</w:t><w:br w:type="page"/><w:t>через разрыв</w:t></w:r>')
+    _append_paragraph_xml(document, '<w:r><w:t>Колонка</w:t><w:br w:type="column"/><w:t>вторая</w:t></w:r>')
+    _append_paragraph_xml(document, '<w:r><w:t>Мягкий</w:t><w:cr/><w:t>перенос</w:t><w:noBreakHyphen/>'
+                                    '<w:t>дефис</w:t><w:ptab w:relativeTo="margin" w:alignment="right" w:leader="none"/>'
+                                    '<w:t>конец</w:t></w:r>')
+    _append_paragraph_xml(document, '<w:r><w:t xml:space="preserve">Ссылка: </w:t></w:r>'
+                                    '<w:hyperlink w:anchor="x"><w:r><w:t>текст ссылки</w:t></w:r>'
+                                    '<w:r><w:t xml:space="preserve"> и продолжение</w:t></w:r></w:hyperlink>'
+                                    '<w:r><w:t>.</w:t></w:r>')
+    # Содержимое, которого нет в Paragraph.text: исправления, поля, смарт-теги, вложенные блоки
+    _append_paragraph_xml(document, '<w:r><w:t xml:space="preserve">Видимый </w:t></w:r>'
+                                    '<w:ins w:id="1" w:author="a" w:date="2024-01-01T00:00:00Z"><w:r><w:t>вставка</w:t></w:r></w:ins>'
+                                    '<w:fldSimple w:instr="PAGE"><w:r><w:t>7</w:t></w:r></w:fldSimple>'
+                                    '<w:smartTag w:uri="u" w:element="e"><w:r><w:t>тег</w:t></w:r></w:smartTag>'
+                                    '<w:r><w:instrText>HYPERLINK</w:instrText><w:t>текст</w:t></w:r>')
+    _append_paragraph_xml(document, '<w:ins w:id="2" w:author="a" w:date="2024-01-01T00:00:00Z"><w:r><w:t>Только вставка</w:t></w:r></w:ins>')
+    _append_paragraph_xml(document, '<w:r><w:t></w:t><w:t/><w:tab/></w:r>')
+    _append_paragraph_xml(document, '<w:r><w:t>&lt;Спецсимволы&gt; &amp; «кавычки» &#8212; тире</w:t></w:r>')
+    table = document.add_table(rows=2, cols=2)
+    for row_index, row in enumerate(table.rows):
+        for column_index, cell in enumerate(row.cells):
+            cell.text = f"Ячейка {row_index}:{column_index}"
+    document.add_paragraph("Абзац после таблицы.")
+    sdt = parse_xml(f'<w:sdt {_W_NS_DECLARATION}><w:sdtContent><w:p><w:r><w:t>Внутри блока управления</w:t></w:r>'
+                    f'</w:p></w:sdtContent></w:sdt>')
+    document.element.body.insert(len(document.element.body) - 1, sdt)
+    document.add_paragraph("Последний абзац.")
+    document.save(path)
+
+def make_large_document(path: str, paragraphs_count: int) -> None:
+    document = docx.Document()
+    for index in range(paragraphs_count):
+        paragraph = document.add_paragraph(f"Абзац номер {index}. ")
+        paragraph.add_run("Иван Петров поехал в Москву, ").bold = True
+        paragraph.add_run("а «Сбербанк России» заключил договор с представителями из Казани.")
+    document.save(path)
+
+def check_regression(paths: List[str]) -> List[str]:
+    """Возвращает документы, на которых потоковый загрузчик расходится с исходным."""
+    return [path for path in paths if load_paragraphs_from_docx(path) != _reference_load_paragraphs_from_docx(path)]
+
+def _measure(loader: Callable[[str], List[str]], path: str) -> Dict[str, float]:
+    start = time.perf_counter()
+    paragraphs = loader(path)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    loader(path)
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "paragraphs": len(paragraphs), "traced_peak_bytes": traced_peak}
+
+def _peak_rss_kb() -> int:
+    """
+    Пиковый RSS текущего процесса. На Linux берется VmHWM: ru_maxrss дочернего процесса
+    наследует пик родителя и не показал бы прирост.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+_LOADERS = {"python-docx": _reference_load_paragraphs_from_docx, "streaming": load_paragraphs_from_docx}
+
+def _measure_peak_rss_in_subprocess(loader_name: str, path: str) -> Dict[str, int]:
+    """Прирост пикового RSS при загрузке документа, замеренный в отдельном процессе."""
+    output = subprocess.run(
+        [sys.executable, "-m", "dataset_preparation.benchmarks.bench_docx_loader", "--rss", loader_name, path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "--rss":
+        # Служебный режим для _measure_peak_rss_in_subprocess
+        loader = _LOADERS[sys.argv[2]]
+        rss_before = _peak_rss_kb()
+        loader(sys.argv[3])
+        rss_after = _peak_rss_kb()
+        print(json.dumps({"peak_rss_increase_kb": rss_after - rss_before}))
+        sys.exit(0)
+
+    large_paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, files_count=8, paragraphs_per_file=300, docx_share=1.0)
+        documents = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(corpus_dir) for name in names if name.endswith('.docx')
+        )
+        edge_case_path = os.path.join(tmp_dir, "edge_cases.docx")
+        make_edge_case_document(edge_case_path)
+        documents.append(edge_case_path)
+
+        mismatches = check_regression(documents)
+        print(f"Регрессионная проверка: документов {len(documents)}, расхождений {len(mismatches)}")
+        for path in mismatches:
+            print(f"  {path}:\n    ожидалось {_reference_load_paragraphs_from_docx(path)}\n"
+                  f"    получено  {load_paragraphs_from_docx(path)}")
+
+        large_path = os.path.join(tmp_dir, "large.docx")
+        make_large_document(large_path, large_paragraphs)
+        print(f"Большой документ: абзацев {large_paragraphs}, {os.path.getsize(large_path) / 1024:.0f} КБ")
+        for loader_name, loader in _LOADERS.items():
+            result = _measure(loader, large_path)
+            rss = _measure_peak_rss_in_subprocess(loader_name, large_path) if resource else {}
+            print(f"  {loader_name}: {result['seconds']:.2f} сек, {result['paragraphs'] / result['seconds']:.0f} абз./сек, "
+                  f"пик tracemalloc {result['traced_peak_bytes'] / 2**20:.1f} МБ"
+                  + (f", прирост пикового RSS {rss['peak_rss_increase_kb'] / 1024:.1f} МБ" if rss else ""))
+
+    sys.exit(1 if mismatches else 0)
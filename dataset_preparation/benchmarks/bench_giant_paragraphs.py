@@ -0,0 +1,114 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_giant_paragraphs.py
+# Худшие случаи для выделения абзацев (file_loaders): синтетические .txt, в которых по пустым
+# строкам получается один огромный "абзац":
+#   - книга с переводом строки после каждого абзаца и без пустых строк;
+#   - весь текст одной строкой без переводов строк;
+#   - одна "строка" без пробелов и знаков препинания (делится только жестко по длине).
+# Для каждого файла и предельной длины абзаца (0 - без ограничения) замеряются пиковая память
+# чтения (tracemalloc), число и наибольшая длина абзацев, время разбиения на предложения.
+# Проверяется, что абзацы не длиннее предела и что текст (без пробельных символов) не теряется.
+# Запуск: python -m dataset_preparation.benchmarks.bench_giant_paragraphs [--size-mb N]
+#         [--max-chars N] [--mode blank_line|single_newline|indent] [--no-split]
+# Код возврата 1, если нарушен предел длины или потерян текст.
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.file_loaders import (
+        PARAGRAPH_MODES,
+        iter_paragraphs_from_txt,
+    )
+    from dataset_preparation.src.sentence_splitter import split_text_into_sentences
+
+_SENTENCES = (
+    "Иван Петров поехал в Москву в {index} году.",
+    "«Где Наташа?» – спросила она.",
+    "Князь Василий долго говорил о том, что Пьер уехал в Париж.",
+    "Он ничего не ответил и вышел в сад.",
+)
+
+def _write_until(file_path: str, size_bytes: int, make_chunk: Callable[[int], str]) -> None:
+    written = 0
+    index = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        while written < size_bytes:
+            chunk = make_chunk(index)
+            f.write(chunk)
+            written += len(chunk.encode('utf-8'))
+            index += 1
+
+def generate_worst_cases(directory: str, size_mb: float) -> Dict[str, str]:
+    """Создает синтетические файлы худших случаев; возвращает {описание: путь}."""
+    size_bytes = int(size_mb * 1024 * 1024)
+    paragraph = lambda index: " ".join(_SENTENCES).format(index=index)
+    files = {
+        "книга без пустых строк": ("single_newline.txt", lambda index: paragraph(index) + "\n"),
+        "одна строка": ("one_line.txt", lambda index: paragraph(index) + " "),
+        "без пробелов и знаков": ("no_boundaries.txt", lambda index: "абвгдежзик" * 100),
+    }
+    paths = {}
+    for description, (file_name, make_chunk) in files.items():
+        paths[description] = os.path.join(directory, file_name)
+        _write_until(paths[description], size_bytes, make_chunk)
+    return paths
+
+def measure(file_path: str, mode: str, max_chars: int, split: bool) -> Dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    paragraphs = 0
+    longest = 0
+    text_chars = 0
+    split_seconds = 0.0
+    for paragraph in iter_paragraphs_from_txt(file_path, mode=mode, max_chars=max_chars):
+        paragraphs += 1
+        longest = max(longest, len(paragraph))
+        text_chars += len(paragraph) - paragraph.count(' ')
+        if split:
+            split_start = time.perf_counter()
+            split_text_into_sentences(paragraph)
+            split_seconds += time.perf_counter() - split_start
+    elapsed = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"paragraphs": paragraphs, "longest": longest, "text_chars": text_chars, "seconds": elapsed,
+            "split_seconds": split_seconds, "peak_mb": peak_bytes / (1024 * 1024)}
+
+def count_text_chars(file_path: str) -> int:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return sum(len(block) - sum(block.count(c) for c in " \n\t\r") for block in iter(lambda: f.read(1 << 20), ''))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Худшие случаи выделения абзацев.")
+    parser.add_argument("--size-mb", type=float, default=4, help="Размер каждого синтетического файла, МБ")
+    parser.add_argument("--max-chars", type=int, default=20000, help="Предельная длина абзаца")
+    parser.add_argument("--mode", choices=PARAGRAPH_MODES, default="blank_line", help="Выделение абзацев")
+    parser.add_argument("--no-split", action="store_true", help="Не разбивать абзацы на предложения")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        split_text_into_sentences("Прогрев.")
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"Файлы по {args.size_mb:g} МБ, выделение абзацев: {args.mode}")
+        for description, file_path in generate_worst_cases(tmp_dir, args.size_mb).items():
+            expected_chars = count_text_chars(file_path)
+            print(f"{description}:")
+            for max_chars in dict.fromkeys((0, args.max_chars)):
+                result = measure(file_path, args.mode, max_chars, not args.no_split)
+                limit = f"предел {max_chars}" if max_chars else "без предела"
+                print(f"  {limit:>14}: абзацев {result['paragraphs']}, самый длинный {result['longest']} симв., "
+                      f"пик памяти чтения {result['peak_mb']:.1f} МБ, время {result['seconds']:.2f} сек "
+                      f"(разбиение на предложения {result['split_seconds']:.2f} сек)")
+                if max_chars and result["longest"] > max_chars:
+                    print(f"    ОШИБКА: абзац длиннее предела ({result['longest']} > {max_chars})")
+                    failed = True
+                if result["text_chars"] != expected_chars:
+                    print(f"    ОШИБКА: потерян текст ({result['text_chars']} из {expected_chars} символов)")
+                    failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,87 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_io_pipeline.py
+# Замер перекрытия ввода-вывода и NLP (io_pipeline): последовательная обработка файлов без фоновых
+# потоков (io_threads=0) и с предзагрузкой абзацев и потоком записи (io_threads=N).
+# Чтобы воспроизвести сетевой диск, чтение каждого абзаца можно замедлить (--latency-ms): загрузчик
+# подменяется оберткой с задержкой (time.sleep отпускает GIL, как и реальное ожидание ввода-вывода).
+# Отчет: время запуска, время ожидания абзацев этапом NLP (этап "load" в метриках) и совпадение
+# результатов.
+# Запуск: python -m dataset_preparation.benchmarks.bench_io_pipeline [--files N] [--paragraphs N]
+#         [--latency-ms X] [--io-threads N] [--seed N]
+# Код возврата 1, если результаты вариантов различаются.
+import argparse
+import contextlib
+import filecmp
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src import data_processor, file_loaders, io_pipeline
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+
+def install_latency(latency_seconds: float) -> None:
+    """Подменяет загрузчик абзацев в модулях конвейера оберткой с задержкой на каждый абзац."""
+    def slow_iter_paragraphs_from_file(file_path):
+        paragraphs = file_loaders.iter_paragraphs_from_file(file_path)
+        def generate():
+            for paragraph in paragraphs:
+                time.sleep(latency_seconds)
+                yield paragraph
+        return generate()
+    data_processor.iter_paragraphs_from_file = slow_iter_paragraphs_from_file
+    io_pipeline.iter_paragraphs_from_file = slow_iter_paragraphs_from_file
+
+def _same_outputs(first_dir: str, second_dir: str) -> bool:
+    for root, _, names in os.walk(first_dir):
+        for name in names:
+            if name.endswith('.jsonl'):
+                first = os.path.join(root, name)
+                second = os.path.join(second_dir, os.path.relpath(first, first_dir))
+                if not os.path.exists(second) or not filecmp.cmp(first, second, shallow=False):
+                    return False
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Перекрытие ввода-вывода и NLP в конвейере.")
+    parser.add_argument("--files", type=int, default=12, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=150, help="Абзацев в файле")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Задержка чтения абзаца, мс (0 - без задержки)")
+    parser.add_argument("--io-threads", type=int, default=2, help="Потоки ввода-вывода во втором варианте")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+    if args.latency_ms > 0:
+        install_latency(args.latency_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        ner_cache_path = os.path.join(tmp_dir, "ner_cache.sqlite3")
+        # Прогрев моделей и кеша NER: варианты отличаются только организацией ввода-вывода
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, os.path.join(tmp_dir, "warm_up"), incremental=False,
+                                          ner_cache_path=ner_cache_path, io_threads=0)
+        print(f"Корпус: файлов {args.files}, абзацев в файле {args.paragraphs}, задержка чтения абзаца {args.latency_ms} мс")
+
+        output_dirs = {}
+        for io_threads in (0, args.io_threads):
+            output_dir = os.path.join(tmp_dir, f"output_{io_threads}")
+            report_path = os.path.join(tmp_dir, f"metrics_{io_threads}.json")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_dataset_creation_pipeline(corpus_dir, output_dir, incremental=False, ner_cache_path=ner_cache_path,
+                                              io_threads=io_threads, collect_metrics=True,
+                                              metrics_report_path=report_path)
+            seconds = time.perf_counter() - start
+            with open(report_path, 'r', encoding='utf-8') as f:
+                stages = json.load(f)["stages"]
+            load_wait = stages.get("load", {}).get("wall_seconds", 0.0)
+            print(f"  io_threads={io_threads}: {seconds:.2f} сек, ожидание абзацев {load_wait:.2f} сек")
+            output_dirs[io_threads] = output_dir
+        same = _same_outputs(output_dirs[0], output_dirs[args.io_threads])
+        print(f"Результаты совпадают: {'да' if same else 'НЕТ'}")
+    sys.exit(0 if same else 1)
@@ -0,0 +1,68 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_ner_batching.py
+# Сравнение скорости извлечения сущностей: по одному Doc на предложение (extract_entities)
+# против пакетного прохода по предложениям абзаца (extract_entities_batch).
+# Запуск: python -m dataset_preparation.benchmarks.bench_ner_batching [число_абзацев]
+import random
+import sys
+import time
+from typing import List
+
+from dataset_preparation.src.ner_cache import configure_ner_cache
+from dataset_preparation.src.ner_extractor import extract_entities, extract_entities_batch
+
+_NAMES = ["Иван Петров", "Наташа Ростова", "Пьер Безухов", "Андрей Болконский", "князь Василий"]
+_PLACES = ["Москву", "Санкт-Петербург", "Казань", "Париж", "Лондон"]
+_SENTENCE_TEMPLATES = [
+    "{name} поехал в {place} в 1812 году.",
+    "«Где {name}?» – спросила она.",
+    "– Да, – сказал {name}.",
+    "– Нет.",
+    "Они долго говорили о том, что {name} уехал в {place}.",
+    "ООО «Газпром» и Сбербанк России заключили договор.",
+]
+
+def make_paragraphs(paragraphs_count: int, seed: int = 42) -> List[List[str]]:
+    """Детерминированно генерирует абзацы (списки предложений) для замера."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for _ in range(paragraphs_count):
+        sentences = [
+            rng.choice(_SENTENCE_TEMPLATES).format(name=rng.choice(_NAMES), place=rng.choice(_PLACES))
+            for _ in range(rng.randint(1, 8))
+        ]
+        paragraphs.append(sentences)
+    return paragraphs
+
+def run_benchmark(paragraphs_count: int = 300) -> dict:
+    # Кеш NER отключается, чтобы сравнивать сами проходы теггера
+    configure_ner_cache(enabled=False)
+    paragraphs = make_paragraphs(paragraphs_count)
+    sentences_count = sum(len(p) for p in paragraphs)
+
+    # Прогрев, чтобы не учитывать первые обращения к моделям
+    extract_entities_batch(paragraphs[0])
+
+    start = time.perf_counter()
+    per_sentence = [[extract_entities(sent) for sent in sentences] for sentences in paragraphs]
+    per_sentence_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = [extract_entities_batch(sentences) for sentences in paragraphs]
+    batched_seconds = time.perf_counter() - start
+
+    return {
+        "paragraphs": paragraphs_count,
+        "sentences": sentences_count,
+        "per_sentence_sent_per_sec": sentences_count / per_sentence_seconds,
+        "batched_sent_per_sec": sentences_count / batched_seconds,
+        "speedup": per_sentence_seconds / batched_seconds,
+        "identical_output": per_sentence == batched,
+    }
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    result = run_benchmark(count)
+    print(f"Абзацев: {result['paragraphs']}, предложений: {result['sentences']}")
+    print(f"  extract_entities (по предложению): {result['per_sentence_sent_per_sec']:.1f} предл./сек")
+    print(f"  extract_entities_batch (по абзацу): {result['batched_sent_per_sec']:.1f} предл./сек")
+    print(f"  Ускорение: x{result['speedup']:.2f}. Результаты совпадают: {result['identical_output']}")
@@ -0,0 +1,129 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_nlp_service.py
+# Нагрузочный тест сервиса анализа текста (nlp_service): сервис запускается отдельным процессом
+# на Unix-сокете, N потоков-клиентов одновременно отправляют запросы по одному предложению
+# (операция entities или analyze). Сравниваются обработка по одному запросу (окно 0, пакет 1)
+# и микропакеты: пропускная способность, задержки p50/p95/p99, средний размер пакета.
+# Отдельно - память: сервис держит модели один раз, процессу клиента они не нужны.
+# Результаты сервиса сверяются с локальными extract_entities / extract_dialogue_info.
+# Запуск: python -m dataset_preparation.benchmarks.bench_nlp_service [--clients N] [--requests N]
+#         [--operation entities|analyze] [--batch-window-ms X] [--max-batch-size N]
+# Код возврата 1, если результаты сервиса отличаются от локальных функций.
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.benchmarks.bench_ner_batching import make_paragraphs
+    from dataset_preparation.src.nlp_client import NLPServiceClient
+
+def rss_megabytes(pid: int) -> float:
+    """Резидентная память процесса по /proc (Linux); 0, если недоступно."""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def start_service(socket_path: str, batch_window_ms: float, max_batch_size: int) -> subprocess.Popen:
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, environment.get("PYTHONPATH")]))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "dataset_preparation.src.nlp_service", "--unix-socket", socket_path,
+         "--batch-window-ms", str(batch_window_ms), "--max-batch-size", str(max_batch_size), "--no-ner-cache"],
+        env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = NLPServiceClient(f"unix:{socket_path}")
+    deadline = time.monotonic() + 300
+    while True:
+        try:
+            client.health()
+            return process
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("Сервис не запустился")
+            time.sleep(0.1)
+
+def run_load(address: str, operation: str, sentences: List[str], clients: int, requests_per_client: int) -> Dict:
+    client = NLPServiceClient(address)
+    latencies: List[float] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients)
+
+    def worker(worker_index: int):
+        own_latencies = []
+        call = client.extract_entities if operation == "entities" else client.analyze_paragraph
+        start_barrier.wait()
+        for request_index in range(requests_per_client):
+            sentence = sentences[(worker_index * requests_per_client + request_index) % len(sentences)]
+            started = time.perf_counter()
+            call(sentence)
+            own_latencies.append(time.perf_counter() - started)
+        client.close()
+        with lock:
+            latencies.extend(own_latencies)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    percentile = lambda share: latencies[min(len(latencies) - 1, int(share * len(latencies)))] * 1000
+    stats = client.health()["stats"]
+    return {"elapsed": elapsed, "throughput": len(latencies) / elapsed, "p50": percentile(0.5),
+            "p95": percentile(0.95), "p99": percentile(0.99),
+            "mean_batch": stats["texts"] / max(1, stats["batches"])}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервиса анализа текста.")
+    parser.add_argument("--clients", type=int, default=16, help="Одновременных клиентов")
+    parser.add_argument("--requests", type=int, default=40, help="Запросов на клиента")
+    parser.add_argument("--operation", choices=("entities", "analyze"), default="entities", help="Операция")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="Окно микропакета, мс")
+    parser.add_argument("--max-batch-size", type=int, default=256, help="Текстов в пакете")
+    args = parser.parse_args()
+
+    sentences = [sentence for paragraph in make_paragraphs(200) for sentence in paragraph]
+    configurations = [("по одному запросу", 0.0, 1),
+                      (f"микропакеты ({args.batch_window_ms:g} мс)", args.batch_window_ms, args.max_batch_size)]
+    print(f"Клиентов: {args.clients}, запросов на клиента: {args.requests}, операция: {args.operation}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "nlp.sock")
+        for name, batch_window_ms, max_batch_size in configurations:
+            service = start_service(socket_path, batch_window_ms, max_batch_size)
+            try:
+                result = run_load(f"unix:{socket_path}", args.operation, sentences, args.clients, args.requests)
+                service_rss = rss_megabytes(service.pid)
+                if max_batch_size > 1: # Сверка с локальными функциями на том же запущенном сервисе
+                    check_client = NLPServiceClient(f"unix:{socket_path}")
+                    sample = sentences[:100]
+                    service_entities = check_client.extract_entities_batch(sample)
+                    service_dialogue = [check_client.extract_dialogue_info(sentence) for sentence in sample]
+            finally:
+                service.terminate()
+                service.wait()
+            print(f"  {name:>24}: {result['throughput']:7.1f} запр/с, задержка p50 {result['p50']:.1f} мс, "
+                  f"p95 {result['p95']:.1f} мс, p99 {result['p99']:.1f} мс, средний пакет {result['mean_batch']:.1f}")
+        print(f"Память: процесс сервиса {service_rss:.0f} МБ, процесс клиентов {rss_megabytes(os.getpid()):.0f} МБ "
+              f"(модели не загружены)")
+
+    with contextlib.redirect_stdout(sys.stderr):
+        from dataset_preparation.src.dialogue_identifier import extract_dialogue_info
+        from dataset_preparation.src.ner_cache import configure_ner_cache
+        from dataset_preparation.src.ner_extractor import extract_entities
+        configure_ner_cache(enabled=False)
+        same = (service_entities == [extract_entities(sentence) for sentence in sample]
+                and service_dialogue == [extract_dialogue_info(sentence) for sentence in sample])
+    print(f"Результаты совпадают с extract_entities / extract_dialogue_info: {'да' if same else 'НЕТ'}")
+    sys.exit(0 if same else 1)
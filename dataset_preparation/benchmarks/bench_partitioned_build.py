@@ -0,0 +1,106 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_partitioned_build.py
+# Локальная проверка распределенной сборки (partitioning): корпус собирается на одной "машине"
+# и по разделам - каждый раздел в отдельном процессе (как на отдельных узлах), затем разделы
+# объединяются merge_partitions. Сравниваются время и результат: объединенные выходные файлы
+# должны совпадать со сборкой на одной машине байт в байт. Дополнительно проверяется, что
+# объединение без одного из разделов отклоняется.
+# Запуск: python -m dataset_preparation.benchmarks.bench_partitioned_build [--files N] [--paragraphs N]
+#         [--partitions N] [--layout mirror|shards] [--seed N]
+# Код возврата 1, если результаты различаются или проверка не сработала.
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.partitioning import merge_partitions, verify_partitions
+    from dataset_preparation.src.sharding import iter_shard_records
+    from dataset_preparation.src.serialization import set_json_backend
+
+# Код процесса раздела: тот же вызов конвейера, что и на отдельном узле
+_PARTITION_SCRIPT = """
+import sys
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+run_dataset_creation_pipeline(sys.argv[1], sys.argv[2], use_ner_cache=False, output_layout=sys.argv[5],
+                              partition_index=int(sys.argv[3]), partition_count=int(sys.argv[4]))
+"""
+
+def run_partitions(corpus_dir: str, partition_dirs: list, layout: str) -> None:
+    """Запускает все разделы одновременно отдельными процессами и дожидается их."""
+    environment = dict(os.environ, DREAM_TEAM_JSON_BACKEND="json")
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, environment.get("PYTHONPATH")]))
+    processes = [
+        subprocess.Popen([sys.executable, "-c", _PARTITION_SCRIPT, corpus_dir, partition_dir, str(index),
+                          str(len(partition_dirs)), layout],
+                         env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for index, partition_dir in enumerate(partition_dirs)
+    ]
+    for process in processes:
+        if process.wait() != 0:
+            raise RuntimeError(f"Процесс раздела завершился с кодом {process.returncode}")
+
+def same_outputs(first_dir: str, second_dir: str, layout: str) -> bool:
+    if layout == "shards":
+        key = lambda record: (record["category"], record["source_file"], record["paragraph_index"])
+        return sorted(iter_shard_records(first_dir), key=key) == sorted(iter_shard_records(second_dir), key=key)
+    for root, _, names in os.walk(first_dir):
+        for name in names:
+            if name.endswith(('.jsonl', '.idx')):
+                first = os.path.join(root, name)
+                second = os.path.join(second_dir, os.path.relpath(first, first_dir))
+                if not os.path.exists(second) or not filecmp.cmp(first, second, shallow=False):
+                    return False
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Распределенная сборка по разделам и объединение.")
+    parser.add_argument("--files", type=int, default=16, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=60, help="Абзацев в файле")
+    parser.add_argument("--partitions", type=int, default=4, help="Число разделов (процессов)")
+    parser.add_argument("--layout", choices=("mirror", "shards"), default="mirror", help="Раскладка вывода")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+    set_json_backend("json")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+
+        single_dir = os.path.join(tmp_dir, "single")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, single_dir, use_ner_cache=False, output_layout=args.layout)
+        single_seconds = time.perf_counter() - start
+
+        partition_dirs = [os.path.join(tmp_dir, f"partition_{index}") for index in range(args.partitions)]
+        start = time.perf_counter()
+        run_partitions(corpus_dir, partition_dirs, args.layout)
+        partitions_seconds = time.perf_counter() - start
+        merged_dir = os.path.join(tmp_dir, "merged")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = merge_partitions(partition_dirs, merged_dir)
+        merge_seconds = time.perf_counter() - start
+
+        sizes = [len(partition["info"]["assigned"]) for partition in report["partitions"]]
+        print(f"Корпус: файлов {args.files}, абзацев в файле {args.paragraphs}, раскладка {args.layout}")
+        print(f"  одна машина: {single_seconds:.2f} сек")
+        print(f"  разделов {args.partitions} (файлов в разделах: {sizes}): {partitions_seconds:.2f} сек "
+              f"(включая запуск процессов и загрузку моделей), объединение {merge_seconds:.2f} сек")
+        same = report["ok"] and same_outputs(single_dir, merged_dir, args.layout)
+        print(f"Объединение прошло проверку: {'да' if report['ok'] else 'НЕТ: ' + '; '.join(report['errors'])}")
+        print(f"Результат совпадает со сборкой на одной машине: {'да' if same else 'НЕТ'}")
+
+        incomplete = verify_partitions(partition_dirs[1:])
+        print(f"Объединение без раздела 0 отклонено: {'да' if not incomplete['ok'] else 'НЕТ'} "
+              f"({'; '.join(incomplete['errors'])})")
+    sys.exit(0 if same and not incomplete["ok"] else 1)
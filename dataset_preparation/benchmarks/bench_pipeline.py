@@ -0,0 +1,178 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_pipeline.py
+# Сквозной замер производительности подготовки датасета на синтетическом корпусе.
+# Замеряются отдельные этапы (file_loaders, sentence_splitter, ner_extractor, dialogue_identifier,
+# сериализация JSON) и весь run_dataset_creation_pipeline. Результат - JSON для отслеживания регрессий
+# между версиями.
+# Запуск: python -m dataset_preparation.benchmarks.bench_pipeline [--files N] [--paragraphs N]
+#         [--workers N] [--seed N] [--output results.json] [--corpus-dir папка]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.data_processor import warm_up_pipeline_components
+    from dataset_preparation.src.dialogue_identifier import extract_dialogue_info_batch
+    from dataset_preparation.src.file_loaders import load_paragraphs_from_docx, load_paragraphs_from_txt
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.manifest import PIPELINE_VERSION
+    from dataset_preparation.src.ner_cache import configure_ner_cache
+    from dataset_preparation.src.ner_extractor import extract_entities_batch
+    from dataset_preparation.src.sentence_splitter import split_text_into_sentences
+
+@contextlib.contextmanager
+def _stdout_to_stderr():
+    """
+    Перенаправляет stdout в stderr на уровне файлового дескриптора, чтобы туда же попадал вывод
+    процессов-обработчиков, а stdout содержал только JSON с результатами.
+    """
+    sys.stdout.flush()
+    saved_stdout_fd = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved_stdout_fd, 1)
+        os.close(saved_stdout_fd)
+
+def _timed(function: Callable[[], object]) -> Dict[str, float]:
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    function()
+    return {"wall_seconds": time.perf_counter() - wall_start, "cpu_seconds": time.process_time() - cpu_start}
+
+def _stage_result(timing: Dict[str, float], items: int, unit: str) -> Dict[str, object]:
+    wall = timing["wall_seconds"]
+    return dict(timing, items=items, unit=unit, items_per_second=(items / wall if wall > 0 else None))
+
+def _list_input_files(corpus_dir: str) -> List[str]:
+    paths = []
+    for root, _, filenames in os.walk(corpus_dir):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(('.txt', '.docx')):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+def benchmark_stages(corpus_dir: str) -> Dict[str, Dict[str, object]]:
+    """Замеряет этапы по отдельности; каждый этап получает готовый результат предыдущего."""
+    stages: Dict[str, Dict[str, object]] = {}
+    input_files = _list_input_files(corpus_dir)
+
+    stages["warm_up"] = _stage_result(_timed(warm_up_pipeline_components), 1, "process")
+
+    paragraphs: List[str] = []
+    txt_files = [p for p in input_files if p.lower().endswith('.txt')]
+    docx_files = [p for p in input_files if p.lower().endswith('.docx')]
+    txt_paragraphs: List[str] = []
+    docx_paragraphs: List[str] = []
+    stages["file_loaders.txt"] = _stage_result(
+        _timed(lambda: [txt_paragraphs.extend(load_paragraphs_from_txt(p)) for p in txt_files]), len(txt_files), "files")
+    stages["file_loaders.docx"] = _stage_result(
+        _timed(lambda: [docx_paragraphs.extend(load_paragraphs_from_docx(p)) for p in docx_files]), len(docx_files), "files")
+    paragraphs = txt_paragraphs + docx_paragraphs
+
+    sentences_per_paragraph: List[List[str]] = []
+    stages["sentence_splitter"] = _stage_result(
+        _timed(lambda: sentences_per_paragraph.extend(split_text_into_sentences(p) for p in paragraphs)),
+        len(paragraphs), "paragraphs")
+    sentences_count = sum(len(s) for s in sentences_per_paragraph)
+
+    entities_per_paragraph: List[List[List[Dict]]] = []
+    stages["ner_extractor"] = _stage_result(
+        _timed(lambda: entities_per_paragraph.extend(extract_entities_batch(s) for s in sentences_per_paragraph)),
+        sentences_count, "sentences")
+
+    dialogue_per_paragraph: List[List[Dict]] = []
+    stages["dialogue_identifier"] = _stage_result(
+        _timed(lambda: dialogue_per_paragraph.extend(extract_dialogue_info_batch(s) for s in sentences_per_paragraph)),
+        sentences_count, "sentences")
+
+    records = [
+        {
+            "id": f"bench_paragraph_{para_idx}",
+            "source_file": "bench.txt",
+            "category": "",
+            "paragraph_index": para_idx,
+            "paragraph_text": para_text,
+            "sentences": [
+                {"sentence_index_in_paragraph": sent_idx, "text": sent_text, "entities": entities, "dialogue_info": dialogue}
+                for sent_idx, (sent_text, entities, dialogue) in enumerate(zip(sentences, entities_list, dialogue_list))
+            ],
+        }
+        for para_idx, (para_text, sentences, entities_list, dialogue_list) in enumerate(
+            zip(paragraphs, sentences_per_paragraph, entities_per_paragraph, dialogue_per_paragraph))
+    ]
+    serialized_bytes = [0]
+
+    def serialize():
+        serialized_bytes[0] = sum(len((json.dumps(r, ensure_ascii=False) + '\n').encode('utf-8')) for r in records)
+
+    stages["json_serialization"] = _stage_result(_timed(serialize), len(records), "records")
+    stages["json_serialization"]["bytes"] = serialized_bytes[0]
+    return stages
+
+def benchmark_full_pipeline(corpus_dir: str, workers: int) -> Dict[str, object]:
+    """Замеряет весь run_dataset_creation_pipeline (без инкрементальности и кеша NER)."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Построчный вывод конвейера не должен попадать в JSON-результат
+        with contextlib.redirect_stdout(io.StringIO()):
+            timing = _timed(lambda: run_dataset_creation_pipeline(
+                corpus_dir, output_dir, recursive_search=True, workers=workers,
+                incremental=False, use_ner_cache=False))
+        output_files = [os.path.join(root, f) for root, _, files in os.walk(output_dir) for f in files if f.endswith('.jsonl')]
+        records = 0
+        for path in output_files:
+            with open(path, encoding='utf-8') as f:
+                records += sum(1 for _ in f)
+    input_files = len(_list_input_files(corpus_dir))
+    result = _stage_result(timing, input_files, "files")
+    result.update({"workers": workers, "records": records, "output_files": len(output_files)})
+    return result
+
+def run_suite(files: int, paragraphs: int, workers: int, seed: int, corpus_dir: str = None) -> Dict[str, object]:
+    # Замеряется сам конвейер: кеш NER отключен, чтобы повторяющиеся предложения не искажали результат
+    configure_ner_cache(enabled=False)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = corpus_dir or os.path.join(tmp_dir, "corpus")
+        corpus_summary = generate_corpus(corpus_dir, files, paragraphs, seed=seed)
+        stages = benchmark_stages(corpus_dir)
+        pipeline = benchmark_full_pipeline(corpus_dir, workers)
+    return {
+        "benchmark": "dataset_preparation.pipeline",
+        "pipeline_version": PIPELINE_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {"files": files, "paragraphs_per_file": paragraphs, "workers": workers, "seed": seed},
+        "corpus": corpus_summary,
+        "stages": stages,
+        "pipeline": pipeline,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сквозной замер производительности подготовки датасета.")
+    parser.add_argument("--files", type=int, default=12, help="Число файлов в синтетическом корпусе")
+    parser.add_argument("--paragraphs", type=int, default=150, help="Абзацев в каждом файле")
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов для полного конвейера")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    parser.add_argument("--output", help="Куда сохранить JSON с результатами (по умолчанию - только stdout)")
+    parser.add_argument("--corpus-dir", help="Сгенерировать корпус в указанную папку и не удалять его")
+    args = parser.parse_args()
+
+    with _stdout_to_stderr(): # Служебные сообщения модулей и процессов-обработчиков - в stderr
+        results = run_suite(args.files, args.paragraphs, args.workers, args.seed, args.corpus_dir)
+    results_json = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(results_json + '\n')
+    print(results_json)
@@ -0,0 +1,50 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_progress_events.py
+# Стоимость событий хода обработки и управления запуском (progress): корпус из множества мелких
+# файлов обрабатывается только разбиением на предложения (так накладные расходы на файл заметнее)
+# с печатью строк о каждом файле (verbose) и без нее, но с подпиской на события и RunControl.
+# Вывод направляется в os.devnull: на реальном терминале строки о файлах обходятся дороже.
+# Запуск: python -m dataset_preparation.benchmarks.bench_progress_events [--files N] [--paragraphs N]
+#         [--stages S] [--seed N]
+import argparse
+import collections
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.data_processor import warm_up_pipeline_components
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.progress import RunControl
+
+def timed_run(corpus_dir: str, output_dir: str, stages: str, **options) -> float:
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        run_dataset_creation_pipeline(corpus_dir, output_dir, use_ner_cache=False, stages=stages, **options)
+        return time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Стоимость событий хода обработки.")
+    parser.add_argument("--files", type=int, default=400, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=5, help="Абзацев в файле")
+    parser.add_argument("--stages", default="split", help="Этапы обработки")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        with contextlib.redirect_stdout(sys.stderr):
+            warm_up_pipeline_components(args.stages.split(','))
+        verbose_seconds = timed_run(corpus_dir, os.path.join(tmp_dir, "verbose"), args.stages)
+        counts = collections.Counter()
+        events_seconds = timed_run(corpus_dir, os.path.join(tmp_dir, "events"), args.stages, verbose=False,
+                                   on_event=lambda event: counts.update([event["type"]]), control=RunControl())
+
+        print(f"Корпус: файлов {args.files}, абзацев в файле {args.paragraphs}, этапы: {args.stages}")
+        print(f"  строки о каждом файле (verbose):       {verbose_seconds:.2f} сек")
+        print(f"  события и RunControl без строк о файлах: {events_seconds:.2f} сек")
+        print(f"События: {dict(counts)}")
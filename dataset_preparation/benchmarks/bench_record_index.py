@@ -0,0 +1,92 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_record_index.py
+# Замер произвольного доступа к готовому датасету: получение записи по id и случайные выборки
+# через индекс смещений (record_index) в сравнении с последовательным чтением файлов.
+# Датасет получается прогоном конвейера по синтетическому корпусу. Дополнительно проверяется,
+# что записи, прочитанные по индексу, совпадают с прочитанными последовательно.
+# Запуск: python -m dataset_preparation.benchmarks.bench_record_index [--files N] [--paragraphs N]
+#         [--lookups N] [--seed N]
+# Код возврата 1, если записи по индексу расходятся с прочитанными последовательно.
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.record_index import INDEX_EXTENSION, DatasetIndex
+    from dataset_preparation.src.serialization import iter_records
+
+def _data_files(output_dir: str) -> List[str]:
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(output_dir) for name in names if name.endswith('.jsonl')
+    )
+
+def scan_for_id(output_dir: str, record_id: str) -> Optional[Dict]:
+    """Поиск записи без индекса: последовательное чтение файлов до нахождения id."""
+    for path in _data_files(output_dir):
+        for record in iter_records(path):
+            if record["id"] == record_id:
+                return record
+    return None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Произвольный доступ к датасету через индекс смещений.")
+    parser.add_argument("--files", type=int, default=10, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=500, help="Абзацев в файле")
+    parser.add_argument("--lookups", type=int, default=20, help="Число поисков по id без индекса")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса и выборок")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        output_dir = os.path.join(tmp_dir, "output")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, output_dir, incremental=False, use_ner_cache=False)
+
+        data_files = _data_files(output_dir)
+        data_bytes = sum(os.path.getsize(path) for path in data_files)
+        index_bytes = sum(os.path.getsize(path + INDEX_EXTENSION) for path in data_files)
+        start = time.perf_counter()
+        all_records = {record["id"]: record for path in data_files for record in iter_records(path)}
+        full_scan_seconds = time.perf_counter() - start
+        print(f"Записей: {len(all_records)}, данные {data_bytes / 2**20:.1f} МБ, индексы {index_bytes / 2**10:.0f} КБ "
+              f"({index_bytes / data_bytes:.1%}), полное чтение {full_scan_seconds:.2f} сек")
+
+        ids = list(all_records)
+        sampled_ids = [rng.choice(ids) for _ in range(args.lookups)]
+        start = time.perf_counter()
+        for record_id in sampled_ids:
+            scan_for_id(output_dir, record_id)
+        scan_seconds = (time.perf_counter() - start) / len(sampled_ids)
+
+        start = time.perf_counter()
+        dataset_index = DatasetIndex(output_dir)
+        open_seconds = time.perf_counter() - start
+        lookup_ids = [rng.choice(ids) for _ in range(10_000)]
+        start = time.perf_counter()
+        for record_id in lookup_ids:
+            dataset_index.get(record_id)
+        index_seconds = (time.perf_counter() - start) / len(lookup_ids)
+        print(f"Запись по id: без индекса {scan_seconds * 1000:.1f} мс, по индексу {index_seconds * 1e6:.1f} мкс "
+              f"(x{scan_seconds / index_seconds:.0f}); открытие индекса {open_seconds * 1000:.1f} мс")
+
+        start = time.perf_counter()
+        batches = [dataset_index.sample(256, rng=rng) for _ in range(40)]
+        sample_seconds = time.perf_counter() - start
+        print(f"Случайные выборки по 256 записей: {sample_seconds / len(batches) * 1000:.1f} мс на выборку")
+
+        mismatches = sum(dataset_index.get(record_id) != record for record_id, record in all_records.items())
+        mismatches += sum(record != all_records[record["id"]] for batch in batches for record in batch)
+        dataset_index.close()
+        print(f"Расхождений с последовательным чтением: {mismatches}")
+    sys.exit(1 if mismatches else 0)
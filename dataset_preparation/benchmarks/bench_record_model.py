@@ -0,0 +1,86 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_record_model.py
+# Замер памяти загруженного корпуса: записи в виде вложенных словарей (как их возвращает
+# serialization.iter_records) против компактной модели records.Paragraph.
+# Синтетический корпус обрабатывается конвейером, строки JSONL результата разбираются заново
+# до набора --sentences предложений (каждая копия - отдельные объекты, как при загрузке большого
+# корпуса). Память считается через tracemalloc и пересчитывается на миллион предложений.
+# Проверяется также, что to_dict() дает те же строки JSONL.
+# Запуск: python -m dataset_preparation.benchmarks.bench_record_model [--files N] [--paragraphs N]
+#         [--sentences N] [--seed N]
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.records import Paragraph
+    from dataset_preparation.src.serialization import dumps_json_line, loads_json_line, set_json_backend
+
+def read_lines(output_dir: str) -> list:
+    lines = []
+    for root, _, names in sorted(os.walk(output_dir)):
+        for name in sorted(names):
+            if name.endswith('.jsonl'):
+                with open(os.path.join(root, name), 'rb') as f:
+                    lines.extend(line for line in f if line.strip())
+    return lines
+
+def measure(lines: list, repeats: int, convert) -> tuple:
+    """Загружает lines repeats раз через convert; возвращает (байт памяти, секунд)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    loaded = [convert(loads_json_line(line)) for _ in range(repeats) for line in lines]
+    seconds = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+    return used, seconds
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Память записей: словари против модели с __slots__.")
+    parser.add_argument("--files", type=int, default=6, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=100, help="Абзацев в файле")
+    parser.add_argument("--sentences", type=int, default=200000, help="Сколько предложений загружать")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+    # Стандартный json: строки сравниваются с записанными тем же модулем
+    set_json_backend("json")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        output_dir = os.path.join(tmp_dir, "output")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, output_dir, incremental=False, use_ner_cache=False)
+        lines = read_lines(output_dir)
+
+    records = [loads_json_line(line) for line in lines]
+    round_trip_ok = all(dumps_json_line(Paragraph.from_dict(record).to_dict()) == line
+                        for record, line in zip(records, lines))
+    sentences_per_pass = sum(len(record["sentences"]) for record in records)
+    entities_per_pass = sum(len(s["entities"]) for record in records for s in record["sentences"])
+    repeats = max(1, args.sentences // max(1, sentences_per_pass))
+    sentences = sentences_per_pass * repeats
+    disk_bytes = sum(len(line) for line in lines) * repeats
+    del records
+
+    print(f"Загружено: абзацев {len(lines) * repeats}, предложений {sentences}, сущностей {entities_per_pass * repeats}, "
+          f"JSONL на диске {disk_bytes / 2**20:.1f} МБ")
+    results = {}
+    for name, convert in (("словари", lambda record: record), ("Paragraph", Paragraph.from_dict)):
+        used, seconds = measure(lines, repeats, convert)
+        results[name] = used
+        print(f"  {name:>9}: {used / 2**20:.1f} МБ ({used / disk_bytes:.2f} от размера на диске), "
+              f"{used / sentences * 1e6 / 2**30:.2f} ГБ на млн предложений, загрузка {seconds:.2f} сек")
+    print(f"Экономия памяти: x{results['словари'] / results['Paragraph']:.2f}")
+    print(f"to_dict() воспроизводит строки JSONL: {'да' if round_trip_ok else 'НЕТ'}")
+    sys.exit(0 if round_trip_ok else 1)
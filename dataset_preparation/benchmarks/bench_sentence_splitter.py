@@ -0,0 +1,130 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_sentence_splitter.py
+# Сравнение движков разбиения на предложения: punkt (NLTK) и razdel с общей токенизацией для NER.
+# Отчет: согласие границ предложений razdel с punkt (точность/полнота/F1 по границам внутри абзацев
+# и доля абзацев, разбитых одинаково) и ускорение этапов "разбиение + NER".
+# Дополнительно проверяется, что NER по токенам razdel дает тот же результат, что и NER,
+# токенизирующий предложения заново.
+# Запуск: python -m dataset_preparation.benchmarks.bench_sentence_splitter [--corpus-dir папка]
+#         [--files N] [--paragraphs N] [--seed N]
+# Код возврата 1, если результаты NER по токенам razdel расходятся с обычными.
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Set
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+from dataset_preparation.src.file_loaders import load_paragraphs_from_docx, load_paragraphs_from_txt
+from dataset_preparation.src.ner_cache import configure_ner_cache
+from dataset_preparation.src.ner_extractor import extract_entities_batch, warm_up as warm_up_ner
+from dataset_preparation.src.sentence_splitter import segment_text, split_text_into_sentences
+
+def load_corpus_paragraphs(corpus_dir: str) -> List[str]:
+    paragraphs = []
+    for root, _, filenames in sorted(os.walk(corpus_dir)):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            if filename.lower().endswith('.txt'):
+                paragraphs.extend(load_paragraphs_from_txt(path))
+            elif filename.lower().endswith('.docx'):
+                paragraphs.extend(load_paragraphs_from_docx(path))
+    return paragraphs
+
+def sentence_boundaries(paragraph: str, sentences: List[str]) -> Set[int]:
+    """Смещения концов предложений внутри абзаца (конец последнего предложения не учитывается)."""
+    boundaries = set()
+    position = 0
+    for sentence in sentences:
+        start = paragraph.find(sentence, position)
+        if start < 0: # Движок изменил текст предложения - границу не засчитываем
+            continue
+        position = start + len(sentence)
+        boundaries.add(position)
+    boundaries.discard(len(paragraph.rstrip()))
+    return boundaries
+
+def boundary_agreement(paragraphs: List[str], reference: List[List[str]], candidate: List[List[str]]) -> Dict[str, float]:
+    true_positive = reference_total = candidate_total = identical = 0
+    for paragraph, reference_sentences, candidate_sentences in zip(paragraphs, reference, candidate):
+        reference_boundaries = sentence_boundaries(paragraph, reference_sentences)
+        candidate_boundaries = sentence_boundaries(paragraph, candidate_sentences)
+        true_positive += len(reference_boundaries & candidate_boundaries)
+        reference_total += len(reference_boundaries)
+        candidate_total += len(candidate_boundaries)
+        identical += reference_sentences == candidate_sentences
+    precision = true_positive / candidate_total if candidate_total else 1.0
+    recall = true_positive / reference_total if reference_total else 1.0
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": (2 * precision * recall / (precision + recall)) if precision + recall else 0.0,
+        "identical_paragraphs": identical / len(paragraphs) if paragraphs else 1.0,
+    }
+
+def _time_punkt_path(paragraphs: List[str]) -> Dict[str, float]:
+    start = time.perf_counter()
+    sentences_per_paragraph = [split_text_into_sentences(p, engine="punkt") for p in paragraphs]
+    split_seconds = time.perf_counter() - start
+    for sentences in sentences_per_paragraph:
+        extract_entities_batch(sentences)
+    return {"split": split_seconds, "total": time.perf_counter() - start}
+
+def _time_razdel_path(paragraphs: List[str]) -> Dict[str, float]:
+    start = time.perf_counter()
+    segmented_per_paragraph = [segment_text(p, engine="razdel") for p in paragraphs]
+    split_seconds = time.perf_counter() - start
+    for segmented in segmented_per_paragraph:
+        extract_entities_batch([s.text for s in segmented], [s.tokens for s in segmented])
+    return {"split": split_seconds, "total": time.perf_counter() - start}
+
+def check_shared_tokens(paragraphs: List[str]) -> int:
+    """Число абзацев, где NER по токенам razdel расходится с NER, токенизирующим текст сам."""
+    mismatches = 0
+    for paragraph in paragraphs:
+        segmented = segment_text(paragraph, engine="razdel")
+        texts = [s.text for s in segmented]
+        mismatches += extract_entities_batch(texts, [s.tokens for s in segmented]) != extract_entities_batch(texts)
+    return mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сравнение движков разбиения на предложения (punkt и razdel).")
+    parser.add_argument("--corpus-dir", help="Папка с реальными .txt/.docx (по умолчанию - синтетический корпус)")
+    parser.add_argument("--files", type=int, default=8, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=250, help="Абзацев в файле синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+
+    # Сравниваются сами движки: кеш NER отключен
+    configure_ner_cache(enabled=False)
+    if args.corpus_dir:
+        corpus_paragraphs = load_corpus_paragraphs(args.corpus_dir)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            generate_corpus(tmp_dir, args.files, args.paragraphs, seed=args.seed)
+            corpus_paragraphs = load_corpus_paragraphs(tmp_dir)
+
+    punkt_sentences = [split_text_into_sentences(p, engine="punkt") for p in corpus_paragraphs]
+    razdel_sentences = [split_text_into_sentences(p, engine="razdel") for p in corpus_paragraphs]
+    agreement = boundary_agreement(corpus_paragraphs, punkt_sentences, razdel_sentences)
+    print(f"Абзацев: {len(corpus_paragraphs)}, предложений: punkt {sum(map(len, punkt_sentences))}, "
+          f"razdel {sum(map(len, razdel_sentences))}")
+    print(f"Согласие границ razdel с punkt: точность {agreement['precision']:.3f}, полнота {agreement['recall']:.3f}, "
+          f"F1 {agreement['f1']:.3f}, одинаково разбитых абзацев {agreement['identical_paragraphs']:.1%}")
+    shown = 0
+    for paragraph, reference, candidate in zip(corpus_paragraphs, punkt_sentences, razdel_sentences):
+        if reference != candidate and shown < 5:
+            print(f"  punkt:  {reference}\n  razdel: {candidate}")
+            shown += 1
+
+    warm_up_ner()
+    mismatches = check_shared_tokens(corpus_paragraphs)
+    print(f"NER по общим токенам razdel: абзацев с расхождениями {mismatches}")
+
+    punkt_timing = _time_punkt_path(corpus_paragraphs)
+    razdel_timing = _time_razdel_path(corpus_paragraphs)
+    print(f"Разбиение: punkt {punkt_timing['split']:.2f} сек, razdel (с токенизацией) {razdel_timing['split']:.2f} сек "
+          f"(x{punkt_timing['split'] / razdel_timing['split']:.2f})")
+    print(f"Разбиение + NER: punkt {punkt_timing['total']:.2f} сек, razdel {razdel_timing['total']:.2f} сек "
+          f"(x{punkt_timing['total'] / razdel_timing['total']:.2f})")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,92 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_serialization.py
+# Замер форматов вывода: запись и обратное чтение записей датасета в JSONL (стандартный json
+# и orjson), msgpack и Parquet (чтение в записи и чтение колоночных таблиц для обучения).
+# Записи получаются прогоном конвейера по синтетическому корпусу и размножаются до нужного числа.
+# Форматы, для которых не установлены пакеты, пропускаются.
+# Запуск: python -m dataset_preparation.benchmarks.bench_serialization [число_записей]
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+from dataset_preparation.src.serialization import (
+    check_output_format,
+    get_json_backend,
+    iter_records,
+    open_record_writer,
+    read_parquet_tables,
+    set_json_backend,
+)
+
+def make_records(count: int) -> List[Dict]:
+    """Настоящие записи конвейера (синтетический корпус), размноженные до count штук."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        output_dir = os.path.join(tmp_dir, "output")
+        generate_corpus(corpus_dir, files_count=4, paragraphs_per_file=100, docx_share=0.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, output_dir, incremental=False, use_ner_cache=False)
+        records = [
+            record
+            for root, _, names in os.walk(output_dir) for name in sorted(names) if name.endswith('.jsonl')
+            for record in iter_records(os.path.join(root, name))
+        ]
+    result = []
+    while len(result) < count:
+        for record in records[:count - len(result)]:
+            result.append(dict(record, id=f"{record['id']}_{len(result)}"))
+    return result
+
+def _path_size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+def _timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def benchmark_variant(records: List[Dict], output_format: str, path: str) -> Dict[str, float]:
+    def write():
+        writer = open_record_writer(path, output_format)
+        for record in records:
+            writer.write(writer.encode(record))
+        writer.commit()
+
+    result = {
+        "write_seconds": _timed(write),
+        "read_records_seconds": _timed(lambda: sum(1 for _ in iter_records(path, output_format))),
+        "size_bytes": _path_size(path),
+    }
+    if output_format == "parquet":
+        # Обучению обычно нужны отдельные колонки, а не вложенные словари
+        result["read_tables_seconds"] = _timed(lambda: read_parquet_tables(path))
+    return result
+
+if __name__ == '__main__':
+    records_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    records = make_records(records_count)
+    variants = [("jsonl", "json"), ("jsonl", "orjson"), ("msgpack", None), ("parquet", None)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"Записей: {len(records)}")
+        for output_format, json_backend in variants:
+            name = f"{output_format}" + (f" ({json_backend})" if json_backend else "")
+            try:
+                check_output_format(output_format)
+                if json_backend:
+                    set_json_backend(json_backend)
+                    get_json_backend() # Проверка, что библиотека установлена
+            except RuntimeError as e:
+                print(f"  {name}: пропущено ({e})")
+                continue
+            result = benchmark_variant(records, output_format, os.path.join(tmp_dir, f"{output_format}_{json_backend}"))
+            print(f"  {name}: запись {result['write_seconds']:.2f} сек, чтение записей {result['read_records_seconds']:.2f} сек"
+                  + (f", чтение таблиц {result['read_tables_seconds']:.3f} сек" if "read_tables_seconds" in result else "")
+                  + f", размер {result['size_bytes'] / 2**20:.1f} МБ")
+        set_json_backend("json")
@@ -0,0 +1,98 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_sharded_output.py
+# Сравнение раскладок вывода на корпусе из множества небольших файлов: отдельный JSONL на каждый
+# входной файл (без сжатия и .jsonl.gz) и шарды ограниченного размера со сжатием gzip и zstd.
+# Отчет: число выходных файлов, их суммарный размер, время запуска конвейера и время чтения всех
+# записей обратно. Дополнительно проверяется, что все варианты содержат одни и те же записи.
+# Результаты NER кешируются общим кешем, поэтому время запуска отражает в основном ввод-вывод.
+# Запуск: python -m dataset_preparation.benchmarks.bench_sharded_output [--files N] [--paragraphs N]
+#         [--max-shard-mb N] [--seed N]
+# Код возврата 1, если записи вариантов различаются.
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.serialization import check_output_format, iter_records
+    from dataset_preparation.src.sharding import iter_shard_records
+
+def _output_files(output_dir: str) -> List[str]:
+    """Файлы с записями (служебные файлы с префиксом '_' не учитываются)."""
+    return [
+        os.path.join(root, name)
+        for root, _, names in os.walk(output_dir) for name in names if not name.startswith('_')
+    ]
+
+def _read_all(output_dir: str, output_layout: str) -> List[str]:
+    if output_layout == "shards":
+        records = iter_shard_records(output_dir)
+    else:
+        records = (record for path in _output_files(output_dir) for record in iter_records(path))
+    return sorted(record["id"] + json.dumps(record, ensure_ascii=False, sort_keys=True) for record in records)
+
+def benchmark_variant(corpus_dir: str, output_dir: str, ner_cache_path: str, output_layout: str,
+                      compression: Optional[str], max_shard_bytes: int) -> Dict:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_dataset_creation_pipeline(corpus_dir, output_dir, incremental=False, ner_cache_path=ner_cache_path,
+                                      output_layout=output_layout, compression=compression,
+                                      max_shard_bytes=max_shard_bytes, write_record_index=False)
+    run_seconds = time.perf_counter() - start
+    files = _output_files(output_dir)
+    start = time.perf_counter()
+    records = _read_all(output_dir, output_layout)
+    return {
+        "run_seconds": run_seconds,
+        "read_seconds": time.perf_counter() - start,
+        "files": len(files),
+        "size_bytes": sum(os.path.getsize(path) for path in files),
+        "records": records,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сравнение отдельных выходных файлов и сжатых шардов.")
+    parser.add_argument("--files", type=int, default=300, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=20, help="Абзацев в файле")
+    parser.add_argument("--max-shard-mb", type=float, default=1.0, help="Размер шарда, МБ")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+    max_shard_bytes = int(args.max_shard_mb * 2**20)
+
+    variants = [("mirror", None), ("mirror", "gzip"), ("shards", "gzip"), ("shards", "zstd")]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        summary = generate_corpus(corpus_dir, args.files, args.paragraphs, docx_share=0.0, seed=args.seed)
+        print(f"Корпус: файлов {summary['files']}, абзацев {summary['paragraphs']}, {summary['bytes'] / 2**20:.1f} МБ")
+        ner_cache_path = os.path.join(tmp_dir, "ner_cache.sqlite3")
+        # Прогрев моделей и кеша NER, чтобы варианты сравнивались на равных
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, os.path.join(tmp_dir, "warm_up"), incremental=False,
+                                          ner_cache_path=ner_cache_path)
+
+        reference_records = None
+        mismatches = 0
+        for output_layout, compression in variants:
+            name = output_layout + (f" ({compression})" if compression else "")
+            try:
+                check_output_format("jsonl", compression)
+            except RuntimeError as e:
+                print(f"  {name}: пропущено ({e})")
+                continue
+            result = benchmark_variant(corpus_dir, os.path.join(tmp_dir, f"{output_layout}_{compression}"),
+                                       ner_cache_path, output_layout, compression, max_shard_bytes)
+            if reference_records is None:
+                reference_records = result["records"]
+            same = result["records"] == reference_records
+            mismatches += not same
+            print(f"  {name}: файлов {result['files']}, размер {result['size_bytes'] / 2**20:.2f} МБ, "
+                  f"запуск {result['run_seconds']:.2f} сек, чтение {result['read_seconds']:.2f} сек"
+                  + ("" if same else ", ЗАПИСИ РАЗЛИЧАЮТСЯ"))
+    sys.exit(1 if mismatches else 0)
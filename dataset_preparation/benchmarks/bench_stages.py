@@ -0,0 +1,58 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_stages.py
+# Замер стоимости наборов этапов (stages) на синтетическом корпусе: только разбиение,
+# + диалоги, набор по умолчанию (+ NER), + синтаксис, + нормализация сущностей.
+# Модели загружаются заранее (warm_up_pipeline_components), кеш NER выключен: сравнивается
+# именно обработка. Дополнительно - дополнение результата набора по умолчанию синтаксисом
+# и нормализацией против обработки с нуля: разбиение и NER при дополнении не повторяются.
+# Запуск: python -m dataset_preparation.benchmarks.bench_stages [--files N] [--paragraphs N] [--seed N]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.data_processor import warm_up_pipeline_components
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+
+CONFIGURATIONS = [
+    ("split", "split"),
+    ("split,dialogue", "split,dialogue"),
+    ("по умолчанию", None),
+    ("+ syntax", "dialogue,ner,syntax"),
+    ("+ syntax, normalize", "dialogue,ner,syntax,normalize"),
+]
+
+def timed_run(corpus_dir: str, output_dir: str, stages) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_dataset_creation_pipeline(corpus_dir, output_dir, use_ner_cache=False, stages=stages)
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Стоимость наборов этапов обработки.")
+    parser.add_argument("--files", type=int, default=8, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=100, help="Абзацев в файле")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            warm_up_pipeline_components(CONFIGURATIONS[-1][1].split(','))
+        print(f"Корпус: файлов {args.files}, абзацев в файле {args.paragraphs}")
+        timings = {}
+        for name, stages in CONFIGURATIONS:
+            timings[name] = timed_run(corpus_dir, os.path.join(tmp_dir, f"output_{len(timings)}"), stages)
+            print(f"  {name:>20}: {timings[name]:.2f} сек")
+
+        upgrade_dir = os.path.join(tmp_dir, "upgrade")
+        timed_run(corpus_dir, upgrade_dir, None)
+        upgrade = timed_run(corpus_dir, upgrade_dir, CONFIGURATIONS[-1][1])
+        print(f"Дополнение по умолчанию -> {CONFIGURATIONS[-1][0]}: {upgrade:.2f} сек "
+              f"(с нуля {timings[CONFIGURATIONS[-1][0]]:.2f} сек)")
@@ -0,0 +1,84 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_txt_streaming_memory.py
+# Замер пикового потребления памяти (RSS) при чтении большого .txt:
+# load_paragraphs_from_txt (весь файл и список абзацев в памяти) против iter_paragraphs_from_txt (потоково).
+# Запуск: python -m dataset_preparation.benchmarks.bench_txt_streaming_memory [размер_в_МБ] [путь_к_файлу]
+# Например, для файла в 2 ГБ: python -m dataset_preparation.benchmarks.bench_txt_streaming_memory 2048
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_PARAGRAPH_TEMPLATE = (
+    "Иван Петров поехал в Москву в {index} году. «Где Наташа?» – спросила она.\n"
+    "– Да, – сказал князь Василий. Они долго говорили о том, что Пьер уехал в Париж.\n"
+)
+
+def generate_synthetic_txt(file_path: str, size_mb: int) -> None:
+    """Записывает синтетический .txt заданного размера (абзацы разделены пустыми строками)."""
+    target_size = size_mb * 1024 * 1024
+    written = 0
+    index = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        while written < target_size:
+            chunk = "\n\n".join(_PARAGRAPH_TEMPLATE.format(index=index + i) for i in range(1000)) + "\n\n"
+            f.write(chunk)
+            written += len(chunk.encode('utf-8'))
+            index += 1000
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux ru_maxrss в КБ, в macOS - в байтах
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _measure_in_this_process(mode: str, file_path: str) -> None:
+    from dataset_preparation.src.file_loaders import iter_paragraphs_from_txt, load_paragraphs_from_txt
+
+    baseline_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    paragraphs_count = 0
+    if mode == "list":
+        paragraphs_count = len(load_paragraphs_from_txt(file_path))
+    else:
+        for _ in iter_paragraphs_from_txt(file_path):
+            paragraphs_count += 1
+    elapsed = time.perf_counter() - start
+    print(f"{mode}\t{paragraphs_count}\t{elapsed:.2f}\t{_peak_rss_mb() - baseline_mb:.1f}")
+
+def run_benchmark(file_path: str) -> None:
+    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    print(f"Файл: {file_path} ({file_size_mb:.0f} МБ)")
+    # Каждый вариант запускается в отдельном процессе, чтобы пики памяти не смешивались
+    for mode in ("list", "stream"):
+        output = subprocess.run(
+            [sys.executable, "-m", "dataset_preparation.benchmarks.bench_txt_streaming_memory", "--measure", mode, file_path],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        _, paragraphs_count, elapsed, peak_mb = output.split('\t')
+        loader_name = "load_paragraphs_from_txt" if mode == "list" else "iter_paragraphs_from_txt"
+        print(f"  {loader_name}: абзацев {paragraphs_count}, время {elapsed} с, прирост пикового RSS {peak_mb} МБ")
+
+if __name__ == '__main__':
+    try:
+        import resource # noqa: F401
+    except ImportError:
+        print("Замер RSS использует модуль resource и доступен только в Unix-системах.")
+        sys.exit(1)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        _measure_in_this_process(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    if len(sys.argv) > 2:
+        txt_path = sys.argv[2]
+        if not os.path.exists(txt_path):
+            generate_synthetic_txt(txt_path, size_mb)
+        run_benchmark(txt_path)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            txt_path = os.path.join(tmp_dir, "synthetic.txt")
+            print(f"Генерация синтетического файла ({size_mb} МБ)...")
+            generate_synthetic_txt(txt_path, size_mb)
+            run_benchmark(txt_path)
@@ -0,0 +1,134 @@
+# Dream-Team-core/dataset_preparation/benchmarks/bench_watch_mode.py
+# Замер задержки "файл сохранен -> результат записан" в режиме наблюдения (watcher) против
+# повторного запуска конвейера отдельным процессом (как при ручном запуске main_creator.py:
+# запуск интерпретатора, загрузка моделей, обход корпуса). В режиме наблюдения новый файл
+# пишется в два приема с паузой меньше debounce - его частичная версия не должна обрабатываться.
+# Запуск: python -m dataset_preparation.benchmarks.bench_watch_mode [--files N] [--paragraphs N]
+#         [--backend auto|inotify|polling] [--debounce X] [--rounds N] [--seed N]
+# Код возврата 1, если результат режима наблюдения отличается от обычного запуска или частично
+# записанный файл был обработан.
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+
+with contextlib.redirect_stdout(sys.stderr): # Пакет печатает служебное сообщение при импорте
+    from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+    from dataset_preparation.src.manifest import get_manifest_path
+    from dataset_preparation.src.serialization import set_json_backend
+    from dataset_preparation.src.watcher import watch_input_dir
+
+_RUN_SCRIPT = """
+import sys
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+run_dataset_creation_pipeline(sys.argv[1], sys.argv[2])
+"""
+
+_NEW_FILE_TEXT = ("Новая глава номер {round}.\n\n"
+                  "— Кто здесь? — спросил Иван Петрович, открывая дверь в Москве.\n\n"
+                  "Мария Ивановна ответила не сразу. Ветер гнал по улице сухие листья.\n")
+
+def wait_for(path: str, timeout: float = 120.0) -> float:
+    start = time.perf_counter()
+    while not os.path.exists(path):
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Результат не появился: {path}")
+        time.sleep(0.01)
+    return time.perf_counter()
+
+def write_in_two_parts(path: str, text: str, pause: float) -> float:
+    """Пишет файл в два приема (как медленное сохранение); возвращает момент окончания записи."""
+    middle = len(text) // 2
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text[:middle])
+        f.flush()
+        time.sleep(pause)
+        f.write(text[middle:])
+    return time.perf_counter()
+
+def rerun_latency(corpus_dir: str, output_dir: str, round_index: int) -> float:
+    environment = dict(os.environ, DREAM_TEAM_JSON_BACKEND="json")
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, environment.get("PYTHONPATH")]))
+    with open(os.path.join(corpus_dir, f"rerun_{round_index}.txt"), 'w', encoding='utf-8') as f:
+        f.write(_NEW_FILE_TEXT.format(round=round_index))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", _RUN_SCRIPT, corpus_dir, output_dir], env=environment,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def same_outputs(first_dir: str, second_dir: str) -> bool:
+    for root, _, names in os.walk(first_dir):
+        for name in names:
+            if name.endswith('.jsonl'):
+                first = os.path.join(root, name)
+                second = os.path.join(second_dir, os.path.relpath(first, first_dir))
+                if not os.path.exists(second) or not filecmp.cmp(first, second, shallow=False):
+                    return False
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Задержка обработки новых файлов в режиме наблюдения.")
+    parser.add_argument("--files", type=int, default=20, help="Число файлов синтетического корпуса")
+    parser.add_argument("--paragraphs", type=int, default=40, help="Абзацев в файле")
+    parser.add_argument("--backend", choices=("auto", "inotify", "polling"), default="auto", help="Способ наблюдения")
+    parser.add_argument("--debounce", type=float, default=0.5, help="Пауза без изменений перед обработкой, сек")
+    parser.add_argument("--rounds", type=int, default=3, help="Число новых файлов")
+    parser.add_argument("--seed", type=int, default=2024, help="Зерно генератора корпуса")
+    args = parser.parse_args()
+    set_json_backend("json")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.join(tmp_dir, "corpus")
+        generate_corpus(corpus_dir, args.files, args.paragraphs, seed=args.seed)
+        rerun_dir = os.path.join(tmp_dir, "rerun")
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, rerun_dir)
+        rerun_latencies = [rerun_latency(corpus_dir, rerun_dir, index) for index in range(args.rounds)]
+
+        watch_dir = os.path.join(tmp_dir, "watch")
+        stop = threading.Event()
+        watch_log = io.StringIO()
+        with contextlib.redirect_stdout(watch_log):
+            watcher_thread = threading.Thread(
+                target=watch_input_dir, args=(corpus_dir, watch_dir),
+                kwargs={"backend": args.backend, "debounce_seconds": args.debounce,
+                        "poll_interval": min(0.25, args.debounce), "stop_event": stop})
+            watcher_thread.start()
+            wait_for(get_manifest_path(watch_dir), timeout=600)
+            watch_latencies = []
+            partial_processed = False
+            for index in range(args.rounds):
+                output_path = os.path.join(watch_dir, f"watch_{index}.jsonl")
+                saved = write_in_two_parts(os.path.join(corpus_dir, f"watch_{index}.txt"),
+                                           _NEW_FILE_TEXT.format(round=index), args.debounce / 2)
+                watch_latencies.append(wait_for(output_path) - saved)
+                # Выходной файл появляется целиком (запись во временный файл): в нем должен быть конец текста
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    partial_processed = partial_processed or "Мария Ивановна" not in f.read()
+            time.sleep(args.debounce * 3) # Последний цикл дописывает манифест
+            stop.set()
+            watcher_thread.join()
+
+        backend = "inotify" if "(inotify)" in watch_log.getvalue() else "polling"
+        print(f"Корпус: файлов {args.files}, абзацев в файле {args.paragraphs}; новых файлов {args.rounds}")
+        print(f"  повторный запуск процесса: в среднем {sum(rerun_latencies) / len(rerun_latencies):.2f} сек "
+              f"(макс {max(rerun_latencies):.2f})")
+        print(f"  режим наблюдения ({backend}, debounce {args.debounce} сек): в среднем "
+              f"{sum(watch_latencies) / len(watch_latencies):.2f} сек (макс {max(watch_latencies):.2f})")
+        print(f"Частично записанный файл обработан до окончания записи: {'ДА' if partial_processed else 'нет'}")
+        # Обычный запуск по тому же корпусу должен дать те же файлы, что и режим наблюдения
+        check_dir = os.path.join(tmp_dir, "check")
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_dataset_creation_pipeline(corpus_dir, check_dir)
+        same = same_outputs(check_dir, watch_dir) and same_outputs(watch_dir, check_dir)
+        print(f"Результат совпадает с обычным запуском: {'да' if same else 'НЕТ'}")
+    sys.exit(0 if same and not partial_processed else 1)
@@ -0,0 +1,143 @@
+# Dream-Team-core/dataset_preparation/benchmarks/corpus_generator.py
+# Детерминированный генератор синтетического русскоязычного корпуса для замеров производительности.
+# Корпус смешивает повествование, диалоги во всех форматах, которые распознает dialogue_identifier,
+# именованные сущности (PER/LOC/ORG) и раскладывается по подпапкам в виде файлов .txt и .docx.
+# Запуск: python -m dataset_preparation.benchmarks.corpus_generator <папка> [число_файлов] [абзацев_в_файле]
+import os
+import random
+import sys
+from typing import Dict, List
+
+_PERSONS = [
+    "Иван Петров", "Наташа Ростова", "Пьер Безухов", "Андрей Болконский", "Марья Дмитриевна",
+    "князь Василий", "Анна Павловна", "Николай Ростов", "Соня", "Долохов",
+]
+_SPEAKERS = ["Иван", "Наташа", "Пьер", "Андрей", "Соня", "Николай"]
+_PLACES = ["Москву", "Санкт-Петербург", "Казань", "Париж", "Лондон", "Смоленск", "Бородино"]
+_ORGANIZATIONS = ["Сбербанк России", "ООО «Газпром»", "Московский университет", "Генеральный штаб"]
+_VERBS = ["сказал", "спросил", "ответил", "воскликнул", "прошептал"]
+
+_PROSE_TEMPLATES = [
+    "{person} поехал в {place} в {year} году.",
+    "Они долго говорили о том, что {person} уехал в {place} и не вернулся.",
+    "Наступила осень, и в доме стало тихо.",
+    "Утром шел дождь, а к вечеру небо над городом {place_short} прояснилось.",
+    "{organization} заключил договор с представителями из города {place_short}.",
+    "В письме, которое {person} получил накануне, не было ни слова о войне.",
+    "Г-н. Иванов поехал в г. Санкт-Петербург, где встретил М.Ю. Лермонтова.",
+]
+
+# Все форматы диалогов из dialogue_identifier: слова автора после/перед речью, тире, цитата
+_DIALOGUE_TEMPLATES = [
+    "«{phrase}», – {verb} {speaker}.",
+    "\"{phrase}\", - {verb} {speaker}.",
+    "«{phrase}!» — {verb} {speaker}.",
+    "{speaker}: «{phrase}».",
+    "{speaker}: {phrase_capitalized}.",
+    "– {phrase_capitalized}, – {verb} {speaker}.",
+    "– {phrase_capitalized}?",
+    "– Да.",
+    "– Нет.",
+    "«{phrase_capitalized}.»",
+]
+
+_PHRASES = [
+    "пойдем гулять", "где же вы были", "все отлично", "я не поеду", "это невозможно",
+    "просто проходил мимо", "какая хорошая погода", "завтра будет бой",
+]
+
+_HEADER_TEMPLATES = ["Глава {number}", "Часть {number}", "* * *"]
+
+class _SentenceFactory:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def prose(self) -> str:
+        place = self.rng.choice(_PLACES)
+        return self.rng.choice(_PROSE_TEMPLATES).format(
+            person=self.rng.choice(_PERSONS),
+            place=place,
+            place_short=self.rng.choice(["Москва", "Казань", "Смоленск"]),
+            organization=self.rng.choice(_ORGANIZATIONS),
+            year=self.rng.randint(1800, 1900),
+        )
+
+    def dialogue(self) -> str:
+        phrase = self.rng.choice(_PHRASES)
+        return self.rng.choice(_DIALOGUE_TEMPLATES).format(
+            phrase=phrase,
+            phrase_capitalized=phrase[0].upper() + phrase[1:],
+            verb=self.rng.choice(_VERBS),
+            speaker=self.rng.choice(_SPEAKERS),
+        )
+
+    def header(self) -> str:
+        return self.rng.choice(_HEADER_TEMPLATES).format(number=self.rng.randint(1, 40))
+
+    def paragraph(self, dialogue_share: float) -> str:
+        roll = self.rng.random()
+        if roll < 0.03:
+            return self.header()
+        if roll < 0.03 + dialogue_share:
+            return self.dialogue()
+        return " ".join(self.prose() for _ in range(self.rng.randint(1, 6)))
+
+def generate_corpus(output_dir: str, files_count: int = 20, paragraphs_per_file: int = 200,
+                    docx_share: float = 0.25, dialogue_share: float = 0.35, seed: int = 2024) -> Dict[str, int]:
+    """
+    Генерирует корпус в output_dir: файлы раскладываются по подпапкам (в том числе вложенным),
+    часть файлов сохраняется в .docx. При одинаковых параметрах результат побайтно одинаков
+    (для .txt; .docx содержит одинаковый текст).
+
+    Returns:
+        dict: Сводка по корпусу: files, txt_files, docx_files, paragraphs, bytes (размер .txt).
+    """
+    rng = random.Random(seed)
+    factory = _SentenceFactory(rng)
+    summary = {"files": 0, "txt_files": 0, "docx_files": 0, "paragraphs": 0, "bytes": 0}
+    subdirs = ["", "book1", "book2", os.path.join("book2", "drafts")]
+
+    for file_index in range(files_count):
+        subdir = os.path.join(output_dir, subdirs[file_index % len(subdirs)])
+        os.makedirs(subdir, exist_ok=True)
+        paragraphs: List[str] = [factory.paragraph(dialogue_share) for _ in range(paragraphs_per_file)]
+        is_docx = rng.random() < docx_share
+        base_name = f"chapter_{file_index:05d}"
+
+        if is_docx:
+            import docx # python-docx нужен только для .docx-части корпуса
+            document = docx.Document()
+            for paragraph in paragraphs:
+                document.add_paragraph(paragraph)
+            document.save(os.path.join(subdir, base_name + ".docx"))
+            summary["docx_files"] += 1
+        else:
+            # Абзацы разделяются пустыми строками, иногда с пробелами внутри и переносами строк в абзаце
+            separators = ["\n\n", "\n\n\n", "\n   \n"]
+            content = "".join(
+                paragraph.replace(". ", ".\n", 1) if rng.random() < 0.2 else paragraph
+                for paragraph in _interleave(paragraphs, [rng.choice(separators) for _ in paragraphs])
+            )
+            with open(os.path.join(subdir, base_name + ".txt"), 'w', encoding='utf-8') as f:
+                f.write(content)
+            summary["txt_files"] += 1
+            summary["bytes"] += len(content.encode('utf-8'))
+        summary["files"] += 1
+        summary["paragraphs"] += len(paragraphs)
+    return summary
+
+def _interleave(items: List[str], separators: List[str]) -> List[str]:
+    result = []
+    for item, separator in zip(items, separators):
+        result.append(item)
+        result.append(separator)
+    return result
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Использование: python -m dataset_preparation.benchmarks.corpus_generator <папка> [число_файлов] [абзацев_в_файле]")
+        sys.exit(1)
+    target_dir = sys.argv[1]
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    paragraphs_count = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    print(generate_corpus(target_dir, files, paragraphs_count))
@@ -2,11 +2,32 @@
 
 # Можно сделать некоторые функции доступными для импорта напрямую из пакета src, например:
 from .main_creator import run_dataset_creation_pipeline
-from .data_processor import process_file_to_jsonl
-from .file_loaders import load_paragraphs_from_docx, load_paragraphs_from_txt
-from .sentence_splitter import split_text_into_sentences
-from .ner_extractor import extract_entities
+from .data_processor import process_file_to_jsonl, warm_up_pipeline_components
+from .discovery import InputDiscovery, iter_input_files
+from .file_loaders import (
+    load_paragraphs_from_docx, load_paragraphs_from_txt, iter_paragraphs_from_docx, iter_paragraphs_from_txt,
+    iter_paragraphs_from_file, split_paragraph_text, set_paragraph_detection, get_paragraph_detection,
+)
+from .sentence_splitter import (
+    split_text_into_sentences, segment_text, set_offline_mode, set_sentence_splitter_engine, get_sentence_splitter_engine,
+)
+from .ner_extractor import extract_entities, extract_entities_batch, extract_entities_for_paragraphs
+from .ner_cache import configure_ner_cache, get_ner_cache_stats
+from .dialogue_identifier import extract_dialogue_info, extract_dialogue_info_batch
 from .text_cleaner import clean_text
+from .serialization import iter_records, read_parquet_tables, set_json_backend
+from .sharding import iter_shard_records
+from .record_index import DatasetIndex, RecordIndex, build_offset_index
+from .deduplication import find_duplicate_paragraphs
+from .records import Paragraph, Sentence, Entity, DialogueInfo, SyntaxToken, iter_paragraphs, load_paragraphs, write_paragraphs
+from .partitioning import merge_partitions, verify_partitions, partition_of
+from .watcher import watch_input_dir
+from .nlp_service import NLPService
+from .nlp_client import NLPServiceClient
+from .progress import PipelineCancelled, PipelineRun, RunControl, start_pipeline_run
+
+# Импорт пакета не загружает модели Natasha и ресурсы NLTK: они инициализируются при первом
+# использовании или явно через warm_up_pipeline_components().
 
 # Это позволит в будущем, если нужно, импортировать так:
 # from dataset_preparation.src import run_dataset_creation_pipeline
@@ -0,0 +1,92 @@
+# Dream-Team-core/dataset_preparation/src/checkpoints.py
+# Контрольные точки внутри файла: при обработке большого входного файла периодически
+# записывается, сколько абзацев уже обработано и сколько байт временного выходного файла
+# (<выходной файл>.tmp) им соответствует. Перед записью контрольной точки выходные данные
+# сбрасываются на диск (fsync), поэтому любая сохраненная контрольная точка указывает на данные,
+# которые переживут сбой. После сбоя (или отмены запуска) следующий запуск обрезает временный файл
+# до сохраненного размера и продолжает с первого необработанного абзаца; итоговый файл совпадает
+# с результатом непрерывной обработки.
+# Поддерживаются несжатые jsonl и msgpack (сжатый поток и Parquet нельзя продолжить с середины):
+# для остальных форматов файл после сбоя обрабатывается заново, как и раньше.
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from .manifest import PIPELINE_VERSION
+
+# Как часто (в секундах) сохранять контрольную точку при обработке файла. Файлы, обработка которых
+# занимает меньше, не платят за fsync ничего.
+DEFAULT_CHECKPOINT_INTERVAL_SECONDS = 10.0
+
+CHECKPOINT_SUFFIX = ".ckpt"
+
+def get_checkpoint_path(output_file_path: str) -> str:
+    return output_file_path + CHECKPOINT_SUFFIX
+
+def is_resumable(output_format: str, compression: Optional[str] = None) -> bool:
+    """Можно ли продолжить запись выходного файла этого формата с контрольной точки."""
+    return compression is None and output_format in ("jsonl", "msgpack")
+
+class CheckpointRequest:
+    """Запрос на контрольную точку в потоке записей (выполняется после записи предыдущих записей)."""
+    __slots__ = ("next_paragraph", "stats")
+
+    def __init__(self, next_paragraph: int, stats: Dict[str, int]):
+        self.next_paragraph = next_paragraph
+        self.stats = stats
+
+class FileCheckpoint:
+    """
+    Контрольная точка обработки одного файла. identity - все, от чего зависит содержимое
+    выходного файла (размер и время изменения входного файла, этапы, формат, дубликаты и т.п.):
+    контрольная точка с другим identity не используется.
+    """
+
+    def __init__(self, output_file_path: str, tmp_path: str, identity: Dict,
+                 interval: float = DEFAULT_CHECKPOINT_INTERVAL_SECONDS):
+        self.path = get_checkpoint_path(output_file_path)
+        self._tmp_path = tmp_path
+        self._identity = dict(identity, pipeline_version=PIPELINE_VERSION)
+        self._interval = interval
+        self._last_saved = time.monotonic()
+
+    def load(self) -> Optional[Dict]:
+        """
+        Состояние для продолжения: {"next_paragraph", "data_bytes", "stats"} или None, если
+        контрольной точки нет, она устарела или временный файл не соответствует ей.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get("identity") == self._identity
+                    and os.path.getsize(self._tmp_path) >= state["data_bytes"]):
+                return state
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self.remove()
+        return None
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_saved >= self._interval
+
+    def save(self, next_paragraph: int, data_bytes: int, stats: Dict[str, int]) -> None:
+        """
+        Атомарно сохраняет контрольную точку (временный файл, fsync, переименование).
+        Данные временного выходного файла до data_bytes уже должны быть сброшены на диск.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"identity": self._identity, "next_paragraph": next_paragraph, "data_bytes": data_bytes,
+                       "stats": stats}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._last_saved = time.monotonic()
+
+    def remove(self) -> None:
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
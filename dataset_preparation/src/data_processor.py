@@ -1,14 +1,176 @@
 # Dream-Team-core/dataset_preparation/src/data_processor.py
 import os
-import json
 import traceback
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .file_loaders import load_paragraphs_from_docx, load_paragraphs_from_txt
-from .sentence_splitter import split_text_into_sentences
-from .ner_extractor import extract_entities
-from .dialogue_identifier import extract_dialogue_info
+from .checkpoints import (
+    DEFAULT_CHECKPOINT_INTERVAL_SECONDS,
+    CheckpointRequest,
+    FileCheckpoint,
+    get_checkpoint_path,
+    is_resumable,
+)
+from .deduplication import duplicates_digest
+from .file_loaders import get_paragraph_detection, iter_paragraphs_from_file
+from . import ner_extractor, sentence_splitter
+from .sentence_splitter import segment_text
+from .ner_extractor import analyze_sentences_batch, extract_entities_batch
+from .dialogue_identifier import extract_dialogue_info_batch
+from .instrumentation import NULL_METRICS, PipelineMetrics
+from .io_pipeline import BackgroundConsumer, iter_in_background
+from .manifest import remove_output_files
+from .progress import PipelineCancelled
+from .serialization import get_json_backend, get_output_extension, open_record_writer
+from .record_index import OffsetIndexBuilder, get_index_path, index_existing_records, is_indexable
+from .stages import get_record_stages, resolve_stages, stages_field
 
-def process_file_to_jsonl(input_file_path: str, output_dir_for_this_file: str, input_base_dir: str) -> bool: # Добавлен input_base_dir
+def warm_up_pipeline_components(stages: Optional[Sequence[str]] = None) -> bool:
+    """
+    Явно загружает тяжелые компоненты конвейера, нужные этапам stages (ресурсы движка разбиения
+    на предложения и модели Natasha; см. stages, None - этапы по умолчанию).
+    Без вызова они загружаются лениво при обработке первого файла.
+
+    Returns:
+        bool: True, если все компоненты готовы к работе.
+    """
+    nltk_ready = sentence_splitter.warm_up()
+    natasha_ready = ner_extractor.warm_up(stages)
+    return nltk_ready and natasha_ready
+
+class _PreviousRecords:
+    """
+    Записи прежнего результата файла (по возрастанию paragraph_index) для дополнения этапов:
+    get() возвращает запись абзаца, если ее можно переиспользовать. Читаются потоково, вместе
+    с абзацами файла.
+    """
+
+    def __init__(self, records: Iterable[Dict]):
+        self._records: Iterator[Dict] = iter(records)
+        self._current: Optional[Dict] = None
+        self._exhausted = False
+
+    def get(self, paragraph_index: int, paragraph_text: str) -> Optional[Dict]:
+        while not self._exhausted and (self._current is None or self._current["paragraph_index"] < paragraph_index):
+            try:
+                self._current = next(self._records, None)
+            except Exception as e:
+                print(f"Предупреждение: не удалось прочитать прежний результат ({e}), абзацы обрабатываются заново.")
+                self._current = None
+            if self._current is None:
+                self._exhausted = True
+        record = self._current
+        # Дубликаты (в режиме "link") хранятся без предложений: переиспользовать нечего
+        if (record is None or record["paragraph_index"] != paragraph_index or record["paragraph_text"] != paragraph_text
+                or "duplicate_of" in record or not record["sentences"]):
+            return None
+        return record
+
+    def close(self) -> None:
+        close = getattr(self._records, "close", None)
+        if close is not None:
+            close() # Закрывает файл прежнего результата до его замены
+
+def _process_paragraph(paragraph_text: str, stages: Tuple[str, ...], metrics: PipelineMetrics,
+                       previous_record: Optional[Dict] = None) -> Tuple[List[Dict], int]:
+    """
+    Выполняет этапы stages для абзаца. Если передана прежняя запись абзаца, ее разбиение
+    на предложения и результаты уже выполненных этапов переиспользуются, а вычисляются только
+    недостающие этапы.
+
+    Returns:
+        tuple: (список предложений записи, число сущностей).
+    """
+    if previous_record is not None:
+        applied = get_record_stages(previous_record)
+        previous_sentences = previous_record["sentences"]
+        sentences_in_para = [sentence["text"] for sentence in previous_sentences]
+        tokens_per_sentence = None
+    else:
+        applied = ()
+        previous_sentences = None
+        with metrics.stage("split"):
+            segmented_sentences = segment_text(paragraph_text)
+        sentences_in_para = [sentence.text for sentence in segmented_sentences]
+        tokens_per_sentence = [sentence.tokens for sentence in segmented_sentences]
+
+    entities_per_sentence = None
+    if "ner" in stages:
+        if "ner" in applied:
+            entities_per_sentence = [sentence["entities"] for sentence in previous_sentences]
+            if "normalize" not in stages:
+                entities_per_sentence = [
+                    [{key: value for key, value in entity.items() if key != "normal"} for entity in entities]
+                    for entities in entities_per_sentence
+                ]
+        else:
+            # Сущности для всех предложений абзаца извлекаются одним пакетным проходом NER;
+            # токены, полученные при разбиении (движок razdel), повторно не вычисляются
+            with metrics.stage("ner"):
+                entities_per_sentence = extract_entities_batch(sentences_in_para, tokens_per_sentence)
+
+    dialogue_info_per_sentence = None
+    if "dialogue" in stages:
+        if "dialogue" in applied:
+            dialogue_info_per_sentence = [sentence["dialogue_info"] for sentence in previous_sentences]
+        else:
+            with metrics.stage("dialogue"):
+                dialogue_info_per_sentence = extract_dialogue_info_batch(sentences_in_para)
+
+    syntax_per_sentence = None
+    if "syntax" in stages and "syntax" in applied:
+        syntax_per_sentence = [sentence["syntax"] for sentence in previous_sentences]
+    parse_syntax = "syntax" in stages and syntax_per_sentence is None
+    normalize = "normalize" in stages and "normalize" not in applied
+    if parse_syntax or normalize:
+        with metrics.stage("syntax" if parse_syntax else "normalize"):
+            parsed, normals_per_sentence = analyze_sentences_batch(
+                sentences_in_para, entities_per_sentence if normalize else None, tokens_per_sentence,
+                syntax=parse_syntax)
+        if parse_syntax:
+            syntax_per_sentence = parsed
+        if normalize:
+            for entities, normals in zip(entities_per_sentence, normals_per_sentence):
+                for entity, normal in zip(entities, normals):
+                    entity["normal"] = normal
+
+    sentences_data = []
+    for sent_idx, sent_text in enumerate(sentences_in_para):
+        sentence = {"sentence_index_in_paragraph": sent_idx, "text": sent_text}
+        if entities_per_sentence is not None:
+            sentence["entities"] = entities_per_sentence[sent_idx]
+        if dialogue_info_per_sentence is not None:
+            sentence["dialogue_info"] = dialogue_info_per_sentence[sent_idx]
+        if syntax_per_sentence is not None:
+            sentence["syntax"] = syntax_per_sentence[sent_idx]
+        sentences_data.append(sentence)
+    entities_count = sum(len(e) for e in entities_per_sentence) if entities_per_sentence is not None else 0
+    return sentences_data, entities_count
+
+def get_output_file_path(input_file_path: str, output_dir_for_this_file: str, output_format: str = "jsonl",
+                         compression: Optional[str] = None) -> str:
+    """
+    Возвращает путь к выходному файлу для входного: имя входного файла с расширением формата
+    (.jsonl, .msgpack; для parquet - директория .parquet) и сжатия (.gz, .zst), если оно задано.
+    """
+    file_name_without_ext = os.path.splitext(os.path.basename(input_file_path))[0]
+    return os.path.join(output_dir_for_this_file, file_name_without_ext + get_output_extension(output_format, compression))
+
+def process_file_to_jsonl(input_file_path: str, output_dir_for_this_file: str, input_base_dir: str,
+                          stats: Optional[Dict[str, int]] = None,
+                          metrics: Optional[PipelineMetrics] = None,
+                          output_format: str = "jsonl",
+                          compression: Optional[str] = None,
+                          write_index: bool = True,
+                          duplicates: Optional[Dict[int, Dict]] = None,
+                          dedup_mode: str = "skip",
+                          paragraphs: Optional[Iterable[str]] = None,
+                          io_queue_size: int = 0,
+                          stages: Optional[Sequence[str]] = None,
+                          previous_records: Optional[Iterable[Dict]] = None,
+                          on_paragraph: Optional[Callable[[], None]] = None,
+                          verbose: bool = True,
+                          checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL_SECONDS) -> bool: # Добавлен input_base_dir
     """
     Обрабатывает один входной файл, извлекает данные и сохраняет в JSONL.
     Добавляет категорию на основе относительного пути.
@@ -17,34 +179,106 @@ def process_file_to_jsonl(input_file_path: str, output_dir_for_this_file: str, i
         input_file_path (str): Полный путь к входному файлу.
         output_dir_for_this_file (str): Полный путь к директории, куда будет сохранен .jsonl.
         input_base_dir (str): Полный путь к корневой входной директории (например, .../input_texts).
+        stats (dict, optional): Если передан, в него записываются счетчики обработки:
+                                "paragraphs", "sentences", "entities", "duplicates", "reused".
+        metrics (PipelineMetrics, optional): Если передан, в него записывается время этапов
+                                             (load, split, ner, dialogue, syntax, normalize,
+                                             serialize, write) и счетчики.
+        output_format (str, optional): Формат выходного файла: "jsonl" (по умолчанию), "msgpack"
+                                       или "parquet" (см. serialization).
+        compression (str, optional): Потоковое сжатие выходного файла: None (по умолчанию), "gzip"
+                                     или "zstd" (только для jsonl и msgpack).
+        write_index (bool, optional): Записать рядом с выходным файлом индекс смещений записей
+                                      (<файл>.idx, см. record_index) для доступа к записям по id
+                                      и случайных выборок. Только для несжатых jsonl и msgpack.
+        duplicates (dict, optional): Почти дубликаты абзацев других файлов (или этого же),
+                                     найденные заранее (см. deduplication.find_duplicate_paragraphs):
+                                     {номер абзаца: {"duplicate_of": {..., "id": ...}, ...}}.
+                                     Такие абзацы не проходят разбиение, NER и поиск диалогов.
+        dedup_mode (str, optional): "skip" (по умолчанию) - дубликаты не попадают в результат;
+                                    "link" - записывается запись без предложений с полем
+                                    duplicate_of (id записи оригинала).
+        paragraphs (iterable, optional): Уже загружаемые абзацы файла (например, из
+                                         io_pipeline.FilePrefetcher). Если None, файл читается здесь.
+        io_queue_size (int, optional): Если больше 0, абзацы читаются, а записи сериализуются
+                                       и пишутся в фоновых потоках через очереди такого размера
+                                       (см. io_pipeline). При этом этап "load" в метриках - время
+                                       ожидания абзацев, а не чтения. По умолчанию 0 - все в текущем потоке.
+        stages (sequence, optional): Этапы обработки (см. stages): "split", "dialogue", "ner",
+                                     "syntax", "normalize". None - этапы по умолчанию (split,
+                                     dialogue, ner). Записи с другим набором этапов содержат поле
+                                     "stages"; у предложений есть только поля выбранных этапов.
+        previous_records (iterable, optional): Записи прежнего результата того же (неизмененного)
+                                               файла. Для абзацев с тем же текстом разбиение
+                                               и результаты уже выполненных этапов берутся из них,
+                                               выполняются только недостающие этапы.
+        on_paragraph (callable, optional): Вызывается после каждой записи абзаца (ход обработки,
+                                           см. progress). Может возбудить progress.PipelineCancelled:
+                                           тогда выходной файл не создается (для несжатых jsonl
+                                           и msgpack сохраняется контрольная точка), исключение
+                                           передается дальше.
+        verbose (bool, optional): Печатать строку об успешной обработке файла. По умолчанию True.
+        checkpoint_interval (float, optional): Как часто (в секундах) сохранять контрольную точку
+                                               (см. checkpoints): после сбоя или отмены следующий
+                                               вызов продолжит файл с первого необработанного абзаца.
+                                               Только для несжатых jsonl и msgpack; 0 - без контрольных
+                                               точек. По умолчанию 10 секунд.
 
     Returns:
-        bool: True, если обработка прошла успешно, иначе False.
+        bool: True, если обработка прошла успешно (у пустого файла выходного файла нет: прежний
+              результат удаляется), иначе False (в том числе при ошибке чтения файла).
     """
     # ... (начало функции остается таким же: проверки, загрузка абзацев) ...
     if not os.path.exists(input_file_path):
         print(f"Ошибка: Файл не найден: {input_file_path}")
         return False
 
-    _, file_extension = os.path.splitext(input_file_path)
     base_file_name = os.path.basename(input_file_path) # Имя файла с расширением
     file_name_without_ext = os.path.splitext(base_file_name)[0] # Имя файла без расширения
     
-    paragraphs_list = []
-    if file_extension.lower() == '.docx':
-        paragraphs_list = load_paragraphs_from_docx(input_file_path)
-    elif file_extension.lower() == '.txt':
-        paragraphs_list = load_paragraphs_from_txt(input_file_path)
-    else:
-        print(f"Неподдерживаемый формат файла: {input_file_path}. Поддерживаются .docx и .txt")
-        return False
+    if metrics is None:
+        metrics = NULL_METRICS
+    stages = resolve_stages(stages)
+    record_stages = stages_field(stages)
+    previous = _PreviousRecords(previous_records) if previous_records is not None else None
 
-    if not paragraphs_list:
-        print(f"Не удалось извлечь абзацы или файл пуст: {input_file_path}")
-        return True 
+    # Абзацы читаются лениво: .txt и .docx загружаются потоково, в памяти держится только текущий абзац
+    background_paragraphs = None
+    if paragraphs is None:
+        try:
+            if io_queue_size > 0:
+                iter_paragraphs_from_file(input_file_path) # Проверка формата до запуска потока
+                background_paragraphs = iter_in_background(lambda: iter_paragraphs_from_file(input_file_path),
+                                                           io_queue_size)
+                paragraphs = background_paragraphs
+            else:
+                paragraphs = iter_paragraphs_from_file(input_file_path)
+        except ValueError as e:
+            print(e)
+            return False
+    paragraphs = metrics.timed_iter("load", paragraphs)
 
-    output_file_name = file_name_without_ext + '.jsonl'
-    output_file_path = os.path.join(output_dir_for_this_file, output_file_name)
+    # Заглядываем на первый абзац, чтобы не создавать выходной файл для пустого входного.
+    # Ошибка чтения (например, поврежденный .docx) - это не пустой файл: он не должен попасть в манифест
+    paragraphs_iter = iter(paragraphs)
+    try:
+        first_paragraph = next(paragraphs_iter, None)
+    except Exception as e:
+        print(f"Ошибка при чтении файла {input_file_path}: {type(e).__name__}: {e}")
+        if background_paragraphs is not None:
+            background_paragraphs.close()
+        return False
+    output_file_path = get_output_file_path(input_file_path, output_dir_for_this_file, output_format, compression)
+    if first_paragraph is None:
+        print(f"Файл пуст (абзацев нет), выходной файл не создается: {input_file_path}")
+        # Результат прежней, непустой версии файла не должен остаться текущим
+        remove_output_files(output_file_path)
+        checkpoint_path = get_checkpoint_path(output_file_path)
+        for path in (checkpoint_path, checkpoint_path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+        return True
+    paragraphs_iter = chain([first_paragraph], paragraphs_iter)
 
     # os.makedirs(output_dir_for_this_file, exist_ok=True) # Это теперь делается в main_creator.py
 
@@ -64,40 +298,163 @@ def process_file_to_jsonl(input_file_path: str, output_dir_for_this_file: str, i
         print(f"Предупреждение: Не удалось определить категорию для {input_file_path}")
 
 
+    if stats is None:
+        stats = {} # Счетчики нужны контрольным точкам, даже если вызывающему они не нужны
+    stats.update({"paragraphs": 0, "sentences": 0, "entities": 0, "duplicates": 0, "reused": 0})
+
+    checkpoint = None
+    resume_state = None
+    if checkpoint_interval > 0 and is_resumable(output_format, compression):
+        input_stat = os.stat(input_file_path)
+        checkpoint = FileCheckpoint(output_file_path, output_file_path + ".tmp", {
+            "input_size": input_stat.st_size, "input_mtime_ns": input_stat.st_mtime_ns,
+            "category": category_path, "stages": list(stages), "output_format": output_format,
+            "dedup_mode": dedup_mode, "duplicates": duplicates_digest(duplicates, dedup_mode),
+            "sentence_splitter": sentence_splitter.get_sentence_splitter_engine(),
+            "paragraph_detection": get_paragraph_detection(), "json_backend": get_json_backend(),
+        }, checkpoint_interval)
+        resume_state = checkpoint.load()
+    resume_from = resume_state["next_paragraph"] if resume_state is not None else 0
+    processed_until = resume_from # Номер первого абзаца, который еще не обработан
+
+    # Запись идет во временный файл, который переименовывается в итоговый только после успешного
+    # завершения, поэтому недописанный результат никогда не будет принят за готовый
+    writer = None
+    record_sink = None
+    index_builder = None
+    if write_index and is_indexable(output_format, compression):
+        index_builder = OffsetIndexBuilder(output_format, base_file_name, category_path)
+
+    def write_record(record: Dict) -> None:
+        if isinstance(record, CheckpointRequest):
+            # Все предыдущие записи уже переданы writer: сбрасываем их на диск и сохраняем точку
+            with metrics.stage("checkpoint"):
+                checkpoint.save(record.next_paragraph, writer.sync(), record.stats)
+            return
+        with metrics.stage("serialize"):
+            payload = writer.encode(record)
+        with metrics.stage("write"):
+            written_bytes = writer.write(payload)
+        if index_builder is not None:
+            index_builder.add(record["id"], written_bytes)
+        if written_bytes is not None:
+            metrics.add("output_bytes", written_bytes)
+
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f_out:
-            for para_idx, para_text in enumerate(paragraphs_list):
-                if not para_text.strip(): 
-                    continue
+        if resume_state is not None:
+            writer = open_record_writer(output_file_path, output_format, resume_bytes=resume_state["data_bytes"])
+            if index_builder is not None:
+                index_existing_records(index_builder, writer.tmp_path)
+            stats.update(resume_state["stats"])
+            print(f"Продолжение обработки файла '{input_file_path}' с абзаца {resume_from} (контрольная точка)")
+        else:
+            writer = open_record_writer(output_file_path, output_format, compression)
+        if io_queue_size > 0:
+            # Сериализация и запись идут в отдельном потоке параллельно с NLP следующих абзацев
+            record_sink = BackgroundConsumer(write_record, io_queue_size)
+        for para_idx, para_text in enumerate(paragraphs_iter):
+            if para_idx < resume_from: # Уже записан до контрольной точки
+                continue
+            if not para_text.strip(): 
+                continue
 
-                sentences_in_para = split_text_into_sentences(para_text)
-                
+            duplicate = duplicates.get(para_idx) if duplicates else None
+            if duplicate is not None:
+                # Почти дубликат уже обработанного абзаца: этапы NLP пропускаются
+                stats["duplicates"] += 1
+                metrics.add("duplicates")
+                if dedup_mode == "skip":
+                    processed_until = para_idx + 1
+                    continue
                 sentences_data = []
-                for sent_idx, sent_text in enumerate(sentences_in_para):
-                    entities = extract_entities(sent_text) 
-                    dialogue_info = extract_dialogue_info(sent_text)
-                    
-                    sentences_data.append({
-                        "sentence_index_in_paragraph": sent_idx,
-                        "text": sent_text,
-                        "entities": entities,
-                        "dialogue_info": dialogue_info
-                    })
-
-                record = {
-                    "id": f"{file_name_without_ext}_paragraph_{para_idx}",
-                    "source_file": base_file_name,
-                    "category": category_path, # <--- ДОБАВЛЕНО ПОЛЕ КАТЕГОРИИ
-                    "paragraph_index": para_idx,
-                    "paragraph_text": para_text,
-                    "sentences": sentences_data
-                }
-                f_out.write(json.dumps(record, ensure_ascii=False) + '\n')
-        print(f"Файл '{input_file_path}' успешно обработан. Категория: '{category_path}'. Результат: '{output_file_path}'")
+                entities_count = 0
+            else:
+                previous_record = previous.get(para_idx, para_text) if previous is not None else None
+                sentences_data, entities_count = _process_paragraph(para_text, stages, metrics, previous_record)
+                if previous_record is not None:
+                    stats["reused"] += 1
+                    metrics.add("reused_paragraphs")
+
+            record = {
+                "id": f"{file_name_without_ext}_paragraph_{para_idx}",
+                "source_file": base_file_name,
+                "category": category_path, # <--- ДОБАВЛЕНО ПОЛЕ КАТЕГОРИИ
+                "paragraph_index": para_idx,
+                "paragraph_text": para_text,
+                "sentences": sentences_data
+            }
+            if duplicate is not None:
+                record["duplicate_of"] = duplicate["duplicate_of"]["id"]
+            if record_stages is not None:
+                record["stages"] = record_stages
+            if record_sink is not None:
+                record_sink.put(record)
+            else:
+                write_record(record)
+
+            stats["paragraphs"] += 1
+            stats["sentences"] += len(sentences_data)
+            stats["entities"] += entities_count
+            if metrics.enabled:
+                metrics.add("paragraphs")
+                metrics.add("sentences", len(sentences_data))
+                metrics.add("entities", entities_count)
+            processed_until = para_idx + 1
+            if checkpoint is not None and checkpoint.due():
+                request = CheckpointRequest(processed_until, dict(stats))
+                if record_sink is not None:
+                    record_sink.put(request)
+                else:
+                    write_record(request)
+            if on_paragraph is not None:
+                on_paragraph()
+        if record_sink is not None:
+            record_sink.finish()
+            record_sink = None
+        if previous is not None:
+            previous.close()
+        index_path = get_index_path(output_file_path)
+        if os.path.exists(index_path):
+            # Индекс прежней версии файла не должен пережить замену данных
+            os.remove(index_path)
+        with metrics.stage("write"):
+            writer.commit()
+        if checkpoint is not None:
+            checkpoint.remove()
+        if index_builder is not None:
+            with metrics.stage("index"):
+                index_builder.write(index_path)
+        if verbose:
+            print(f"Файл '{input_file_path}' успешно обработан. Категория: '{category_path}'. Результат: '{output_file_path}'")
         return True
     except Exception as e:
-        print(f"Критическая ошибка при обработке или сохранении JSONL для файла {input_file_path}: {e}")
-        traceback.print_exc()
+        cancelled = isinstance(e, PipelineCancelled)
+        if not cancelled:
+            print(f"Критическая ошибка при обработке или сохранении результата для файла {input_file_path}: {e}")
+            traceback.print_exc()
+        if background_paragraphs is not None:
+            background_paragraphs.close() # Останавливает поток чтения
+        if cancelled and checkpoint is not None and writer is not None:
+            # Отмена: записанные абзацы сохраняются, следующий запуск продолжит файл с контрольной точки
+            try:
+                if record_sink is not None:
+                    record_sink.finish()
+                    record_sink = None
+                write_record(CheckpointRequest(processed_until, dict(stats)))
+                writer.suspend()
+                writer = None
+            except Exception as checkpoint_error:
+                print(f"Не удалось сохранить контрольную точку для файла {input_file_path}: {checkpoint_error}")
+        if record_sink is not None:
+            record_sink.abort()
+        if previous is not None:
+            previous.close()
+        if writer is not None:
+            writer.abort()
+            if checkpoint is not None:
+                checkpoint.remove()
+        if cancelled:
+            raise
         return False
 
 # В __main__ блоке data_processor.py нужно будет добавить input_base_dir при вызове
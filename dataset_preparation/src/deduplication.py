@@ -0,0 +1,214 @@
+# Dream-Team-core/dataset_preparation/src/deduplication.py
+# Поиск почти одинаковых абзацев во всем корпусе до дорогих этапов NLP (разбиение, NER, диалоги).
+# Черновики, пересохранения, .txt и .docx версии одной книги дают много повторяющихся абзацев:
+# каждый из них иначе прошел бы полную обработку и попал в датасет.
+#
+# Абзац нормализуется (нижний регистр, ё -> е, без пунктуации и лишних пробелов) и разбивается
+# на символьные 5-граммы; по ним считается MinHash-сигнатура (оценка коэффициента Жаккара).
+# Кандидаты в дубликаты ищутся через LSH (сигнатура делится на полосы, совпадение любой полосы
+# дает кандидата), после чего сходство кандидата проверяется по всей сигнатуре.
+# Абзацы просматриваются в детерминированном порядке (по относительному пути файла и номеру
+# абзаца): оригиналом считается первое вхождение, дубликаты ссылаются на него.
+# Нужен numpy (устанавливается вместе с natasha).
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .file_loaders import iter_paragraphs_from_file
+
+DEDUP_MODES = ("skip", "link")
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+DEFAULT_NUM_PERMUTATIONS = 128
+# Более короткие абзацы (после нормализации) не считаются дубликатами: реплики вроде "— Да."
+# законно повторяются в тексте, а сходство по нескольким 5-граммам ненадежно
+DEFAULT_MIN_PARAGRAPH_CHARS = 40
+
+_SHINGLE_SIZE = 5
+_HASH_SEED = 20240601
+_NON_WORD_RE = re.compile(r'[^\w\s]+')
+_SPACES_RE = re.compile(r'\s+')
+
+def normalize_for_dedup(text: str) -> str:
+    text = text.lower().replace('ё', 'е')
+    text = _NON_WORD_RE.sub(' ', text)
+    return _SPACES_RE.sub(' ', text).strip()
+
+def choose_lsh_bands(threshold: float, num_permutations: int) -> Tuple[int, int]:
+    """
+    Число полос и строк в полосе, при которых порог срабатывания LSH (1/b)^(1/r) ближе всего
+    к заданному порогу сходства (с небольшим запасом вниз, чтобы не терять дубликаты).
+    """
+    best = None
+    for rows in range(1, num_permutations + 1):
+        bands = num_permutations // rows
+        if bands == 0:
+            break
+        lsh_threshold = (1.0 / bands) ** (1.0 / rows)
+        distance = abs(lsh_threshold - (threshold - 0.05))
+        if best is None or distance < best[0]:
+            best = (distance, bands, rows)
+    return best[1], best[2]
+
+class MinHasher:
+    """MinHash-сигнатуры абзацев: num_permutations минимумов хешей 5-грамм (uint32)."""
+
+    def __init__(self, num_permutations: int = DEFAULT_NUM_PERMUTATIONS, seed: int = _HASH_SEED):
+        import numpy as np
+        self._np = np
+        rng = np.random.default_rng(seed)
+        # Хеш-функции вида (a * x + b) >> 32 по модулю 2^64 с нечетным a
+        self._a = (rng.integers(1, 2**63, size=num_permutations, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_permutations, dtype=np.uint64)
+        self._powers = np.array([1000003 ** k % 2**64 for k in range(_SHINGLE_SIZE)][::-1], dtype=np.uint64)
+        self.num_permutations = num_permutations
+
+    def shingle_hashes(self, normalized_text: str):
+        np = self._np
+        codes = np.frombuffer(normalized_text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        if len(codes) < _SHINGLE_SIZE:
+            codes = np.concatenate([codes, np.zeros(_SHINGLE_SIZE - len(codes), dtype=np.uint64)])
+        count = len(codes) - _SHINGLE_SIZE + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        for k in range(_SHINGLE_SIZE):
+            hashes += codes[k:k + count] * self._powers[k]
+        return np.unique(hashes)
+
+    def signature(self, normalized_text: str):
+        np = self._np
+        hashes = self.shingle_hashes(normalized_text)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+class NearDuplicateIndex:
+    """
+    LSH-индекс сигнатур абзацев. add() возвращает ключ ранее добавленного похожего абзаца
+    (и оценку сходства) или None, если абзац новый; дубликаты в индекс не добавляются.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 num_permutations: int = DEFAULT_NUM_PERMUTATIONS,
+                 min_paragraph_chars: int = DEFAULT_MIN_PARAGRAPH_CHARS):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Порог сходства должен быть в (0, 1]: {threshold}")
+        self.threshold = threshold
+        self.min_paragraph_chars = min_paragraph_chars
+        self.hasher = MinHasher(num_permutations)
+        self.bands, self.rows = choose_lsh_bands(threshold, num_permutations)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures = []
+        self._keys = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key, text: str) -> Optional[Tuple[object, float]]:
+        normalized = normalize_for_dedup(text)
+        if len(normalized) < self.min_paragraph_chars:
+            return None
+        signature = self.hasher.signature(normalized)
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        best_number, best_similarity = None, 0.0
+        seen = set()
+        for band, band_key in enumerate(band_keys):
+            for number in self._buckets[band].get(band_key, ()):
+                if number in seen:
+                    continue
+                seen.add(number)
+                similarity = float((self._signatures[number] == signature).mean())
+                if similarity > best_similarity:
+                    best_number, best_similarity = number, similarity
+        if best_number is not None and best_similarity >= self.threshold:
+            return self._keys[best_number], best_similarity
+        number = len(self._keys)
+        self._keys.append(key)
+        self._signatures.append(signature)
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band].setdefault(band_key, []).append(number)
+        return None
+
+def paragraph_record_id(file_path: str, paragraph_index: int) -> str:
+    """id записи абзаца так же, как в data_processor."""
+    return f"{os.path.splitext(os.path.basename(file_path))[0]}_paragraph_{paragraph_index}"
+
+def find_duplicate_paragraphs(files: Iterable[Tuple[str, str]],
+                              threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                              num_permutations: int = DEFAULT_NUM_PERMUTATIONS,
+                              min_paragraph_chars: int = DEFAULT_MIN_PARAGRAPH_CHARS) -> Tuple[Dict[str, Dict[int, Dict]], int]:
+    """
+    Ищет почти одинаковые абзацы в файлах files - пары (относительный путь, полный путь),
+    просматриваемые в порядке относительных путей.
+
+    Returns:
+        tuple: (дубликаты, число проверенных абзацев). Дубликаты - словарь
+               {относительный путь: {номер абзаца: {"duplicate_of": {"source", "paragraph_index", "id"},
+               "similarity": оценка}}}; номера абзацев совпадают с paragraph_index записей.
+    """
+    index = NearDuplicateIndex(threshold, num_permutations, min_paragraph_chars)
+    duplicates: Dict[str, Dict[int, Dict]] = {}
+    checked = 0
+    for relative_path, file_path in sorted(files):
+        try:
+            paragraphs = list(enumerate(iter_paragraphs_from_file(file_path)))
+        except Exception as e:
+            # Файл с ошибкой чтения будет обработан (и выдаст ошибку) как обычно
+            print(f"Предупреждение: дубликаты в файле {file_path} не проверены: {e}")
+            continue
+        for paragraph_index, paragraph in paragraphs:
+            if not paragraph.strip():
+                continue
+            checked += 1
+            match = index.add((relative_path, file_path, paragraph_index), paragraph)
+            if match is None:
+                continue
+            (original_relative_path, original_file_path, original_index), similarity = match
+            duplicates.setdefault(relative_path, {})[paragraph_index] = {
+                "duplicate_of": {"source": original_relative_path, "paragraph_index": original_index,
+                                 "id": paragraph_record_id(original_file_path, original_index)},
+                "similarity": round(similarity, 4),
+            }
+    return duplicates, checked
+
+def duplicates_digest(file_duplicates: Optional[Dict[int, Dict]], mode: str) -> Optional[str]:
+    """
+    Отпечаток решений о дубликатах файла (для манифеста): если он изменился, файл нужно
+    обработать заново, даже если сам файл не менялся. None - в файле нет дубликатов.
+    """
+    if not file_duplicates:
+        return None
+    data = json.dumps({"mode": mode, "duplicates": {str(k): v["duplicate_of"]["id"] for k, v in file_duplicates.items()}},
+                      ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def write_duplicates_report(report_path: str, duplicates: Dict[str, Dict[int, Dict]], checked: int,
+                            settings: Dict) -> None:
+    """Сохраняет JSON-отчет о найденных дубликатах."""
+    report = {
+        "settings": settings,
+        "paragraphs_checked": checked,
+        "duplicates": sum(len(file_duplicates) for file_duplicates in duplicates.values()),
+        "files": {
+            relative_path: [
+                {"paragraph_index": paragraph_index, **info}
+                for paragraph_index, info in sorted(file_duplicates.items())
+            ]
+            for relative_path, file_duplicates in sorted(duplicates.items())
+        },
+    }
+    report_dir = os.path.dirname(report_path)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    index = NearDuplicateIndex()
+    examples = [
+        "Иван Петрович вышел из дома рано утром и направился к реке, где его уже ждали друзья.",
+        "Иван Петрович вышел из дома рано утром и направился к реке, где его ждали друзья!",
+        "Совсем другой абзац о погоде в Москве, который не похож на предыдущие ни по словам, ни по смыслу.",
+    ]
+    for number, example in enumerate(examples):
+        print(f"{number}: {index.add(number, example)} - '{example}'")
+    print(f"Полос LSH: {index.bands}, строк в полосе: {index.rows}")
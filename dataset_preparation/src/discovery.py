@@ -0,0 +1,338 @@
+# Dream-Team-core/dataset_preparation/src/discovery.py
+# Потоковый поиск входных файлов: дерево обходится через os.scandir (тип записи берется из каталога
+# без лишних stat), относительные пути собираются по ходу обхода, а найденные файлы выдаются сразу -
+# конвейер начинает обработку первого файла, не дожидаясь обхода всего дерева, и не держит в памяти
+# список всех файлов.
+# - Параллельный обход (threads > 1): директории читаются пулом потоков, найденные файлы передаются
+#   через ограниченную очередь. Окупается на сетевых дисках, где чтение каталога - в основном ожидание
+#   ответа сервера (os.scandir отпускает GIL). Порядок файлов при этом не определен.
+# - Шаблоны include/exclude (см. PathPatterns): исключенные директории не обходятся вовсе.
+# - Кеш списков директорий (ListingCache, SQLite): список неизмененной директории (mtime совпадает
+#   с сохраненным) берется из кеша без чтения каталога. Изменение содержимого файла не меняет mtime
+#   директории, но его и не нужно замечать здесь: изменения файлов отслеживает манифест.
+import fnmatch
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .io_pipeline import _End, _consume, _put
+
+# Расширения входных файлов, которые обрабатывает конвейер
+INPUT_EXTENSIONS = ('.docx', '.txt')
+
+# Потоки обхода директорий по умолчанию: 1 - обход в потоке потребителя, без фоновых потоков
+DEFAULT_DISCOVERY_THREADS = 1
+# Сколько найденных файлов параллельный обход держит наготове, пока потребитель занят
+_DISCOVERY_QUEUE_SIZE = 1024
+
+# Версия формата кеша списков; увеличивать при изменении формата записей
+_LISTING_CACHE_SCHEMA_VERSION = "1"
+# Директория, измененная позже, чем столько наносекунд назад, не кешируется: при грубом разрешении
+# mtime (FAT, SMB) новый файл, созданный в ту же секунду, не изменил бы сохраненное значение
+_RACY_WINDOW_NS = 2_000_000_000
+# Как часто (в числе сохраненных списков) фиксируется транзакция кеша: после сбоя кеш не пуст
+_LISTING_CACHE_COMMIT_INTERVAL = 1000
+
+Patterns = Union[str, Sequence[str], None]
+
+class InputFile(NamedTuple):
+    """Найденный входной файл: путь, путь относительно input_dir и его директория (с '/')."""
+    path: str
+    relative_path: str
+    relative_dir: str
+
+class PathPatterns:
+    """
+    Набор шаблонов fnmatch. Шаблон без '/' сравнивается с именем файла или директории, шаблон с '/' -
+    с путем относительно input_dir ('*' совпадает и с '/'; ведущий '**/' - любая глубина, включая корень).
+    """
+
+    def __init__(self, patterns: Patterns):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        name_patterns, path_patterns = [], []
+        for pattern in patterns or ():
+            if os.path.sep != '/':
+                pattern = pattern.replace(os.path.sep, '/')
+            pattern = pattern.strip('/')
+            if pattern.startswith('**/'):
+                pattern = pattern[3:]
+                if '/' in pattern:
+                    path_patterns.append('*/' + pattern)
+            if not pattern:
+                continue
+            (path_patterns if '/' in pattern else name_patterns).append(pattern)
+        self._name = self._compile(name_patterns)
+        self._path = self._compile(path_patterns)
+
+    @staticmethod
+    def _compile(patterns: List[str]) -> Optional["re.Pattern"]:
+        return re.compile('|'.join(fnmatch.translate(p) for p in patterns)) if patterns else None
+
+    def __bool__(self) -> bool:
+        return self._name is not None or self._path is not None
+
+    def matches(self, relative_path: str, name: str) -> bool:
+        return ((self._name is not None and self._name.match(name) is not None)
+                or (self._path is not None and self._path.match(relative_path) is not None))
+
+    def matches_directory(self, relative_dir: str, name: str) -> bool:
+        # 'drafts/**' исключает и саму директорию drafts
+        return self.matches(relative_dir, name) or (self._path is not None
+                                                    and self._path.match(relative_dir + '/') is not None)
+
+class ListingCache:
+    """
+    Кеш списков директорий в SQLite: для каждой директории (путь относительно input_dir) хранится
+    mtime_ns и ее поддиректории и входные файлы. Кеш другой входной директории или другого набора
+    расширений не используется. Доступ из потоков параллельного обхода - под блокировкой.
+    """
+
+    def __init__(self, path: str, input_dir: str, extensions: Sequence[str] = INPUT_EXTENSIONS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._writes = 0
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            " directory TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " entries TEXT NOT NULL)"
+        )
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        scope = '\0'.join([_LISTING_CACHE_SCHEMA_VERSION, os.path.abspath(input_dir)] + sorted(extensions))
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'scope'").fetchone()
+        if row is None or row[0] != scope:
+            self._connection.execute("DELETE FROM listings")
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('scope', ?)", (scope,))
+        self._connection.commit()
+
+    def get(self, relative_dir: str, mtime_ns: int) -> Optional[List[Tuple[bool, str]]]:
+        """Сохраненный список [(это директория, имя)] или None, если его нет или директория изменилась."""
+        with self._lock:
+            self._seen.add(relative_dir)
+            row = self._connection.execute("SELECT mtime_ns, entries FROM listings WHERE directory = ?",
+                                           (relative_dir,)).fetchone()
+        if row is None or row[0] != mtime_ns:
+            return None
+        # Имена файлов не содержат '\0': им разделяются записи, первый символ - тип записи
+        return [(entry[0] == 'd', entry[1:]) for entry in row[1].split('\0') if entry]
+
+    def put(self, relative_dir: str, mtime_ns: int, entries: List[Tuple[bool, str]]) -> None:
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            return
+        encoded = '\0'.join(('d' if is_dir else 'f') + name for is_dir, name in entries)
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO listings (directory, mtime_ns, entries) VALUES (?, ?, ?)",
+                                     (relative_dir, mtime_ns, encoded))
+            self._writes += 1
+            if self._writes % _LISTING_CACHE_COMMIT_INTERVAL == 0:
+                self._connection.commit()
+
+    def close(self, prune: bool = False) -> None:
+        """Сохраняет кеш; prune=True (полный обход) удаляет списки директорий, которых больше нет."""
+        with self._lock:
+            if prune:
+                stale = [(directory,) for directory, in self._connection.execute("SELECT directory FROM listings")
+                         if directory not in self._seen]
+                self._connection.executemany("DELETE FROM listings WHERE directory = ?", stale)
+            self._connection.commit()
+            self._connection.close()
+
+class InputDiscovery:
+    """
+    Итерация по входным файлам input_dir (InputFile по мере нахождения).
+
+    Args:
+        input_dir (str): Входная директория.
+        recursive (bool): Обходить ли подпапки.
+        include (str или list, optional): Шаблоны файлов, которые нужно обработать (см. PathPatterns).
+                                          None - все файлы с расширениями extensions.
+        exclude (str или list, optional): Шаблоны исключаемых файлов и директорий.
+        threads (int): Потоки обхода директорий; 1 - обход в потоке потребителя.
+        cache_path (str, optional): Файл кеша списков директорий (см. ListingCache). None - без кеша.
+        extensions (tuple): Расширения входных файлов (без учета регистра).
+
+    После полного обхода stats содержит число директорий ("directories"), из них взятых из кеша
+    ("cached_directories"), число найденных файлов ("files") и время обхода ("seconds").
+    """
+
+    def __init__(self, input_dir: str, recursive: bool = True, include: Patterns = None, exclude: Patterns = None,
+                 threads: int = DEFAULT_DISCOVERY_THREADS, cache_path: Optional[str] = None,
+                 extensions: Sequence[str] = INPUT_EXTENSIONS):
+        self.input_dir = os.path.normpath(input_dir)
+        self.recursive = recursive
+        self.threads = max(1, threads)
+        self.cache_path = cache_path
+        self._include = PathPatterns(include)
+        self._exclude = PathPatterns(exclude)
+        self._extensions = tuple(extension.lower() for extension in extensions)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Union[int, float]] = {"directories": 0, "cached_directories": 0, "files": 0,
+                                                    "seconds": 0.0}
+
+    def selects(self, relative_path: str) -> bool:
+        """Попал бы файл с таким относительным путем (с '/') в обход с текущими шаблонами."""
+        parts = relative_path.split('/')
+        if not parts[-1].lower().endswith(self._extensions):
+            return False
+        if self._exclude:
+            for depth in range(1, len(parts)):
+                if self._exclude.matches_directory('/'.join(parts[:depth]), parts[depth - 1]):
+                    return False
+        return self._accepts_file(relative_path, parts[-1])
+
+    def _accepts_file(self, relative_path: str, name: str) -> bool:
+        if self._include and not self._include.matches(relative_path, name):
+            return False
+        return not (self._exclude and self._exclude.matches(relative_path, name))
+
+    def _accepts_directory(self, relative_dir: str, name: str) -> bool:
+        return self.recursive and not (self._exclude and self._exclude.matches_directory(relative_dir, name))
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _list_directory(self, path: str, relative_dir: str,
+                        cache: Optional[ListingCache]) -> Iterator[Tuple[bool, str]]:
+        """Поддиректории и входные файлы директории: (это директория, имя) по мере чтения каталога."""
+        self._count("directories")
+        if cache is not None:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError as e:
+                print(f"Предупреждение: не удалось прочитать директорию {path}: {e}")
+                return
+            cached = cache.get(relative_dir, mtime_ns)
+            if cached is not None:
+                self._count("cached_directories")
+                yield from cached
+                return
+        listing = [] if cache is not None else None
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            item = (True, entry.name)
+                        elif entry.name.lower().endswith(self._extensions) and entry.is_file():
+                            item = (False, entry.name)
+                        else:
+                            continue
+                    except OSError: # Запись удалена между чтением каталога и stat
+                        continue
+                    if listing is not None:
+                        listing.append(item)
+                    yield item
+        except OSError as e:
+            print(f"Предупреждение: не удалось прочитать директорию {path}: {e}")
+            return
+        if cache is not None:
+            cache.put(relative_dir, mtime_ns, listing)
+
+    def _walk(self, cache: Optional[ListingCache]) -> Iterator[InputFile]:
+        """Обход в глубину в потоке потребителя: следующая директория читается, когда нужны ее файлы."""
+        pending_dirs = [(self.input_dir, "")]
+        while pending_dirs:
+            path, relative_dir = pending_dirs.pop()
+            subdirs = []
+            for is_dir, name in self._list_directory(path, relative_dir, cache):
+                relative_path = f"{relative_dir}/{name}" if relative_dir else name
+                if is_dir:
+                    if self._accepts_directory(relative_path, name):
+                        subdirs.append((os.path.join(path, name), relative_path))
+                elif self._accepts_file(relative_path, name):
+                    yield InputFile(os.path.join(path, name), relative_path, relative_dir)
+            pending_dirs.extend(reversed(subdirs))
+
+    def _walk_parallel(self, cache: Optional[ListingCache]) -> Iterator[InputFile]:
+        """Обход пулом потоков: каждая директория - отдельная задача, файлы - в ограниченную очередь."""
+        found: queue.Queue = queue.Queue(maxsize=_DISCOVERY_QUEUE_SIZE)
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="discovery")
+        pending_count = 1
+        pending_lock = threading.Lock()
+
+        def scan(path: str, relative_dir: str) -> None:
+            nonlocal pending_count
+            try:
+                for is_dir, name in self._list_directory(path, relative_dir, cache):
+                    relative_path = f"{relative_dir}/{name}" if relative_dir else name
+                    if is_dir:
+                        if self._accepts_directory(relative_path, name) and not stop.is_set():
+                            with pending_lock:
+                                pending_count += 1
+                            executor.submit(scan, os.path.join(path, name), relative_path)
+                    elif self._accepts_file(relative_path, name):
+                        if not _put(found, InputFile(os.path.join(path, name), relative_path, relative_dir), stop):
+                            return
+            except BaseException as e: # В том числе отказ пула после остановки потребителем
+                if not stop.is_set():
+                    _put(found, _End(e), stop)
+                return
+            with pending_lock:
+                pending_count -= 1
+                finished = pending_count == 0
+            if finished:
+                _put(found, _End(), stop)
+
+        executor.submit(scan, self.input_dir, "")
+        try:
+            yield from _consume(found, stop)
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __iter__(self) -> Iterator[InputFile]:
+        started_at = time.perf_counter()
+        cache = ListingCache(self.cache_path, self.input_dir, self._extensions) if self.cache_path else None
+        walker = self._walk_parallel(cache) if self.threads > 1 else self._walk(cache)
+        complete = False
+        try:
+            for input_file in walker:
+                self.stats["files"] += 1
+                yield input_file
+            complete = True
+        finally:
+            # Потоки обхода останавливаются до закрытия кеша
+            walker.close()
+            if cache is not None:
+                cache.close(prune=complete and self.recursive)
+            self.stats["seconds"] = time.perf_counter() - started_at
+
+def iter_input_files(input_dir: str, recursive: bool = True, include: Patterns = None, exclude: Patterns = None,
+                     threads: int = DEFAULT_DISCOVERY_THREADS, cache_path: Optional[str] = None) -> Iterator[InputFile]:
+    """Входные файлы (.docx, .txt) input_dir по мере нахождения (см. InputDiscovery)."""
+    return iter(InputDiscovery(input_dir, recursive, include, exclude, threads, cache_path))
+
+def relative_posix_path(path: str, base_dir: str) -> str:
+    """
+    Путь относительно base_dir с разделителями '/' (ключ манифеста не зависит от ОС). Для путей
+    внутри base_dir - отрезанием префикса, без os.path.relpath (он нормализует оба пути на каждый вызов).
+    """
+    prefix = base_dir if base_dir.endswith(os.path.sep) else base_dir + os.path.sep
+    relative = path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, base_dir)
+    return relative.replace(os.path.sep, '/') if os.path.sep != '/' else relative
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print("Использование: python -m dataset_preparation.src.discovery <входная директория> [потоков]")
+        sys.exit(1)
+    discovery = InputDiscovery(sys.argv[1], threads=int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    for input_file in discovery:
+        print(input_file.relative_path)
+    print(f"Директорий: {discovery.stats['directories']}, файлов: {discovery.stats['files']}, "
+          f"{discovery.stats['seconds']:.2f} сек", file=sys.stderr)
@@ -1,52 +1,365 @@
 # Dream-Team-core/dataset_preparation/src/file_loaders.py
 import os
-import docx
 import re
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import IO, Dict, Iterable, Iterator, List, Optional
 from .text_cleaner import clean_text # Импортируем из нашего же пакета
 
+# Способ выделения абзацев в .txt (и внутри абзацев .docx, разбитых разрывами строк):
+# - "blank_line" (по умолчанию) - абзацы разделены пустыми строками;
+# - "single_newline" - каждая непустая строка - отдельный абзац (экспорт книг без пустых строк);
+# - "indent" - новый абзац начинается со строки с отступом (пробел, табуляция) или с тире реплики
+#   диалога, а также после пустой строки; строки без отступа продолжают текущий абзац
+#   (текст с жесткими переносами строк).
+# Выбирается переменной окружения DREAM_TEAM_PARAGRAPH_MODE или set_paragraph_detection().
+PARAGRAPH_MODES = ("blank_line", "single_newline", "indent")
+DEFAULT_PARAGRAPH_MODE = "blank_line"
+# Предельная длина абзаца в символах (после очистки). Более длинный абзац делится на части по
+# границам предложений (если их нет - по пробелам), поэтому ни память при чтении, ни размер записи
+# не растут с длиной абзаца. Переменная окружения DREAM_TEAM_MAX_PARAGRAPH_CHARS.
+# По умолчанию 0 - без ограничения: деление меняет paragraph_index и id записей, поэтому включается
+# явно (например, 20000), а предел записывается в настройки манифеста.
+DEFAULT_MAX_PARAGRAPH_CHARS = 0
+
+def _normalize_paragraph_mode(mode: str) -> str:
+    name = mode.strip().lower()
+    if name not in PARAGRAPH_MODES:
+        raise ValueError(f"Неизвестный способ выделения абзацев: '{mode}'. Доступны: {', '.join(PARAGRAPH_MODES)}")
+    return name
+
+def _normalize_max_paragraph_chars(max_chars: int) -> int:
+    max_chars = int(max_chars)
+    if max_chars < 0:
+        raise ValueError(f"Предельная длина абзаца не может быть отрицательной: {max_chars}")
+    return max_chars
+
+_PARAGRAPH_MODE = _normalize_paragraph_mode(os.environ.get("DREAM_TEAM_PARAGRAPH_MODE", "") or DEFAULT_PARAGRAPH_MODE)
+_MAX_PARAGRAPH_CHARS = _normalize_max_paragraph_chars(
+    os.environ.get("DREAM_TEAM_MAX_PARAGRAPH_CHARS", "") or DEFAULT_MAX_PARAGRAPH_CHARS)
+
+def set_paragraph_detection(mode: Optional[str] = None, max_chars: Optional[int] = None) -> None:
+    """Задает для текущего процесса способ выделения абзацев и (или) предельную длину абзаца."""
+    global _PARAGRAPH_MODE, _MAX_PARAGRAPH_CHARS
+    if mode is not None:
+        _PARAGRAPH_MODE = _normalize_paragraph_mode(mode)
+    if max_chars is not None:
+        _MAX_PARAGRAPH_CHARS = _normalize_max_paragraph_chars(max_chars)
+
+def get_paragraph_detection() -> Dict[str, object]:
+    """Текущие настройки выделения абзацев: {"mode": ..., "max_chars": ...}."""
+    return {"mode": _PARAGRAPH_MODE, "max_chars": _MAX_PARAGRAPH_CHARS}
+
+# Граница предложения для деления слишком длинного абзаца: знак конца предложения (с закрывающими
+# кавычками и скобками), пробел и начало следующего предложения (заглавная буква, цифра, кавычка, тире)
+_SENTENCE_BOUNDARY = re.compile(r'[.!?…]+[»"”’)\]]*\s+(?=[«"„“(\[\-–—0-9A-ZА-ЯЁ])')
+# Символы, с которых в режиме "indent" начинается новый абзац (кроме пробельных): тире реплики
+_DIALOGUE_DASHES = ("—", "–", "-")
+
+def _split_oversized_text(text: str, max_chars: int) -> Iterator[str]:
+    """
+    Делит очищенный текст длиннее max_chars на части не длиннее max_chars: по последней границе
+    предложения в пределах max_chars, если ее нет - по последнему пробелу, иначе - ровно по max_chars.
+    Последняя часть возвращается вместе с остальными.
+    """
+    while len(text) > max_chars:
+        cut = None
+        for match in _SENTENCE_BOUNDARY.finditer(text, 0, max_chars + 2):
+            cut = match
+        if cut is not None and cut.start() > 0:
+            head, text = text[:cut.end()].rstrip(), text[cut.end():]
+        else:
+            space = text.rfind(' ', 1, max_chars + 1)
+            if space > 0:
+                head, text = text[:space], text[space + 1:]
+            else:
+                head, text = text[:max_chars], text[max_chars:]
+        yield head
+    if text:
+        yield text
+
+_NO_PARAGRAPHS: List[str] = [] # Общий пустой результат feed() (не изменяется)
+
+class _ParagraphAssembler:
+    """
+    Собирает абзацы из последовательных частей строк по способу mode; feed() и finish() возвращают
+    готовые очищенные абзацы. Если накопленный текст превышает max_chars, его начало сразу
+    выдается частями по границам предложений, так что в памяти держится не больше
+    max_chars + длина одной части строки.
+    """
+
+    def __init__(self, mode: str, max_chars: int):
+        self._mode = mode
+        self._max_chars = max_chars
+        self._lines: List[str] = []
+        self._chars = 0
+        self._at_line_start = True
+        self._indent = "" # Пробельное начало строки, пришедшее отдельными частями (см. feed)
+
+    def feed(self, piece: str) -> List[str]:
+        """Очередная часть текста; строка может приходить несколькими частями (конец строки - '\n')."""
+        ready = _NO_PARAGRAPHS
+        if self._at_line_start:
+            if piece[-1] != '\n' and piece.isspace():
+                # Пробельный отрезок длиннее блока чтения в начале строки: пустая ли это строка, станет
+                # ясно по следующим частям. Хранится один его символ - при очистке отрезок все равно
+                # сжимается в один пробел, а для режима "indent" важен только отступ
+                self._indent = self._indent or piece[0]
+                return _NO_PARAGRAPHS
+            if self._indent:
+                piece = self._indent + piece
+                self._indent = ""
+            self._at_line_start = piece[-1] == '\n'
+            if piece.isspace():
+                # Пустая строка - граница абзаца при любом способе
+                return self.finish() if self._lines else _NO_PARAGRAPHS
+            if self._lines and (self._mode == "single_newline" or (
+                    self._mode == "indent" and (piece[0].isspace() or piece.startswith(_DIALOGUE_DASHES)))):
+                ready = self.finish()
+        else:
+            self._at_line_start = piece[-1] == '\n'
+        self._lines.append(piece)
+        self._chars += len(piece)
+        if self._max_chars and self._chars > self._max_chars:
+            raw_text = ''.join(self._lines)
+            parts = list(_split_oversized_text(clean_text(raw_text), self._max_chars))
+            tail = parts.pop() if parts else ""
+            ready = ready + parts
+            # Остаток начинает следующую часть абзаца; пробельный конец сохраняется, чтобы
+            # следующая строка не склеилась с последним словом
+            if tail and raw_text[-1].isspace():
+                tail += ' '
+            self._lines = [tail] if tail else []
+            self._chars = len(tail)
+        return ready
+
+    def finish(self) -> List[str]:
+        """Завершает текущий абзац."""
+        raw_text = ''.join(self._lines)
+        self._lines = []
+        self._chars = 0
+        self._indent = ""
+        paragraph = clean_text(raw_text)
+        if not paragraph:
+            return []
+        if self._max_chars and len(paragraph) > self._max_chars:
+            return list(_split_oversized_text(paragraph, self._max_chars))
+        return [paragraph]
+
+def _resolve_detection(mode: Optional[str], max_chars: Optional[int]) -> Dict[str, object]:
+    return {"mode": _normalize_paragraph_mode(mode) if mode is not None else _PARAGRAPH_MODE,
+            "max_chars": _normalize_max_paragraph_chars(max_chars) if max_chars is not None else _MAX_PARAGRAPH_CHARS}
+
+def split_paragraph_text(text: str, mode: Optional[str] = None, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Делит текст одного абзаца (например, абзаца .docx с разрывами строк) на очищенные абзацы
+    по способу mode и предельной длине max_chars (None - текущие настройки, см. set_paragraph_detection).
+    В режиме "blank_line" абзац делится только по предельной длине.
+    """
+    detection = _resolve_detection(mode, max_chars)
+    assembler = _ParagraphAssembler(detection["mode"], detection["max_chars"])
+    if detection["mode"] == "blank_line":
+        lines: Iterable[str] = [text] if text else []
+    else:
+        lines = text.splitlines(keepends=True)
+    paragraphs: List[str] = []
+    for line in lines:
+        paragraphs.extend(assembler.feed(line))
+    paragraphs.extend(assembler.finish())
+    return paragraphs
+
+# Элементы WordprocessingML, из которых складывается текст абзаца (как Paragraph.text в python-docx)
+_W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W_NAMESPACE + "body"
+_W_PARAGRAPH = _W_NAMESPACE + "p"
+_W_RUN = _W_NAMESPACE + "r"
+_W_HYPERLINK = _W_NAMESPACE + "hyperlink"
+_W_TEXT = _W_NAMESPACE + "t"
+_W_BREAK = _W_NAMESPACE + "br"
+_W_BREAK_TYPE = _W_NAMESPACE + "type"
+# Элементы внутри w:r, заменяемые символом (w:br обрабатывается отдельно: зависит от типа разрыва)
+_W_RUN_CHARACTERS = {
+    _W_NAMESPACE + "cr": "\n",
+    _W_NAMESPACE + "noBreakHyphen": "-",
+    _W_NAMESPACE + "ptab": "\t",
+    _W_NAMESPACE + "tab": "\t",
+}
+_DEFAULT_MAIN_DOCUMENT_PART = "word/document.xml"
+
+def _find_main_document_part(archive: zipfile.ZipFile) -> str:
+    """Имя части с основным текстом документа (по связи officeDocument в _rels/.rels)."""
+    try:
+        relationships = ET.fromstring(archive.read("_rels/.rels"))
+    except KeyError:
+        return _DEFAULT_MAIN_DOCUMENT_PART
+    for relationship in relationships:
+        if relationship.get("Type", "").endswith("/officeDocument"):
+            return relationship.get("Target", _DEFAULT_MAIN_DOCUMENT_PART).lstrip("/")
+    return _DEFAULT_MAIN_DOCUMENT_PART
+
+def _append_run_text(run: ET.Element, parts: List[str]) -> None:
+    for child in run:
+        tag = child.tag
+        if tag == _W_TEXT:
+            if child.text:
+                parts.append(child.text)
+        elif tag == _W_BREAK:
+            # Разрыв строки - перевод строки, разрывы страницы и колонки текста не дают
+            if child.get(_W_BREAK_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in _W_RUN_CHARACTERS:
+            parts.append(_W_RUN_CHARACTERS[tag])
+
+def _docx_paragraph_text(paragraph: ET.Element) -> str:
+    """Текст абзаца w:p: прямые дочерние w:r и w:r внутри w:hyperlink (как в python-docx)."""
+    parts: List[str] = []
+    for child in paragraph:
+        if child.tag == _W_RUN:
+            _append_run_text(child, parts)
+        elif child.tag == _W_HYPERLINK:
+            for run in child:
+                if run.tag == _W_RUN:
+                    _append_run_text(run, parts)
+    return "".join(parts)
+
+def _iter_docx_body_paragraphs(document_xml: IO[bytes]) -> Iterator[str]:
+    """
+    Инкрементально разбирает document.xml и возвращает текст абзацев, непосредственно вложенных
+    в w:body (абзацы таблиц, как и в docx.Document.paragraphs, не учитываются). Разобранные
+    элементы верхнего уровня сразу удаляются, поэтому в памяти держится только текущий.
+    """
+    depth = 0 # Глубина текущего элемента: w:document - 1, w:body - 2, абзацы тела - 3
+    body = None
+    for event, element in ET.iterparse(document_xml, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and element.tag == _W_BODY:
+                body = element
+            continue
+        if depth == 3 and body is not None:
+            if element.tag == _W_PARAGRAPH:
+                yield _docx_paragraph_text(element)
+            body.clear()
+        elif depth == 2 and element is body:
+            body = None
+        depth -= 1
+
+def iter_paragraphs_from_docx(file_path: str, mode: Optional[str] = None,
+                             max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    Потоково читает файл .docx и по одному возвращает очищенные непустые абзацы.
+    Текст берется прямо из word/document.xml внутри zip-архива инкрементальным XML-парсером,
+    без построения docx.Document; при настройках по умолчанию результат совпадает с абзацами python-docx
+    (кроме абзацев длиннее предельной длины). mode и max_chars - см. split_paragraph_text.
+
+    Ошибки чтения не перехватываются: вызывающий код должен отличать частично прочитанный файл
+    от успешно прочитанного.
+    """
+    if not os.path.exists(file_path):
+        print(f"Ошибка: Файл не найден по пути {file_path}")
+        return
+    detection = _resolve_detection(mode, max_chars)
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open(_find_main_document_part(archive)) as document_xml:
+            for paragraph_text in _iter_docx_body_paragraphs(document_xml):
+                yield from split_paragraph_text(paragraph_text, **detection)
+
 def load_paragraphs_from_docx(file_path: str) -> list[str]:
     """
     Загружает текст из файла .docx в виде списка абзацев.
     Каждый абзац предварительно очищается.
+    Для больших файлов используйте iter_paragraphs_from_docx (не держит все абзацы в памяти).
     """
-    if not os.path.exists(file_path):
-        print(f"Ошибка: Файл не найден по пути {file_path}")
-        return []
     try:
-        doc = docx.Document(file_path)
-        # Сохраняем только непустые абзацы после очистки
-        paragraphs = [clean_text(para.text) for para in doc.paragraphs if clean_text(para.text)]
-        return paragraphs
+        return list(iter_paragraphs_from_docx(file_path))
     except Exception as e:
         print(f"Ошибка при чтении .docx файла {file_path}: {e}")
         return []
 
+# Размер буфера чтения для потоковой загрузки .txt
+_TXT_READ_BUFFER_SIZE = 1024 * 1024
+# Текст .txt читается блоками этого размера (в символах): строка длиннее блока передается частями,
+# поэтому файл без переводов строк не читается в память целиком
+_TXT_READ_BLOCK_CHARS = 256 * 1024
+
+def _iter_line_pieces(file: IO[str]) -> Iterator[str]:
+    """Строки файла (с '\n'); строки длиннее блока чтения - несколькими частями."""
+    carry = ""
+    for block in iter(lambda: file.read(_TXT_READ_BLOCK_CHARS), ''):
+        lines = (carry + block).split('\n')
+        carry = lines.pop()
+        for line in lines:
+            yield line + '\n'
+        if len(carry) >= _TXT_READ_BLOCK_CHARS:
+            yield carry # Часть длинной строки: конец строки придет следующими частями
+            carry = ""
+    if carry:
+        yield carry
+
+def iter_paragraphs_from_txt(file_path: str, mode: Optional[str] = None,
+                            max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    Потоково читает файл .txt и по одному возвращает очищенные абзацы, не загружая файл целиком.
+    В режиме "blank_line" абзацы разделены одной или несколькими пустыми (или состоящими только
+    из пробельных символов) строками - то же разбиение, что и re.split(r'\\n\\s*\\n+', ...) по всему
+    тексту. mode и max_chars - способ выделения абзацев и предельная длина абзаца
+    (None - текущие настройки, см. set_paragraph_detection). Память не зависит ни от размера
+    файла, ни (при max_chars > 0) от длины абзацев и строк.
+
+    Ошибки чтения не перехватываются: вызывающий код должен отличать частично прочитанный файл
+    от успешно прочитанного.
+    """
+    if not os.path.exists(file_path):
+        print(f"Ошибка: Файл не найден по пути {file_path}")
+        return
+    detection = _resolve_detection(mode, max_chars)
+    assembler = _ParagraphAssembler(detection["mode"], detection["max_chars"])
+    with open(file_path, 'r', encoding='utf-8', buffering=_TXT_READ_BUFFER_SIZE) as file:
+        feed = assembler.feed
+        for piece in _iter_line_pieces(file):
+            paragraphs = feed(piece)
+            if paragraphs:
+                yield from paragraphs
+        yield from assembler.finish()
+
 def load_paragraphs_from_txt(file_path: str) -> list[str]:
     """
     Загружает текст из файла .txt и разбивает на абзацы.
-    Абзацы разделены одной или несколькими пустыми строками.
+    Абзацы разделены одной или несколькими пустыми строками (способ выделения абзацев и предельная
+    длина - текущие настройки, см. set_paragraph_detection).
     Каждый абзац предварительно очищается.
+    Для больших файлов используйте iter_paragraphs_from_txt (не держит все абзацы в памяти).
     """
-    if not os.path.exists(file_path):
-        print(f"Ошибка: Файл не найден по пути {file_path}")
-        return []
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        # Разбиваем по двум или более символам новой строки, затем очищаем каждый абзац
-        # Также убираем пустые строки, которые могут образоваться после split
-        paragraphs = [clean_text(p) for p in re.split(r'\n\s*\n+', content) if clean_text(p)]
-        return paragraphs
+        return list(iter_paragraphs_from_txt(file_path))
     except Exception as e:
         print(f"Ошибка при чтении .txt файла {file_path}: {e}")
         return []
 
+SUPPORTED_EXTENSIONS = ('.docx', '.txt')
+
+def iter_paragraphs_from_file(file_path: str, mode: Optional[str] = None,
+                              max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    Потоковое чтение абзацев файла .docx или .txt (загрузчик выбирается по расширению).
+    Для неподдерживаемого расширения сразу возбуждает ValueError.
+    mode и max_chars - способ выделения абзацев и предельная длина (см. set_paragraph_detection).
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.docx':
+        return iter_paragraphs_from_docx(file_path, mode, max_chars)
+    if extension == '.txt':
+        return iter_paragraphs_from_txt(file_path, mode, max_chars)
+    raise ValueError(f"Неподдерживаемый формат файла: {file_path}. Поддерживаются .docx и .txt")
+
 if __name__ == '__main__':
     # Для тестирования этого модуля, вам нужно создать тестовые файлы
     # в папке ../input_texts/ относительно текущей папки src
     # Пример: Dream-Team-core/dataset_preparation/input_texts/test_load.docx
     #         Dream-Team-core/dataset_preparation/input_texts/test_load.txt
 
+    import docx
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     input_texts_dir = os.path.join(os.path.dirname(current_dir), "input_texts")
     os.makedirs(input_texts_dir, exist_ok=True) # Создаем папку, если ее нет
@@ -0,0 +1,247 @@
+# Dream-Team-core/dataset_preparation/src/instrumentation.py
+# Инструментирование конвейера: время (настенное и процессорное) по этапам, счетчики,
+# задержки обработки файлов с перцентилями и итоговый JSON-отчет. Отключенное
+# инструментирование (NULL_METRICS) сводится к вызову пустых методов.
+# Процессорное время этапов считается по потоку (time.thread_time): этапы могут выполняться
+# в фоновых потоках (предзагрузка, запись - см. io_pipeline), и их время не смешивается.
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+class _StageTimer:
+    """Контекстный менеджер замера одного вызова этапа."""
+    __slots__ = ("_metrics", "_name", "_wall_start", "_cpu_start")
+
+    def __init__(self, metrics: "PipelineMetrics", name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._metrics.add_stage_time(
+            self._name, time.perf_counter() - self._wall_start, time.thread_time() - self._cpu_start
+        )
+        return False
+
+class _NullStageTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_STAGE_TIMER = _NullStageTimer()
+
+class PipelineMetrics:
+    """
+    Накопитель метрик одного запуска (или одного файла в процессе-обработчике).
+    Метрики процессов-обработчиков передаются в основной процесс через to_dict() и объединяются merge().
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0]) # name -> [wall, cpu, calls]
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.file_latencies: Dict[str, float] = {}
+        self.file_peak_memory: Dict[str, int] = {}
+        # Этапы и счетчики обновляются и из фоновых потоков
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> _StageTimer:
+        return _StageTimer(self, name)
+
+    def add_stage_time(self, name: str, wall_seconds: float, cpu_seconds: float) -> None:
+        with self._lock:
+            stage = self.stages[name]
+            stage[0] += wall_seconds
+            stage[1] += cpu_seconds
+            stage[2] += 1
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """Оборачивает ленивый итератор (например, загрузчик абзацев), замеряя время получения каждого элемента."""
+        iterator = iter(iterable)
+        while True:
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_stage_time(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+                return
+            self.add_stage_time(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+            yield item
+
+    def add(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += value
+
+    def record_file(self, file_path: str, latency_seconds: float, peak_memory_bytes: Optional[int] = None) -> None:
+        self.file_latencies[file_path] = latency_seconds
+        if peak_memory_bytes is not None:
+            self.file_peak_memory[file_path] = peak_memory_bytes
+
+    def to_dict(self) -> Dict:
+        return {
+            "stages": {name: list(values) for name, values in self.stages.items()},
+            "counters": dict(self.counters),
+            "file_latencies": dict(self.file_latencies),
+            "file_peak_memory": dict(self.file_peak_memory),
+        }
+
+    def merge(self, data: Dict) -> None:
+        for name, (wall, cpu, calls) in data.get("stages", {}).items():
+            stage = self.stages[name]
+            stage[0] += wall
+            stage[1] += cpu
+            stage[2] += calls
+        for counter, value in data.get("counters", {}).items():
+            self.counters[counter] += value
+        self.file_latencies.update(data.get("file_latencies", {}))
+        self.file_peak_memory.update(data.get("file_peak_memory", {}))
+
+    def report(self, wall_seconds: float, cpu_seconds: float, extra: Optional[Dict] = None) -> Dict:
+        """
+        Формирует итоговый отчет. wall_seconds/cpu_seconds - длительность всего запуска
+        (процессорное время - только основного процесса; время этапов - суммарно по всем процессам).
+        """
+        stages_wall_total = sum(values[0] for values in self.stages.values())
+        stages = {
+            name: {
+                "wall_seconds": wall,
+                "cpu_seconds": cpu,
+                "calls": calls,
+                "share_of_stage_time": (wall / stages_wall_total) if stages_wall_total > 0 else None,
+            }
+            for name, (wall, cpu, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0])
+        }
+        throughput = {
+            f"{counter}_per_second": (value / wall_seconds if wall_seconds > 0 else None)
+            for counter, value in self.counters.items()
+        }
+        latencies = sorted(self.file_latencies.values())
+        report = {
+            "wall_seconds": wall_seconds,
+            "cpu_seconds_main_process": cpu_seconds,
+            "counters": dict(self.counters),
+            "throughput": throughput,
+            "stages": stages,
+            "file_latency_seconds": {
+                "count": len(latencies),
+                "mean": (sum(latencies) / len(latencies)) if latencies else None,
+                "p50": _percentile(latencies, 50),
+                "p90": _percentile(latencies, 90),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+            "slowest_files": [
+                {"file": path, "seconds": seconds}
+                for path, seconds in sorted(self.file_latencies.items(), key=lambda item: -item[1])[:10]
+            ],
+        }
+        if self.file_peak_memory:
+            report["peak_traced_memory_bytes"] = {
+                "max": max(self.file_peak_memory.values()),
+                "largest_files": [
+                    {"file": path, "bytes": peak}
+                    for path, peak in sorted(self.file_peak_memory.items(), key=lambda item: -item[1])[:10]
+                ],
+            }
+        if extra:
+            report.update(extra)
+        return report
+
+class _NullMetrics:
+    """Отключенное инструментирование: тот же интерфейс, что у PipelineMetrics, без накладных расходов."""
+    enabled = False
+
+    def stage(self, name: str) -> _NullStageTimer:
+        return _NULL_STAGE_TIMER
+
+    def add_stage_time(self, name: str, wall_seconds: float, cpu_seconds: float) -> None:
+        pass
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterable:
+        return iterable
+
+    def add(self, counter: str, value: int = 1) -> None:
+        pass
+
+    def record_file(self, file_path: str, latency_seconds: float, peak_memory_bytes: Optional[int] = None) -> None:
+        pass
+
+    def to_dict(self) -> Dict:
+        return {}
+
+    def merge(self, data: Dict) -> None:
+        pass
+
+NULL_METRICS = _NullMetrics()
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Перцентиль с линейной интерполяцией по отсортированному списку."""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def write_metrics_report(report_path: str, report: Dict[str, Union[float, int, Dict, List]]) -> None:
+    """Атомарно записывает JSON-отчет с метриками."""
+    report_dir = os.path.dirname(report_path)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    tmp_path = report_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, report_path)
+
+class FileProfiler:
+    """
+    Необязательные "тяжелые" хуки для обработки одного файла: cProfile (статистика сохраняется
+    в profile_path) и tracemalloc (пиковый объем памяти, выделенной Python во время обработки).
+    """
+
+    def __init__(self, profile_path: Optional[str] = None, trace_memory: bool = False):
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.peak_memory_bytes: Optional[int] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.trace_memory:
+            self._started_tracemalloc = not tracemalloc.is_tracing()
+            if self._started_tracemalloc:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiler is not None:
+            self._profiler.disable()
+            profile_dir = os.path.dirname(self.profile_path)
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+        if self.trace_memory:
+            self.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        return False
@@ -0,0 +1,203 @@
+# Dream-Team-core/dataset_preparation/src/io_pipeline.py
+# Конвейер "производитель - потребитель" на ограниченных очередях: ввод-вывод выполняется
+# в фоновых потоках параллельно с CPU-нагруженными этапами NLP.
+# - FilePrefetcher: потоки заранее читают и очищают абзацы следующих файлов, пока текущий
+#   проходит разбиение и NER (при последовательной обработке в одном процессе);
+# - iter_in_background: то же для абзацев одного файла (в процессах-обработчиках пула);
+# - BackgroundConsumer: поток записи, который сериализует и сбрасывает записи на диск.
+# Очереди ограничены по размеру: производитель, обогнавший потребителя, ждет (обратное давление),
+# поэтому в памяти держится не больше нескольких сотен абзацев на файл независимо от размера входа.
+# Потоки оправдывают себя на медленном вводе-выводе (сетевые диски, .docx): распаковка zip и чтение
+# файлов отпускают GIL. Ошибки фоновых потоков передаются потребителю и возбуждаются у него.
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .file_loaders import iter_paragraphs_from_file
+
+DEFAULT_IO_THREADS = 2
+DEFAULT_QUEUE_SIZE = 256
+
+# Как часто (в секундах) заблокированный производитель проверяет, не отменена ли работа
+_STOP_CHECK_INTERVAL = 0.1
+
+T = TypeVar("T")
+
+# Маркер исчерпанных задач FilePrefetcher
+_NO_TASK = object()
+
+class _End:
+    """Маркер конца потока элементов (с исключением производителя, если оно было)."""
+    __slots__ = ("error",)
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+def _put(items: queue.Queue, item, stop: threading.Event) -> bool:
+    """Кладет элемент в очередь, ожидая свободного места; False, если работа отменена."""
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=_STOP_CHECK_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _produce(iterable_factory: Callable[[], Iterable], items: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for item in iterable_factory():
+            if not _put(items, item, stop):
+                return
+    except BaseException as e:
+        _put(items, _End(e), stop)
+        return
+    _put(items, _End(), stop)
+
+def _consume(items: queue.Queue, stop: threading.Event) -> Iterator:
+    """Элементы очереди до маркера конца; при досрочном закрытии останавливает производителя."""
+    try:
+        while True:
+            item = items.get()
+            if isinstance(item, _End):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        stop.set()
+
+def iter_in_background(iterable_factory: Callable[[], Iterable[T]],
+                       max_buffered: int = DEFAULT_QUEUE_SIZE, name: str = "prefetch") -> Iterator[T]:
+    """
+    Итерирует iterable_factory() в фоновом потоке, держа наготове не больше max_buffered элементов.
+    Исключение производителя возбуждается при получении следующего элемента.
+    """
+    items: queue.Queue = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+    thread = threading.Thread(target=_produce, args=(iterable_factory, items, stop), name=name, daemon=True)
+    thread.start()
+    return _consume(items, stop)
+
+class FilePrefetcher:
+    """
+    Предзагрузка абзацев файлов, обрабатываемых по порядку: пока потребитель обрабатывает файл,
+    потоки уже читают абзацы следующих files_ahead файлов (каждый - в свою очередь на queue_size
+    абзацев).
+
+    Использование:
+        with FilePrefetcher(tasks, key=lambda task: task[0]) as prefetcher:
+            for task, paragraphs in prefetcher:
+                ...
+    """
+
+    def __init__(self, tasks: Iterable[T], key: Callable[[T], str] = lambda task: task,
+                 files_ahead: int = DEFAULT_IO_THREADS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 loader: Callable[[str], Iterable[str]] = None):
+        # Задачи берутся из tasks по мере надобности: это может быть генератор, который еще ищет файлы
+        self._tasks = iter(tasks)
+        self._key = key
+        self._files_ahead = max(1, files_ahead)
+        self._queue_size = queue_size
+        self._loader = loader or iter_paragraphs_from_file
+        # Задачи на чтение ставятся в порядке файлов, поэтому текущий файл всегда читается
+        # раньше следующих и не ждет потоков, заблокированных на заполненных очередях
+        self._executor = ThreadPoolExecutor(max_workers=self._files_ahead, thread_name_prefix="prefetch")
+        self._scheduled: Deque[Tuple[T, queue.Queue, threading.Event]] = deque()
+        # Флаги остановки всех запущенных чтений: при досрочном закрытии останавливается и чтение
+        # текущего файла, уже выданного потребителю
+        self._stops: List[threading.Event] = []
+
+    def _schedule(self, count: int) -> None:
+        while len(self._scheduled) < count:
+            task = next(self._tasks, _NO_TASK)
+            if task is _NO_TASK:
+                return
+            file_path = self._key(task)
+            items: queue.Queue = queue.Queue(maxsize=self._queue_size)
+            stop = threading.Event()
+            self._executor.submit(_produce, lambda path=file_path: self._loader(path), items, stop)
+            self._scheduled.append((task, items, stop))
+            self._stops.append(stop)
+
+    def __iter__(self) -> Iterator[Tuple[T, Iterator[str]]]:
+        while True:
+            # Текущий файл и files_ahead следующих
+            self._schedule(1 + self._files_ahead)
+            if not self._scheduled:
+                return
+            task, items, stop = self._scheduled.popleft()
+            paragraphs = _consume(items, stop)
+            try:
+                yield task, paragraphs
+            finally:
+                # Если потребитель не дочитал абзацы (например, ошибка обработки), поток чтения
+                # не должен ждать места в очереди вечно
+                paragraphs.close()
+                stop.set()
+
+    def close(self) -> None:
+        for stop in self._stops:
+            stop.set()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "FilePrefetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class BackgroundConsumer:
+    """
+    Фоновый поток, вызывающий handle(item) для каждого элемента из ограниченной очереди
+    (например, сериализация и запись записей). put() ждет, если очередь заполнена, и возбуждает
+    ошибку потока, если она уже произошла; finish() дожидается обработки всех элементов.
+    """
+
+    def __init__(self, handle: Callable[[T], None], max_pending: int = DEFAULT_QUEUE_SIZE, name: str = "writer"):
+        self._handle = handle
+        self._items: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._items.get()
+            if isinstance(item, _End):
+                return
+            try:
+                self._handle(item)
+            except BaseException as e:
+                self._error = e
+                self._stop.set()
+                return
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def put(self, item: T) -> None:
+        self._raise_error()
+        if not _put(self._items, item, self._stop):
+            self._raise_error()
+            raise RuntimeError("Фоновый поток записи остановлен")
+
+    def finish(self) -> None:
+        """Дожидается обработки всех переданных элементов и возбуждает ошибку потока, если она была."""
+        if _put(self._items, _End(), self._stop):
+            self._thread.join()
+        self._raise_error()
+
+    def abort(self) -> None:
+        """Останавливает поток, не дожидаясь обработки оставшихся элементов."""
+        self._stop.set()
+        try:
+            while True:
+                self._items.get_nowait()
+        except queue.Empty:
+            pass
+        self._items.put(_End())
+        self._thread.join()
@@ -1,8 +1,226 @@
 # Dream-Team-core/dataset_preparation/src/main_creator.py
+import contextlib
+import itertools
 import os
-from .data_processor import process_file_to_jsonl
+import shutil
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-def run_dataset_creation_pipeline(input_dir: str = None, output_dir: str = None, recursive_search: bool = True): # Изменили recursive_search по умолчанию на True
+from .checkpoints import DEFAULT_CHECKPOINT_INTERVAL_SECONDS
+from .data_processor import get_output_file_path, process_file_to_jsonl, warm_up_pipeline_components
+from .deduplication import (
+    DEDUP_MODES,
+    DEFAULT_SIMILARITY_THRESHOLD,
+    duplicates_digest,
+    find_duplicate_paragraphs,
+    write_duplicates_report,
+)
+from .discovery import DEFAULT_DISCOVERY_THREADS, InputDiscovery, InputFile, relative_posix_path
+from .file_loaders import (
+    DEFAULT_MAX_PARAGRAPH_CHARS,
+    DEFAULT_PARAGRAPH_MODE,
+    get_paragraph_detection,
+    set_paragraph_detection,
+)
+from .instrumentation import NULL_METRICS, FileProfiler, PipelineMetrics, write_metrics_report
+from .io_pipeline import DEFAULT_IO_THREADS, DEFAULT_QUEUE_SIZE, FilePrefetcher
+from .manifest import (
+    compute_file_hash,
+    is_input_modified_since,
+    is_input_unchanged,
+    load_manifest,
+    make_manifest_entry,
+    remove_outputs_of_deleted_inputs,
+    save_manifest,
+    stat_input,
+)
+from .ner_cache import configure_ner_cache, get_ner_cache_config, get_ner_cache_stats
+from .partitioning import check_partition, partition_of, write_partition_info
+from .progress import PipelineCancelled, ProgressReporter, RunControl
+from .record_index import build_offset_index, get_index_path, is_indexable
+from .sentence_splitter import get_sentence_splitter_engine, set_sentence_splitter_engine
+from .serialization import check_output_format, get_json_backend, iter_records, set_json_backend
+from .sharding import (
+    DEFAULT_MAX_SHARD_BYTES,
+    DEFAULT_SHARD_COMPRESSION,
+    ShardStore,
+    get_segments_dir,
+    iter_shard_records,
+)
+from .stages import DEFAULT_STAGES, resolve_stages, stages_field
+
+# Имя файла дискового кеша NER по умолчанию (в корне выходной директории)
+NER_CACHE_FILE_NAME = "_ner_cache.sqlite3"
+# Имя файла кеша списков входных директорий по умолчанию (в корне выходной директории)
+LISTING_CACHE_FILE_NAME = "_listing_cache.sqlite3"
+# Имя JSON-отчета с метриками по умолчанию (в корне выходной директории)
+METRICS_REPORT_FILE_NAME = "_metrics.json"
+# Имя JSON-отчета о почти одинаковых абзацах по умолчанию (в корне выходной директории)
+DUPLICATES_REPORT_FILE_NAME = "_duplicates.json"
+# Раскладка выходных файлов: "mirror" - один файл на входной файл со структурой подпапок входной
+# директории, "shards" - сжатые шарды ограниченного размера с индексом (см. sharding)
+OUTPUT_LAYOUTS = ("mirror", "shards")
+
+# Как часто (в секундах) сохранять манифест во время запуска. Манифест также сохраняется в конце
+# запуска и при прерывании; после сбоя будут заново обработаны только файлы, не попавшие в манифест.
+_MANIFEST_SAVE_INTERVAL_SECONDS = 5.0
+# Сколько файлов одновременно передано каждому процессу-обработчику: остальные ждут в основном
+# процессе, поэтому пауза и отмена не ждут, пока пул разберет всю очередь
+_TASKS_IN_FLIGHT_PER_WORKER = 2
+# Как часто (в секундах) основной процесс проверяет паузу и отмену, ожидая результатов пула
+_CONTROL_CHECK_INTERVAL = 0.2
+
+# Управление запуском в процессе-обработчике (см. _init_worker)
+_worker_control: Optional[RunControl] = None
+
+def resolve_pipeline_dirs(input_dir: Optional[str] = None, output_dir: Optional[str] = None) -> Tuple[str, str]:
+    """Нормализованные входная и выходная директории (по умолчанию ../input_texts и ../processed_data)."""
+    dataset_preparation_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if input_dir is None:
+        input_dir = os.path.join(dataset_preparation_root, "input_texts")
+    if output_dir is None:
+        output_dir = os.path.join(dataset_preparation_root, "processed_data")
+    # Нормализуем пути для корректного сравнения и построения относительных путей
+    return os.path.normpath(input_dir), os.path.normpath(output_dir)
+
+def _init_worker(ner_cache_config: Dict, sentence_splitter_engine: str, json_backend: str,
+                 stages: Tuple[str, ...] = DEFAULT_STAGES, control: Optional[RunControl] = None,
+                 paragraph_detection: Optional[Dict] = None):
+    """
+    Инициализатор процесса-обработчика: загружает компоненты Natasha (только нужные этапам stages)
+    и ресурсы движка разбиения на предложения один раз при старте процесса, а не на каждую задачу,
+    и настраивает кеш NER, движок разбиения, выделение абзацев и библиотеку JSON как в основном процессе.
+    control - управление запуском: обработчик проверяет паузу и отмену после каждого абзаца.
+    """
+    global _worker_control
+    _worker_control = control
+    configure_ner_cache(**ner_cache_config)
+    set_sentence_splitter_engine(sentence_splitter_engine)
+    if paragraph_detection is not None:
+        set_paragraph_detection(**paragraph_detection)
+    set_json_backend(json_backend)
+    if not warm_up_pipeline_components(stages):
+        print(f"[PID {os.getpid()}] Предупреждение: компоненты NLP не загружены в процессе-обработчике.")
+
+def _profile_path_for(file_path: str, input_dir: str, profile_dir: str) -> str:
+    """Путь к файлу статистики cProfile для входного файла (структура подпапок сохраняется)."""
+    return os.path.join(profile_dir, os.path.relpath(file_path, input_dir) + ".prof")
+
+def _process_file_task(file_path: str, target_output_subdir: str, input_dir: str,
+                       instrumentation: Optional[Dict] = None,
+                       processing_options: Optional[Dict] = None,
+                       duplicates: Optional[Dict[int, Dict]] = None,
+                       paragraphs=None,
+                       previous_output: Optional[Dict[str, str]] = None,
+                       on_paragraph: Optional[Callable[[], None]] = None,
+                       input_stat: Optional[Dict[str, int]] = None) -> Dict[str, Union[str, bool, int, None, Dict]]:
+    """
+    Обрабатывает один файл (в процессе-обработчике или в основном процессе) и возвращает
+    результат в виде словаря, пригодного для передачи в родительский процесс.
+
+    instrumentation - None (метрики не собираются) или словарь с ключами
+    profile_dir (str или None) и trace_memory (bool).
+    processing_options - именованные параметры process_file_to_jsonl, общие для всех файлов
+    (output_format, compression, write_index, dedup_mode, io_queue_size, stages).
+    duplicates - почти дубликаты абзацев файла; paragraphs - предзагруженные абзацы (или None).
+    previous_output - прежний результат неизмененного файла, который дополняется этапами:
+    {"path": выходной файл} или {"output_dir": ..., "source": относительный путь} для шардов.
+    on_paragraph - вызывается после каждого абзаца (ход обработки, пауза и отмена); в процессе-
+    обработчике по умолчанию - проверка управления запуском из _init_worker.
+    input_stat - размер и mtime файла (manifest.stat_input), снятые до начала его чтения (в том числе
+    предзагрузки); возвращаются в результате вместе с хешем. Если None, снимаются здесь перед хешем.
+    PipelineCancelled передается вызывающему.
+    """
+    processing_options = processing_options or {}
+    if on_paragraph is None and _worker_control is not None:
+        on_paragraph = _worker_control.checkpoint
+    stats: Dict[str, int] = {}
+    metrics = PipelineMetrics() if instrumentation is not None else NULL_METRICS
+    profiler = None
+    if instrumentation is not None:
+        profile_dir = instrumentation.get("profile_dir")
+        profiler = FileProfiler(
+            _profile_path_for(file_path, input_dir, profile_dir) if profile_dir else None,
+            trace_memory=instrumentation.get("trace_memory", False),
+        )
+    cache_stats_before = get_ner_cache_stats()
+    error = None
+    file_hash = None
+    started_at = time.perf_counter()
+    with profiler or contextlib.nullcontext():
+        try:
+            # Хеш считается до обработки: в манифест попадает состояние файла, которое было обработано.
+            # Изменение файла после снимка input_stat обнаруживается при записи в манифест (handle_result)
+            if input_stat is None:
+                input_stat = stat_input(file_path)
+            with metrics.stage("hash"):
+                file_hash = compute_file_hash(file_path)
+            previous_records = None
+            if previous_output is not None:
+                if "path" in previous_output:
+                    previous_records = iter_records(previous_output["path"])
+                else:
+                    previous_records = iter_shard_records(previous_output["output_dir"], [previous_output["source"]])
+            success = process_file_to_jsonl(file_path, target_output_subdir, input_dir, stats=stats, metrics=metrics,
+                                            duplicates=duplicates, paragraphs=paragraphs,
+                                            previous_records=previous_records, on_paragraph=on_paragraph,
+                                            **processing_options)
+        except PipelineCancelled:
+            raise
+        except Exception as e:
+            success = False
+            error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+    if profiler is not None:
+        metrics.record_file(relative_posix_path(file_path, input_dir), time.perf_counter() - started_at,
+                            profiler.peak_memory_bytes)
+        metrics.add("files")
+    cache_stats_after = get_ner_cache_stats()
+    return {
+        "file_path": file_path,
+        "output_file_path": get_output_file_path(file_path, target_output_subdir,
+                                                 processing_options.get("output_format", "jsonl"),
+                                                 processing_options.get("compression")),
+        "sha256": file_hash,
+        "input_stat": input_stat,
+        "success": success,
+        "error": error,
+        "paragraphs": stats.get("paragraphs", 0),
+        "sentences": stats.get("sentences", 0),
+        "entities": stats.get("entities", 0),
+        "duplicates": stats.get("duplicates", 0),
+        "reused": stats.get("reused", 0),
+        "seconds": time.perf_counter() - started_at,
+        "ner_cache_hits": sum(cache_stats_after[k] - cache_stats_before[k] for k in ("memory_hits", "disk_hits")),
+        "ner_cache_misses": cache_stats_after["misses"] - cache_stats_before["misses"],
+        "metrics": metrics.to_dict(),
+    }
+
+def run_dataset_creation_pipeline(input_dir: str = None, output_dir: str = None, recursive_search: bool = True,
+                                  workers: int = 1, incremental: bool = True,
+                                  use_ner_cache: bool = True, ner_cache_path: Optional[str] = None,
+                                  collect_metrics: bool = False, metrics_report_path: Optional[str] = None,
+                                  profile_dir: Optional[str] = None, trace_memory: bool = False,
+                                  sentence_splitter: Optional[str] = None,
+                                  paragraph_mode: Optional[str] = None, max_paragraph_chars: Optional[int] = None,
+                                  output_format: str = "jsonl",
+                                  output_layout: str = "mirror", compression: Optional[str] = None,
+                                  max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+                                  write_record_index: bool = True,
+                                  deduplicate: bool = False, dedup_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                                  dedup_mode: str = "skip", duplicates_report_path: Optional[str] = None,
+                                  io_threads: int = DEFAULT_IO_THREADS, io_queue_size: int = DEFAULT_QUEUE_SIZE,
+                                  stages: Optional[Union[str, Sequence[str]]] = None,
+                                  partition_index: Optional[int] = None, partition_count: int = 1,
+                                  on_event: Optional[Callable[[Dict], None]] = None,
+                                  control: Optional[RunControl] = None, verbose: bool = True,
+                                  checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL_SECONDS,
+                                  include: Optional[Union[str, Sequence[str]]] = None,
+                                  exclude: Optional[Union[str, Sequence[str]]] = None,
+                                  discovery_threads: int = DEFAULT_DISCOVERY_THREADS,
+                                  listing_cache: bool = False, listing_cache_path: Optional[str] = None): # Изменили recursive_search по умолчанию на True
     """
     Основная функция для запуска процесса создания датасета.
     Ищет файлы в input_dir (рекурсивно по умолчанию) и обрабатывает их, 
@@ -15,84 +233,564 @@ def run_dataset_creation_pipeline(input_dir: str = None, output_dir: str = None,
                                     Если None, используется ../processed_data.
         recursive_search (bool, optional): Искать ли файлы в подпапках input_dir. 
                                            По умолчанию True.
+        workers (int, optional): Число процессов для параллельной обработки файлов.
+                                 При 1 (по умолчанию) файлы обрабатываются последовательно
+                                 в текущем процессе. Результат не зависит от числа процессов.
+        incremental (bool, optional): Пропускать файлы, не изменившиеся с прошлого запуска
+                                      (по манифесту в output_dir). По умолчанию True.
+                                      При False все файлы обрабатываются заново.
+        use_ner_cache (bool, optional): Кешировать результаты NER (в памяти и в SQLite на диске),
+                                        чтобы повторяющиеся предложения и повторные запуски
+                                        не проходили через теггер. По умолчанию True.
+        ner_cache_path (str, optional): Путь к файлу дискового кеша NER.
+                                        Если None, используется output_dir/_ner_cache.sqlite3.
+        collect_metrics (bool, optional): Собирать метрики (время этапов, пропускная способность,
+                                          задержки по файлам) и сохранять JSON-отчет. По умолчанию False.
+        metrics_report_path (str, optional): Путь к отчету с метриками.
+                                             Если None, используется output_dir/_metrics.json.
+        profile_dir (str, optional): Директория для статистики cProfile по каждому файлу (*.prof,
+                                     читается pstats/snakeviz). Включает сбор метрик.
+        trace_memory (bool, optional): Замерять пиковую память обработки каждого файла через
+                                       tracemalloc (заметно замедляет обработку). Включает сбор метрик.
+        sentence_splitter (str, optional): Движок разбиения на предложения: "punkt" или "razdel"
+                                           (токены razdel повторно используются NER, NLTK не нужен).
+                                           Если None, используется текущий (см. sentence_splitter).
+        paragraph_mode (str, optional): Выделение абзацев в .txt (см. file_loaders): "blank_line" -
+                                        по пустым строкам, "single_newline" - каждая строка,
+                                        "indent" - по отступам и репликам диалога.
+                                        Если None, используется текущий (по умолчанию "blank_line").
+        max_paragraph_chars (int, optional): Предельная длина абзаца: более длинные делятся на части
+                                             по границам предложений (0 - без ограничения).
+                                             Если None, используется текущая (по умолчанию 0).
+        output_format (str, optional): Формат выходных файлов: "jsonl" (по умолчанию), "msgpack"
+                                       или "parquet" (связанные таблицы абзацев, предложений
+                                       и сущностей; см. serialization).
+        output_layout (str, optional): "mirror" (по умолчанию) - выходной файл на каждый входной
+                                       со структурой подпапок; "shards" - записи всех файлов
+                                       упаковываются в сжатые шарды output_dir/shards/ размером
+                                       до max_shard_bytes с индексом _shard_index.json
+                                       (см. sharding; формат parquet не поддерживается).
+        compression (str, optional): Потоковое сжатие выходных файлов: "gzip" или "zstd".
+                                     По умолчанию без сжатия, для шардов - gzip.
+        max_shard_bytes (int, optional): Размер шарда (в сжатом виде), после которого начинается
+                                         следующий. По умолчанию 256 МБ.
+        write_record_index (bool, optional): Писать рядом с выходными файлами индексы смещений
+                                             записей (*.idx) для доступа по id и случайных выборок
+                                             (см. record_index). По умолчанию True; только для
+                                             несжатых jsonl и msgpack в раскладке "mirror".
+        deduplicate (bool, optional): Искать почти одинаковые абзацы во всем корпусе (MinHash/LSH,
+                                      см. deduplication) до разбиения и NER. Оригиналом считается
+                                      первое вхождение по относительному пути файла. По умолчанию False.
+        dedup_threshold (float, optional): Порог сходства абзацев (оценка коэффициента Жаккара
+                                           по символьным 5-граммам). По умолчанию 0.8.
+        dedup_mode (str, optional): "skip" - дубликаты не попадают в датасет; "link" - для них
+                                    пишется запись без предложений с полем duplicate_of.
+        duplicates_report_path (str, optional): Путь к отчету о дубликатах.
+                                                Если None, используется output_dir/_duplicates.json.
+        io_threads (int, optional): Потоки ввода-вывода, работающие параллельно с NLP (см. io_pipeline):
+                                    при последовательной обработке столько следующих файлов
+                                    читается заранее; запись результатов идет в отдельном потоке.
+                                    В процессах-обработчиках пула абзацы текущего файла читаются
+                                    фоновым потоком. 0 - без фоновых потоков. По умолчанию 2.
+        io_queue_size (int, optional): Размер ограниченных очередей (абзацев на предзагружаемый файл
+                                       и записей, ожидающих записи). По умолчанию 256.
+        stages (str или list, optional): Этапы обработки (см. stages): "split" (всегда), "dialogue",
+                                         "ner", "syntax", "normalize" - списком или строкой через
+                                         запятую. None - split, dialogue, ner. Загружаются только
+                                         нужные модели. Если неизмененный файл был обработан другим
+                                         набором этапов, его прежний результат дополняется: разбиение
+                                         и выполненные этапы переиспользуются (формат parquet не
+                                         хранит синтаксический разбор).
+        partition_index (int, optional): Номер раздела (с 0) при распределенной сборке
+                                         (см. partitioning): обрабатываются только файлы, которые
+                                         стабильный хеш относительного пути относит к этому разделу,
+                                         в output_dir пишутся частичный манифест и _partition.json.
+                                         Разделы объединяются partitioning.merge_partitions.
+                                         Поиск дубликатов при этом идет по всему корпусу.
+                                         None (по умолчанию) - обрабатывается весь корпус.
+        partition_count (int, optional): Число разделов. По умолчанию 1.
+        on_event (callable, optional): Подписчик на события хода обработки (см. progress): начало
+                                       и конец файла, абзацы, скорость, оценка оставшегося времени,
+                                       ошибки, итог запуска. Вызывается в потоке запуска.
+        control (progress.RunControl, optional): Пауза и отмена. Проверяются между файлами и после
+                                                 каждого абзаца (и в процессах-обработчиках);
+                                                 при отмене начатые файлы не публикуются (для несжатых
+                                                 jsonl и msgpack сохраняется контрольная точка), манифест
+                                                 сохраняется, и следующий запуск продолжит обработку.
+        verbose (bool, optional): Печатать строки о каждом файле. По умолчанию True; итоги запуска
+                                  печатаются всегда.
+        checkpoint_interval (float, optional): Как часто (в секундах) сохранять контрольную точку
+                                               внутри обрабатываемого файла (см. checkpoints): после
+                                               сбоя большой файл продолжается с первого необработанного
+                                               абзаца. Только для несжатых jsonl и msgpack в раскладке
+                                               "mirror"; 0 - без контрольных точек. По умолчанию 10 секунд.
+        include (str или list, optional): Шаблоны входных файлов для обработки (см. discovery.PathPatterns):
+                                          шаблон без '/' сравнивается с именем файла, с '/' - с путем
+                                          относительно input_dir. None - все файлы .docx и .txt.
+        exclude (str или list, optional): Шаблоны исключаемых файлов и директорий (исключенные
+                                          директории не обходятся). Результаты ранее обработанных
+                                          файлов, которые теперь не выбраны шаблонами, удаляются.
+        discovery_threads (int, optional): Потоки параллельного обхода входной директории (окупаются
+                                           на сетевых дисках). При 1 (по умолчанию) директории читаются
+                                           по мере надобности в потоке запуска. Файлы передаются обработке
+                                           по мере нахождения (с дедупликацией - после полного поиска).
+        listing_cache (bool, optional): Кешировать списки входных директорий (см. discovery.ListingCache):
+                                        список директории, mtime которой не изменился, не читается заново.
+                                        По умолчанию False.
+        listing_cache_path (str, optional): Путь к кешу списков директорий.
+                                            Если None, используется output_dir/_listing_cache.sqlite3.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    dataset_preparation_root = os.path.dirname(script_dir)
-
-    if input_dir is None:
-        input_dir = os.path.join(dataset_preparation_root, "input_texts")
-    # Нормализуем путь для корректного сравнения и построения относительных путей
-    input_dir = os.path.normpath(input_dir)
-
-
-    if output_dir is None:
-        output_dir = os.path.join(dataset_preparation_root, "processed_data")
-    output_dir = os.path.normpath(output_dir)
+    input_dir, output_dir = resolve_pipeline_dirs(input_dir, output_dir)
+    reporter = ProgressReporter(on_event, control)
 
     if not os.path.isdir(input_dir):
         print(f"Директория с входными текстами не найдена: {input_dir}")
         print(f"Пожалуйста, создайте ее и поместите туда файлы для обработки или укажите корректный путь.")
+        reporter.emit("error", message=f"Директория с входными текстами не найдена: {input_dir}")
+        reporter.finish("failed")
         return
-    
+
+    if use_ner_cache:
+        configure_ner_cache(enabled=True, disk_path=ner_cache_path or os.path.join(output_dir, NER_CACHE_FILE_NAME))
+    else:
+        configure_ner_cache(enabled=False)
+
+    run_wall_start = time.perf_counter()
+    run_cpu_start = time.process_time()
+    collect_metrics = collect_metrics or bool(profile_dir) or trace_memory
+    instrumentation = {"profile_dir": profile_dir, "trace_memory": trace_memory} if collect_metrics else None
+
+    if output_layout == "shards" and compression is None:
+        compression = DEFAULT_SHARD_COMPRESSION
+    try:
+        if output_layout not in OUTPUT_LAYOUTS:
+            raise ValueError(f"Неизвестная раскладка вывода: '{output_layout}'. Доступны: {', '.join(OUTPUT_LAYOUTS)}")
+        if dedup_mode not in DEDUP_MODES:
+            raise ValueError(f"Неизвестный режим дедупликации: '{dedup_mode}'. Доступны: {', '.join(DEDUP_MODES)}")
+        if output_layout == "shards" and output_format == "parquet":
+            raise ValueError("Формат parquet не упаковывается в шарды: используйте jsonl или msgpack")
+        check_output_format(output_format, compression)
+        stages = resolve_stages(stages)
+        if output_format == "parquet" and "syntax" in stages:
+            raise ValueError("Синтаксический разбор не записывается в формат parquet: используйте jsonl или msgpack")
+        if partition_index is not None:
+            check_partition(partition_index, partition_count)
+        set_paragraph_detection(paragraph_mode, max_paragraph_chars)
+        json_backend = get_json_backend()
+    except (ValueError, RuntimeError) as e:
+        print(f"Ошибка: {e}")
+        reporter.emit("error", message=str(e))
+        reporter.finish("failed")
+        return
+
+    if sentence_splitter is not None:
+        set_sentence_splitter_engine(sentence_splitter)
+
+    # Манифест обработанных файлов: выходные данные удаленных входных файлов удаляются после поиска
+    manifest_settings = {"sentence_splitter": get_sentence_splitter_engine(), "output_format": output_format,
+                         "output_layout": output_layout, "compression": compression}
+    # Настройки выделения абзацев записываются, только если отличаются от умолчаний (предел длины
+    # абзаца - только если задан): манифесты, созданные до их появления, остаются действительными
+    paragraph_detection = get_paragraph_detection()
+    if paragraph_detection["mode"] != DEFAULT_PARAGRAPH_MODE:
+        manifest_settings["paragraph_mode"] = paragraph_detection["mode"]
+    if paragraph_detection["max_chars"] != DEFAULT_MAX_PARAGRAPH_CHARS:
+        manifest_settings["max_paragraph_chars"] = paragraph_detection["max_chars"]
+    # orjson пишет те же записи другими байтами (без пробелов): файлы разных библиотек не смешиваются
+    if output_format == "jsonl" and json_backend != "json":
+        manifest_settings["json_backend"] = json_backend
+    manifest = load_manifest(output_dir, settings=manifest_settings)
+    shard_store = None
+    # Корень, в котором обработчики создают выходные файлы (в режиме шардов - временные сегменты)
+    output_root = output_dir
+    if output_layout == "shards":
+        shard_store = ShardStore(output_dir, output_format, compression, max_shard_bytes)
+        if manifest.get("stale") or not incremental:
+            shard_store.reset()
+        output_root = get_segments_dir(output_dir)
+        if os.path.isdir(output_root):
+            shutil.rmtree(output_root)
+    discovery = InputDiscovery(input_dir, recursive_search, include, exclude, discovery_threads,
+                               (listing_cache_path or os.path.join(output_dir, LISTING_CACHE_FILE_NAME))
+                               if listing_cache else None)
+    # Записи манифеста, которые поиск еще не нашел. После полного обхода это удаленные входные файлы
+    # (и исключенные шаблонами include/exclude): их результаты удаляются без stat каждой записи.
+    # При поиске только в корне записи подпапок проверяются по файловой системе (см. manifest).
+    missing_inputs = set(manifest["files"]) if recursive_search else None
+    # В режиме раздела результаты файлов, которые теперь относятся к другим разделам, удаляются
+    # так же, как результаты удаленных файлов
+    in_partition = None
+    if partition_index is not None:
+        in_partition = lambda relative_input_path: partition_of(relative_input_path, partition_count) == partition_index
+    keep = in_partition
+    if missing_inputs is None and (include or exclude):
+        keep = lambda relative_input_path: (discovery.selects(relative_input_path)
+                                            and (in_partition is None or in_partition(relative_input_path)))
+
     # Не создаем output_dir здесь, он будет создаваться по мере необходимости для подпапок
 
     print(f"Поиск файлов для обработки в: {input_dir}" + (" (включая подпапки)" if recursive_search else ""))
-    
-    files_processed_count = 0
-    files_to_process_map = {} # Словарь для хранения {output_subdir_path: [input_file_path, ...]}
-
-    if recursive_search:
-        for root, _, filenames in os.walk(input_dir):
-            for filename in filenames:
-                if filename.lower().endswith(('.docx', '.txt')):
-                    input_file_path = os.path.join(root, filename)
-                    
-                    # Определяем относительный путь от input_dir до текущей папки файла
-                    relative_subdir = os.path.relpath(root, input_dir)
-                    
-                    # Создаем соответствующий путь для выходной поддиректории
-                    # Если relative_subdir это '.', значит файл в корне input_dir, тогда output_subdir = output_dir
-                    current_output_subdir = output_dir
-                    if relative_subdir != ".":
-                        current_output_subdir = os.path.join(output_dir, relative_subdir)
-                    
-                    if current_output_subdir not in files_to_process_map:
-                        files_to_process_map[current_output_subdir] = []
-                    files_to_process_map[current_output_subdir].append(input_file_path)
-    else: # Если не рекурсивный поиск, то все файлы из корня input_dir идут в корень output_dir
-        if output_dir not in files_to_process_map:
-            files_to_process_map[output_dir] = []
-        for item_name in os.listdir(input_dir):
-            item_path = os.path.join(input_dir, item_name)
-            if os.path.isfile(item_path) and item_name.lower().endswith(('.docx', '.txt')):
-                files_to_process_map[output_dir].append(item_path)
-
-    if not files_to_process_map or not any(files_to_process_map.values()):
+    input_files: Iterable[InputFile] = discovery
+
+    run_metrics = PipelineMetrics() if collect_metrics else NULL_METRICS
+    reporter.start()
+
+    # Поиск дубликатов идет по всем входным файлам, включая неизмененные и файлы других разделов:
+    # они могут содержать оригиналы абзацев новых файлов. Поэтому с дедупликацией обработка начинается
+    # после полного поиска; без нее файлы передаются обработке по мере нахождения.
+    duplicates_by_file: Dict[str, Dict[int, Dict]] = {}
+    if deduplicate:
+        input_files = list(discovery)
+        if input_files:
+            print(f"Поиск почти одинаковых абзацев (порог сходства {dedup_threshold})...")
+            with run_metrics.stage("dedup"):
+                duplicates_by_file, paragraphs_checked = find_duplicate_paragraphs(
+                    [(input_file.relative_path, input_file.path) for input_file in input_files],
+                    threshold=dedup_threshold)
+            report_path = duplicates_report_path or os.path.join(output_dir, DUPLICATES_REPORT_FILE_NAME)
+            write_duplicates_report(report_path, duplicates_by_file, paragraphs_checked,
+                                    settings={"threshold": dedup_threshold, "mode": dedup_mode})
+            print(f"Проверено абзацев: {paragraphs_checked}, почти дубликатов: "
+                  f"{sum(len(d) for d in duplicates_by_file.values())}. Отчет: {report_path}")
+
+    def duplicates_changed(relative_input_path: str) -> bool:
+        entry = manifest["files"].get(relative_input_path) or {}
+        return entry.get("duplicates") != duplicates_digest(duplicates_by_file.get(relative_input_path), dedup_mode)
+
+    # Неизмененные файлы, обработанные другим набором этапов: их прежний результат дополняется
+    previous_outputs: Dict[str, Dict[str, str]] = {}
+
+    def needs_processing(file_path: str, relative_input_path: str) -> bool:
+        if (not is_input_unchanged(manifest, relative_input_path, file_path, output_dir)
+                or not _is_in_shards(shard_store, manifest, relative_input_path)):
+            return True
+        entry = manifest["files"][relative_input_path]
+        if tuple(entry.get("stages") or DEFAULT_STAGES) != stages and entry.get("output") is not None:
+            if shard_store is not None:
+                previous_outputs[relative_input_path] = {"output_dir": output_dir, "source": relative_input_path}
+            else:
+                previous_outputs[relative_input_path] = {"path": os.path.join(output_dir, *entry["output"].split('/'))}
+            return True
+        return duplicates_changed(relative_input_path)
+
+    if incremental and write_record_index and shard_store is None and is_indexable(output_format, compression):
+        _build_missing_indexes(manifest, output_dir)
+
+    # Счетчики поиска: найдено, в разделе, пропущено без изменений, передано обработке
+    discovered = {"found": 0, "assigned": 0, "skipped": 0, "tasks": 0, "complete": False}
+    corpus_files: List[str] = []
+    assigned_files: List[str] = []
+    input_sizes: Dict[str, int] = {}
+
+    def iter_tasks() -> Iterator[Tuple[str, str, Dict[str, int]]]:
+        """
+        Задачи (input_file_path, target_output_subdir, input_stat) по мере нахождения входных файлов.
+        input_stat снимается здесь, до того как файл откроет обработчик или предзагрузка.
+        """
+        output_subdirs: Dict[str, str] = {}
+        for file_path, relative_input_path, relative_dir in input_files:
+            discovered["found"] += 1
+            if missing_inputs is not None:
+                missing_inputs.discard(relative_input_path)
+            if in_partition is not None:
+                corpus_files.append(relative_input_path)
+                if not in_partition(relative_input_path):
+                    continue
+                assigned_files.append(relative_input_path)
+            discovered["assigned"] += 1
+            if incremental and not needs_processing(file_path, relative_input_path):
+                discovered["skipped"] += 1
+                continue
+            target_output_subdir = output_subdirs.get(relative_dir)
+            if target_output_subdir is None:
+                # Создаем выходную поддиректорию, если ее нет (в основном процессе, до передачи файла обработчику)
+                target_output_subdir = os.path.join(output_root, *relative_dir.split('/')) if relative_dir else output_root
+                if not os.path.isdir(target_output_subdir):
+                    if verbose:
+                        print(f"Создание выходной поддиректории: {target_output_subdir}")
+                    os.makedirs(target_output_subdir, exist_ok=True)
+                output_subdirs[relative_dir] = target_output_subdir
+            if reporter.enabled:
+                input_sizes[file_path] = os.path.getsize(file_path)
+                reporter.file_discovered(input_sizes[file_path])
+            discovered["tasks"] += 1
+            yield file_path, target_output_subdir, stat_input(file_path)
+
+        discovered["complete"] = True
+        directories = f"директорий просмотрено: {discovery.stats['directories']}"
+        if listing_cache:
+            directories += f", из них по кешу списков: {discovery.stats['cached_directories']}"
+        print(f"Найдено файлов для обработки: {discovered['found']} ({directories})")
+        if in_partition is not None:
+            write_partition_info(output_dir, partition_index, partition_count, corpus_files, assigned_files)
+            print(f"Раздел {partition_index} из {partition_count}: файлов {discovered['assigned']}")
+        if discovered["skipped"]:
+            print(f"Пропущено файлов без изменений: {discovered['skipped']}")
+        if previous_outputs:
+            print(f"Файлов, дополняемых этапами {', '.join(stages)}: {len(previous_outputs)}")
+        reporter.discovery_finished(discovered["found"], discovered["found"] - discovered["tasks"])
+
+    results = []
+    last_manifest_save = time.monotonic()
+
+    def handle_result(result):
+        nonlocal last_manifest_save
+        results.append(result)
+        run_metrics.merge(result["metrics"])
+        reporter.file_finished(result, input_sizes.pop(result["file_path"], 0), result.get("seconds"))
+        relative_input_path = relative_posix_path(result["file_path"], input_dir)
+        modified = (result["success"] and result["sha256"] is not None
+                    and is_input_modified_since(result["file_path"], result["input_stat"]))
+        if modified:
+            # Обработано состояние файла, которого уже нет: запись в манифест привязала бы прежний
+            # результат к новому размеру и mtime, и файл больше не обрабатывался бы
+            print(f"Входной файл '{relative_input_path}' изменился во время обработки: "
+                  "он будет обработан заново при следующем запуске")
+        if result["success"] and result["sha256"] is not None and not modified:
+            output_file_path = result["output_file_path"]
+            # Пустой файл: выходного файла нет (прежний результат обработчик удалил)
+            if not os.path.exists(output_file_path):
+                relative_output_path = None
+                if shard_store is not None:
+                    shard_store.remove_source(relative_input_path)
+            elif shard_store is not None:
+                relative_category = os.path.dirname(relative_input_path)
+                relative_output_path = shard_store.add_source(
+                    relative_input_path, output_file_path, result["paragraphs"],
+                    relative_category, os.path.basename(result["file_path"]))
+            else:
+                relative_output_path = relative_posix_path(output_file_path, output_dir)
+            manifest["files"][relative_input_path] = make_manifest_entry(
+                result["file_path"], relative_output_path, file_hash=result["sha256"], input_stat=result["input_stat"]
+            )
+            digest = duplicates_digest(duplicates_by_file.get(relative_input_path), dedup_mode)
+            if digest is not None:
+                manifest["files"][relative_input_path]["duplicates"] = digest
+            if stages_field(stages) is not None:
+                manifest["files"][relative_input_path]["stages"] = stages_field(stages)
+        else:
+            # Файл с ошибкой (или измененный во время обработки) будет обработан заново при следующем запуске
+            manifest["files"].pop(relative_input_path, None)
+
+        if time.monotonic() - last_manifest_save >= _MANIFEST_SAVE_INTERVAL_SECONDS:
+            save_outputs_state()
+            last_manifest_save = time.monotonic()
+
+    def save_outputs_state():
+        # Индекс шардов сохраняется раньше манифеста: манифест не должен ссылаться на сегменты,
+        # которых нет в индексе
+        if shard_store is not None:
+            shard_store.save()
+        save_manifest(output_dir, manifest)
+
+    cancelled = False
+    try:
+        processing_options = {
+            "output_format": output_format, "compression": compression, "write_index": write_record_index,
+            "dedup_mode": dedup_mode, "io_queue_size": io_queue_size if io_threads > 0 else 0,
+            "stages": stages, "verbose": verbose, "checkpoint_interval": checkpoint_interval,
+        }
+        _run_tasks(iter_tasks(), input_dir, workers, handle_result, instrumentation, processing_options,
+                   duplicates_by_file, io_threads, previous_outputs, reporter, control)
+    except PipelineCancelled:
+        cancelled = True
+    finally:
+        removed_count = 0
+        if discovered["complete"]:
+            # Выходной файл удаленного входа, совпадающий с выходным файлом нового, не удаляется:
+            # запись нового файла к этому моменту уже в манифесте
+            removed_count = remove_outputs_of_deleted_inputs(manifest, input_dir, output_dir, keep=keep,
+                                                             missing=missing_inputs)
+            if shard_store is not None:
+                removed_count += shard_store.prune(manifest["files"])
+        if discovered["found"] or removed_count:
+            save_outputs_state()
+        if shard_store is not None:
+            shutil.rmtree(output_root, ignore_errors=True)
+
+    if discovered["complete"] and not discovered["found"]:
         print(f"В директории {input_dir} (и ее подпапках, если рекурсивный поиск включен) "
               "не найдено файлов .docx или .txt для обработки.")
+        reporter.finish("empty")
         return
 
-    total_files_to_process = sum(len(files) for files in files_to_process_map.values())
-    print(f"Найдено файлов для обработки: {total_files_to_process}")
+    failed_results = [r for r in results if not r["success"]]
+    files_processed_count = len(results) - len(failed_results)
+    for failed in failed_results:
+        print(f"Ошибка обработки файла {failed['file_path']}" + (f": {failed['error']}" if failed["error"] else ""))
+
+    print(f"\nОбработка датасета {'отменена' if cancelled else 'завершена'}. Всего обработано файлов: {files_processed_count}")
+    if cancelled:
+        print(f"Не обработано файлов: {discovered['tasks'] - len(results)}"
+              + ("" if discovered["complete"] else " и файлы, до которых не дошел поиск")
+              + " (будут обработаны при следующем запуске)")
+    print(f"Абзацев: {sum(r['paragraphs'] for r in results)}, "
+          f"предложений: {sum(r['sentences'] for r in results)}, "
+          f"сущностей: {sum(r['entities'] for r in results)}, "
+          f"файлов с ошибками: {len(failed_results)}")
+    if deduplicate:
+        print(f"Почти дубликатов абзацев пропущено через NLP: {sum(r['duplicates'] for r in results)} "
+              f"(режим '{dedup_mode}')")
+    if previous_outputs:
+        print(f"Абзацев дополнено без повторного разбиения: {sum(r['reused'] for r in results)}")
+    if use_ner_cache and results:
+        print(f"Кеш NER: попаданий {sum(r['ner_cache_hits'] for r in results)}, "
+              f"промахов {sum(r['ner_cache_misses'] for r in results)}")
+    if shard_store is not None:
+        print(f"Шарды: {len(shard_store.shards)} в {os.path.dirname(output_root)}, "
+              f"входных файлов {len(shard_store.sources)}, неиспользуемых байт {shard_store.dead_bytes()}")
+
+    if collect_metrics:
+        report = run_metrics.report(
+            time.perf_counter() - run_wall_start, time.process_time() - run_cpu_start,
+            extra={
+                "workers": workers,
+                "files": {"found": discovered["found"], "processed": files_processed_count,
+                          "skipped": discovered["found"] - len(results), "failed": len(failed_results)},
+                "discovery": dict(discovery.stats),
+                "ner_cache": {"hits": sum(r['ner_cache_hits'] for r in results),
+                              "misses": sum(r['ner_cache_misses'] for r in results)},
+                "duplicates": sum(r['duplicates'] for r in results),
+            },
+        )
+        report_path = metrics_report_path or os.path.join(output_dir, METRICS_REPORT_FILE_NAME)
+        write_metrics_report(report_path, report)
+        print(f"Отчет с метриками сохранен: {report_path}")
+    reporter.finish("cancelled" if cancelled else "completed", files_processed=files_processed_count,
+                    files_failed=len(failed_results), files_skipped=discovered["found"] - discovered["tasks"],
+                    files_not_processed=discovered["tasks"] - len(results),
+                    paragraphs=sum(r['paragraphs'] for r in results), sentences=sum(r['sentences'] for r in results),
+                    entities=sum(r['entities'] for r in results))
+
+def _is_in_shards(shard_store: Optional[ShardStore], manifest: Dict, relative_input_path: str) -> bool:
+    """Для режима шардов: есть ли результат файла в индексе (пустые файлы в шарды не попадают)."""
+    if shard_store is None:
+        return True
+    entry = manifest["files"].get(relative_input_path) or {}
+    return entry.get("output") is None or relative_input_path in shard_store.sources
 
-    for target_output_subdir, input_file_paths_list in files_to_process_map.items():
-        if not input_file_paths_list:
+def _build_missing_indexes(manifest: Dict, output_dir: str) -> None:
+    """
+    Строит индексы смещений для уже готовых выходных файлов, у которых их нет (например, файлы
+    созданы до включения индексов), чтобы не переобрабатывать неизмененные входные файлы.
+    """
+    for entry in manifest["files"].values():
+        relative_output_path = entry.get("output")
+        if relative_output_path is None:
             continue
+        output_file_path = os.path.join(output_dir, *relative_output_path.split('/'))
+        if os.path.isfile(output_file_path) and not os.path.exists(get_index_path(output_file_path)):
+            try:
+                build_offset_index(output_file_path)
+            except Exception as e:
+                print(f"Предупреждение: не удалось построить индекс для {output_file_path}: {e}")
+
+def _run_tasks(tasks: Iterable[Tuple[str, str, Dict[str, int]]], input_dir: str, workers: int, handle_result,
+               instrumentation: Optional[Dict] = None, processing_options: Optional[Dict] = None,
+               duplicates_by_file: Optional[Dict[str, Dict[int, Dict]]] = None,
+               io_threads: int = 0, previous_outputs: Optional[Dict[str, Dict[str, str]]] = None,
+               reporter: Optional[ProgressReporter] = None, control: Optional[RunControl] = None) -> None:
+    """
+    Обрабатывает файлы последовательно (workers <= 1) или в пуле процессов. tasks - тройки
+    (input_file_path, target_output_subdir, input_stat), в том числе генератор: следующая задача
+    берется, когда для нее освобождается место.
+    handle_result вызывается в основном процессе для результата каждого файла по мере готовности.
+    При последовательной обработке и io_threads > 0 абзацы следующих файлов читаются заранее.
+    reporter получает начало файлов и (при последовательной обработке) ход по абзацам;
+    control проверяется между файлами и после каждого абзаца (при отмене - PipelineCancelled).
+    """
+    # Задачи могут поступать из еще идущего поиска файлов: пул процессов не создается, пока
+    # не найден первый файл для обработки (и вовсе не создается, если обрабатывать нечего)
+    tasks = iter(tasks)
+    first_task = next(tasks, None)
+    if first_task is None:
+        return
+    tasks = itertools.chain([first_task], tasks)
+    duplicates_by_file = duplicates_by_file or {}
+    # previous_outputs дополняется по ходу поиска файлов: словарь не подменяется
+    previous_outputs = previous_outputs if previous_outputs is not None else {}
+    processing_options = processing_options or {}
+    reporter = reporter or ProgressReporter()
+    verbose = processing_options.get("verbose", True)
+    if workers <= 1:
+        # Передаем target_output_subdir в process_file_to_jsonl
+        # В process_file_to_jsonl имя выходного файла будет формироваться на основе имени входного
+        # и он будет сохранен в target_output_subdir
+        if io_threads > 0:
+            prefetcher = FilePrefetcher(tasks, key=lambda task: task[0], files_ahead=io_threads,
+                                        queue_size=processing_options.get("io_queue_size") or DEFAULT_QUEUE_SIZE)
+            prefetched_tasks = iter(prefetcher)
+        else:
+            prefetcher = contextlib.nullcontext()
+            prefetched_tasks = ((task, None) for task in tasks)
+
+        on_paragraph = None
+        if control is not None or reporter.enabled:
+            def on_paragraph():
+                reporter.paragraph_done()
+                if control is not None:
+                    control.checkpoint()
+        with prefetcher:
+            for (file_path, target_output_subdir, input_stat), paragraphs in prefetched_tasks:
+                if control is not None:
+                    control.checkpoint()
+                if verbose:
+                    print(f"--- Обработка файла: {file_path} -> сохранение в {target_output_subdir} ---")
+                reporter.file_started(file_path)
+                relative_input_path = relative_posix_path(file_path, input_dir)
+                handle_result(_process_file_task(file_path, target_output_subdir, input_dir, instrumentation,
+                                                 processing_options, duplicates_by_file.get(relative_input_path),
+                                                 paragraphs, previous_outputs.get(relative_input_path),
+                                                 on_paragraph, input_stat))
+    else:
+        print(f"Параллельная обработка: процессов-обработчиков {workers}")
+        pending_tasks = iter(tasks)
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(get_ner_cache_config(), get_sentence_splitter_engine(),
+                                           get_json_backend(),
+                                           processing_options.get("stages", DEFAULT_STAGES), control,
+                                           get_paragraph_detection())) as executor:
+            def submit_next() -> None:
+                for file_path, target_output_subdir, input_stat in pending_tasks:
+                    relative_input_path = relative_posix_path(file_path, input_dir)
+                    future = executor.submit(_process_file_task, file_path, target_output_subdir, input_dir,
+                                             instrumentation, processing_options,
+                                             duplicates_by_file.get(relative_input_path), None,
+                                             previous_outputs.get(relative_input_path), None, input_stat)
+                    running[future] = file_path
+                    reporter.file_started(file_path)
+                    return
 
-        # Создаем выходную поддиректорию, если ее нет
-        if not os.path.isdir(target_output_subdir):
-            print(f"Создание выходной поддиректории: {target_output_subdir}")
-            os.makedirs(target_output_subdir, exist_ok=True)
-            
-        for file_path in input_file_paths_list:
-            print(f"--- Обработка файла: {file_path} -> сохранение в {target_output_subdir} ---")
-            # Передаем target_output_subdir в process_file_to_jsonl
-            # В process_file_to_jsonl имя выходного файла будет формироваться на основе имени входного
-            # и он будет сохранен в target_output_subdir
-            if process_file_to_jsonl(file_path, target_output_subdir, input_dir):
-                files_processed_count += 1
-            
-    print(f"\nОбработка датасета завершена. Всего обработано файлов: {files_processed_count}")
+            try:
+                for _ in range(workers * _TASKS_IN_FLIGHT_PER_WORKER):
+                    submit_next()
+                while running:
+                    done, _ = wait(running, timeout=_CONTROL_CHECK_INTERVAL if control is not None else None,
+                                   return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = running.pop(future)
+                        try:
+                            result = future.result()
+                        except PipelineCancelled: # Обработчик прервал файл по отмене
+                            continue
+                        except Exception as e: # Например, аварийное завершение процесса-обработчика
+                            result = {"file_path": file_path, "output_file_path": None, "sha256": None, "input_stat": None,
+                                      "success": False, "error": f"{type(e).__name__}: {e}",
+                                      "paragraphs": 0, "sentences": 0, "entities": 0, "duplicates": 0, "reused": 0,
+                                      "seconds": None, "ner_cache_hits": 0, "ner_cache_misses": 0, "metrics": {}}
+                        handle_result(result)
+                    if control is not None:
+                        control.checkpoint()
+                    for _ in done:
+                        submit_next()
+            except PipelineCancelled:
+                # Файлы, еще не переданные обработчикам, снимаются; начатые прерываются в обработчиках
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future, file_path in running.items(): # Файлы, завершенные до отмены, сохраняются
+                    if not future.cancelled() and future.exception() is None:
+                        handle_result(future.result())
+                raise
 
 if __name__ == "__main__":
     # По умолчанию теперь рекурсивный поиск включен
@@ -0,0 +1,179 @@
+# Dream-Team-core/dataset_preparation/src/manifest.py
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Dict, Optional, Set, Union
+
+from .record_index import get_index_path
+
+# Версия конвейера подготовки датасета. Увеличивать при любом изменении, влияющем на содержимое
+# выходных JSONL (формат записей, очистка, разбиение, NER и т.п.), чтобы инкрементальный
+# запуск переобработал все файлы.
+PIPELINE_VERSION = "1"
+
+# Файл манифеста хранится в корне выходной директории (processed_data)
+MANIFEST_FILE_NAME = "_manifest.json"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+def get_manifest_path(output_dir: str) -> str:
+    return os.path.join(output_dir, MANIFEST_FILE_NAME)
+
+def load_manifest(output_dir: str, settings: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Загружает манифест из output_dir. Если манифеста нет, он поврежден или создан другой
+    версией конвейера, возвращается пустой манифест (все файлы будут обработаны заново).
+
+    settings - настройки запуска, влияющие на содержимое выходных файлов (например, движок
+    разбиения на предложения). Если они отличаются от сохраненных в манифесте, все файлы
+    также будут обработаны заново.
+    """
+    settings = settings or {}
+    empty_manifest = {"pipeline_version": PIPELINE_VERSION, "settings": settings, "files": {}}
+    manifest_path = get_manifest_path(output_dir)
+    if not os.path.exists(manifest_path):
+        return empty_manifest
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"Предупреждение: не удалось прочитать манифест {manifest_path}: {e}. Все файлы будут обработаны заново.")
+        return empty_manifest
+
+    if manifest.get("pipeline_version") != PIPELINE_VERSION or not isinstance(manifest.get("files"), dict):
+        print(f"Манифест создан другой версией конвейера ({manifest.get('pipeline_version')}), "
+              f"текущая версия: {PIPELINE_VERSION}. Все файлы будут обработаны заново.")
+        # Записи сохраняем, чтобы при очистке можно было найти выходные файлы удаленных входов
+        return {"pipeline_version": PIPELINE_VERSION, "settings": settings,
+                "files": manifest.get("files") or {}, "stale": True}
+    if manifest.get("settings", {}) != settings:
+        print(f"Манифест создан с другими настройками конвейера ({manifest.get('settings', {})}), "
+              f"текущие настройки: {settings}. Все файлы будут обработаны заново.")
+        return {"pipeline_version": PIPELINE_VERSION, "settings": settings, "files": manifest["files"], "stale": True}
+    return manifest
+
+def save_manifest(output_dir: str, manifest: Dict) -> None:
+    """
+    Атомарно сохраняет манифест: запись во временный файл с последующим переименованием.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = get_manifest_path(output_dir)
+    tmp_path = manifest_path + ".tmp"
+    data = {"pipeline_version": PIPELINE_VERSION, "settings": manifest.get("settings", {}), "files": manifest["files"]}
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+
+def compute_file_hash(file_path: str) -> str:
+    """Считает SHA-256 содержимого файла, читая его блоками."""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def is_input_unchanged(manifest: Dict, relative_input_path: str, input_file_path: str,
+                       output_dir: str) -> bool:
+    """
+    Проверяет, можно ли пропустить файл: он уже обработан текущей версией конвейера,
+    выходной файл на месте, а содержимое не менялось.
+
+    Сначала сравниваются размер и mtime (дешево). Если совпадает только размер, считается хеш:
+    при совпадении хеша (например, файл лишь "потрогали") запись в манифесте обновляется.
+    """
+    if manifest.get("stale"):
+        return False
+    entry = manifest["files"].get(relative_input_path)
+    if not entry or entry.get("pipeline_version") != PIPELINE_VERSION:
+        return False
+
+    relative_output_path = entry.get("output")
+    # Выходной "файл" формата parquet - директория с таблицами
+    if relative_output_path is not None and not os.path.exists(os.path.join(output_dir, relative_output_path)):
+        return False
+
+    stat = os.stat(input_file_path)
+    if stat.st_size != entry.get("size"):
+        return False
+    if stat.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+
+    if compute_file_hash(input_file_path) != entry.get("sha256"):
+        return False
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+def stat_input(input_file_path: str) -> Dict[str, int]:
+    """Размер и mtime входного файла: {"size": ..., "mtime_ns": ...}."""
+    stat = os.stat(input_file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def is_input_modified_since(input_file_path: str, input_stat: Dict[str, int]) -> bool:
+    """Изменился ли входной файл (размер или mtime) с момента снимка stat_input."""
+    try:
+        return stat_input(input_file_path) != input_stat
+    except OSError: # Файл удален
+        return True
+
+def make_manifest_entry(input_file_path: str, relative_output_path: Optional[str],
+                        file_hash: Optional[str] = None,
+                        input_stat: Optional[Dict[str, int]] = None) -> Dict[str, Union[str, int, None]]:
+    """
+    Формирует запись манифеста для успешно обработанного файла.
+    relative_output_path - путь выходного файла относительно output_dir (None, если входной файл пуст и выходной не создавался).
+    input_stat - снимок stat_input, сделанный до чтения файла (вместе с хешем он описывает то
+    состояние файла, которое было обработано). Если None, берется текущее состояние файла.
+    """
+    if input_stat is None:
+        input_stat = stat_input(input_file_path)
+    return {
+        "size": input_stat["size"],
+        "mtime_ns": input_stat["mtime_ns"],
+        "sha256": file_hash if file_hash is not None else compute_file_hash(input_file_path),
+        "output": relative_output_path,
+        "pipeline_version": PIPELINE_VERSION,
+    }
+
+def remove_output_files(output_file_path: str) -> None:
+    """Удаляет выходной файл (или директорию parquet), его временный файл и индекс смещений (record_index)."""
+    for path in (output_file_path, output_file_path + ".tmp", get_index_path(output_file_path)):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+def remove_outputs_of_deleted_inputs(manifest: Dict, input_dir: str, output_dir: str,
+                                     keep: Optional[Callable[[str], bool]] = None,
+                                     missing: Optional[Set[str]] = None) -> int:
+    """
+    Удаляет из манифеста записи о входных файлах, которых больше нет, и их выходные JSONL
+    (если тот же выходной файл не принадлежит другому, еще существующему входу).
+    keep - необязательный фильтр относительных путей: записи, для которых он возвращает False,
+    удаляются так же, как записи удаленных файлов (например, файлы чужого раздела, см. partitioning).
+    missing - относительные пути записей, входные файлы которых не нашел полный обход входной
+    директории (см. discovery). Если передано, существование файлов не проверяется по каждой записи.
+
+    Returns:
+        int: Количество удаленных записей.
+    """
+    files = manifest["files"]
+    deleted_inputs = {
+        rel_path for rel_path in files
+        if (rel_path in missing if missing is not None
+            else not os.path.isfile(os.path.join(input_dir, *rel_path.split('/'))))
+        or (keep is not None and not keep(rel_path))
+    }
+    live_outputs = {
+        entry.get("output") for rel_path, entry in files.items() if rel_path not in deleted_inputs
+    }
+    for rel_path in sorted(deleted_inputs):
+        relative_output_path = files.pop(rel_path).get("output")
+        if relative_output_path is None or relative_output_path in live_outputs:
+            continue
+        output_file_path = os.path.join(output_dir, *relative_output_path.split('/'))
+        remove_output_files(output_file_path)
+        print(f"Входной файл '{rel_path}' удален. Удален выходной файл: {output_file_path}")
+    return len(deleted_inputs)
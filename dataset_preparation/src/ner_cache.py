@@ -0,0 +1,249 @@
+# Dream-Team-core/dataset_preparation/src/ner_cache.py
+# Двухуровневый кеш результатов NER: LRU в памяти процесса + (опционально) SQLite на диске.
+# Ключ на диске - хеш текста вместе с версией модели, поэтому смена версии Natasha/slovnet
+# автоматически делает старые записи недоступными.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Union
+
+Entities = List[Dict[str, Union[str, int]]]
+
+# Версия формата записей кеша; увеличивать при изменении формата сущностей
+_CACHE_SCHEMA_VERSION = "1"
+
+DEFAULT_MEMORY_MAX_ENTRIES = 100_000
+DEFAULT_DISK_MAX_ENTRIES = 5_000_000
+# Проверка размера дискового кеша выполняется не чаще, чем раз в столько вставок
+_DISK_EVICTION_CHECK_INTERVAL = 10_000
+
+_lock = threading.Lock()
+_enabled = True
+_memory_max_entries = DEFAULT_MEMORY_MAX_ENTRIES
+_memory_cache: "OrderedDict[str, Entities]" = OrderedDict()
+_disk_path: Optional[str] = None
+_disk_max_entries = DEFAULT_DISK_MAX_ENTRIES
+_disk_connection: Optional[sqlite3.Connection] = None
+_disk_connection_pid: Optional[int] = None
+_disk_inserts_since_check = 0
+_model_version: Optional[str] = None
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+def configure_ner_cache(enabled: bool = True, disk_path: Optional[str] = None,
+                        memory_max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES,
+                        disk_max_entries: int = DEFAULT_DISK_MAX_ENTRIES) -> None:
+    """
+    Настраивает кеш NER для текущего процесса.
+
+    Args:
+        enabled (bool): Использовать ли кеш вообще.
+        disk_path (str, optional): Путь к файлу SQLite для дискового кеша. None - только кеш в памяти.
+        memory_max_entries (int): Максимум записей в LRU-кеше в памяти.
+        disk_max_entries (int): Максимум записей в дисковом кеше (вытесняются давно не использованные).
+    """
+    global _enabled, _memory_max_entries, _disk_path, _disk_max_entries
+    with _lock:
+        _close_disk_connection()
+        _enabled = enabled
+        _memory_max_entries = memory_max_entries
+        _disk_path = disk_path
+        _disk_max_entries = disk_max_entries
+        while len(_memory_cache) > _memory_max_entries:
+            _memory_cache.popitem(last=False)
+
+def get_ner_cache_config() -> Dict[str, Union[bool, int, str, None]]:
+    """Текущие настройки кеша (например, для передачи в процессы-обработчики)."""
+    return {
+        "enabled": _enabled,
+        "disk_path": _disk_path,
+        "memory_max_entries": _memory_max_entries,
+        "disk_max_entries": _disk_max_entries,
+    }
+
+def get_ner_cache_stats() -> Dict[str, int]:
+    """Счетчики попаданий/промахов и вытеснений кеша в текущем процессе."""
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory_cache)
+    return stats
+
+def reset_ner_cache_stats() -> None:
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+def clear_ner_cache(include_disk: bool = False) -> None:
+    """Очищает кеш в памяти (и, при include_disk=True, дисковый кеш)."""
+    with _lock:
+        _memory_cache.clear()
+        if include_disk:
+            connection = _get_disk_connection()
+            if connection is not None:
+                with connection:
+                    connection.execute("DELETE FROM ner_cache")
+
+def _get_model_version() -> str:
+    """Версия моделей, от которой зависит результат NER (входит в ключ дискового кеша)."""
+    global _model_version
+    if _model_version is None:
+        from importlib.metadata import PackageNotFoundError, version
+        parts = [f"schema-{_CACHE_SCHEMA_VERSION}"]
+        for package in ("natasha", "slovnet", "navec"):
+            try:
+                parts.append(f"{package}-{version(package)}")
+            except PackageNotFoundError:
+                parts.append(f"{package}-unknown")
+        _model_version = "/".join(parts)
+    return _model_version
+
+def _disk_key(text: str) -> str:
+    return hashlib.blake2b(f"{_get_model_version()}\0{text}".encode('utf-8'), digest_size=16).hexdigest()
+
+def _close_disk_connection() -> None:
+    global _disk_connection, _disk_connection_pid
+    if _disk_connection is not None and _disk_connection_pid == os.getpid():
+        _disk_connection.close()
+    _disk_connection = None
+    _disk_connection_pid = None
+
+def _get_disk_connection() -> Optional[sqlite3.Connection]:
+    """
+    Открывает (лениво) соединение с дисковым кешем. Соединение создается отдельно в каждом
+    процессе: после fork унаследованное соединение не используется.
+    """
+    global _disk_connection, _disk_connection_pid
+    if _disk_path is None:
+        return None
+    if _disk_connection is not None and _disk_connection_pid == os.getpid():
+        return _disk_connection
+    try:
+        disk_dir = os.path.dirname(_disk_path)
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        connection = sqlite3.connect(_disk_path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS ner_cache ("
+            " key TEXT PRIMARY KEY,"
+            " entities TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS ner_cache_last_access ON ner_cache (last_access)")
+        connection.commit()
+    except sqlite3.Error as e:
+        print(f"Предупреждение: не удалось открыть дисковый кеш NER {_disk_path}: {e}. Используется только кеш в памяти.")
+        return None
+    _disk_connection = connection
+    _disk_connection_pid = os.getpid()
+    return connection
+
+def _memory_put(text: str, entities: Entities) -> None:
+    _memory_cache[text] = entities
+    _memory_cache.move_to_end(text)
+    if len(_memory_cache) > _memory_max_entries:
+        _memory_cache.popitem(last=False)
+        _stats["memory_evictions"] += 1
+
+def get_cached_entities(texts: Sequence[str]) -> Dict[int, Entities]:
+    """
+    Ищет результаты NER для текстов в кеше (сначала в памяти, затем на диске).
+
+    Returns:
+        dict: {индекс текста: список сущностей} для найденных текстов. Возвращаются копии.
+    """
+    if not _enabled:
+        return {}
+
+    found: Dict[int, Entities] = {}
+    with _lock:
+        disk_lookup: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            entities = _memory_cache.get(text)
+            if entities is not None:
+                _memory_cache.move_to_end(text)
+                found[i] = entities
+                _stats["memory_hits"] += 1
+            else:
+                disk_lookup.setdefault(text, []).append(i)
+
+        connection = _get_disk_connection() if disk_lookup else None
+        if connection is not None:
+            keys = {_disk_key(text): text for text in disk_lookup}
+            rows = []
+            key_list = list(keys)
+            try:
+                # Ограничение SQLite на число параметров в запросе
+                for start in range(0, len(key_list), 500):
+                    chunk = key_list[start:start + 500]
+                    rows.extend(connection.execute(
+                        f"SELECT key, entities FROM ner_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+                if rows:
+                    now = time.time()
+                    with connection:
+                        connection.executemany(
+                            "UPDATE ner_cache SET last_access = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                        )
+            except sqlite3.Error as e:
+                print(f"Предупреждение: ошибка чтения дискового кеша NER: {e}")
+                rows = []
+            for key, entities_json in rows:
+                text = keys[key]
+                entities = json.loads(entities_json)
+                _memory_put(text, entities)
+                for i in disk_lookup.pop(text):
+                    found[i] = entities
+                    _stats["disk_hits"] += 1
+
+        _stats["misses"] += sum(len(indices) for indices in disk_lookup.values())
+
+    return {i: [dict(entity) for entity in entities] for i, entities in found.items()}
+
+def store_entities(texts: Sequence[str], entities_per_text: Sequence[Entities]) -> None:
+    """Сохраняет результаты NER в кеш (в память и, если настроен, на диск)."""
+    global _disk_inserts_since_check
+    if not _enabled or not texts:
+        return
+
+    with _lock:
+        for text, entities in zip(texts, entities_per_text):
+            _memory_put(text, [dict(entity) for entity in entities])
+
+        connection = _get_disk_connection()
+        if connection is None:
+            return
+        now = time.time()
+        rows = {
+            _disk_key(text): (json.dumps(entities, ensure_ascii=False), now)
+            for text, entities in zip(texts, entities_per_text)
+        }
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO ner_cache (key, entities, last_access) VALUES (?, ?, ?)",
+                    [(key, entities_json, last_access) for key, (entities_json, last_access) in rows.items()]
+                )
+            _disk_inserts_since_check += len(rows)
+            if _disk_inserts_since_check >= _DISK_EVICTION_CHECK_INTERVAL:
+                _disk_inserts_since_check = 0
+                _evict_disk_entries(connection)
+        except sqlite3.Error as e:
+            print(f"Предупреждение: ошибка записи в дисковый кеш NER: {e}")
+
+def _evict_disk_entries(connection: sqlite3.Connection) -> None:
+    """Вытесняет давно не использованные записи, оставляя около 90% от максимального размера."""
+    (count,) = connection.execute("SELECT COUNT(*) FROM ner_cache").fetchone()
+    if count <= _disk_max_entries:
+        return
+    to_delete = count - int(_disk_max_entries * 0.9)
+    with connection:
+        connection.execute(
+            "DELETE FROM ner_cache WHERE key IN (SELECT key FROM ner_cache ORDER BY last_access LIMIT ?)",
+            (to_delete,)
+        )
+    _stats["disk_evictions"] += to_delete
@@ -1,48 +1,118 @@
 # Dream-Team-core/dataset_preparation/src/ner_extractor.py
-from natasha import (
-    Segmenter,
-    MorphVocab,
-    NewsEmbedding,
-    NewsMorphTagger,
-    NewsSyntaxParser, # Пока не используется активно, но является частью стандартного пайплайна
-    NewsNERTagger,
-    Doc
-)
-from typing import List, Dict, Union
-
-# --- Инициализация компонентов Natasha (один раз при загрузке модуля) ---
-# Эти объекты довольно "тяжелые", поэтому создаем их глобально для модуля
-try:
-    segmenter_ner = Segmenter()
-    morph_vocab_ner = MorphVocab()
-    emb_ner = NewsEmbedding()
-    morph_tagger_ner = NewsMorphTagger(emb_ner)
-    syntax_parser_ner = NewsSyntaxParser(emb_ner) 
-    ner_tagger_ner = NewsNERTagger(emb_ner)
-    _NATASHA_COMPONENTS_LOADED = True
-    print("Компоненты Natasha для NER успешно инициализированы.")
-except Exception as e:
-    _NATASHA_COMPONENTS_LOADED = False
-    print(f"Ошибка при инициализации компонентов Natasha для NER: {e}")
-    print("Функция извлечения сущностей может не работать корректно.")
+import threading
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+
+from .ner_cache import get_cached_entities, store_entities
+from .stages import resolve_stages
+
+# --- Компоненты Natasha (загружаются лениво, при первом использовании) ---
+# Эти объекты довольно "тяжелые" (секунды на загрузку и сотни МБ памяти), поэтому создаются
+# один раз на процесс, но не при импорте модуля: инструментам, которым нужны только
+# clean_text или extract_dialogue_info, модели не нужны. Явная загрузка - warm_up().
+# Компоненты загружаются группами, только когда нужны выбранным этапам (см. stages):
+# "ner" - сегментатор и NER-теггер, "morph" - морфологический теггер и словарь (нормализация
+# сущностей), "syntax" - синтаксический парсер. Эмбеддинги общие для всех групп.
+segmenter_ner = None
+morph_vocab_ner = None
+emb_ner = None
+morph_tagger_ner = None
+syntax_parser_ner = None
+ner_tagger_ner = None
+COMPONENT_GROUPS = ("ner", "morph", "syntax")
+_GROUP_TITLES = {"ner": "для NER", "morph": "для морфологии", "syntax": "для синтаксического разбора"}
+# Группа -> удалось ли ее загрузить (повторная попытка после неудачной загрузки не выполняется)
+_loaded_groups: Dict[str, bool] = {}
+_natasha_init_lock = threading.Lock()
+
+def _load_component_group(group: str) -> None:
+    global segmenter_ner, morph_vocab_ner, emb_ner, morph_tagger_ner, syntax_parser_ner, ner_tagger_ner
+    from natasha import NewsEmbedding
+    if emb_ner is None:
+        emb_ner = NewsEmbedding()
+    if group == "ner":
+        from natasha import Segmenter, NewsNERTagger
+        segmenter_ner = Segmenter()
+        ner_tagger_ner = NewsNERTagger(emb_ner)
+    elif group == "morph":
+        from natasha import MorphVocab, NewsMorphTagger
+        morph_vocab_ner = MorphVocab()
+        morph_tagger_ner = NewsMorphTagger(emb_ner)
+    elif group == "syntax":
+        from natasha import NewsSyntaxParser
+        syntax_parser_ner = NewsSyntaxParser(emb_ner)
+    else:
+        raise ValueError(f"Неизвестная группа компонентов Natasha: '{group}'")
+
+def _ensure_components(group: str) -> bool:
+    """
+    Загружает группу компонентов Natasha при первом вызове (потокобезопасно).
+
+    Returns:
+        bool: True, если компоненты группы загружены.
+    """
+    loaded = _loaded_groups.get(group)
+    if loaded is not None:
+        return loaded
+
+    with _natasha_init_lock:
+        if group in _loaded_groups:
+            return _loaded_groups[group]
+        try:
+            _load_component_group(group)
+            loaded = True
+            print(f"Компоненты Natasha {_GROUP_TITLES[group]} успешно инициализированы.")
+        except Exception as e:
+            loaded = False
+            print(f"Ошибка при инициализации компонентов Natasha {_GROUP_TITLES.get(group, group)}: {e}")
+            print("Функции, использующие эти компоненты, могут не работать корректно.")
+        _loaded_groups[group] = loaded
+    return loaded
+
+def _ensure_natasha_components() -> bool:
+    """Загружает компоненты Natasha для NER (см. _ensure_components)."""
+    return _ensure_components("ner")
+
+def get_required_component_groups(stages: Optional[Sequence[str]] = None) -> List[str]:
+    """Группы компонентов Natasha, нужные этапам обработки (None - этапы по умолчанию)."""
+    stages = resolve_stages(stages)
+    groups = []
+    if "ner" in stages:
+        groups.append("ner")
+    if "normalize" in stages:
+        # Нормализация опирается на морфологию, а для организаций - и на синтаксис
+        groups.append("morph")
+    if "syntax" in stages or "normalize" in stages:
+        groups.append("syntax")
+    return groups
+
+def warm_up(stages: Optional[Sequence[str]] = None) -> bool:
+    """
+    Явно загружает компоненты Natasha, нужные этапам stages (None - этапы по умолчанию), например
+    при старте процесса-обработчика или сервиса, чтобы первый вызов extract_entities не платил
+    за загрузку моделей.
+
+    Returns:
+        bool: True, если компоненты загружены.
+    """
+    return all([_ensure_components(group) for group in get_required_component_groups(stages)])
 # -----------------------------------------------------------------------------
 
 def extract_entities(text_content: str) -> List[Dict[str, Union[str, int]]]:
     """
     Извлекает именованные сущности (PER, LOC, ORG и др.) из текста с помощью Natasha.
     """
-    if not _NATASHA_COMPONENTS_LOADED:
-        print("Ошибка: Компоненты Natasha для NER не были загружены. Извлечение сущностей невозможно.")
-        return []
-        
     if not text_content:
         return []
-    
+
+    if not _ensure_natasha_components():
+        print("Ошибка: Компоненты Natasha для NER не были загружены. Извлечение сущностей невозможно.")
+        return []
+
+    from natasha import Doc
     doc = Doc(text_content)
     try:
         doc.segment(segmenter_ner)
-        doc.tag_morph(morph_tagger_ner)
-        # doc.parse_syntax(syntax_parser_ner) # Можно раскомментировать, если синтаксис нужен для NER или других задач
+        # Морфология и синтаксис на результат NER не влияют (см. analyze_sentences_batch)
         doc.tag_ner(ner_tagger_ner)
     except Exception as e:
         print(f"Ошибка во время обработки текста Natasha: {e}")
@@ -50,7 +120,6 @@ def extract_entities(text_content: str) -> List[Dict[str, Union[str, int]]]:
 
     entities = []
     for span in doc.spans:
-        # span.normalize(morph_vocab_ner) # Можно добавить нормализацию, если нужно
         entities.append({
             "text": span.text,
             "type": span.type,
@@ -59,6 +128,200 @@ def extract_entities(text_content: str) -> List[Dict[str, Union[str, int]]]:
         })
     return entities
 
+def _spans_to_entities(text_content: str, spans) -> List[Dict[str, Union[str, int]]]:
+    """
+    Преобразует спаны разметки NER-теггера в список словарей того же вида,
+    что возвращает extract_entities (текст спана берется из исходной строки, как в Natasha Doc).
+    """
+    return [
+        {
+            "text": text_content[span.start:span.stop],
+            "type": span.type,
+            "start_char": span.start,
+            "end_char": span.stop
+        }
+        for span in spans
+    ]
+
+def _tag_pretokenized(token_lists: List[list]) -> List[list]:
+    """
+    Прогоняет NER-теггер по уже токенизированным текстам (токены razdel из sentence_splitter.segment_text).
+    Повторяет NERTagger.map из slovnet/natasha (те же пакеты по batch_size, то же кодирование слов),
+    но без повторной токенизации каждого текста и поиска токенов в нем: спаны строятся прямо
+    по start/stop токенов.
+
+    Returns:
+        list: Список спанов (с полями start, stop, type) для каждого текста.
+    """
+    from slovnet.bio import bio_spans
+    from slovnet.chop import chop
+
+    infer = ner_tagger_ner.infer
+    spans_per_text = []
+    for chunk in chop(token_lists, ner_tagger_ner.batch_size):
+        words = [[token.text for token in tokens] for tokens in chunk]
+        tags_per_text = infer.decoder(infer.process(infer.encoder(words)))
+        for tokens, tags in zip(chunk, tags_per_text):
+            spans_per_text.append(list(bio_spans(tokens, tags)))
+    return spans_per_text
+
+def extract_entities_batch(texts: List[str],
+                           tokens_per_text: Optional[List[Optional[list]]] = None) -> List[List[Dict[str, Union[str, int]]]]:
+    """
+    Пакетное извлечение именованных сущностей для списка текстов (обычно - предложений одного
+    или нескольких абзацев) за один проход NER-теггера.
+
+    В отличие от extract_entities, не создает Doc на каждый текст и не выполняет сегментацию
+    и морфологический разбор: результат NER зависит только от самого теггера, поэтому сущности
+    и их start_char/end_char (относительно каждого текста) совпадают с extract_entities.
+
+    Результаты кешируются (см. ner_cache): повторяющиеся тексты (заголовки глав, короткие реплики)
+    теггеру повторно не передаются. Если все тексты найдены в кеше, модели даже не загружаются.
+
+    tokens_per_text - необязательные токены razdel для каждого текста (см. sentence_splitter.segment_text).
+    Если они переданы, текст не токенизируется повторно; результат тот же, что и без них.
+
+    Returns:
+        list: Список списков сущностей, по одному на каждый входной текст (в том же порядке).
+    """
+    results: List[List[Dict[str, Union[str, int]]]] = [[] for _ in texts]
+    # Пустые и пробельные тексты теггеру не отдаем (Natasha для них тоже возвращает пустой список)
+    indices_to_tag = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not indices_to_tag:
+        return results
+
+    cached = get_cached_entities([texts[i] for i in indices_to_tag])
+    for position, entities in cached.items():
+        results[indices_to_tag[position]] = entities
+    indices_to_tag = [i for position, i in enumerate(indices_to_tag) if position not in cached]
+    if not indices_to_tag:
+        return results
+
+    if not _ensure_natasha_components():
+        print("Ошибка: Компоненты Natasha для NER не были загружены. Извлечение сущностей невозможно.")
+        return results
+
+    # Одинаковые тексты внутри пакета размечаются один раз
+    unique_texts = list(dict.fromkeys(texts[i] for i in indices_to_tag))
+    tokens_by_text = {}
+    if tokens_per_text is not None:
+        for i in indices_to_tag:
+            if tokens_per_text[i]:
+                tokens_by_text.setdefault(texts[i], tokens_per_text[i])
+    try:
+        if len(tokens_by_text) == len(unique_texts):
+            spans_per_text = _tag_pretokenized([tokens_by_text[text] for text in unique_texts])
+        else:
+            spans_per_text = [markup.spans for markup in ner_tagger_ner.map(unique_texts)]
+    except Exception as e:
+        print(f"Ошибка во время пакетной обработки текста Natasha: {e}. Переход к обработке по одному тексту.")
+        for i in indices_to_tag:
+            results[i] = extract_entities(texts[i])
+        return results
+
+    entities_by_text = {
+        text: _spans_to_entities(text, spans) for text, spans in zip(unique_texts, spans_per_text)
+    }
+    store_entities(unique_texts, [entities_by_text[text] for text in unique_texts])
+    for i in indices_to_tag:
+        results[i] = [dict(entity) for entity in entities_by_text[texts[i]]]
+    return results
+
+def analyze_sentences_batch(texts: List[str],
+                            entities_per_text: Optional[List[List[Dict]]] = None,
+                            tokens_per_text: Optional[List[Optional[list]]] = None,
+                            syntax: bool = True) -> Tuple[Optional[List[List[Dict]]], Optional[List[List[Optional[str]]]]]:
+    """
+    Синтаксический разбор и нормализация сущностей для списка текстов (предложений) за один
+    проход морфологического теггера и синтаксического парсера.
+
+    entities_per_text - сущности каждого текста (как из extract_entities_batch): если переданы,
+    для них вычисляются нормальные формы (как span.normalize в Natasha; нужна морфология,
+    для организаций - синтаксис). Сущности не извлекаются повторно.
+    syntax - возвращать ли разбор: для каждого текста список токенов
+    {"id", "text", "head_id", "rel"} (id с 1, head_id = 0 у корня).
+    tokens_per_text - необязательные токены razdel (см. sentence_splitter.segment_text).
+
+    Returns:
+        tuple: (разбор для каждого текста или None, нормальные формы сущностей каждого текста
+                в порядке entities_per_text или None). Если модели не загрузились, разбор пуст,
+                а нормальные формы - None.
+    """
+    from natasha.doc import DocSpan, DocToken, envelop_span_tokens, inject_morph, inject_syntax
+    from razdel import tokenize
+
+    normalize = entities_per_text is not None
+    syntax_per_text = [[] for _ in texts] if syntax else None
+    normals_per_text = [[None] * len(entities) for entities in entities_per_text] if normalize else None
+
+    token_lists = []
+    for i, text in enumerate(texts):
+        tokens = tokens_per_text[i] if tokens_per_text is not None and tokens_per_text[i] else tokenize(text or "")
+        token_lists.append([DocToken(token.start, token.stop, token.text) for token in tokens])
+    indices_to_parse = [i for i, tokens in enumerate(token_lists) if tokens]
+    if normalize:
+        # Тексты без сущностей нужны только для разбора
+        indices_to_parse = [i for i in indices_to_parse if syntax or entities_per_text[i]]
+    if not indices_to_parse:
+        return syntax_per_text, normals_per_text
+
+    if not _ensure_components("syntax") or (normalize and not _ensure_components("morph")):
+        print("Ошибка: Компоненты Natasha для синтаксиса и морфологии не были загружены. Разбор невозможен.")
+        return syntax_per_text, normals_per_text
+
+    words = [[token.text for token in token_lists[i]] for i in indices_to_parse]
+    try:
+        if normalize:
+            for i, markup in zip(indices_to_parse, morph_tagger_ner.map(words)):
+                inject_morph(token_lists[i], markup.tokens)
+        for i, markup in zip(indices_to_parse, syntax_parser_ner.map(words)):
+            inject_syntax(token_lists[i], markup.tokens)
+    except Exception as e:
+        print(f"Ошибка во время синтаксического разбора Natasha: {e}")
+        return syntax_per_text, normals_per_text
+
+    for i in indices_to_parse:
+        tokens = token_lists[i]
+        if syntax:
+            syntax_per_text[i] = [
+                {"id": int(token.id), "text": token.text, "head_id": int(token.head_id), "rel": token.rel}
+                for token in tokens
+            ]
+        if normalize and entities_per_text[i]:
+            spans = [DocSpan(entity["start_char"], entity["end_char"], entity["type"], entity["text"])
+                     for entity in entities_per_text[i]]
+            envelop_span_tokens(tokens, spans)
+            for position, span in enumerate(spans):
+                try:
+                    span.normalize(morph_vocab_ner)
+                    normals_per_text[i][position] = span.normal
+                except Exception:
+                    # Сущность не совпала с границами токенов: нормальная форма неизвестна
+                    normals_per_text[i][position] = None
+    return syntax_per_text, normals_per_text
+
+def extract_entities_for_paragraphs(paragraphs_sentences: List[List[str]]) -> List[List[List[Dict[str, Union[str, int]]]]]:
+    """
+    Извлекает сущности для нескольких абзацев сразу: все предложения всех абзацев
+    размечаются одним пакетным проходом (см. extract_entities_batch).
+
+    Args:
+        paragraphs_sentences (list): Список абзацев, каждый - список его предложений.
+
+    Returns:
+        list: Для каждого абзаца - список списков сущностей по его предложениям.
+              start_char/end_char отсчитываются от начала предложения.
+    """
+    flat_sentences = [sent for sentences in paragraphs_sentences for sent in sentences]
+    flat_entities = extract_entities_batch(flat_sentences)
+
+    grouped = []
+    position = 0
+    for sentences in paragraphs_sentences:
+        grouped.append(flat_entities[position:position + len(sentences)])
+        position += len(sentences)
+    return grouped
+
 if __name__ == '__main__':
     # Пример использования
     sample_text = "Иван Грозный взял Казань в 1552 году. Петр Первый основал Санкт-Петербург."
@@ -77,4 +340,9 @@ if __name__ == '__main__':
     empty_text = ""
     print(f"\nТекст: '{empty_text}'")
     extracted_entities_empty = extract_entities(empty_text)
-    print(f"Извлеченные сущности из пустого текста: {extracted_entities_empty}")
\ No newline at end of file
+    print(f"Извлеченные сущности из пустого текста: {extracted_entities_empty}")
+
+    sample_sentences = ["Иван Грозный взял Казань в 1552 году.", "Петр Первый основал Санкт-Петербург.", ""]
+    print(f"\nПакетная обработка предложений: {sample_sentences}")
+    for sent, sent_entities in zip(sample_sentences, extract_entities_batch(sample_sentences)):
+        print(f"  '{sent}': {sent_entities}")
\ No newline at end of file
@@ -0,0 +1,139 @@
+# Dream-Team-core/dataset_preparation/src/nlp_client.py
+# Клиент локального сервиса анализа текста (nlp_service). Использует только стандартную
+# библиотеку и не импортирует модели: интерфейс и UI получают те же результаты, что
+# split_text_into_sentences / extract_entities / extract_dialogue_info, без загрузки Natasha
+# в своем процессе.
+# Адрес сервиса: "http://127.0.0.1:8765" (по умолчанию) или "unix:/путь/к/сокету";
+# можно задать переменной окружения DREAM_TEAM_NLP_SERVICE.
+import http.client
+import json
+import os
+import socket
+import threading
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+DEFAULT_SERVICE_ADDRESS = "http://127.0.0.1:8765"
+
+_ADDRESS_ENV_VAR = "DREAM_TEAM_NLP_SERVICE"
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP-соединение через Unix-сокет."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+class NLPServiceClient:
+    """
+    Клиент сервиса анализа текста. Соединение с сервисом держится открытым (отдельное на каждый
+    поток), поэтому один клиент можно использовать из нескольких потоков. Ошибки сервиса
+    возбуждаются как RuntimeError, недоступность сервиса - как OSError (ConnectionError).
+    """
+
+    def __init__(self, address: Optional[str] = None, timeout: float = 60.0):
+        self.address = address or os.environ.get(_ADDRESS_ENV_VAR) or DEFAULT_SERVICE_ADDRESS
+        self.timeout = timeout
+        self._local = threading.local()
+        if self.address.startswith("unix:"):
+            self._socket_path = self.address[len("unix:"):]
+            self._host = self._port = None
+        else:
+            parts = urlsplit(self.address)
+            if parts.scheme != "http" or not parts.hostname:
+                raise ValueError(f"Некорректный адрес сервиса: '{self.address}'. Ожидается http://хост:порт или unix:путь")
+            self._socket_path = None
+            self._host, self._port = parts.hostname, parts.port or 80
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._socket_path is not None:
+                connection = _UnixHTTPConnection(self._socket_path, self.timeout)
+            else:
+                connection = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        headers = {"Content-Type": "application/json; charset=utf-8"} if body is not None else {}
+        # Повтор один раз: сервер мог закрыть простаивавшее соединение
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt:
+                    raise
+            except (OSError, http.client.HTTPException):
+                self.close() # Соединение в неопределенном состоянии: следующий запрос откроет новое
+                raise
+        try:
+            result = json.loads(data)
+        except ValueError:
+            raise RuntimeError(f"Некорректный ответ сервиса ({response.status})")
+        if response.status != 200:
+            raise RuntimeError(f"Ошибка сервиса ({response.status}): {result.get('error')}")
+        return result
+
+    def _call(self, operation: str, text: str):
+        return self._request("POST", f"/{operation}", {"text": text})["result"]
+
+    def _call_batch(self, operation: str, texts: List[str]) -> List:
+        if not texts:
+            return []
+        return self._request("POST", f"/{operation}", {"texts": list(texts)})["results"]
+
+    def health(self) -> Dict:
+        """Состояние сервиса и статистика микропакетов."""
+        return self._request("GET", "/health")
+
+    def split_text_into_sentences(self, text_content: str) -> List[str]:
+        return self._call("split", text_content)
+
+    def extract_entities(self, text_content: str) -> List[Dict[str, Union[str, int]]]:
+        return self._call("entities", text_content)
+
+    def extract_dialogue_info(self, sentence_text: str) -> Dict[str, Optional[Union[bool, str]]]:
+        return self._call("dialogue", sentence_text)
+
+    def analyze_paragraph(self, paragraph_text: str) -> List[Dict]:
+        """Предложения абзаца с сущностями и dialogue_info (как в записях конвейера)."""
+        return self._call("analyze", paragraph_text)
+
+    def split_text_into_sentences_batch(self, texts: List[str]) -> List[List[str]]:
+        return self._call_batch("split", texts)
+
+    def extract_entities_batch(self, texts: List[str]) -> List[List[Dict[str, Union[str, int]]]]:
+        return self._call_batch("entities", texts)
+
+    def extract_dialogue_info_batch(self, sentences: List[str]) -> List[Dict[str, Optional[Union[bool, str]]]]:
+        return self._call_batch("dialogue", sentences)
+
+    def analyze_paragraphs(self, paragraph_texts: List[str]) -> List[List[Dict]]:
+        return self._call_batch("analyze", paragraph_texts)
+
+    def close(self) -> None:
+        """Закрывает соединение текущего потока."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+if __name__ == '__main__':
+    import sys
+    client = NLPServiceClient(sys.argv[1] if len(sys.argv) > 1 else None)
+    text = "«Привет! Как дела?», – спросил Иван. Он приехал из Москвы вчера."
+    for sentence in client.analyze_paragraph(text):
+        print(sentence)
+    print(client.health())
@@ -0,0 +1,300 @@
+# Dream-Team-core/dataset_preparation/src/nlp_service.py
+# Локальный сервис анализа текста для интерактивных клиентов (ui_core и другие инструменты):
+# один процесс держит загруженными разбиение на предложения, NER и определение диалогов,
+# клиенты обращаются к нему по HTTP на localhost или через Unix-сокет (см. nlp_client)
+# и не загружают модели сами.
+#
+# Одновременные запросы объединяются в микропакеты (MicroBatcher): первый запрос ждет
+# batch_window секунд остальные, после чего все тексты одной операции размечаются одним вызовом
+# пакетных функций (extract_entities_batch и др.). Все вызовы моделей выполняются в одном потоке,
+# потоки HTTP только разбирают запросы и ждут результатов. Результаты совпадают с
+# split_text_into_sentences / extract_entities / extract_dialogue_info.
+#
+# Протокол: POST /<операция> с JSON {"text": "..."} -> {"result": ...} или {"texts": [...]} ->
+# {"results": [...]}; GET /health -> состояние и статистика пакетов. Операции:
+#   split     - список предложений текста;
+#   entities  - сущности текста (как extract_entities);
+#   dialogue  - информация о диалоге в предложении (как extract_dialogue_info);
+#   analyze   - предложения абзаца с сущностями и dialogue_info (как записи конвейера).
+# Запуск: python -m dataset_preparation.src.nlp_service [--host H] [--port N] [--unix-socket PATH]
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import ner_extractor, sentence_splitter
+from .dialogue_identifier import extract_dialogue_info_batch
+from .ner_extractor import extract_entities_batch
+from .sentence_splitter import segment_text, set_sentence_splitter_engine, split_text_into_sentences
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Сколько первый запрос пакета ждет остальные; 0 - без ожидания (в пакет попадают только уже
+# поступившие запросы)
+DEFAULT_BATCH_WINDOW_SECONDS = 0.005
+# Наибольшее число текстов в пакете
+DEFAULT_MAX_BATCH_SIZE = 256
+# Наибольший размер тела запроса
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+# Сколько поток HTTP ждет результата обработки
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 60.0
+# Очередь входящих подключений (по умолчанию в socketserver - 5)
+_LISTEN_BACKLOG = 128
+
+def _split_batch(texts: List[str]) -> List[List[str]]:
+    return [split_text_into_sentences(text) for text in texts]
+
+def _analyze_batch(texts: List[str]) -> List[List[Dict]]:
+    """Разбиение абзацев и разметка всех их предложений одним пакетом (как в data_processor)."""
+    segmented_per_text = [segment_text(text) for text in texts]
+    sentences = [sentence for segmented in segmented_per_text for sentence in segmented]
+    entities = extract_entities_batch([sentence.text for sentence in sentences],
+                                      [sentence.tokens for sentence in sentences])
+    dialogue_infos = extract_dialogue_info_batch([sentence.text for sentence in sentences])
+    results = []
+    position = 0
+    for segmented in segmented_per_text:
+        results.append([
+            {"sentence_index_in_paragraph": index, "text": sentence.text,
+             "entities": entities[position + index], "dialogue_info": dialogue_infos[position + index]}
+            for index, sentence in enumerate(segmented)
+        ])
+        position += len(segmented)
+    return results
+
+# Операция -> пакетная функция (список текстов -> список результатов в том же порядке)
+OPERATIONS: Dict[str, Callable[[List[str]], List]] = {
+    "split": _split_batch,
+    "entities": extract_entities_batch,
+    "dialogue": extract_dialogue_info_batch,
+    "analyze": _analyze_batch,
+}
+
+class MicroBatcher:
+    """
+    Очередь запросов с одним потоком обработки: запросы, поступившие в пределах batch_window
+    от первого (но не больше max_batch_size текстов), обрабатываются одним пакетом на операцию.
+    submit() возвращает Future со списком результатов для переданных текстов.
+    """
+
+    def __init__(self, batch_window: float = DEFAULT_BATCH_WINDOW_SECONDS,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        self._batch_window = batch_window
+        self._max_batch_size = max(1, max_batch_size)
+        self._requests: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "texts": 0, "largest_batch": 0}
+        self._thread = threading.Thread(target=self._run, name="nlp-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: str, texts: List[str]) -> Future:
+        if operation not in OPERATIONS:
+            raise ValueError(f"Неизвестная операция: '{operation}'. Доступны: {', '.join(OPERATIONS)}")
+        future: Future = Future()
+        self._requests.put((operation, texts, future))
+        return future
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        """Обрабатывает уже поступившие запросы и останавливает поток."""
+        self._requests.put(None)
+        self._thread.join()
+
+    def _collect(self, first_request: Tuple) -> Tuple[List[Tuple], bool]:
+        batch = [first_request]
+        size = len(first_request[1])
+        deadline = time.monotonic() + self._batch_window
+        while size < self._max_batch_size:
+            try:
+                timeout = deadline - time.monotonic()
+                request = self._requests.get(timeout=timeout) if timeout > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            size += len(request[1])
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch, closing = self._collect(request)
+            self._process(batch)
+            if closing:
+                return
+
+    def _process(self, batch: List[Tuple]) -> None:
+        by_operation: Dict[str, List[Tuple[List[str], Future]]] = {}
+        for operation, texts, future in batch:
+            if future.set_running_or_notify_cancel():
+                by_operation.setdefault(operation, []).append((texts, future))
+        for operation, requests in by_operation.items():
+            all_texts = [text for texts, _ in requests for text in texts]
+            try:
+                results = OPERATIONS[operation](all_texts)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            position = 0
+            for texts, future in requests:
+                future.set_result(results[position:position + len(texts)])
+                position += len(texts)
+        batch_size = sum(len(texts) for _, texts, _ in batch)
+        with self._stats_lock:
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["texts"] += batch_size
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], batch_size)
+
+class _NLPRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Соединения клиентов переиспользуются между запросами
+    server_version = "DreamTeamNLP/1"
+
+    def log_message(self, format, *args): # Без журнала на каждый запрос
+        pass
+
+    def _reply(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') != "/health":
+            self._reply(404, {"error": f"Неизвестный путь: {self.path}"})
+            return
+        self._reply(200, {"status": "ok", "operations": list(OPERATIONS), "stats": self.server.batcher.stats()})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True # Тело не читаем: соединение дальше не используется
+            self._reply(413, {"error": f"Запрос больше {MAX_REQUEST_BYTES} байт"})
+            return
+        body = self.rfile.read(length)
+        operation = self.path.strip('/')
+        if operation not in OPERATIONS:
+            self._reply(404, {"error": f"Неизвестная операция: '{operation}'. Доступны: {', '.join(OPERATIONS)}"})
+            return
+        try:
+            payload = json.loads(body)
+            single = "texts" not in payload
+            texts = [payload["text"]] if single else payload["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("ожидается строка 'text' или список строк 'texts'")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._reply(400, {"error": f"Некорректный запрос: {e}"})
+            return
+        try:
+            results = self.server.batcher.submit(operation, texts).result(timeout=self.server.request_timeout)
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._reply(200, {"result": results[0]} if single else {"results": results})
+
+class _TCPRequestHandler(_NLPRequestHandler):
+    # Заголовки и тело ответа пишутся отдельно: без TCP_NODELAY алгоритм Нейгла вместе с отложенным
+    # подтверждением у клиента добавлял бы десятки миллисекунд к каждому ответу
+    disable_nagle_algorithm = True
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = _LISTEN_BACKLOG
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # При переполненной очереди подключений клиент Unix-сокета сразу получает EAGAIN, а не ждет
+    request_queue_size = _LISTEN_BACKLOG
+
+class NLPService:
+    """
+    Сервис анализа текста: HTTP-сервер (TCP на host:port или Unix-сокет) и MicroBatcher.
+    serve_forever() блокирует вызывающий поток, start() запускает сервер в фоновом потоке.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_socket: Optional[str] = None,
+                 batch_window: float = DEFAULT_BATCH_WINDOW_SECONDS, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT_SECONDS):
+        self.unix_socket = unix_socket
+        if unix_socket is not None:
+            if os.path.exists(unix_socket): # Сокет, оставшийся от завершившегося процесса
+                os.remove(unix_socket)
+            self._server = _UnixServer(unix_socket, _NLPRequestHandler)
+            self.address = f"unix:{unix_socket}"
+        else:
+            self._server = _TCPServer((host, port), _TCPRequestHandler)
+            self.address = f"http://{host}:{self._server.server_address[1]}"
+        self.batcher = MicroBatcher(batch_window, max_batch_size)
+        self._server.batcher = self.batcher
+        self._server.request_timeout = request_timeout
+        self._thread: Optional[threading.Thread] = None
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "NLPService":
+        self._thread = threading.Thread(target=self.serve_forever, name="nlp-service", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+        self.batcher.close()
+        if self.unix_socket is not None and os.path.exists(self.unix_socket):
+            os.remove(self.unix_socket)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def warm_up_service_components() -> bool:
+    """Загружает ресурсы разбиения на предложения и модели NER до первого запроса."""
+    return sentence_splitter.warm_up() and ner_extractor.warm_up(("split", "dialogue", "ner"))
+
+if __name__ == '__main__':
+    import argparse
+    from .ner_cache import configure_ner_cache
+    parser = argparse.ArgumentParser(description="Локальный сервис анализа текста с микропакетами.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Адрес для HTTP (по умолчанию только localhost)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Порт HTTP")
+    parser.add_argument("--unix-socket", help="Слушать Unix-сокет вместо TCP")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_SECONDS * 1000,
+                        help="Сколько первый запрос пакета ждет остальные, мс")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="Текстов в пакете")
+    parser.add_argument("--sentence-splitter", help="Движок разбиения на предложения: punkt или razdel")
+    parser.add_argument("--no-ner-cache", action="store_true", help="Не кешировать результаты NER в памяти")
+    args = parser.parse_args()
+
+    if args.sentence_splitter:
+        set_sentence_splitter_engine(args.sentence_splitter)
+    configure_ner_cache(enabled=not args.no_ner_cache)
+    print("Загрузка моделей...")
+    if not warm_up_service_components():
+        print("Предупреждение: не все компоненты загружены, соответствующие операции вернут пустые результаты")
+    service = NLPService(args.host, args.port, args.unix_socket, args.batch_window_ms / 1000, args.max_batch_size)
+    print(f"Сервис анализа текста: {service.address}. Для остановки нажмите Ctrl+C.", flush=True)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,247 @@
+# Dream-Team-core/dataset_preparation/src/partitioning.py
+# Распределенная сборка датасета: корпус делится на partition_count разделов, каждый раздел
+# обрабатывается отдельно (на своей машине или в отдельном процессе) в свою выходную директорию,
+# после чего merge_partitions() объединяет частичные результаты.
+#
+# Раздел файла определяется стабильным хешем его относительного пути (SHA-1, не hash() Python,
+# который меняется от запуска к запуску), поэтому все узлы независимо приходят к одному и тому же
+# разбиению, не обмениваясь списками файлов. Каждый раздел кроме обычного (частичного) манифеста
+# пишет _partition.json: номер и число разделов, отпечаток списка файлов всего корпуса
+# и назначенные разделу файлы. По ним объединение проверяет, что разделы получены одним
+# разбиением одного и того же корпуса с одинаковыми настройками, ни один файл не потерян
+# (например, из-за ошибки обработки) и ни один не обработан дважды.
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .manifest import PIPELINE_VERSION, get_manifest_path, save_manifest
+from .record_index import get_index_path
+from .sharding import ShardStore, get_segments_dir, get_shard_index_path, get_shards_dir
+
+PARTITION_FILE_NAME = "_partition.json"
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+def partition_of(relative_input_path: str, partition_count: int) -> int:
+    """Номер раздела входного файла (по относительному пути с разделителями '/')."""
+    digest = hashlib.sha1(relative_input_path.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % partition_count
+
+def check_partition(partition_index: int, partition_count: int) -> None:
+    if partition_count < 1:
+        raise ValueError(f"Число разделов должно быть положительным: {partition_count}")
+    if not 0 <= partition_index < partition_count:
+        raise ValueError(f"Номер раздела должен быть от 0 до {partition_count - 1}: {partition_index}")
+
+def corpus_digest(relative_input_paths: Iterable[str]) -> str:
+    """Отпечаток списка файлов корпуса: у всех разделов одной сборки он должен совпадать."""
+    return hashlib.sha256('\n'.join(sorted(relative_input_paths)).encode('utf-8')).hexdigest()
+
+def get_partition_path(output_dir: str) -> str:
+    return os.path.join(output_dir, PARTITION_FILE_NAME)
+
+def write_partition_info(output_dir: str, partition_index: int, partition_count: int,
+                         corpus_files: Sequence[str], assigned_files: Sequence[str]) -> None:
+    """Атомарно сохраняет описание раздела (_partition.json) в его выходной директории."""
+    os.makedirs(output_dir, exist_ok=True)
+    info = {
+        "index": partition_index,
+        "count": partition_count,
+        "corpus_files": len(corpus_files),
+        "corpus_digest": corpus_digest(corpus_files),
+        "assigned": sorted(assigned_files),
+    }
+    path = get_partition_path(output_dir)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+
+def _load_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def verify_partitions(partition_dirs: Sequence[str]) -> Dict:
+    """
+    Проверяет частичные результаты перед объединением.
+
+    Returns:
+        dict: {"ok": bool, "errors": [описания проблем], "missing": [файлы без результата],
+               "duplicated": [файлы, обработанные несколькими разделами], "files": число файлов,
+               "partitions": [{"dir", "info", "manifest"}] - прочитанные описания разделов}.
+    """
+    errors: List[str] = []
+    partitions = []
+    for partition_dir in partition_dirs:
+        info = _load_json(get_partition_path(partition_dir))
+        manifest = _load_json(get_manifest_path(partition_dir))
+        if info is None:
+            errors.append(f"{partition_dir}: нет описания раздела {PARTITION_FILE_NAME}")
+            continue
+        if manifest is None or not isinstance(manifest.get("files"), dict):
+            errors.append(f"{partition_dir}: нет манифеста или он поврежден")
+            continue
+        if manifest.get("pipeline_version") != PIPELINE_VERSION:
+            errors.append(f"{partition_dir}: манифест создан другой версией конвейера ({manifest.get('pipeline_version')})")
+        partitions.append({"dir": partition_dir, "info": info, "manifest": manifest})
+    report = {"ok": False, "errors": errors, "missing": [], "duplicated": [], "files": 0, "partitions": partitions}
+    if not partitions:
+        errors.append("Нет разделов для объединения")
+        return report
+
+    first = partitions[0]
+    count = first["info"]["count"]
+    for partition in partitions[1:]:
+        for key, description in (("count", "число разделов"), ("corpus_digest", "список файлов корпуса")):
+            if partition["info"][key] != first["info"][key]:
+                errors.append(f"{partition['dir']}: {description} отличается от {first['dir']}")
+        if partition["manifest"].get("settings") != first["manifest"].get("settings"):
+            errors.append(f"{partition['dir']}: настройки конвейера отличаются от {first['dir']}")
+    indexes = [partition["info"]["index"] for partition in partitions]
+    for index in sorted(set(indexes)):
+        if indexes.count(index) > 1:
+            errors.append(f"Раздел {index} передан несколько раз")
+    absent = sorted(set(range(count)) - set(indexes))
+    if absent:
+        errors.append(f"Не хватает разделов: {', '.join(map(str, absent))} (всего {count})")
+
+    seen: Dict[str, str] = {}
+    assigned_total = 0
+    for partition in partitions:
+        info, files = partition["info"], partition["manifest"]["files"]
+        assigned = set(info["assigned"])
+        assigned_total += len(assigned)
+        for relative_input_path in info["assigned"]:
+            if partition_of(relative_input_path, count) != info["index"]:
+                errors.append(f"{partition['dir']}: файл {relative_input_path} не принадлежит разделу {info['index']}")
+            if relative_input_path not in files:
+                report["missing"].append(relative_input_path)
+        for relative_input_path, entry in files.items():
+            if relative_input_path in seen:
+                report["duplicated"].append(relative_input_path)
+                continue
+            seen[relative_input_path] = partition["dir"]
+            if relative_input_path not in assigned:
+                errors.append(f"{partition['dir']}: в манифесте есть файл не из раздела: {relative_input_path}")
+            elif not _output_exists(partition["dir"], partition["manifest"], relative_input_path, entry):
+                report["missing"].append(relative_input_path)
+    if not absent and assigned_total != first["info"]["corpus_files"]:
+        errors.append(f"Разделам назначено {assigned_total} файлов, в корпусе {first['info']['corpus_files']}")
+    if report["missing"]:
+        errors.append(f"Нет результатов для файлов: {len(report['missing'])}")
+    if report["duplicated"]:
+        errors.append(f"Файлы обработаны несколькими разделами: {len(report['duplicated'])}")
+    report["missing"].sort()
+    report["duplicated"].sort()
+    report["files"] = len(seen)
+    report["ok"] = not errors
+    return report
+
+def _output_exists(partition_dir: str, manifest: Dict, relative_input_path: str, entry: Dict) -> bool:
+    relative_output_path = entry.get("output")
+    if relative_output_path is None: # Пустой входной файл: результата нет и не должно быть
+        return True
+    if manifest.get("settings", {}).get("output_layout") == "shards":
+        index = _load_json(get_shard_index_path(partition_dir)) or {}
+        return relative_input_path in index.get("sources", {})
+    return os.path.exists(os.path.join(partition_dir, *relative_output_path.split('/')))
+
+def _transfer(source: str, target: str, move: bool) -> None:
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    if move:
+        shutil.move(source, target)
+    elif os.path.isdir(source): # Результат в формате parquet - директория
+        shutil.copytree(source, target)
+    else:
+        shutil.copy2(source, target)
+
+def _copy_segment(shard_path: str, offset: int, length: int, segment_path: str) -> None:
+    with open(shard_path, 'rb') as shard_file, open(segment_path, 'wb') as segment_file:
+        shard_file.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = shard_file.read(min(_COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError(f"Шард {shard_path} короче, чем указано в индексе")
+            segment_file.write(chunk)
+            remaining -= len(chunk)
+
+def merge_partitions(partition_dirs: Sequence[str], output_dir: str, move: bool = False,
+                     max_shard_bytes: Optional[int] = None) -> Dict:
+    """
+    Проверяет частичные результаты (verify_partitions) и, если проблем нет, объединяет их
+    в output_dir: результат и манифест такие же, как у обычной сборки всего корпуса на одной
+    машине, поэтому дальше output_dir можно обновлять инкрементальными запусками.
+    В раскладке "mirror" выходные файлы и индексы смещений копируются (move=True - переносятся),
+    в раскладке "shards" живые сегменты разделов переупаковываются в новые шарды
+    (max_shard_bytes - размер шарда, по умолчанию как при сборке).
+
+    Returns:
+        dict: Отчет проверки (см. verify_partitions); при ошибках output_dir не изменяется.
+    """
+    report = verify_partitions(partition_dirs)
+    if not report["ok"]:
+        return report
+    if os.path.exists(get_manifest_path(output_dir)):
+        report["ok"] = False
+        report["errors"].append(f"{output_dir}: выходная директория уже содержит манифест")
+        return report
+
+    partitions = sorted(report["partitions"], key=lambda partition: partition["info"]["index"])
+    settings = partitions[0]["manifest"].get("settings", {})
+    merged_files: Dict[str, Dict] = {}
+    shard_store = None
+    if settings.get("output_layout") == "shards":
+        shard_store = ShardStore(output_dir, settings.get("output_format", "jsonl"), settings.get("compression"),
+                                 **({"max_shard_bytes": max_shard_bytes} if max_shard_bytes else {}))
+        shard_store.reset()
+        os.makedirs(get_segments_dir(output_dir), exist_ok=True)
+
+    for partition in partitions:
+        partition_dir = partition["dir"]
+        shard_sources = (_load_json(get_shard_index_path(partition_dir)) or {}).get("sources", {})
+        # В порядке относительных путей: результат не зависит от порядка обработки в разделе
+        for relative_input_path, entry in sorted(partition["manifest"]["files"].items()):
+            entry = dict(entry)
+            relative_output_path = entry.get("output")
+            if relative_output_path is not None and shard_store is not None:
+                source = shard_sources[relative_input_path]
+                segment_path = os.path.join(get_segments_dir(output_dir), "merge.segment")
+                _copy_segment(os.path.join(get_shards_dir(partition_dir), source["shard"]),
+                              source["offset"], source["length"], segment_path)
+                entry["output"] = shard_store.add_source(relative_input_path, segment_path, source["records"],
+                                                         source["category"], source["source_file"])
+            elif relative_output_path is not None:
+                source_path = os.path.join(partition_dir, *relative_output_path.split('/'))
+                target_path = os.path.join(output_dir, *relative_output_path.split('/'))
+                _transfer(source_path, target_path, move)
+                if os.path.exists(get_index_path(source_path)):
+                    _transfer(get_index_path(source_path), get_index_path(target_path), move)
+            merged_files[relative_input_path] = entry
+
+    if shard_store is not None:
+        shutil.rmtree(get_segments_dir(output_dir), ignore_errors=True)
+        shard_store.save()
+    save_manifest(output_dir, {"settings": settings, "files": merged_files})
+    print(f"Объединено разделов: {len(partitions)}, файлов: {len(merged_files)} -> {output_dir}")
+    return report
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 3:
+        print("Использование: python -m dataset_preparation.src.partitioning <выходная_директория> <раздел> [<раздел> ...]")
+        sys.exit(1)
+    merge_report = merge_partitions(sys.argv[2:], sys.argv[1])
+    for error in merge_report["errors"]:
+        print(f"Ошибка: {error}")
+    for relative_path in merge_report["missing"]:
+        print(f"  нет результата: {relative_path}")
+    for relative_path in merge_report["duplicated"]:
+        print(f"  обработан несколькими разделами: {relative_path}")
+    sys.exit(0 if merge_report["ok"] else 1)
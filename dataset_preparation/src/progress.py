@@ -0,0 +1,305 @@
+# Dream-Team-core/dataset_preparation/src/progress.py
+# События хода обработки и управление запуском конвейера для интерфейса (ui_core) и CLI.
+#
+# run_dataset_creation_pipeline(on_event=...) вызывает подписчика со словарями событий:
+#   run_started        - запуск начат (поиск входных файлов идет одновременно с обработкой, см. discovery);
+#   discovery_finished - files_found, files_to_process, files_skipped, bytes_total: поиск файлов завершен;
+#   file_started       - file_path (при параллельной обработке - файл передан процессу-обработчику);
+#   file_finished      - file_path, success, error, paragraphs, sentences, entities, seconds;
+#   progress           - files_done, files_total, paragraphs_done, paragraphs_per_second,
+#                        files_per_second, bytes_done, bytes_total, elapsed_seconds, eta_seconds,
+#                        discovery_complete (не чаще раза в interval секунд и после последнего файла).
+#                        До завершения поиска files_total и bytes_total - найденное к этому моменту,
+#                        а eta_seconds - None;
+#   error              - message (и file_path для ошибок обработки файла);
+#   run_finished       - status ("completed", "cancelled", "failed", "empty") и итоговые счетчики.
+# У каждого события есть поля "type" и "time" (time.time()). Время на паузе не учитывается
+# в скорости и оценке оставшегося времени; оценка строится по объему уже обработанных входных файлов.
+#
+# RunControl - кооперативная отмена и пауза: конвейер проверяет его между файлами и между абзацами
+# (в том числе в процессах-обработчиках пула). При отмене текущие файлы не публикуются: для несжатых
+# jsonl и msgpack сохраняется контрольная точка внутри файла (см. checkpoints), для остальных форматов
+# временные выходные файлы удаляются. Манифест сохраняется: следующий запуск продолжит с места остановки.
+# start_pipeline_run() запускает конвейер в фоновом потоке или процессе и возвращает PipelineRun
+# с очередью событий и методами cancel/pause/resume.
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Как часто (в секундах) отправляются события progress внутри файла
+DEFAULT_PROGRESS_INTERVAL = 0.5
+# Как часто (в секундах) поставленный на паузу конвейер проверяет отмену
+_PAUSE_CHECK_INTERVAL = 0.1
+
+RUN_MODES = ("thread", "process")
+
+class PipelineCancelled(Exception):
+    """Запуск остановлен через RunControl.cancel()."""
+
+class RunControl:
+    """
+    Флаги отмены и паузы запуска. События multiprocessing работают и между потоками,
+    и в процессах-обработчиках пула (передаются им при создании).
+    """
+
+    def __init__(self):
+        self._cancelled = multiprocessing.Event()
+        self._running = multiprocessing.Event()
+        self._running.set()
+        self.paused_seconds = 0.0 # Сколько текущий процесс провел на паузе в checkpoint()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._running.set() # Поставленный на паузу конвейер должен увидеть отмену
+
+    def pause(self) -> None:
+        if not self._cancelled.is_set():
+            self._running.clear()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def checkpoint(self) -> None:
+        """Ждет снятия паузы; возбуждает PipelineCancelled, если запуск отменен."""
+        if not self._running.is_set():
+            paused_at = time.monotonic()
+            while not self._running.wait(_PAUSE_CHECK_INTERVAL):
+                pass
+            self.paused_seconds += time.monotonic() - paused_at
+        if self._cancelled.is_set():
+            raise PipelineCancelled()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["paused_seconds"] = 0.0
+        return state
+
+class ProgressReporter:
+    """Считает ход обработки и передает события подписчику (без подписчика ничего не делает)."""
+
+    def __init__(self, on_event: Optional[Callable[[Dict], None]] = None, control: Optional[RunControl] = None,
+                 interval: float = DEFAULT_PROGRESS_INTERVAL):
+        self.enabled = on_event is not None
+        self._on_event = on_event
+        self._control = control
+        self._interval = interval
+        self._subscriber_failed = False
+        self.files_total = 0 # Найденные к этому моменту файлы для обработки и их объем
+        self.bytes_total = 0
+        self.discovery_complete = False
+        self.files_done = 0
+        self.bytes_done = 0
+        self.paragraphs_done = 0
+        self._file_paragraphs = 0 # Абзацы текущего файла, о которых уже сообщено (последовательная обработка)
+        self._started_at = time.monotonic()
+        self._last_progress = 0.0
+
+    def emit(self, event_type: str, **fields) -> None:
+        if not self.enabled:
+            return
+        event = {"type": event_type, "time": time.time()}
+        event.update(fields)
+        try:
+            self._on_event(event)
+        except Exception: # Ошибка подписчика (например, интерфейса) не должна прерывать обработку
+            if not self._subscriber_failed:
+                self._subscriber_failed = True
+                print(f"Ошибка обработчика событий хода обработки:\n{traceback.format_exc()}")
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        self.emit("run_started")
+
+    def file_discovered(self, input_bytes: int) -> None:
+        """Найден файл для обработки (до завершения поиска общий объем работы растет)."""
+        self.files_total += 1
+        self.bytes_total += input_bytes
+
+    def discovery_finished(self, files_found: int, files_skipped: int) -> None:
+        self.discovery_complete = True
+        self.emit("discovery_finished", files_found=files_found, files_to_process=self.files_total,
+                  files_skipped=files_skipped, bytes_total=self.bytes_total)
+        if self.enabled and self.files_done >= self.files_total:
+            self.progress()
+
+    def file_started(self, file_path: str) -> None:
+        self._file_paragraphs = 0
+        self.emit("file_started", file_path=file_path)
+
+    def paragraph_done(self) -> None:
+        """Абзац текущего файла обработан (при последовательной обработке)."""
+        if not self.enabled:
+            return
+        self._file_paragraphs += 1
+        self.paragraphs_done += 1
+        if time.monotonic() - self._last_progress >= self._interval:
+            self.progress()
+
+    def file_finished(self, result: Dict, input_bytes: int, seconds: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        self.files_done += 1
+        self.bytes_done += input_bytes
+        # Абзацы, о которых уже сообщено по ходу файла, заменяются итогом файла
+        self.paragraphs_done += result["paragraphs"] - self._file_paragraphs
+        self._file_paragraphs = 0
+        self.emit("file_finished", file_path=result["file_path"], success=result["success"], error=result["error"],
+                  paragraphs=result["paragraphs"], sentences=result["sentences"], entities=result["entities"],
+                  seconds=seconds)
+        if not result["success"]:
+            self.emit("error", file_path=result["file_path"],
+                      message=result["error"] or "Ошибка обработки файла")
+        if ((self.discovery_complete and self.files_done >= self.files_total)
+                or time.monotonic() - self._last_progress >= self._interval):
+            self.progress()
+
+    def elapsed(self) -> float:
+        paused = self._control.paused_seconds if self._control is not None else 0.0
+        return max(0.0, time.monotonic() - self._started_at - paused)
+
+    def progress(self) -> None:
+        self._last_progress = time.monotonic()
+        elapsed = self.elapsed()
+        eta = None
+        # Пока поиск файлов не завершен, общий объем работы неизвестен
+        if self.discovery_complete:
+            if self.files_done >= self.files_total:
+                eta = 0.0
+            elif self.bytes_done > 0 and elapsed > 0:
+                eta = (self.bytes_total - self.bytes_done) * elapsed / self.bytes_done
+        self.emit("progress", files_done=self.files_done, files_total=self.files_total,
+                  paragraphs_done=self.paragraphs_done,
+                  paragraphs_per_second=self.paragraphs_done / elapsed if elapsed > 0 else 0.0,
+                  files_per_second=self.files_done / elapsed if elapsed > 0 else 0.0,
+                  bytes_done=self.bytes_done, bytes_total=self.bytes_total,
+                  elapsed_seconds=elapsed, eta_seconds=eta, discovery_complete=self.discovery_complete)
+
+    def finish(self, status: str, **summary) -> None:
+        self.emit("run_finished", status=status, elapsed_seconds=self.elapsed(), **summary)
+
+def _run_with_events(pipeline_options: Dict, control: RunControl, put_event: Callable[[Dict], None]) -> None:
+    from .main_creator import run_dataset_creation_pipeline
+    try:
+        run_dataset_creation_pipeline(on_event=put_event, control=control, **pipeline_options)
+    except BaseException as e: # Событие завершения должно прийти в любом случае
+        put_event({"type": "error", "time": time.time(), "message": f"{type(e).__name__}: {e}"})
+        put_event({"type": "run_finished", "time": time.time(), "status": "failed"})
+
+class PipelineRun:
+    """
+    Запуск конвейера в фоне. События забираются без блокировки (poll_events, удобно вызывать
+    по таймеру интерфейса) или итерацией events(); итог - событие run_finished (result).
+    """
+
+    def __init__(self, mode: str, pipeline_options: Dict):
+        if mode not in RUN_MODES:
+            raise ValueError(f"Неизвестный режим запуска: '{mode}'. Доступны: {', '.join(RUN_MODES)}")
+        self.mode = mode
+        self.control = RunControl()
+        self.result: Optional[Dict] = None
+        self._buffer: List[Dict] = [] # События, прочитанные wait(), но еще не выданные
+        if mode == "thread":
+            self._events = queue.Queue()
+            self._worker = threading.Thread(target=_run_with_events, name="dataset-pipeline",
+                                            args=(pipeline_options, self.control, self._events.put), daemon=True)
+        else:
+            # Процесс не демонический: ему самому может понадобиться пул процессов-обработчиков
+            self._events = multiprocessing.Queue()
+            self._worker = multiprocessing.Process(target=_run_with_events, name="dataset-pipeline",
+                                                   args=(pipeline_options, self.control, self._events.put))
+        self._worker.start()
+
+    def cancel(self) -> None:
+        self.control.cancel()
+
+    def pause(self) -> None:
+        self.control.pause()
+
+    def resume(self) -> None:
+        self.control.resume()
+
+    @property
+    def paused(self) -> bool:
+        return self.control.paused
+
+    def is_running(self) -> bool:
+        return self._worker.is_alive()
+
+    def _read(self, timeout: float) -> Optional[Dict]:
+        try:
+            event = self._events.get(timeout=timeout) if timeout > 0 else self._events.get_nowait()
+        except queue.Empty:
+            return None
+        if event["type"] == "run_finished":
+            self.result = event
+        return event
+
+    def _finish_if_crashed(self) -> None:
+        """Фоновый запуск завершился: дочитывает события; без run_finished (аварийное завершение процесса) - failed."""
+        while (event := self._read(_PAUSE_CHECK_INTERVAL)) is not None:
+            self._buffer.append(event)
+        if self.result is None:
+            self.result = {"type": "run_finished", "time": time.time(), "status": "failed"}
+            self._buffer.append(self.result)
+
+    def poll_events(self) -> List[Dict]:
+        """Все накопившиеся события без ожидания."""
+        events, self._buffer = self._buffer, []
+        while (event := self._read(0)) is not None:
+            events.append(event)
+        if not events and self.result is None and not self._worker.is_alive():
+            self._finish_if_crashed()
+            events, self._buffer = self._buffer, []
+        return events
+
+    def events(self, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """События по мере появления до run_finished (или пока за timeout секунд нет новых)."""
+        while True:
+            if self._buffer:
+                yield self._buffer.pop(0)
+                continue
+            if self.result is not None:
+                return
+            event = self._read(timeout if timeout is not None else DEFAULT_PROGRESS_INTERVAL)
+            if event is not None:
+                yield event
+            elif not self._worker.is_alive():
+                self._finish_if_crashed()
+            elif timeout is not None:
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Ждет завершения и возвращает result (None по истечении timeout); события сохраняются."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.result is None:
+            step = DEFAULT_PROGRESS_INTERVAL if deadline is None else min(DEFAULT_PROGRESS_INTERVAL,
+                                                                          deadline - time.monotonic())
+            if step <= 0:
+                return None
+            event = self._read(step)
+            if event is not None:
+                self._buffer.append(event)
+            elif not self._worker.is_alive():
+                self._finish_if_crashed()
+        self._worker.join()
+        return self.result
+
+def start_pipeline_run(mode: str = "thread", verbose: bool = False, **pipeline_options) -> PipelineRun:
+    """
+    Запускает run_dataset_creation_pipeline в фоновом потоке (mode="thread") или процессе
+    (mode="process": модели загружаются в нем, интерфейс не делит с обработкой GIL).
+    pipeline_options - параметры run_dataset_creation_pipeline (кроме on_event и control).
+    По умолчанию строки о каждом файле не печатаются (verbose=False): ход обработки - в событиях.
+    """
+    return PipelineRun(mode, dict(pipeline_options, verbose=verbose))
@@ -0,0 +1,374 @@
+# Dream-Team-core/dataset_preparation/src/record_index.py
+# Индекс смещений записей в выходных файлах для произвольного доступа без сканирования:
+# получение абзаца по id (например, "chapter1_paragraph_42") и случайные выборки.
+# Индекс пишется рядом с выходным файлом (chapter1.jsonl -> chapter1.jsonl.idx) при его создании
+# в process_file_to_jsonl, а для уже готовых файлов строится через build_offset_index().
+# Поддерживаются несжатые jsonl и msgpack (по смещению в сжатом потоке запись не прочитать).
+#
+# Формат файла индекса (little-endian, секции выровнены по 8 байт):
+#   заголовок: магическое число (8 байт), версия, число записей n, размер хеш-таблицы, длина метаданных (по uint32)
+#   метаданные: JSON (формат и размер файла данных, source_file, category)
+#   смещения записей: n + 1 uint64 (запись i занимает байты [off[i], off[i+1]) файла данных)
+#   смещения id: n + 1 uint32 в блоке id
+#   хеш-таблица: uint32 (номер записи + 1, 0 - пусто), открытая адресация по crc32(id)
+#   блок id: id записей подряд в UTF-8
+# Чтение (RecordIndex, DatasetIndex) отображает индекс и данные в память (mmap): запись по id или
+# по номеру достается за O(1) без чтения остального файла.
+import json
+import mmap
+import os
+import random
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from .serialization import OUTPUT_EXTENSIONS, detect_compression, detect_output_format, loads_json_line
+
+INDEX_EXTENSION = ".idx"
+INDEXED_FORMATS = ("jsonl", "msgpack")
+
+_INDEX_MAGIC = b"DTRIDX\x00\x00"
+_INDEX_VERSION = 1
+_HEADER = struct.Struct("<8sIIII")
+
+def get_index_path(data_path: str) -> str:
+    return data_path + INDEX_EXTENSION
+
+def is_indexable(output_format: str, compression: Optional[str] = None) -> bool:
+    return output_format in INDEXED_FORMATS and compression is None
+
+def _pad8(length: int) -> int:
+    return (8 - length % 8) % 8
+
+def _table_size(count: int) -> int:
+    """Степень двойки не меньше 2 * count (заполнение таблицы не больше половины)."""
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    return size
+
+def _id_hash(record_id: bytes) -> int:
+    # crc32 одинаков во всех процессах (в отличие от hash() для строк)
+    return zlib.crc32(record_id)
+
+class OffsetIndexBuilder:
+    """
+    Накопление смещений записей по мере записи файла данных: add() вызывается для каждой
+    записи с ее id и размером в байтах, write() сохраняет индекс.
+    """
+
+    def __init__(self, output_format: str = "jsonl", source_file: Optional[str] = None,
+                 category: Optional[str] = None):
+        self.output_format = output_format
+        self.source_file = source_file
+        self.category = category
+        self._offsets = array('Q', [0])
+        self._id_offsets = array('I', [0])
+        self._ids = bytearray()
+
+    def add(self, record_id: str, length: int) -> None:
+        self._offsets.append(self._offsets[-1] + length)
+        self._ids += record_id.encode('utf-8')
+        self._id_offsets.append(len(self._ids))
+
+    def skip(self, length: int) -> None:
+        """Пропуск байт, не относящихся ни к одной записи (например, пустой строки в jsonl)."""
+        # Пропуск после записи приписывается к ней (JSON с пробелами в конце разбирается),
+        # до первой записи - сдвигает ее начало
+        self._offsets[-1] += length
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def write(self, index_path: str) -> None:
+        """Атомарно записывает индекс (временный файл index_path + '.tmp' и переименование)."""
+        count = len(self)
+        table_size = _table_size(count)
+        table = array('I', bytes(4 * table_size))
+        mask = table_size - 1
+        ids = bytes(self._ids)
+        for number in range(count):
+            slot = _id_hash(ids[self._id_offsets[number]:self._id_offsets[number + 1]]) & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = number + 1
+        meta = json.dumps({"format": self.output_format, "data_size": self._offsets[-1],
+                           "source_file": self.source_file, "category": self.category},
+                          ensure_ascii=False).encode('utf-8')
+        sections = [
+            _HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, count, table_size, len(meta)),
+            meta + bytes(_pad8(len(meta))),
+            _to_little_endian(self._offsets),
+            _to_little_endian(self._id_offsets) + bytes(_pad8(4 * (count + 1))),
+            _to_little_endian(table),
+            ids,
+        ]
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            for section in sections:
+                f.write(section)
+        os.replace(tmp_path, index_path)
+
+def _to_little_endian(values: array) -> bytes:
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _index_records(f: BinaryIO, output_format: str,
+                   builder: Optional[OffsetIndexBuilder] = None) -> Optional[OffsetIndexBuilder]:
+    """Добавляет в builder (или в новый, по первой записи) смещения всех записей файла f."""
+    if output_format == "jsonl":
+        skipped = 0
+        for line in f:
+            if not line.strip():
+                skipped += len(line)
+                continue
+            record = loads_json_line(line)
+            if builder is None:
+                builder = OffsetIndexBuilder(output_format, record.get("source_file"), record.get("category"))
+            builder.skip(skipped)
+            skipped = 0
+            builder.add(record["id"], len(line))
+        if builder is not None:
+            builder.skip(skipped)
+    else:
+        import msgpack
+        unpacker = msgpack.Unpacker(f, raw=False)
+        position = 0
+        for record in unpacker:
+            if builder is None:
+                builder = OffsetIndexBuilder(output_format, record.get("source_file"), record.get("category"))
+            builder.add(record["id"], unpacker.tell() - position)
+            position = unpacker.tell()
+    return builder
+
+def index_existing_records(builder: OffsetIndexBuilder, data_path: str) -> None:
+    """Добавляет в builder записи, уже записанные в файл data_path (при продолжении записи, см. checkpoints)."""
+    with open(data_path, 'rb') as f:
+        _index_records(f, builder.output_format, builder)
+
+def build_offset_index(data_path: str, index_path: Optional[str] = None) -> int:
+    """
+    Строит индекс для готового выходного файла (jsonl или msgpack без сжатия), прочитав его целиком.
+
+    Returns:
+        int: Число проиндексированных записей.
+    """
+    output_format = detect_output_format(data_path)
+    if not is_indexable(output_format, detect_compression(data_path)):
+        raise ValueError(f"Индекс строится только для несжатых файлов jsonl и msgpack: {data_path}")
+    with open(data_path, 'rb') as f:
+        builder = _index_records(f, output_format)
+    builder = builder or OffsetIndexBuilder(output_format)
+    builder.write(index_path or get_index_path(data_path))
+    return len(builder)
+
+class RecordIndex:
+    """
+    Произвольный доступ к записям одного выходного файла по его индексу.
+    Индекс и данные отображаются в память; закрывать через close() или with.
+    """
+
+    def __init__(self, data_path: str, index_path: Optional[str] = None):
+        self.data_path = data_path
+        self.index_path = index_path or get_index_path(data_path)
+        with open(self.index_path, 'rb') as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, table_size, meta_length = _HEADER.unpack_from(self._index, 0)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            self._index.close()
+            raise ValueError(f"Файл не является индексом записей (или другой версии): {self.index_path}")
+        position = _HEADER.size
+        meta = json.loads(self._index[position:position + meta_length])
+        position += meta_length + _pad8(meta_length)
+        self.output_format = meta["format"]
+        self.source_file = meta.get("source_file")
+        self.category = meta.get("category")
+        self._count = count
+        self._table_mask = table_size - 1
+        view = memoryview(self._index)
+        self._offsets = _cast(view[position:position + 8 * (count + 1)], 'Q')
+        position += 8 * (count + 1)
+        self._id_offsets = _cast(view[position:position + 4 * (count + 1)], 'I')
+        position += 4 * (count + 1) + _pad8(4 * (count + 1))
+        self._table = _cast(view[position:position + 4 * table_size], 'I')
+        self._ids = view[position + 4 * table_size:]
+        # Секции ссылаются на отображение сами; общий view освобождается, чтобы close() мог закрыть mmap
+        view.release()
+
+        if os.path.getsize(data_path) != meta["data_size"]:
+            self.close()
+            raise ValueError(f"Индекс {self.index_path} не соответствует файлу данных (размер изменился): "
+                             f"постройте его заново через build_offset_index()")
+        self._data = None
+        if count:
+            with open(data_path, 'rb') as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._unpackb = None
+        if self.output_format == "msgpack":
+            import msgpack
+            self._unpackb = msgpack.unpackb
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> "RecordIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # memoryview на mmap нужно освободить до закрытия отображения
+        for name in ("_offsets", "_id_offsets", "_table", "_ids"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        self._index.close()
+        if getattr(self, "_data", None) is not None:
+            self._data.close()
+            self._data = None
+
+    def record_id(self, number: int) -> str:
+        return bytes(self._ids[self._id_offsets[number]:self._id_offsets[number + 1]]).decode('utf-8')
+
+    def find(self, record_id: str) -> Optional[int]:
+        """Номер записи с данным id в файле или None."""
+        key = record_id.encode('utf-8')
+        slot = _id_hash(key) & self._table_mask
+        while True:
+            number = self._table[slot]
+            if not number:
+                return None
+            number -= 1
+            if self._ids[self._id_offsets[number]:self._id_offsets[number + 1]] == key:
+                return number
+            slot = (slot + 1) & self._table_mask
+
+    def record(self, number: int) -> Dict:
+        """Запись по номеру в файле (0 .. len - 1)."""
+        if not 0 <= number < self._count:
+            raise IndexError(f"Номер записи вне диапазона: {number}")
+        payload = self._data[self._offsets[number]:self._offsets[number + 1]]
+        if self._unpackb is not None:
+            return self._unpackb(payload, raw=False)
+        return loads_json_line(payload)
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        number = self.find(record_id)
+        return None if number is None else self.record(number)
+
+    def sample(self, count: int, rng: Optional[random.Random] = None) -> List[Dict]:
+        """count случайных записей (с повторениями)."""
+        rng = rng or random
+        return [self.record(rng.randrange(self._count)) for _ in range(count)] if self._count else []
+
+def _cast(view: memoryview, typecode: str) -> memoryview:
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        raise RuntimeError("Чтение индекса записей поддерживается только на little-endian платформах")
+    return view.cast(typecode)
+
+class DatasetIndex:
+    """
+    Произвольный доступ ко всем проиндексированным выходным файлам директории: запись по id,
+    записи категории или исходного файла, случайные выборки по всему датасету или категории.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.files: List[RecordIndex] = []
+        for root, dirs, names in os.walk(output_dir):
+            dirs.sort()
+            for name in sorted(names):
+                if not name.endswith(INDEX_EXTENSION):
+                    continue
+                data_path = os.path.join(root, name[:-len(INDEX_EXTENSION)])
+                if os.path.exists(data_path) and data_path.endswith(tuple(OUTPUT_EXTENSIONS[f] for f in INDEXED_FORMATS)):
+                    self.files.append(RecordIndex(data_path))
+        # id записей конвейера имеют вид "<имя файла без расширения>_paragraph_<номер>":
+        # по префиксу сразу находится файл, в котором искать
+        self._files_by_stem: Dict[str, List[RecordIndex]] = {}
+        self._files_by_category: Dict[Optional[str], List[RecordIndex]] = {}
+        for record_index in self.files:
+            stem = os.path.splitext(record_index.source_file or "")[0]
+            self._files_by_stem.setdefault(stem, []).append(record_index)
+            self._files_by_category.setdefault(record_index.category, []).append(record_index)
+        self._cumulative_counts = self._cumulative(self.files)
+
+    @staticmethod
+    def _cumulative(files: List[RecordIndex]) -> List[int]:
+        counts, total = [], 0
+        for record_index in files:
+            total += len(record_index)
+            counts.append(total)
+        return counts
+
+    def __len__(self) -> int:
+        return self._cumulative_counts[-1] if self._cumulative_counts else 0
+
+    def __enter__(self) -> "DatasetIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for record_index in self.files:
+            record_index.close()
+        self.files = []
+
+    def categories(self) -> List[Optional[str]]:
+        return sorted(self._files_by_category, key=lambda c: c or "")
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        stem = record_id.rsplit("_paragraph_", 1)[0]
+        candidates = self._files_by_stem.get(stem, [])
+        for record_index in candidates + [f for f in self.files if f not in candidates]:
+            number = record_index.find(record_id)
+            if number is not None:
+                return record_index.record(number)
+        return None
+
+    def iter_category(self, category: Optional[str]) -> Iterator[Dict]:
+        for record_index in self._files_by_category.get(category, []):
+            for number in range(len(record_index)):
+                yield record_index.record(number)
+
+    def iter_source_file(self, source_file: str, category: Optional[str] = None) -> Iterator[Dict]:
+        for record_index in self.files:
+            if record_index.source_file == source_file and (category is None or record_index.category == category):
+                for number in range(len(record_index)):
+                    yield record_index.record(number)
+
+    def sample(self, count: int, category: Optional[str] = None,
+               rng: Optional[random.Random] = None) -> List[Dict]:
+        """count случайных записей (с повторениями) по всему датасету или одной категории."""
+        rng = rng or random
+        files = self.files if category is None else self._files_by_category.get(category, [])
+        cumulative = self._cumulative_counts if category is None else self._cumulative(files)
+        if not cumulative or not cumulative[-1]:
+            return []
+        result = []
+        for _ in range(count):
+            position = rng.randrange(cumulative[-1])
+            file_number = bisect_right(cumulative, position)
+            previous = cumulative[file_number - 1] if file_number else 0
+            result.append(files[file_number].record(position - previous))
+        return result
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print("Использование: python -m dataset_preparation.src.record_index <выходная_директория> [id]")
+        sys.exit(1)
+    with DatasetIndex(sys.argv[1]) as dataset_index:
+        print(f"Проиндексировано файлов: {len(dataset_index.files)}, записей: {len(dataset_index)}")
+        if len(sys.argv) > 2:
+            print(json.dumps(dataset_index.get(sys.argv[2]), ensure_ascii=False, indent=2))
+        else:
+            for sampled in dataset_index.sample(3, rng=random.Random(0)):
+                print(f"  {sampled['id']}: {sampled['paragraph_text'][:80]}")
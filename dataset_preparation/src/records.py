@@ -0,0 +1,294 @@
+# Dream-Team-core/dataset_preparation/src/records.py
+# Компактная типизированная модель записей датасета: Paragraph -> Sentence -> Entity, DialogueInfo.
+# Конвейер пишет записи как вложенные словари (каждое предложение - словарь с вложенным словарем
+# dialogue_info, каждая сущность - словарь из четырех ключей); загруженный обратно корпус в таком
+# виде занимает в памяти в несколько раз больше, чем на диске. Здесь те же данные хранятся
+# в классах с __slots__ (без словаря атрибутов у каждого объекта):
+# - списки сущностей и предложений - кортежи, пустые списки сущностей - общий пустой кортеж;
+# - DialogueInfo не изменяется, поэтому одинаковые значения (в первую очередь "не диалог")
+#   разделяются между предложениями;
+# - повторяющиеся строки (тип сущности, маркер диалога, имя файла, категория, тексты сущностей)
+#   интернируются.
+# Модель читается из записей схемы JSONL (from_dict) и сериализуется обратно в ту же схему
+# (to_dict) с тем же порядком ключей, поэтому запись, прочитанная и записанная заново, дает
+# байт-в-байт ту же строку JSONL. Ключи верхнего уровня, неизвестные модели, сохраняются в extra.
+# Поля этапов, которые к записи не применялись (см. stages), равны None: у Sentence - entities,
+# dialogue_info и syntax, у Entity - normal (пишется, только если этап "normalize" применялся).
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .serialization import iter_records, open_record_writer
+from .stages import DEFAULT_STAGES
+
+_intern = sys.intern
+
+def _intern_optional(value: Optional[str]) -> Optional[str]:
+    return _intern(value) if value is not None else None
+
+class Entity:
+    """
+    Именованная сущность предложения: текст, тип (PER, LOC, ORG), символьные границы в предложении
+    и нормальная форма (этап "normalize").
+    """
+    __slots__ = ("text", "type", "start_char", "end_char", "normal")
+
+    def __init__(self, text: str, type: str, start_char: int, end_char: int, normal: Optional[str] = None):
+        self.text = text
+        self.type = type
+        self.start_char = start_char
+        self.end_char = end_char
+        self.normal = normal
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Entity":
+        return cls(_intern(data["text"]), _intern(data["type"]), data["start_char"], data["end_char"],
+                   _intern_optional(data.get("normal")))
+
+    def to_dict(self, with_normal: bool = False) -> Dict:
+        data = {"text": self.text, "type": self.type, "start_char": self.start_char, "end_char": self.end_char}
+        if with_normal:
+            data["normal"] = self.normal
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Entity):
+            return NotImplemented
+        return (self.text, self.type, self.start_char, self.end_char, self.normal) == \
+               (other.text, other.type, other.start_char, other.end_char, other.normal)
+
+    def __repr__(self) -> str:
+        return f"Entity({self.text!r}, {self.type!r}, {self.start_char}, {self.end_char})"
+
+class DialogueInfo:
+    """
+    Признаки диалога предложения (см. dialogue_identifier.extract_dialogue_info).
+    Экземпляры неизменяемы и разделяются между предложениями: получайте их через from_dict или of().
+    """
+    __slots__ = ("is_dialogue", "speaker", "dialogue_cue")
+
+    _shared: Dict[Tuple, "DialogueInfo"] = {}
+
+    def __init__(self, is_dialogue: bool = False, speaker: Optional[str] = None, dialogue_cue: Optional[str] = None):
+        object.__setattr__(self, "is_dialogue", is_dialogue)
+        object.__setattr__(self, "speaker", speaker)
+        object.__setattr__(self, "dialogue_cue", dialogue_cue)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DialogueInfo не изменяется")
+
+    @classmethod
+    def of(cls, is_dialogue: bool = False, speaker: Optional[str] = None,
+           dialogue_cue: Optional[str] = None) -> "DialogueInfo":
+        """Общий экземпляр для набора значений (реплики без спикера встречаются тысячами)."""
+        key = (is_dialogue, speaker, dialogue_cue)
+        info = cls._shared.get(key)
+        if info is None:
+            info = cls(is_dialogue, _intern_optional(speaker), _intern_optional(dialogue_cue))
+            if speaker is None:
+                # Спикеров много и они разные: разделяются только значения без спикера
+                cls._shared[key] = info
+        return info
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DialogueInfo":
+        return cls.of(data["is_dialogue"], data["speaker"], data["dialogue_cue"])
+
+    def to_dict(self) -> Dict:
+        return {"is_dialogue": self.is_dialogue, "speaker": self.speaker, "dialogue_cue": self.dialogue_cue}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DialogueInfo):
+            return NotImplemented
+        return (self.is_dialogue, self.speaker, self.dialogue_cue) == \
+               (other.is_dialogue, other.speaker, other.dialogue_cue)
+
+    def __hash__(self) -> int:
+        return hash((self.is_dialogue, self.speaker, self.dialogue_cue))
+
+    def __repr__(self) -> str:
+        return f"DialogueInfo({self.is_dialogue!r}, {self.speaker!r}, {self.dialogue_cue!r})"
+
+class SyntaxToken:
+    """Токен синтаксического разбора (этап "syntax"): номер с 1, текст, номер вершины (0 у корня) и отношение."""
+    __slots__ = ("id", "text", "head_id", "rel")
+
+    def __init__(self, id: int, text: str, head_id: int, rel: str):
+        self.id = id
+        self.text = text
+        self.head_id = head_id
+        self.rel = rel
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SyntaxToken":
+        return cls(data["id"], data["text"], data["head_id"], _intern(data["rel"]))
+
+    def to_dict(self) -> Dict:
+        return {"id": self.id, "text": self.text, "head_id": self.head_id, "rel": self.rel}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SyntaxToken):
+            return NotImplemented
+        return (self.id, self.text, self.head_id, self.rel) == (other.id, other.text, other.head_id, other.rel)
+
+    def __repr__(self) -> str:
+        return f"SyntaxToken({self.id}, {self.text!r}, {self.head_id}, {self.rel!r})"
+
+class Sentence:
+    """
+    Предложение абзаца с сущностями, признаками диалога и синтаксическим разбором
+    (None - соответствующий этап не выполнялся).
+    """
+    __slots__ = ("sentence_index_in_paragraph", "text", "entities", "dialogue_info", "syntax")
+
+    def __init__(self, sentence_index_in_paragraph: int, text: str, entities: Optional[Tuple[Entity, ...]] = (),
+                 dialogue_info: Optional[DialogueInfo] = None, syntax: Optional[Tuple[SyntaxToken, ...]] = None):
+        self.sentence_index_in_paragraph = sentence_index_in_paragraph
+        self.text = text
+        self.entities = tuple(entities) if entities is not None else None
+        self.dialogue_info = dialogue_info
+        self.syntax = tuple(syntax) if syntax is not None else None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Sentence":
+        entities = data.get("entities")
+        dialogue_info = data.get("dialogue_info")
+        syntax = data.get("syntax")
+        return cls(
+            data["sentence_index_in_paragraph"],
+            data["text"],
+            tuple(Entity.from_dict(entity) for entity in entities) if entities else entities,
+            DialogueInfo.from_dict(dialogue_info) if dialogue_info is not None else None,
+            tuple(SyntaxToken.from_dict(token) for token in syntax) if syntax is not None else None,
+        )
+
+    def to_dict(self, with_normal: bool = False) -> Dict:
+        data = {"sentence_index_in_paragraph": self.sentence_index_in_paragraph, "text": self.text}
+        if self.entities is not None:
+            data["entities"] = [entity.to_dict(with_normal) for entity in self.entities]
+        if self.dialogue_info is not None:
+            data["dialogue_info"] = self.dialogue_info.to_dict()
+        if self.syntax is not None:
+            data["syntax"] = [token.to_dict() for token in self.syntax]
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sentence):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        entities = len(self.entities) if self.entities is not None else None
+        return f"Sentence({self.sentence_index_in_paragraph}, {self.text!r}, entities={entities})"
+
+class Paragraph:
+    """Запись датасета: абзац исходного файла с разбиением на предложения."""
+    __slots__ = ("id", "source_file", "category", "paragraph_index", "paragraph_text", "sentences",
+                 "duplicate_of", "stages", "extra")
+
+    _FIELDS = ("id", "source_file", "category", "paragraph_index", "paragraph_text", "sentences", "duplicate_of",
+               "stages")
+
+    def __init__(self, id: str, source_file: str, category: str, paragraph_index: int, paragraph_text: str,
+                 sentences: Tuple[Sentence, ...] = (), duplicate_of: Optional[str] = None,
+                 stages: Optional[Tuple[str, ...]] = None, extra: Optional[Dict] = None):
+        self.id = id
+        self.source_file = source_file
+        self.category = category
+        self.paragraph_index = paragraph_index
+        self.paragraph_text = paragraph_text
+        self.sentences = tuple(sentences)
+        self.duplicate_of = duplicate_of
+        # Примененные этапы (None - этапы по умолчанию, поле "stages" не пишется)
+        self.stages = tuple(_intern(stage) for stage in stages) if stages is not None else None
+        # Ключи записи, которых нет в модели (None, если их нет), - в порядке появления в записи
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Paragraph":
+        extra = None
+        if len(data) > 6:
+            extra = {key: value for key, value in data.items() if key not in cls._FIELDS}
+        return cls(
+            data["id"],
+            _intern(data["source_file"]),
+            _intern(data["category"]),
+            data["paragraph_index"],
+            data["paragraph_text"],
+            tuple(Sentence.from_dict(sentence) for sentence in data["sentences"]),
+            data.get("duplicate_of"),
+            data.get("stages"),
+            extra,
+        )
+
+    @property
+    def applied_stages(self) -> Tuple[str, ...]:
+        return self.stages if self.stages is not None else DEFAULT_STAGES
+
+    def to_dict(self) -> Dict:
+        with_normal = "normalize" in self.applied_stages
+        record = {
+            "id": self.id,
+            "source_file": self.source_file,
+            "category": self.category,
+            "paragraph_index": self.paragraph_index,
+            "paragraph_text": self.paragraph_text,
+            "sentences": [sentence.to_dict(with_normal) for sentence in self.sentences],
+        }
+        if self.duplicate_of is not None:
+            record["duplicate_of"] = self.duplicate_of
+        if self.stages is not None:
+            record["stages"] = list(self.stages)
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    @property
+    def entities(self) -> List[Entity]:
+        """Все сущности абзаца по порядку предложений."""
+        return [entity for sentence in self.sentences for entity in sentence.entities or ()]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Paragraph):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Paragraph({self.id!r}, sentences={len(self.sentences)})"
+
+def iter_paragraphs(path: str, output_format: Optional[str] = None) -> Iterator[Paragraph]:
+    """Читает выходной файл конвейера (любой формат из serialization.iter_records) как объекты Paragraph."""
+    for record in iter_records(path, output_format):
+        yield Paragraph.from_dict(record)
+
+def load_paragraphs(path: str, output_format: Optional[str] = None) -> List[Paragraph]:
+    return list(iter_paragraphs(path, output_format))
+
+def write_paragraphs(path: str, paragraphs: Iterable[Paragraph], output_format: str = "jsonl",
+                     compression: Optional[str] = None) -> int:
+    """Записывает абзацы в схеме конвейера (атомарно, как data_processor); возвращает число записей."""
+    writer = open_record_writer(path, output_format, compression)
+    count = 0
+    try:
+        for paragraph in paragraphs:
+            writer.write(writer.encode(paragraph.to_dict()))
+            count += 1
+        writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+    return count
+
+if __name__ == '__main__':
+    record = {
+        "id": "book_paragraph_0", "source_file": "book.txt", "category": "проза", "paragraph_index": 0,
+        "paragraph_text": "— Здравствуй, Иван, — сказал Петр.",
+        "sentences": [{
+            "sentence_index_in_paragraph": 0, "text": "— Здравствуй, Иван, — сказал Петр.",
+            "entities": [{"text": "Иван", "type": "PER", "start_char": 13, "end_char": 17},
+                         {"text": "Петр", "type": "PER", "start_char": 29, "end_char": 33}],
+            "dialogue_info": {"is_dialogue": True, "speaker": "Петр", "dialogue_cue": "author_words_after"},
+        }],
+    }
+    paragraph = Paragraph.from_dict(record)
+    print(paragraph, paragraph.entities)
+    print("Обратное преобразование совпадает:", paragraph.to_dict() == record)
@@ -1,54 +1,163 @@
 # Dream-Team-core/dataset_preparation/src/sentence_splitter.py
-import nltk
+import os
+import threading
+from typing import List, Optional
 from .text_cleaner import clean_text # Импортируем из нашего же пакета
 
-# Попытка загрузить токенизатор 'punkt' для nltk, если он еще не загружен
-# и дополнительный 'punkt_tab'
+# Офлайн-режим: при отсутствии ресурсов NLTK не пытаться скачивать их из сети, а сразу
+# завершаться с ошибкой. Включается переменной окружения DREAM_TEAM_OFFLINE=1 или set_offline_mode(True).
+_OFFLINE_MODE = os.environ.get("DREAM_TEAM_OFFLINE", "").strip().lower() not in ("", "0", "false", "no")
+
+def set_offline_mode(enabled: bool) -> None:
+    """Включает/выключает офлайн-режим (запрет загрузки ресурсов NLTK из сети)."""
+    global _OFFLINE_MODE
+    _OFFLINE_MODE = enabled
+
+def is_offline_mode() -> bool:
+    return _OFFLINE_MODE
+
+# Движок разбиения на предложения:
+# - "punkt" (по умолчанию) - nltk.sent_tokenize; NER затем токенизирует каждое предложение заново;
+# - "razdel" - razdel (на нем же построен Segmenter из Natasha): абзац разбивается на предложения,
+#   а предложения - на токены один раз, и эти токены напрямую используются NER (см. segment_text).
+#   NLTK при этом не нужен вовсе. "natasha" - синоним "razdel".
+# Выбирается переменной окружения DREAM_TEAM_SENTENCE_SPLITTER или set_sentence_splitter_engine().
+SENTENCE_SPLITTER_ENGINES = ("punkt", "razdel")
+_ENGINE_ALIASES = {"natasha": "razdel"}
+
+def _normalize_engine_name(engine: str) -> str:
+    name = engine.strip().lower()
+    name = _ENGINE_ALIASES.get(name, name)
+    if name not in SENTENCE_SPLITTER_ENGINES:
+        raise ValueError(f"Неизвестный движок разбиения на предложения: '{engine}'. "
+                         f"Доступны: {', '.join(SENTENCE_SPLITTER_ENGINES + tuple(_ENGINE_ALIASES))}")
+    return name
+
+_SENTENCE_SPLITTER_ENGINE = _normalize_engine_name(os.environ.get("DREAM_TEAM_SENTENCE_SPLITTER", "") or "punkt")
+
+def set_sentence_splitter_engine(engine: str) -> None:
+    """Выбирает движок разбиения на предложения для текущего процесса ("punkt" или "razdel")."""
+    global _SENTENCE_SPLITTER_ENGINE
+    _SENTENCE_SPLITTER_ENGINE = _normalize_engine_name(engine)
+
+def get_sentence_splitter_engine() -> str:
+    return _SENTENCE_SPLITTER_ENGINE
+
+# Проверка (и при необходимости загрузка) токенизатора 'punkt' для nltk
+# и дополнительного 'punkt_tab'. Выполняется лениво - при первом разбиении на предложения
+# или явно через warm_up(), а не при импорте модуля.
 _NLTK_RESOURCES_LOADED = False
+_NLTK_INIT_ATTEMPTED = False # Чтобы не повторять попытку загрузки из сети на каждом абзаце
+_nltk_init_lock = threading.Lock()
+
 def _ensure_nltk_resources():
-    global _NLTK_RESOURCES_LOADED
-    if _NLTK_RESOURCES_LOADED:
+    global _NLTK_RESOURCES_LOADED, _NLTK_INIT_ATTEMPTED
+    if _NLTK_RESOURCES_LOADED or _NLTK_INIT_ATTEMPTED:
         return
 
-    resources_to_check = ["punkt", "punkt_tab"]
-    all_loaded_successfully = True
+    with _nltk_init_lock:
+        if _NLTK_RESOURCES_LOADED or _NLTK_INIT_ATTEMPTED:
+            return
+        import nltk
+
+        resources_to_check = ["punkt", "punkt_tab"]
+        all_loaded_successfully = True
 
-    for resource_name in resources_to_check:
-        try:
-            nltk.data.find(f'tokenizers/{resource_name}')
-        except LookupError:
-            print(f"Ресурс '{resource_name}' для nltk не найден. Попытка загрузки...")
+        for resource_name in resources_to_check:
             try:
-                nltk.download(resource_name, quiet=False)
-                nltk.data.find(f'tokenizers/{resource_name}') # Проверка после загрузки
-                print(f"Ресурс '{resource_name}' успешно загружен.")
-            except Exception as e_download:
-                print(f"Ошибка при загрузке '{resource_name}': {e_download}")
-                print(f"Пожалуйста, попробуйте загрузить '{resource_name}' вручную (см. предыдущие инструкции).")
+                nltk.data.find(f'tokenizers/{resource_name}')
+            except LookupError:
+                if _OFFLINE_MODE:
+                    raise RuntimeError(
+                        f"Ресурс NLTK '{resource_name}' не найден, а загрузка из сети запрещена (офлайн-режим). "
+                        f"Установите его заранее: python -m nltk.downloader {resource_name}"
+                    )
+                print(f"Ресурс '{resource_name}' для nltk не найден. Попытка загрузки...")
+                try:
+                    nltk.download(resource_name, quiet=False)
+                    nltk.data.find(f'tokenizers/{resource_name}') # Проверка после загрузки
+                    print(f"Ресурс '{resource_name}' успешно загружен.")
+                except Exception as e_download:
+                    print(f"Ошибка при загрузке '{resource_name}': {e_download}")
+                    print(f"Пожалуйста, попробуйте загрузить '{resource_name}' вручную (см. предыдущие инструкции).")
+                    all_loaded_successfully = False
+            except Exception as e_find:
+                print(f"Произошла неожиданная ошибка при проверке ресурса '{resource_name}': {e_find}")
                 all_loaded_successfully = False
-        except Exception as e_find:
-            print(f"Произошла неожиданная ошибка при проверке ресурса '{resource_name}': {e_find}")
-            all_loaded_successfully = False
-    
-    if all_loaded_successfully:
-        _NLTK_RESOURCES_LOADED = True
 
-_ensure_nltk_resources() # Вызываем при импорте модуля
+        if all_loaded_successfully:
+            _NLTK_RESOURCES_LOADED = True
+        _NLTK_INIT_ATTEMPTED = True
+
+def warm_up() -> bool:
+    """
+    Явно проверяет/загружает ресурсы выбранного движка (для punkt - ресурсы NLTK) и прогревает
+    его, чтобы первый вызов split_text_into_sentences не платил за инициализацию.
 
-def split_text_into_sentences(text_content: str) -> list[str]:
+    Returns:
+        bool: True, если ресурсы доступны.
+    """
+    if _SENTENCE_SPLITTER_ENGINE == "razdel":
+        segment_text("Прогрев.")
+        return True
+    _ensure_nltk_resources()
+    if _NLTK_RESOURCES_LOADED:
+        import nltk
+        nltk.sent_tokenize("Прогрев.", language='russian')
+    return _NLTK_RESOURCES_LOADED
+
+class SegmentedSentence:
+    """
+    Предложение и (для движка razdel) его токены - объекты razdel с полями start, stop, text,
+    где start/stop отсчитываются от начала предложения. Для punkt tokens = None.
+    """
+    __slots__ = ("text", "tokens")
+
+    def __init__(self, text: str, tokens: Optional[list] = None):
+        self.text = text
+        self.tokens = tokens
+
+def segment_text(text_content: str, engine: Optional[str] = None) -> List[SegmentedSentence]:
+    """
+    Разбивает текст на предложения выбранным движком (по умолчанию - текущим, см.
+    set_sentence_splitter_engine). Движок razdel сразу токенизирует каждое предложение: токены
+    передаются в ner_extractor.extract_entities_batch, и NER не токенизирует текст повторно.
+    """
+    engine = _normalize_engine_name(engine) if engine else _SENTENCE_SPLITTER_ENGINE
+    if engine == "punkt":
+        return [SegmentedSentence(sentence) for sentence in _split_with_punkt(text_content)]
+    if not text_content:
+        return []
+    from razdel import sentenize, tokenize
+    segmented = []
+    for sentence in sentenize(text_content):
+        sentence_text = sentence.text.strip()
+        if sentence_text:
+            segmented.append(SegmentedSentence(sentence_text, list(tokenize(sentence_text))))
+    return segmented
+
+def split_text_into_sentences(text_content: str, engine: Optional[str] = None) -> list[str]:
     """
     Разбивает предоставленный текстовый контент на предложения.
     Текст предварительно очищается.
+    engine - движок разбиения ("punkt" или "razdel"); по умолчанию - текущий (см. set_sentence_splitter_engine).
     """
+    engine = _normalize_engine_name(engine) if engine else _SENTENCE_SPLITTER_ENGINE
+    if engine == "punkt":
+        return _split_with_punkt(text_content)
+    return [sentence.text for sentence in segment_text(text_content, engine)]
+
+def _split_with_punkt(text_content: str) -> list[str]:
+    if not text_content:
+        return []
+
+    _ensure_nltk_resources()
     if not _NLTK_RESOURCES_LOADED:
         print("Ошибка: Необходимые ресурсы NLTK (punkt/punkt_tab) не загружены. Разбиение на предложения может быть некорректным.")
         # Можно либо вернуть [clean_text(text_content)] либо возбудить исключение
         # return [clean_text(text_content)] # Возвращаем как одно предложение
         raise RuntimeError("NLTK tokenizers (punkt/punkt_tab) not available.")
 
-
-    if not text_content:
-        return []
     # Очистка текста здесь не нужна, если предполагается, что он уже очищен (например, целый абзац)
     # Но если это произвольный текст, то лучше очистить:
     # cleaned_text = clean_text(text_content)
@@ -56,6 +165,7 @@ def split_text_into_sentences(text_content: str) -> list[str]:
     #     return []
     
     # Предполагаем, что text_content - это уже осмысленный блок (например, абзац)
+    import nltk
     try:
         sentences = nltk.sent_tokenize(text_content, language='russian')
         # Дополнительная очистка для каждого предложения (удаление ведущих/замыкающих пробелов)
@@ -82,4 +192,8 @@ if __name__ == '__main__':
     print(f"\nАбзац: '{test_para_complex}'")
     print("Предложения:")
     for i, s in enumerate(sentences_complex):
+        print(f"  {i}: '{s}'")
+
+    print("\nДвижок razdel:")
+    for i, s in enumerate(split_text_into_sentences(test_para_complex, engine="razdel")):
         print(f"  {i}: '{s}'")
\ No newline at end of file
@@ -0,0 +1,432 @@
+# Dream-Team-core/dataset_preparation/src/serialization.py
+# Сериализация записей датасета и форматы выходных файлов.
+# - "jsonl" (по умолчанию): одна запись JSON на строку, стандартным json. По запросу вместо него
+#   используется orjson (в несколько раз быстрее; записи те же, но без пробелов после ':' и ',',
+#   поэтому байты файлов отличаются - выбор записывается в манифест). Выбор:
+#   DREAM_TEAM_JSON_BACKEND=json|orjson|auto (orjson, если установлен) или set_json_backend().
+# - "msgpack": поток записей msgpack в одном файле (нужен пакет msgpack).
+# - "parquet": колоночный формат, директория с тремя связанными таблицами paragraphs.parquet,
+#   sentences.parquet и entities.parquet (нужен пакет pyarrow). Связь - по paragraph_id и
+#   sentence_index_in_paragraph.
+# Форматы jsonl и msgpack можно сжимать потоково: gzip (стандартная библиотека) или zstd (нужен
+# пакет zstandard). Сжатые файлы можно склеивать: несколько членов gzip/кадров zstd подряд читаются
+# как один поток (на этом основана упаковка в шарды, см. sharding).
+# Прочитать любой из форматов обратно в записи можно через iter_records().
+import gzip
+import io
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from .stages import get_record_stages
+
+OUTPUT_FORMATS = ("jsonl", "msgpack", "parquet")
+# Расширение выходного файла (для parquet - имя директории) по формату
+OUTPUT_EXTENSIONS = {"jsonl": ".jsonl", "msgpack": ".msgpack", "parquet": ".parquet"}
+JSON_BACKENDS = ("auto", "json", "orjson")
+COMPRESSIONS = ("gzip", "zstd")
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+_GZIP_COMPRESS_LEVEL = 6
+_ZSTD_COMPRESS_LEVEL = 3
+
+# Число абзацев, накапливаемых в памяти перед записью очередной группы строк Parquet
+_PARQUET_ROW_GROUP_PARAGRAPHS = 2048
+
+_json_backend_setting = os.environ.get("DREAM_TEAM_JSON_BACKEND", "").strip().lower() or "json"
+_resolved_json_backend: Optional[str] = None
+
+def set_json_backend(backend: str) -> None:
+    """Выбирает библиотеку JSON: "json" (по умолчанию), "orjson" или "auto" (orjson, если установлен)."""
+    global _json_backend_setting, _resolved_json_backend
+    backend = backend.strip().lower()
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Неизвестная библиотека JSON: '{backend}'. Доступны: {', '.join(JSON_BACKENDS)}")
+    _json_backend_setting = backend
+    _resolved_json_backend = None
+
+def get_json_backend() -> str:
+    """Библиотека JSON, которая фактически используется ("json" или "orjson")."""
+    global _resolved_json_backend
+    if _resolved_json_backend is None:
+        if _json_backend_setting == "json":
+            _resolved_json_backend = "json"
+        else:
+            try:
+                import orjson # noqa: F401
+                _resolved_json_backend = "orjson"
+            except ImportError:
+                if _json_backend_setting == "orjson":
+                    raise RuntimeError("Библиотека orjson не установлена: pip install orjson")
+                _resolved_json_backend = "json"
+    return _resolved_json_backend
+
+def dumps_json_line(record: Dict) -> bytes:
+    """Запись в виде строки JSONL (UTF-8, с завершающим переводом строки)."""
+    if get_json_backend() == "orjson":
+        import orjson
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+def loads_json_line(line: bytes) -> Dict:
+    if get_json_backend() == "orjson":
+        import orjson
+        return orjson.loads(line)
+    return json.loads(line)
+
+def _import_optional(module_name: str, output_format: str):
+    try:
+        return __import__(module_name)
+    except ImportError:
+        raise RuntimeError(f"Для формата '{output_format}' нужен пакет {module_name}: pip install {module_name}")
+
+def check_output_format(output_format: str, compression: Optional[str] = None) -> None:
+    """Проверяет, что формат и сжатие известны и нужные для них пакеты установлены (иначе - исключение)."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода: '{output_format}'. Доступны: {', '.join(OUTPUT_FORMATS)}")
+    if output_format == "msgpack":
+        _import_optional("msgpack", output_format)
+    elif output_format == "parquet":
+        _import_optional("pyarrow", output_format)
+    if compression is None:
+        return
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Неизвестный способ сжатия: '{compression}'. Доступны: {', '.join(COMPRESSIONS)}")
+    if output_format == "parquet":
+        raise ValueError("Формат parquet сжимается внутри файлов и не поддерживает внешнее сжатие")
+    if compression == "zstd":
+        _import_optional("zstandard", "zstd")
+
+def get_output_extension(output_format: str, compression: Optional[str] = None) -> str:
+    """Расширение выходного файла, например .jsonl или .jsonl.gz."""
+    return OUTPUT_EXTENSIONS[output_format] + (COMPRESSION_EXTENSIONS[compression] if compression else "")
+
+def open_compressed_writer(raw_file: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """Оборачивает открытый двоичный файл потоковым сжатием (для None возвращает сам файл)."""
+    if compression is None:
+        return raw_file
+    if compression == "gzip":
+        # mtime=0: одинаковое содержимое дает одинаковые байты
+        return gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=_GZIP_COMPRESS_LEVEL, mtime=0)
+    zstandard = _import_optional("zstandard", "zstd")
+    return zstandard.ZstdCompressor(level=_ZSTD_COMPRESS_LEVEL).stream_writer(raw_file, closefd=False)
+
+def open_decompressed_reader(raw_file: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """Поток распакованных данных; склеенные члены gzip/кадры zstd читаются подряд."""
+    if compression is None:
+        return raw_file
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw_file, mode='rb')
+    zstandard = _import_optional("zstandard", "zstd")
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw_file, read_across_frames=True, closefd=False))
+
+# --- Запись ---
+
+class RecordWriter(ABC):
+    """
+    Запись потока записей во временный путь с атомарной публикацией в итоговый при commit().
+    Работа разбита на encode() (сериализация записи) и write() (запись результата), чтобы
+    эти этапы можно было замерять по отдельности.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.tmp_path = output_path + '.tmp'
+
+    @abstractmethod
+    def encode(self, record: Dict):
+        """Сериализует запись в представление, которое принимает write()."""
+
+    @abstractmethod
+    def write(self, payload) -> Optional[int]:
+        """Записывает результат encode(); возвращает число записанных байт (если известно)."""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Закрывает временный файл (повторный вызов ничего не делает)."""
+
+    def sync(self) -> int:
+        """
+        Сбрасывает записанное на диск (fsync) и возвращает размер временного файла в байтах -
+        позицию, с которой можно продолжить запись (см. checkpoints). Только для форматов без сжатия.
+        """
+        raise ValueError(f"Выходной файл {self.output_path} нельзя продолжить с контрольной точки")
+
+    def commit(self) -> None:
+        self._close()
+        _replace_path(self.tmp_path, self.output_path)
+
+    def suspend(self) -> None:
+        """Закрывает временный файл, не публикуя и не удаляя его: запись будет продолжена позже."""
+        self._close()
+
+    def abort(self) -> None:
+        try:
+            self._close()
+        finally:
+            _remove_path(self.tmp_path)
+
+class _JsonlWriter(RecordWriter):
+    def __init__(self, output_path: str, compression: Optional[str] = None, resume_bytes: Optional[int] = None):
+        super().__init__(output_path)
+        if resume_bytes is not None:
+            # Продолжение записи: все, что записано после контрольной точки, отбрасывается
+            self._raw_file = open(self.tmp_path, 'r+b')
+            self._raw_file.truncate(resume_bytes)
+            self._raw_file.seek(resume_bytes)
+        else:
+            self._raw_file = open(self.tmp_path, 'wb')
+        self._file = open_compressed_writer(self._raw_file, compression)
+
+    def encode(self, record: Dict) -> bytes:
+        return dumps_json_line(record)
+
+    def write(self, payload: bytes) -> int:
+        """Возвращает размер несжатых данных."""
+        self._file.write(payload)
+        return len(payload)
+
+    def sync(self) -> int:
+        if self._file is not self._raw_file:
+            raise ValueError("Сжатый выходной файл нельзя продолжить с контрольной точки")
+        self._raw_file.flush()
+        os.fsync(self._raw_file.fileno())
+        return self._raw_file.tell()
+
+    def _close(self) -> None:
+        if self._raw_file.closed:
+            return
+        try:
+            if self._file is not self._raw_file:
+                self._file.close()
+        finally:
+            self._raw_file.close()
+
+class _MsgpackWriter(_JsonlWriter):
+    def __init__(self, output_path: str, compression: Optional[str] = None, resume_bytes: Optional[int] = None):
+        self._packer = _import_optional("msgpack", "msgpack").Packer()
+        super().__init__(output_path, compression, resume_bytes)
+
+    def encode(self, record: Dict) -> bytes:
+        return self._packer.pack(record)
+
+_PARAGRAPH_COLUMNS = ("id", "source_file", "category", "paragraph_index", "paragraph_text")
+# Необязательные поля записи абзаца (в записи присутствуют, только если не None)
+_OPTIONAL_PARAGRAPH_COLUMNS = ("duplicate_of", "stages")
+# Поля признаков диалога пусты (null), если этап "dialogue" не выполнялся (см. stages);
+# нормальная форма сущности (normal) заполняется этапом "normalize"
+_SENTENCE_COLUMNS = ("paragraph_id", "sentence_index_in_paragraph", "text", "is_dialogue", "speaker", "dialogue_cue")
+_ENTITY_COLUMNS = ("paragraph_id", "sentence_index_in_paragraph", "text", "type", "start_char", "end_char", "normal")
+_PARQUET_TABLES = ("paragraphs", "sentences", "entities")
+
+def _parquet_schemas():
+    pa = _import_optional("pyarrow", "parquet")
+    return {
+        "paragraphs": pa.schema([("id", pa.string()), ("source_file", pa.string()), ("category", pa.string()),
+                                 ("paragraph_index", pa.int64()), ("paragraph_text", pa.string()),
+                                 ("duplicate_of", pa.string()), ("stages", pa.list_(pa.string()))]),
+        "sentences": pa.schema([("paragraph_id", pa.string()), ("sentence_index_in_paragraph", pa.int32()),
+                                ("text", pa.string()), ("is_dialogue", pa.bool_()), ("speaker", pa.string()),
+                                ("dialogue_cue", pa.string())]),
+        "entities": pa.schema([("paragraph_id", pa.string()), ("sentence_index_in_paragraph", pa.int32()),
+                               ("text", pa.string()), ("type", pa.string()), ("start_char", pa.int32()),
+                               ("end_char", pa.int32()), ("normal", pa.string())]),
+    }
+
+class _ParquetWriter(RecordWriter):
+    """Раскладывает вложенные записи по трем таблицам и пишет их группами строк."""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        _import_optional("pyarrow", "parquet")
+        import pyarrow.parquet as pq
+        _remove_path(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self._schemas = _parquet_schemas()
+        self._writers = {
+            name: pq.ParquetWriter(os.path.join(self.tmp_path, name + ".parquet"), self._schemas[name])
+            for name in _PARQUET_TABLES
+        }
+        self._columns = {
+            "paragraphs": {c: [] for c in _PARAGRAPH_COLUMNS + _OPTIONAL_PARAGRAPH_COLUMNS},
+            "sentences": {c: [] for c in _SENTENCE_COLUMNS},
+            "entities": {c: [] for c in _ENTITY_COLUMNS},
+        }
+        self._buffered_paragraphs = 0
+
+    def encode(self, record: Dict) -> Dict:
+        return record
+
+    def write(self, record: Dict) -> None:
+        paragraphs, sentences, entities = (self._columns[name] for name in _PARQUET_TABLES)
+        paragraph_id = record["id"]
+        for column in _PARAGRAPH_COLUMNS:
+            paragraphs[column].append(record[column])
+        for column in _OPTIONAL_PARAGRAPH_COLUMNS:
+            paragraphs[column].append(record.get(column))
+        for sentence in record["sentences"]:
+            sentence_index = sentence["sentence_index_in_paragraph"]
+            dialogue_info = sentence.get("dialogue_info") or {}
+            sentences["paragraph_id"].append(paragraph_id)
+            sentences["sentence_index_in_paragraph"].append(sentence_index)
+            sentences["text"].append(sentence["text"])
+            sentences["is_dialogue"].append(dialogue_info.get("is_dialogue"))
+            sentences["speaker"].append(dialogue_info.get("speaker"))
+            sentences["dialogue_cue"].append(dialogue_info.get("dialogue_cue"))
+            for entity in sentence.get("entities", ()):
+                entities["paragraph_id"].append(paragraph_id)
+                entities["sentence_index_in_paragraph"].append(sentence_index)
+                for column in ("text", "type", "start_char", "end_char"):
+                    entities[column].append(entity[column])
+                entities["normal"].append(entity.get("normal"))
+        self._buffered_paragraphs += 1
+        if self._buffered_paragraphs >= _PARQUET_ROW_GROUP_PARAGRAPHS:
+            self._flush()
+        return None
+
+    def _flush(self) -> None:
+        import pyarrow as pa
+        for name in _PARQUET_TABLES:
+            columns = self._columns[name]
+            self._writers[name].write_table(pa.table(columns, schema=self._schemas[name]))
+            for values in columns.values():
+                values.clear()
+        self._buffered_paragraphs = 0
+
+    def _close(self) -> None:
+        if self._writers is None:
+            return
+        try:
+            if self._buffered_paragraphs:
+                self._flush()
+        finally:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers = None
+
+_WRITERS = {"jsonl": _JsonlWriter, "msgpack": _MsgpackWriter, "parquet": _ParquetWriter}
+
+def open_record_writer(output_path: str, output_format: str = "jsonl", compression: Optional[str] = None,
+                       resume_bytes: Optional[int] = None) -> RecordWriter:
+    """
+    Открывает запись выходного файла заданного формата (во временный путь output_path + '.tmp').
+    compression - None, "gzip" или "zstd" (только для jsonl и msgpack).
+    resume_bytes - продолжить запись в существующий временный файл, обрезав его до этого размера
+    (только jsonl и msgpack без сжатия, см. checkpoints).
+    """
+    check_output_format(output_format, compression)
+    if resume_bytes is not None:
+        if output_format == "parquet" or compression is not None:
+            raise ValueError("Продолжить запись можно только в несжатый файл jsonl или msgpack")
+        return _WRITERS[output_format](output_path, resume_bytes=resume_bytes)
+    if compression is not None:
+        return _WRITERS[output_format](output_path, compression)
+    return _WRITERS[output_format](output_path)
+
+def _replace_path(source: str, target: str) -> None:
+    # os.replace не заменяет непустую директорию: старый результат Parquet удаляется заранее
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    os.replace(source, target)
+
+def _remove_path(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+# --- Чтение ---
+
+def detect_output_format(path: str) -> str:
+    """Формат по имени файла (расширение сжатия, если есть, не учитывается)."""
+    for compression_extension in COMPRESSION_EXTENSIONS.values():
+        if path.endswith(compression_extension):
+            path = path[:-len(compression_extension)]
+            break
+    for output_format, extension in OUTPUT_EXTENSIONS.items():
+        if path.endswith(extension):
+            return output_format
+    raise ValueError(f"Не удалось определить формат по имени: {path}")
+
+def detect_compression(path: str) -> Optional[str]:
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if path.endswith(extension):
+            return compression
+    return None
+
+def iter_records_from_stream(stream: BinaryIO, output_format: str) -> Iterator[Dict]:
+    """Читает записи jsonl или msgpack из уже распакованного двоичного потока."""
+    if output_format == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield loads_json_line(line)
+    elif output_format == "msgpack":
+        msgpack = _import_optional("msgpack", output_format)
+        yield from msgpack.Unpacker(stream, raw=False)
+    else:
+        raise ValueError(f"Формат '{output_format}' нельзя читать из потока")
+
+def read_parquet_tables(path: str) -> Dict:
+    """Читает результат в формате parquet как таблицы pyarrow: {"paragraphs": ..., "sentences": ..., "entities": ...}."""
+    _import_optional("pyarrow", "parquet")
+    import pyarrow.parquet as pq
+    return {name: pq.read_table(os.path.join(path, name + ".parquet")) for name in _PARQUET_TABLES}
+
+def _iter_parquet_records(path: str) -> Iterator[Dict]:
+    tables = {name: table.to_pydict() for name, table in read_parquet_tables(path).items()}
+    sentences_by_paragraph: Dict[str, List[Dict]] = {}
+    sentences = tables["sentences"]
+    for row in range(len(sentences["paragraph_id"])):
+        sentences_by_paragraph.setdefault(sentences["paragraph_id"][row], []).append({
+            "sentence_index_in_paragraph": sentences["sentence_index_in_paragraph"][row],
+            "text": sentences["text"][row],
+            "entities": [],
+            "dialogue_info": {
+                "is_dialogue": sentences["is_dialogue"][row],
+                "speaker": sentences["speaker"][row],
+                "dialogue_cue": sentences["dialogue_cue"][row],
+            },
+        })
+    entities = tables["entities"]
+    # Файлы, записанные до появления столбца normal, его не содержат
+    entity_columns = [column for column in ("text", "type", "start_char", "end_char", "normal") if column in entities]
+    for row in range(len(entities["paragraph_id"])):
+        sentence = sentences_by_paragraph[entities["paragraph_id"][row]][entities["sentence_index_in_paragraph"][row]]
+        sentence["entities"].append({column: entities[column][row] for column in entity_columns})
+    paragraphs = tables["paragraphs"]
+    for row in range(len(paragraphs["id"])):
+        record = {column: paragraphs[column][row] for column in _PARAGRAPH_COLUMNS}
+        record["sentences"] = sentences_by_paragraph.get(record["id"], [])
+        for column in _OPTIONAL_PARAGRAPH_COLUMNS:
+            if paragraphs.get(column) is not None and paragraphs[column][row] is not None:
+                record[column] = paragraphs[column][row]
+        _drop_skipped_stage_fields(record)
+        yield record
+
+def _drop_skipped_stage_fields(record: Dict) -> None:
+    """Убирает из прочитанной из parquet записи поля этапов, которые к ней не применялись (см. stages)."""
+    stages = get_record_stages(record)
+    for sentence in record["sentences"]:
+        if "ner" not in stages:
+            del sentence["entities"]
+        elif "normalize" not in stages:
+            for entity in sentence["entities"]:
+                entity.pop("normal", None)
+        if "dialogue" not in stages:
+            del sentence["dialogue_info"]
+
+def iter_records(path: str, output_format: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Читает выходной файл конвейера (jsonl, msgpack или parquet, в том числе сжатые .gz/.zst)
+    и возвращает записи в исходном вложенном виде. Формат определяется по расширению,
+    если не указан явно.
+    """
+    output_format = output_format or detect_output_format(path)
+    if output_format == "parquet":
+        yield from _iter_parquet_records(path)
+        return
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода: '{output_format}'. Доступны: {', '.join(OUTPUT_FORMATS)}")
+    with open(path, 'rb') as raw_file:
+        yield from iter_records_from_stream(open_decompressed_reader(raw_file, detect_compression(path)), output_format)
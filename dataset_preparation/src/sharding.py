@@ -0,0 +1,237 @@
+# Dream-Team-core/dataset_preparation/src/sharding.py
+# Упаковка результатов в шарды ограниченного размера вместо отдельного выходного файла на каждый
+# входной (режим output_layout="shards" в main_creator).
+# Каждый входной файл обрабатывается в отдельный сжатый сегмент (jsonl/msgpack + gzip/zstd), который
+# затем дописывается в конец текущего шарда: члены gzip и кадры zstd можно склеивать, поэтому шард
+# остается обычным сжатым файлом. Когда шард достигает max_shard_bytes, начинается следующий.
+# Индекс шардов (shards/_shard_index.json) хранит для каждого входного файла шард, смещение и длину
+# его сегмента, число записей, категорию и имя файла; поля category и source_file остаются и
+# в самих записях.
+# При переобработке или удалении входного файла старый сегмент остается в шарде "мертвыми" байтами:
+# читать шарды нужно через индекс (iter_shard_records), а не целиком.
+import io
+import json
+import os
+import shutil
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+from .serialization import (
+    get_output_extension,
+    iter_records_from_stream,
+    open_decompressed_reader,
+)
+
+SHARDS_DIR_NAME = "shards"
+SHARD_INDEX_FILE_NAME = "_shard_index.json"
+# Временные сегменты обработчиков (очищается при каждом запуске)
+SEGMENTS_DIR_NAME = "_segments"
+DEFAULT_MAX_SHARD_BYTES = 256 * 1024 * 1024
+DEFAULT_SHARD_COMPRESSION = "gzip"
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+def get_shards_dir(output_dir: str) -> str:
+    return os.path.join(output_dir, SHARDS_DIR_NAME)
+
+def get_segments_dir(output_dir: str) -> str:
+    return os.path.join(get_shards_dir(output_dir), SEGMENTS_DIR_NAME)
+
+def get_shard_index_path(output_dir: str) -> str:
+    return os.path.join(get_shards_dir(output_dir), SHARD_INDEX_FILE_NAME)
+
+class ShardStore:
+    """
+    Шарды выходной директории и их индекс. Используется только в основном процессе:
+    обработчики пишут сегменты, а add_source() переносит их в шарды.
+    """
+
+    def __init__(self, output_dir: str, output_format: str = "jsonl", compression: Optional[str] = DEFAULT_SHARD_COMPRESSION,
+                 max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES):
+        if max_shard_bytes <= 0:
+            raise ValueError(f"Размер шарда должен быть положительным: {max_shard_bytes}")
+        self.output_dir = output_dir
+        self.shards_dir = get_shards_dir(output_dir)
+        self.output_format = output_format
+        self.compression = compression
+        self.max_shard_bytes = max_shard_bytes
+        self.shards: Dict[str, Dict] = {}
+        self.sources: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        index_path = get_shard_index_path(self.output_dir)
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except Exception as e:
+            print(f"Предупреждение: не удалось прочитать индекс шардов {index_path}: {e}. Шарды будут созданы заново.")
+            self.reset()
+            return
+        if index.get("output_format") != self.output_format or index.get("compression") != self.compression:
+            print("Индекс шардов создан с другим форматом или сжатием. Шарды будут созданы заново.")
+            self.reset()
+            return
+        self.shards = index.get("shards", {})
+        self.sources = index.get("sources", {})
+
+    def reset(self) -> None:
+        """Удаляет все шарды и индекс."""
+        if os.path.isdir(self.shards_dir):
+            for name in os.listdir(self.shards_dir):
+                if name != SEGMENTS_DIR_NAME:
+                    os.remove(os.path.join(self.shards_dir, name))
+        self.shards = {}
+        self.sources = {}
+
+    def save(self) -> None:
+        """Атомарно сохраняет индекс (сохранять до манифеста: манифест ссылается на шарды)."""
+        os.makedirs(self.shards_dir, exist_ok=True)
+        index_path = get_shard_index_path(self.output_dir)
+        tmp_path = index_path + ".tmp"
+        data = {"output_format": self.output_format, "compression": self.compression,
+                "shards": self.shards, "sources": self.sources}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, index_path)
+
+    def _shard_path(self, shard_name: str) -> str:
+        return os.path.join(self.shards_dir, shard_name)
+
+    def relative_shard_path(self, shard_name: str) -> str:
+        """Путь шарда относительно выходной директории (для манифеста)."""
+        return f"{SHARDS_DIR_NAME}/{shard_name}"
+
+    def _shard_for(self, segment_size: int) -> str:
+        """Текущий шард, если сегмент в него помещается, иначе новый (слишком большой сегмент занимает шард целиком)."""
+        if self.shards:
+            last_name = max(self.shards)
+            last_path = self._shard_path(last_name)
+            current_size = os.path.getsize(last_path) if os.path.exists(last_path) else 0
+            if current_size == 0 or current_size + segment_size <= self.max_shard_bytes:
+                return last_name
+        number = int(max(self.shards).split('-')[1].split('.')[0]) + 1 if self.shards else 0
+        shard_name = f"shard-{number:05d}" + get_output_extension(self.output_format, self.compression)
+        self.shards[shard_name] = {"bytes": 0, "records": 0, "sources": []}
+        return shard_name
+
+    def add_source(self, relative_input_path: str, segment_path: str, records: int,
+                   category: Optional[str], source_file: str) -> str:
+        """
+        Дописывает сегмент входного файла в шард и удаляет файл сегмента. Прежний сегмент
+        этого входного файла (если был) исключается из индекса.
+
+        Returns:
+            str: Путь шарда относительно выходной директории.
+        """
+        self.remove_source(relative_input_path)
+        segment_size = os.path.getsize(segment_path)
+        shard_name = self._shard_for(segment_size)
+        shard_path = self._shard_path(shard_name)
+        with open(shard_path, 'ab') as shard_file, open(segment_path, 'rb') as segment_file:
+            offset = shard_file.tell()
+            shutil.copyfileobj(segment_file, shard_file, _COPY_CHUNK_SIZE)
+            shard_file.flush()
+            os.fsync(shard_file.fileno())
+        os.remove(segment_path)
+        shard = self.shards[shard_name]
+        shard["bytes"] = offset + segment_size
+        shard["records"] += records
+        shard["sources"].append(relative_input_path)
+        self.sources[relative_input_path] = {
+            "shard": shard_name, "offset": offset, "length": segment_size,
+            "records": records, "category": category, "source_file": source_file,
+        }
+        return self.relative_shard_path(shard_name)
+
+    def remove_source(self, relative_input_path: str) -> None:
+        entry = self.sources.pop(relative_input_path, None)
+        if entry is None:
+            return
+        shard = self.shards.get(entry["shard"])
+        if shard is None:
+            return
+        shard["records"] -= entry["records"]
+        if relative_input_path in shard["sources"]:
+            shard["sources"].remove(relative_input_path)
+        if not shard["sources"]:
+            # Шард без живых сегментов больше не нужен
+            del self.shards[entry["shard"]]
+            if os.path.exists(self._shard_path(entry["shard"])):
+                os.remove(self._shard_path(entry["shard"]))
+
+    def prune(self, live_sources: Iterable[str]) -> int:
+        """
+        Исключает из индекса входные файлы, которых нет в live_sources (например, удаленные из
+        манифеста), и шарды, файлы которых пропали. Returns: число исключенных входных файлов.
+        """
+        for shard_name in [name for name in self.shards if not os.path.exists(self._shard_path(name))]:
+            del self.shards[shard_name]
+        live_sources = set(live_sources)
+        removed = [rel for rel, entry in self.sources.items()
+                   if rel not in live_sources or entry["shard"] not in self.shards]
+        for rel in removed:
+            self.remove_source(rel)
+        return len(removed)
+
+    def dead_bytes(self) -> int:
+        """Байты шардов, не принадлежащие ни одному живому сегменту (старые версии файлов)."""
+        live_bytes = sum(entry["length"] for entry in self.sources.values())
+        return sum(shard["bytes"] for shard in self.shards.values()) - live_bytes
+
+    def iter_records(self, sources: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        Записи входных файлов sources (по умолчанию - всех) в порядке расположения в шардах.
+        """
+        wanted = set(self.sources) if sources is None else set(sources)
+        entries = sorted((entry["shard"], entry["offset"], entry["length"])
+                         for rel, entry in self.sources.items() if rel in wanted)
+        for shard_name, offset, length in entries:
+            with open(self._shard_path(shard_name), 'rb') as shard_file:
+                shard_file.seek(offset)
+                segment = _BoundedReader(shard_file, length)
+                stream = open_decompressed_reader(io.BufferedReader(segment), self.compression)
+                yield from iter_records_from_stream(stream, self.output_format)
+
+class _BoundedReader(io.RawIOBase):
+    """Чтение не более length байт из файла с текущей позиции (сегмент внутри шарда)."""
+
+    def __init__(self, raw_file: BinaryIO, length: int):
+        self._file = raw_file
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        data = self._file.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+def iter_shard_records(output_dir: str, sources: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+    """
+    Читает записи из шардов выходной директории по индексу. sources - относительные пути
+    входных файлов (как в манифесте); по умолчанию читаются все.
+    """
+    index_path = get_shard_index_path(output_dir)
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    store = ShardStore(output_dir, index["output_format"], index["compression"])
+    yield from store.iter_records(sources)
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print("Использование: python -m dataset_preparation.src.sharding <выходная_директория>")
+        sys.exit(1)
+    store_dir = sys.argv[1]
+    with open(get_shard_index_path(store_dir), 'r', encoding='utf-8') as f:
+        shard_index = json.load(f)
+    for name, info in sorted(shard_index["shards"].items()):
+        print(f"{name}: {info['bytes']} байт, записей {info['records']}, файлов {len(info['sources'])}")
@@ -0,0 +1,51 @@
+# Dream-Team-core/dataset_preparation/src/stages.py
+# Этапы обработки абзаца, которые можно включать и выключать:
+# - "split"     - разбиение на предложения (выполняется всегда);
+# - "dialogue"  - признаки диалога предложений (dialogue_info);
+# - "ner"       - именованные сущности предложений (entities);
+# - "syntax"    - синтаксический разбор предложений (syntax: токены с head_id и rel);
+# - "normalize" - нормальная форма сущностей (поле normal у каждой сущности; требует "ner").
+# Загружаются только модели, нужные выбранным этапам (см. ner_extractor.warm_up): для одного
+# разбиения на предложения Natasha не загружается вовсе.
+#
+# Записи, обработанные не набором этапов по умолчанию, содержат поле "stages" со списком
+# примененных этапов; запись без этого поля обработана этапами DEFAULT_STAGES (так выглядят
+# все записи, созданные до появления выбора этапов). По этому полю и по манифесту дешевый
+# запуск можно позже дополнить недостающими этапами, не повторяя уже выполненную работу.
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+STAGES = ("split", "dialogue", "ner", "syntax", "normalize")
+DEFAULT_STAGES = ("split", "dialogue", "ner")
+# Этапы, результаты которых нужны другим этапам
+STAGE_REQUIREMENTS = {"normalize": ("ner",)}
+
+def resolve_stages(stages: Optional[Union[str, Iterable[str]]] = None) -> Tuple[str, ...]:
+    """
+    Проверяет набор этапов и приводит его к каноническому виду: добавляет "split" и этапы,
+    от которых зависят выбранные, и упорядочивает как в STAGES.
+    stages - список имен или строка через запятую ("split,ner"); None - DEFAULT_STAGES.
+    """
+    if stages is None:
+        return DEFAULT_STAGES
+    if isinstance(stages, str):
+        stages = [name.strip() for name in stages.split(',') if name.strip()]
+    selected = {"split"}
+    for name in stages:
+        if name not in STAGES:
+            raise ValueError(f"Неизвестный этап обработки: '{name}'. Доступны: {', '.join(STAGES)}")
+        selected.add(name)
+        selected.update(STAGE_REQUIREMENTS.get(name, ()))
+    return tuple(name for name in STAGES if name in selected)
+
+def get_record_stages(record: Dict) -> Tuple[str, ...]:
+    """Этапы, примененные к записи (для записей без поля "stages" - DEFAULT_STAGES)."""
+    stages = record.get("stages")
+    return tuple(stages) if stages is not None else DEFAULT_STAGES
+
+def stages_field(stages: Tuple[str, ...]) -> Optional[list]:
+    """Значение поля "stages" записи или манифеста (None для набора по умолчанию - поле не пишется)."""
+    return None if tuple(stages) == DEFAULT_STAGES else list(stages)
+
+if __name__ == '__main__':
+    for example in (None, "split", "split,normalize", ["syntax", "dialogue"]):
+        print(f"{example!r} -> {resolve_stages(example)}")
@@ -0,0 +1,306 @@
+# Dream-Team-core/dataset_preparation/src/watcher.py
+# Режим наблюдения: долго работающий процесс, который один раз загружает модели NLP и ресурсы
+# разбиения на предложения, а затем следит за входной директорией и обрабатывает новые
+# и измененные файлы по мере их появления. Каждый цикл - обычный инкрементальный запуск
+# run_dataset_creation_pipeline: неизмененные файлы пропускаются по манифесту, результаты
+# удаленных файлов удаляются, поэтому выходная директория всегда такая же, как после ручного запуска.
+#
+# Изменения отслеживаются через inotify (Linux, через ctypes, без внешних зависимостей), иначе -
+# опросом дерева через os.scandir (размер и mtime входных файлов). Частично записанные файлы
+# не обрабатываются: цикл запускается, когда в течение debounce_seconds не было новых изменений.
+# Файл, прочитанный во время записи (например, .docx, сохраняемый дольше паузы), завершится
+# ошибкой или будет обработан заново в следующем цикле: в манифест попадают размер и mtime,
+# снятые до чтения файла, а файл, изменившийся во время обработки, не записывается в манифест вовсе.
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from .data_processor import warm_up_pipeline_components
+from .discovery import INPUT_EXTENSIONS
+from .file_loaders import PARAGRAPH_MODES
+from .main_creator import resolve_pipeline_dirs, run_dataset_creation_pipeline
+from .sentence_splitter import set_sentence_splitter_engine
+from .stages import resolve_stages
+
+WATCH_BACKENDS = ("auto", "inotify", "polling")
+
+# Пауза без изменений во входной директории, после которой запускается обработка
+DEFAULT_DEBOUNCE_SECONDS = 1.0
+# Период опроса дерева (для inotify - как часто проверяется запрос на остановку)
+DEFAULT_POLL_INTERVAL = 1.0
+# Если файлы меняются непрерывно, обработка все равно запускается не реже чем раз в столько секунд
+DEFAULT_MAX_DELAY_SECONDS = 30.0
+
+# Константы inotify из <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+# struct inotify_event: wd, mask, cookie, len, затем имя длиной len (дополненное нулями)
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_BUFFER_SIZE = 64 * 1024
+
+def _is_input_file_name(name: str) -> bool:
+    return name.lower().endswith(INPUT_EXTENSIONS)
+
+def _scan_input_files(input_dir: str, recursive: bool) -> Dict[str, Tuple[int, int]]:
+    """Снимок входных файлов {путь: (размер, mtime_ns)}; тип записи os.scandir берет без лишних stat."""
+    snapshot = {}
+    pending_dirs = [input_dir]
+    while pending_dirs:
+        try:
+            with os.scandir(pending_dirs.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                pending_dirs.append(entry.path)
+                        elif _is_input_file_name(entry.name) and entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError: # Файл удален между чтением каталога и stat
+                        continue
+        except OSError:
+            continue
+    return snapshot
+
+class _PollingWatcher:
+    """Опрос дерева: wait() возвращает True, если снимок входных файлов изменился."""
+
+    def __init__(self, input_dir: str, recursive: bool, stop: threading.Event):
+        self._input_dir = input_dir
+        self._recursive = recursive
+        self._stop = stop
+        self._snapshot = _scan_input_files(input_dir, recursive)
+
+    def wait(self, timeout: float) -> bool:
+        if self._stop.wait(timeout):
+            return False
+        snapshot = _scan_input_files(self._input_dir, self._recursive)
+        changed = snapshot != self._snapshot
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+class _InotifyWatcher:
+    """
+    inotify на каждом каталоге входного дерева: wait() возвращает True, если за timeout пришло
+    событие о входном файле или каталоге. Новые подкаталоги берутся под наблюдение сразу;
+    при переносе каталогов и переполнении очереди событий наблюдение перестраивается.
+    """
+
+    def __init__(self, input_dir: str, recursive: bool):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            self._init = libc.inotify_init1
+            self._add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError("inotify недоступен в этой системе")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._input_dir = input_dir
+        self._recursive = recursive
+        self._fd = -1
+        self._watches: Dict[int, str] = {}
+        self._open()
+
+    def _open(self) -> None:
+        self._fd = self._init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error_code = ctypes.get_errno()
+            raise OSError(error_code, f"inotify_init1: {os.strerror(error_code)}")
+        self._watches = {}
+        self._watch_tree(self._input_dir)
+        if not self._watches:
+            self.close()
+            raise OSError(f"Не удалось начать наблюдение за {self._input_dir}")
+
+    def _watch_tree(self, directory: str) -> None:
+        pending_dirs = [directory]
+        while pending_dirs:
+            directory = pending_dirs.pop()
+            watch = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if watch < 0: # Каталог уже удален или исчерпан лимит fs.inotify.max_user_watches
+                if ctypes.get_errno() == errno.ENOSPC:
+                    print(f"Предупреждение: исчерпан лимит inotify, каталог {directory} не отслеживается")
+                continue
+            self._watches[watch] = directory
+            if not self._recursive:
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    pending_dirs.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _reopen(self) -> None:
+        self.close()
+        self._open()
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self._fd, _READ_BUFFER_SIZE)
+        except BlockingIOError:
+            return False
+        changed = False
+        reopen = False
+        offset = 0
+        while offset < len(data):
+            watch, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+            if mask & _IN_Q_OVERFLOW:
+                changed = reopen = True
+            elif mask & _IN_IGNORED:
+                self._watches.pop(watch, None)
+            elif mask & _IN_ISDIR:
+                # Каталог мог появиться вместе с файлами: обработку запускаем в любом случае
+                changed = True
+                if mask & (_IN_MOVED_FROM | _IN_MOVED_TO):
+                    reopen = self._recursive # Пути перенесенных каталогов в наблюдении устарели
+                elif mask & _IN_CREATE and self._recursive and watch in self._watches:
+                    self._watch_tree(os.path.join(self._watches[watch], name))
+            elif mask & _IN_DELETE_SELF or _is_input_file_name(name):
+                changed = True
+        if reopen:
+            self._reopen()
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def _create_watcher(backend: str, input_dir: str, recursive: bool, stop: threading.Event):
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"Неизвестный способ наблюдения: '{backend}'. Доступны: {', '.join(WATCH_BACKENDS)}")
+    if backend != "polling":
+        try:
+            return _InotifyWatcher(input_dir, recursive), "inotify"
+        except OSError as e:
+            if backend == "inotify":
+                raise RuntimeError(f"Не удалось использовать inotify: {e}")
+            print(f"inotify недоступен ({e}), используется опрос директории")
+    return _PollingWatcher(input_dir, recursive, stop), "polling"
+
+def watch_input_dir(input_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                    recursive_search: bool = True, backend: str = "auto",
+                    debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+                    poll_interval: float = DEFAULT_POLL_INTERVAL,
+                    max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+                    stop_event: Optional[threading.Event] = None, **pipeline_options) -> int:
+    """
+    Обрабатывает входную директорию и продолжает следить за ней, пока не будет установлен
+    stop_event (или не нажато Ctrl+C): после каждого изменения входных файлов запускается
+    инкрементальная обработка. Модели загружаются один раз при старте.
+
+    Args:
+        input_dir (str, optional): Путь к директории с входными текстами. Если None, ../input_texts.
+        output_dir (str, optional): Путь к выходной директории. Если None, ../processed_data.
+        recursive_search (bool, optional): Следить ли за подпапками. По умолчанию True.
+        backend (str, optional): "inotify", "polling" или "auto" (по умолчанию) - inotify,
+                                 если он доступен, иначе опрос.
+        debounce_seconds (float, optional): Пауза без изменений, после которой файлы считаются
+                                            записанными и запускается обработка. По умолчанию 1 сек.
+        poll_interval (float, optional): Период опроса дерева. По умолчанию 1 сек.
+        max_delay_seconds (float, optional): Наибольшая задержка обработки при непрерывных
+                                             изменениях. По умолчанию 30 сек.
+        stop_event (threading.Event, optional): Событие остановки (для запуска в потоке).
+        **pipeline_options: Остальные параметры run_dataset_creation_pipeline (incremental не
+                            передается: каждый цикл инкрементальный). При workers > 1 процессы-
+                            обработчики создаются в каждом цикле и загружают модели заново.
+
+    Returns:
+        int: Число выполненных циклов обработки (включая начальный).
+    """
+    input_dir, output_dir = resolve_pipeline_dirs(input_dir, output_dir)
+    pipeline_options.pop("incremental", None)
+    stop = stop_event or threading.Event()
+    if not os.path.isdir(input_dir):
+        print(f"Директория с входными текстами не найдена: {input_dir}")
+        return 0
+    try:
+        stages = resolve_stages(pipeline_options.get("stages"))
+        watcher, backend = _create_watcher(backend, input_dir, recursive_search, stop)
+    except (ValueError, RuntimeError) as e:
+        print(f"Ошибка: {e}")
+        return 0
+
+    if pipeline_options.get("sentence_splitter") is not None:
+        set_sentence_splitter_engine(pipeline_options["sentence_splitter"])
+    print("Загрузка моделей...")
+    warm_up_pipeline_components(stages)
+
+    cycles = 0
+
+    def process():
+        nonlocal cycles
+        cycles += 1
+        try:
+            run_dataset_creation_pipeline(input_dir, output_dir, recursive_search=recursive_search,
+                                          incremental=True, **pipeline_options)
+        except Exception: # Наблюдение продолжается: файлы с ошибкой будут обработаны в следующем цикле
+            print(f"Ошибка цикла обработки:\n{traceback.format_exc()}")
+
+    try:
+        # Файлы, появившиеся до запуска наблюдения. Изменения во время обработки накапливаются
+        # в наблюдателе и запускают следующий цикл.
+        process()
+        print(f"Наблюдение за {input_dir} ({backend}). Для остановки нажмите Ctrl+C.")
+        while not stop.is_set():
+            if not watcher.wait(poll_interval):
+                continue
+            first_change = last_change = time.monotonic()
+            while not stop.is_set():
+                now = time.monotonic()
+                quiet_left = debounce_seconds - (now - last_change)
+                if quiet_left <= 0 or now - first_change >= max_delay_seconds:
+                    break
+                if watcher.wait(min(poll_interval, quiet_left)):
+                    last_change = time.monotonic()
+            if not stop.is_set():
+                process()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    print(f"Наблюдение остановлено. Циклов обработки: {cycles}")
+    return cycles
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Обработка новых и измененных входных файлов по мере появления.")
+    parser.add_argument("--input-dir", help="Директория с входными текстами (по умолчанию ../input_texts)")
+    parser.add_argument("--output-dir", help="Выходная директория (по умолчанию ../processed_data)")
+    parser.add_argument("--backend", choices=WATCH_BACKENDS, default="auto", help="Способ наблюдения")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                        help="Пауза без изменений перед обработкой, сек")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Период опроса, сек")
+    parser.add_argument("--stages", help="Этапы обработки через запятую (см. stages)")
+    parser.add_argument("--paragraph-mode", choices=PARAGRAPH_MODES, help="Выделение абзацев в .txt")
+    parser.add_argument("--max-paragraph-chars", type=int, help="Предельная длина абзаца (0 - без ограничения)")
+    parser.add_argument("--include", action="append", help="Шаблон обрабатываемых файлов (можно несколько)")
+    parser.add_argument("--exclude", action="append", help="Шаблон исключаемых файлов и директорий (можно несколько)")
+    args = parser.parse_args()
+    watch_input_dir(args.input_dir, args.output_dir, backend=args.backend, debounce_seconds=args.debounce,
+                    poll_interval=args.poll_interval, stages=args.stages, paragraph_mode=args.paragraph_mode,
+                    max_paragraph_chars=args.max_paragraph_chars, include=args.include, exclude=args.exclude)
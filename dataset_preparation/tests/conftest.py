@@ -0,0 +1,9 @@
+# Dream-Team-core/dataset_preparation/tests/conftest.py
+# Тесты импортируют пакет как dataset_preparation.src, поэтому корень репозитория добавляется в sys.path.
+# Запуск из корня репозитория: python -m pytest -q dataset_preparation/tests
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,126 @@
+# Dream-Team-core/dataset_preparation/tests/dialogue_reference.py
+# Эталон и корпуса для проверки extract_dialogue_info: исходная реализация на регулярных выражениях,
+# фиксированный регрессионный корпус, проза, случайные короткие предложения и длинные "враждебные" входы.
+# Используются тестом tests/test_dialogue_identifier.py и замером benchmarks/bench_dialogue_identifier.py.
+import random
+import re
+from typing import Dict, List, Optional, Union
+
+from dataset_preparation.src.dialogue_identifier import (
+    RE_AUTHOR_WORDS_AFTER,
+    RE_AUTHOR_WORDS_BEFORE,
+    RE_DASH_SPEECH_START,
+    RE_QUOTED_SPEECH,
+)
+
+def reference_extract_dialogue_info(sentence_text: str) -> Dict[str, Optional[Union[bool, str]]]:
+    """Исходная реализация extract_dialogue_info (эталон для регрессионной проверки)."""
+    dialogue_info = {"is_dialogue": False, "speaker": None, "dialogue_cue": None}
+
+    match_author_after = RE_AUTHOR_WORDS_AFTER.search(sentence_text)
+    if match_author_after:
+        dialogue_info["is_dialogue"] = True
+        dialogue_info["dialogue_cue"] = "author_words_after"
+        author_words = match_author_after.group(2).strip()
+        if len(author_words.split()) <= 3 and not any(c in author_words for c in '?!.'):
+            potential_speaker = re.findall(r'\b[А-ЯЁ][а-яё]+\b', author_words)
+            if potential_speaker:
+                dialogue_info["speaker"] = " ".join(potential_speaker)
+        return dialogue_info
+
+    match_author_before = RE_AUTHOR_WORDS_BEFORE.match(sentence_text)
+    if match_author_before:
+        dialogue_info["is_dialogue"] = True
+        dialogue_info["dialogue_cue"] = "author_words_before"
+        dialogue_info["speaker"] = match_author_before.group(1).strip().rstrip(':')
+        return dialogue_info
+
+    if RE_DASH_SPEECH_START.match(sentence_text):
+        dialogue_info["is_dialogue"] = True
+        dialogue_info["dialogue_cue"] = "dash_start"
+        return dialogue_info
+
+    if RE_QUOTED_SPEECH.search(sentence_text):
+        dequoted = sentence_text.replace('«', '').replace('»', '').replace('"', '').strip()
+        original_dequoted_len = len(dequoted)
+        non_quote_parts = RE_QUOTED_SPEECH.sub('', sentence_text).strip()
+        if not non_quote_parts or len(non_quote_parts) < original_dequoted_len * 0.3:
+            dialogue_info["is_dialogue"] = True
+            dialogue_info["dialogue_cue"] = "quoted_speech"
+            return dialogue_info
+
+    return dialogue_info
+
+# Фиксированный регрессионный корпус: все форматы диалогов, которые распознает модуль, и пограничные случаи
+REGRESSION_CORPUS = [
+    "«Привет! Как дела?», – спросил Иван.",
+    "Он ответил: «Все отлично!»",
+    "– Добрый день, – сказал он.",
+    "– А ты кто?",
+    "«Просто проходил мимо.»",
+    "Это обычное предложение без диалога.",
+    "Иван сказал: «Пойдем гулять».",
+    "«Пойдем», – согласилась Маша.",
+    "Маша подумала: «Какая хорошая погода!» (это внутренняя речь, но формально как диалог)",
+    "– Ну что ж, – вздохнул он, – придется идти.",
+    "Предложение с цитатой: В книге было написано «жили-были». Это не диалог.",
+    "«Полностью цитата»",
+    '"Привет", - сказал Петр Иванович.',
+    '"Да!" — ответила Анна Павловна и ушла.',
+    "«Где Пьер?» – спросила она у князя Василия.",
+    "Наташа: «Я не поеду»",
+    "Князь Андрей: Нет, это невозможно.",
+    "Глава 1: Начало",
+    "Время: 12:30",
+    "«»",
+    '""',
+    "«» – сказал он.",
+    "«А» – Б",
+    "«Да», –, нет",
+    "«Да», – .",
+    "«Да», –    ",
+    "«Да»,–Иван",
+    "«Первая», – сказал Иван. «Вторая», – ответил Петр.",
+    "«Строка\nперенос», – сказал Иван.",
+    "«Раз»\n«Два», – сказал Олег.",
+    "Иван:\n«Привет»",
+    "Иван: «Незакрытая цитата",
+    "Иван: «\nx»",
+    "«Незакрытая кавычка и тире – сказал он.",
+    "— Кто там? — Свои.",
+    "-Без пробела",
+    "   – С отступом",
+    "Ии-ван Петров.: Ответ",
+    "Слово_с_подчеркиванием: Да",
+    "«Цитата» и еще «цитата» и немного текста вокруг них",
+    '"Одна" "Две" "Три"',
+    "««Вложенные»»",
+    '«Смешанные" кавычки»',
+]
+
+# Предложения повествования без признаков диалога (отсекаются предфильтром)
+PROSE_SENTENCES = [
+    "Они долго говорили о том, что Пьер уехал в Париж и не вернулся.",
+    "Наступила осень, и в доме стало тихо.",
+    "Иван Петров поехал в Москву в 1812 году.",
+    "Утром шел дождь, а к вечеру небо прояснилось.",
+    "В саду цвели яблони.",
+]
+
+_ALPHABET = list("«»\"-–—:,.!? \n") + list("абвгдеёжз") + list("АБВЁ") + ["_", "Иван", "сказал", "1", "AB", "x"]
+
+def make_random_corpus(count: int, seed: int = 7) -> List[str]:
+    """Детерминированно генерирует короткие предложения из "опасных" для правил символов."""
+    rng = random.Random(seed)
+    return ["".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 30))) for _ in range(count)]
+
+def make_adversarial_inputs(length: int) -> Dict[str, str]:
+    """Длинные входы, на которых исходные регулярные выражения перебирают варианты с возвратами."""
+    return {
+        "many_open_quotes": "«" * length,
+        "quotes_and_commas": "«а," * (length // 3),
+        "many_double_quotes": '"а' * (length // 2) + " – ",
+        "commas_before_dash": "«" + "а, " * (length // 3) + "–",
+        "long_plain_prose": "Это обычное длинное предложение без диалога " * (length // 44),
+        "long_dialogue": "«" + "слово " * (length // 6) + "», – сказал Иван.",
+    }
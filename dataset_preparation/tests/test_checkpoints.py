@@ -0,0 +1,80 @@
+# Dream-Team-core/dataset_preparation/tests/test_checkpoints.py
+# Контрольные точки внутри файла (checkpoints): процесс обработки аварийно завершается (os._exit
+# из on_paragraph) после заданного числа абзацев, повторный вызов продолжает файл с контрольной
+# точки, и результат побайтно совпадает с непрерывной обработкой - для .txt и .docx.
+import filecmp
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dataset_preparation.benchmarks.corpus_generator import generate_corpus
+from dataset_preparation.src.checkpoints import get_checkpoint_path
+from dataset_preparation.src.data_processor import process_file_to_jsonl
+from dataset_preparation.src.record_index import get_index_path
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGES = ("split", "dialogue")
+PARAGRAPHS = 60
+KILL_AFTER_PARAGRAPHS = 25
+# Контрольная точка сохраняется после каждого абзаца: момент сбоя определяет ее содержимое
+CHECKPOINT_INTERVAL = 1e-9
+
+_CRASH_SCRIPT = """
+import os, sys
+from dataset_preparation.src.data_processor import process_file_to_jsonl
+processed = [0]
+def crash_after_paragraphs():
+    processed[0] += 1
+    if processed[0] == int(sys.argv[4]):
+        os._exit(3) # Сбой без очистки: временный файл и контрольная точка остаются на диске
+process_file_to_jsonl(sys.argv[1], sys.argv[2], sys.argv[3], stages={stages!r}, checkpoint_interval={interval!r},
+                      on_paragraph=crash_after_paragraphs)
+"""
+
+def _process(input_file: str, output_dir: str, corpus_dir: str) -> int:
+    """Обрабатывает файл и возвращает число обработанных (не взятых из контрольной точки) абзацев."""
+    processed = []
+    assert process_file_to_jsonl(input_file, output_dir, corpus_dir, stages=STAGES,
+                                 checkpoint_interval=CHECKPOINT_INTERVAL, verbose=False,
+                                 on_paragraph=lambda: processed.append(1))
+    return len(processed)
+
+@pytest.mark.parametrize("extension", [".txt", ".docx"])
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, extension):
+    corpus_dir = str(tmp_path / "corpus")
+    generate_corpus(corpus_dir, files_count=1, paragraphs_per_file=PARAGRAPHS,
+                    docx_share=1.0 if extension == ".docx" else 0.0)
+    input_file = os.path.join(corpus_dir, "chapter_00000" + extension)
+    assert os.path.exists(input_file)
+    reference_dir, crash_dir = str(tmp_path / "reference"), str(tmp_path / "crash")
+    os.makedirs(reference_dir)
+    os.makedirs(crash_dir)
+
+    paragraphs_count = _process(input_file, reference_dir, corpus_dir)
+    assert paragraphs_count > KILL_AFTER_PARAGRAPHS
+
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, environment.get("PYTHONPATH")]))
+    crashed = subprocess.run(
+        [sys.executable, "-c", _CRASH_SCRIPT.format(stages=STAGES, interval=CHECKPOINT_INTERVAL),
+         input_file, crash_dir, corpus_dir, str(KILL_AFTER_PARAGRAPHS)],
+        env=environment, capture_output=True, text=True)
+    assert crashed.returncode == 3, crashed.stderr
+
+    output_file = os.path.join(crash_dir, "chapter_00000.jsonl")
+    assert not os.path.exists(output_file)
+    with open(get_checkpoint_path(output_file), 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    assert checkpoint["next_paragraph"] == KILL_AFTER_PARAGRAPHS
+    assert os.path.getsize(output_file + ".tmp") >= checkpoint["data_bytes"] > 0
+
+    assert _process(input_file, crash_dir, corpus_dir) == paragraphs_count - KILL_AFTER_PARAGRAPHS
+
+    reference_file = os.path.join(reference_dir, "chapter_00000.jsonl")
+    assert filecmp.cmp(reference_file, output_file, shallow=False)
+    assert filecmp.cmp(get_index_path(reference_file), get_index_path(output_file), shallow=False)
+    assert sorted(os.listdir(crash_dir)) == sorted(os.listdir(reference_dir))
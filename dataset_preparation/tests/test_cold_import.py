@@ -0,0 +1,48 @@
+# Dream-Team-core/dataset_preparation/tests/test_cold_import.py
+# Импорт пакета и main_creator в чистом процессе не загружает тяжелые зависимости
+# (Natasha, NLTK, python-docx): они загружаются лениво, при первой обработке файла.
+# Время холодного импорта сравнивается со временем импорта одних тяжелых зависимостей на той же
+# машине: порог не зависит от ее скорости и с запасом ловит возврат тяжелых импортов в пакет.
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dataset_preparation.benchmarks.bench_cold_import import HEAVY_MODULES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Холодный импорт пакета (около 0.12 с) примерно втрое быстрее импорта natasha, nltk и docx (около 0.35 с)
+MAX_COLD_IMPORT_SHARE_OF_HEAVY = 0.75
+TIMED_IMPORT_REPEATS = 3
+
+_CHECK_CODE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+)
+
+def _cold_import(module: str) -> dict:
+    """Импортирует модуль (или несколько через запятую) в чистом процессе: время и загруженные тяжелые модули."""
+    env = dict(os.environ, DREAM_TEAM_OFFLINE="1")
+    output = subprocess.run(
+        [sys.executable, "-c", _CHECK_CODE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    return json.loads(output)
+
+@pytest.mark.parametrize("module", ["dataset_preparation.src", "dataset_preparation.src.main_creator"])
+def test_import_does_not_load_heavy_modules(module):
+    assert _cold_import(module)["heavy"] == []
+
+def _best_import_seconds(module: str) -> float:
+    # Лучшее из нескольких запусков: первый запуск может платить за холодный кэш диска
+    return min(_cold_import(module)["seconds"] for _ in range(TIMED_IMPORT_REPEATS))
+
+def test_cold_import_is_faster_than_heavy_dependencies():
+    heavy_seconds = _best_import_seconds("natasha, nltk, docx")
+    assert _best_import_seconds("dataset_preparation.src") < heavy_seconds * MAX_COLD_IMPORT_SHARE_OF_HEAVY
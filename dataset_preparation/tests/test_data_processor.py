@@ -0,0 +1,64 @@
+# Dream-Team-core/dataset_preparation/tests/test_data_processor.py
+# Обработка одного файла (data_processor.process_file_to_jsonl): ошибки чтения и пустые файлы.
+import json
+import os
+
+import pytest
+
+from dataset_preparation.src.data_processor import process_file_to_jsonl
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+from dataset_preparation.src.manifest import get_manifest_path
+
+def _write(path, data) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, bytes):
+        path.write_bytes(data)
+    else:
+        path.write_text(data, encoding="utf-8")
+    return str(path)
+
+def _manifest_files(output_dir) -> dict:
+    with open(get_manifest_path(str(output_dir)), 'r', encoding='utf-8') as f:
+        return json.load(f)["files"]
+
+@pytest.mark.parametrize("io_queue_size", [0, 4])
+def test_corrupt_docx_is_an_error_not_an_empty_file(tmp_path, io_queue_size):
+    input_file = _write(tmp_path / "input" / "bad.docx", b"PK\x03\x04 not a zip archive")
+    output_dir = str(tmp_path / "output")
+    os.makedirs(output_dir)
+    assert not process_file_to_jsonl(input_file, output_dir, str(tmp_path / "input"), stages="split",
+                                     io_queue_size=io_queue_size, verbose=False)
+    assert os.listdir(output_dir) == []
+
+def test_empty_txt_is_processed_without_output(tmp_path):
+    input_file = _write(tmp_path / "input" / "empty.txt", "\n  \n")
+    output_dir = str(tmp_path / "output")
+    os.makedirs(output_dir)
+    assert process_file_to_jsonl(input_file, output_dir, str(tmp_path / "input"), stages="split", verbose=False)
+    assert os.listdir(output_dir) == []
+
+@pytest.mark.parametrize("io_threads", [0, 2])
+def test_corrupt_docx_is_not_recorded_in_manifest(tmp_path, io_threads):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write(input_dir / "bad.docx", b"PK\x03\x04 not a zip archive")
+    _write(input_dir / "good.txt", "Обычный абзац.")
+    for _ in range(2): # Файл с ошибкой не пропускается и при повторном запуске
+        run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                      verbose=False, io_threads=io_threads)
+        assert set(_manifest_files(output_dir)) == {"good.txt"}
+
+@pytest.mark.parametrize("output_format", ["jsonl", "parquet"])
+def test_emptied_input_removes_previous_output(tmp_path, output_format):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write(input_dir / "a.txt", "Абзац, который потом исчезнет.")
+    run = lambda: run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                                verbose=False, output_format=output_format)
+    run()
+    output_name = "a." + output_format
+    assert _manifest_files(output_dir)["a.txt"]["output"] == output_name
+    assert os.path.exists(output_dir / output_name)
+
+    _write(input_dir / "a.txt", "\n")
+    run()
+    assert _manifest_files(output_dir)["a.txt"]["output"] is None
+    assert sorted(name for name in os.listdir(output_dir) if not name.startswith("_")) == []
@@ -0,0 +1,96 @@
+# Dream-Team-core/dataset_preparation/tests/test_deduplication.py
+# Поиск почти одинаковых абзацев (deduplication): сходство MinHash/LSH, порядок выбора оригинала,
+# режимы "skip" и "link" в конвейере и повторная обработка файла, когда пропал его оригинал.
+import json
+
+import pytest
+
+from dataset_preparation.src.deduplication import (
+    NearDuplicateIndex,
+    choose_lsh_bands,
+    duplicates_digest,
+    find_duplicate_paragraphs,
+)
+from dataset_preparation.src.main_creator import DUPLICATES_REPORT_FILE_NAME, run_dataset_creation_pipeline
+
+ORIGINAL = "Иван Петрович вышел из дома рано утром и направился к реке, где его уже ждали друзья."
+# Тот же абзац с другим регистром и пунктуацией: после нормализации почти совпадает
+NEAR_COPY = "иван петрович вышел из дома рано утром и направился к реке - где его уже ждали друзья!!"
+OTHER = "Совсем другой абзац о погоде в Москве, который не похож на предыдущие ни по словам, ни по смыслу."
+
+def _write(path, paragraphs) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+    return str(path)
+
+def _read_jsonl(path) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_near_duplicate_index():
+    index = NearDuplicateIndex()
+    assert index.add("original", ORIGINAL) is None
+    key, similarity = index.add("copy", NEAR_COPY)
+    assert key == "original" and similarity >= index.threshold
+    assert index.add("other", OTHER) is None
+    # Короткие реплики законно повторяются и не считаются дубликатами
+    assert index.add("short_1", "— Да.") is None
+    assert index.add("short_2", "— Да.") is None
+    assert len(index) == 2
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(threshold=0)
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.95])
+def test_lsh_bands_fit_threshold(threshold):
+    bands, rows = choose_lsh_bands(threshold, 128)
+    assert bands * rows <= 128
+    # Порог срабатывания LSH немного ниже порога сходства, чтобы не терять дубликаты
+    assert abs((1.0 / bands) ** (1.0 / rows) - (threshold - 0.05)) < 0.1
+
+def test_first_occurrence_by_relative_path_is_original(tmp_path):
+    files = [
+        ("b.txt", _write(tmp_path / "b.txt", [OTHER, NEAR_COPY])),
+        ("a.txt", _write(tmp_path / "a.txt", [ORIGINAL, ORIGINAL])),
+    ]
+    duplicates, checked = find_duplicate_paragraphs(files)
+    assert checked == 4
+    assert duplicates["a.txt"][1]["duplicate_of"] == {"source": "a.txt", "paragraph_index": 0, "id": "a_paragraph_0"}
+    assert duplicates["b.txt"][1]["duplicate_of"]["id"] == "a_paragraph_0"
+    assert set(duplicates["b.txt"]) == {1}
+    assert duplicates_digest(duplicates["b.txt"], "skip") != duplicates_digest(duplicates["b.txt"], "link")
+    assert duplicates_digest({}, "skip") is None
+
+def _run(input_dir, output_dir, **options) -> None:
+    run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                  verbose=False, deduplicate=True, **options)
+
+@pytest.mark.parametrize("dedup_mode", ["skip", "link"])
+def test_pipeline_dedup_modes(tmp_path, dedup_mode):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write(input_dir / "a.txt", [ORIGINAL])
+    _write(input_dir / "b.txt", [OTHER, NEAR_COPY])
+    _run(input_dir, output_dir, dedup_mode=dedup_mode)
+
+    records = _read_jsonl(output_dir / "b.jsonl")
+    if dedup_mode == "skip":
+        assert [r["paragraph_index"] for r in records] == [0]
+    else:
+        assert [r["paragraph_index"] for r in records] == [0, 1]
+        assert records[1]["duplicate_of"] == "a_paragraph_0" and records[1]["sentences"] == []
+        assert "duplicate_of" not in records[0] and records[0]["sentences"]
+    with open(output_dir / DUPLICATES_REPORT_FILE_NAME, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report["duplicates"] == 1
+    assert report["files"]["b.txt"][0]["paragraph_index"] == 1
+
+def test_unchanged_file_is_reprocessed_when_its_original_disappears(tmp_path):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write(input_dir / "a.txt", [ORIGINAL])
+    _write(input_dir / "b.txt", [OTHER, NEAR_COPY])
+    _run(input_dir, output_dir)
+    assert len(_read_jsonl(output_dir / "b.jsonl")) == 1
+
+    # b.txt не менялся, но его абзац больше не дубликат: файл обрабатывается заново
+    _write(input_dir / "a.txt", ["Новая первая глава начинается с описания старого сада за городом."])
+    _run(input_dir, output_dir)
+    assert [r["paragraph_text"] for r in _read_jsonl(output_dir / "b.jsonl")] == [OTHER, NEAR_COPY]
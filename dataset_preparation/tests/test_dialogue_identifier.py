@@ -0,0 +1,43 @@
+# Dream-Team-core/dataset_preparation/tests/test_dialogue_identifier.py
+# Регрессионная проверка extract_dialogue_info: результаты совпадают с исходной реализацией на
+# регулярных выражениях (эталон и корпуса - из tests/dialogue_reference.py) и на коротких
+# предложениях (выражения), и на длинных (линейные сканеры).
+import pytest
+
+from dataset_preparation.tests.dialogue_reference import (
+    PROSE_SENTENCES,
+    REGRESSION_CORPUS,
+    reference_extract_dialogue_info,
+    make_adversarial_inputs,
+    make_random_corpus,
+)
+from dataset_preparation.src.dialogue_identifier import (
+    _REGEX_MAX_SENTENCE_CHARS,
+    extract_dialogue_info,
+    extract_dialogue_info_batch,
+)
+
+def _mismatches(sentences):
+    """Предложения, на которых extract_dialogue_info или пакетный вариант расходятся с эталоном."""
+    batch_results = extract_dialogue_info_batch(sentences)
+    return [sentence for sentence, batch_result in zip(sentences, batch_results)
+            if not (extract_dialogue_info(sentence) == batch_result == reference_extract_dialogue_info(sentence))]
+
+@pytest.mark.parametrize("sentence", REGRESSION_CORPUS + PROSE_SENTENCES)
+def test_regression_corpus_matches_reference(sentence):
+    assert extract_dialogue_info(sentence) == reference_extract_dialogue_info(sentence)
+
+def test_random_sentences_match_reference():
+    assert _mismatches(make_random_corpus(20_000)) == []
+
+@pytest.mark.parametrize("length", [_REGEX_MAX_SENTENCE_CHARS - 3, _REGEX_MAX_SENTENCE_CHARS + 3, 2_000])
+def test_long_inputs_match_reference(length):
+    # Длина около границы быстрого пути: одни и те же входы проверяются выражениями и сканерами
+    assert _mismatches(list(make_adversarial_inputs(length).values())) == []
+
+def test_long_corpus_sentences_use_scanners():
+    # Предложения корпуса, дополненные до длины больше границы, проверяются линейными сканерами
+    padding = " " + "слово " * (_REGEX_MAX_SENTENCE_CHARS // 6 + 1)
+    sentences = [sentence + padding for sentence in REGRESSION_CORPUS] + [padding + sentence for sentence in REGRESSION_CORPUS]
+    assert all(len(sentence) > _REGEX_MAX_SENTENCE_CHARS for sentence in sentences)
+    assert _mismatches(sentences) == []
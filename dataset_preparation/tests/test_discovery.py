@@ -0,0 +1,117 @@
+# Dream-Team-core/dataset_preparation/tests/test_discovery.py
+# Поиск входных файлов (discovery): последовательный и параллельный обход находят одни и те же файлы,
+# шаблоны include/exclude согласованы с selects(), кеш списков директорий (ListingCache) используется
+# только для неизмененных директорий и очищается от удаленных.
+import os
+import sqlite3
+import time
+
+import pytest
+
+from dataset_preparation.src.discovery import InputDiscovery, relative_posix_path
+
+INPUT_FILES = [
+    "a.txt", "B.TXT", "book.docx",
+    "part1/c.txt", "part1/drafts/old.txt", "part1/deep/tmp_d.txt", "part1/deep/e.docx",
+    "drafts/f.txt", "part2/g.txt",
+]
+OTHER_FILES = ["notes.md", "part1/image.png", "part2/h.txt.bak"]
+
+@pytest.fixture
+def input_dir(tmp_path):
+    root = tmp_path / "input"
+    for relative_path in INPUT_FILES + OTHER_FILES:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("Текст.", encoding="utf-8")
+    (root / "empty_dir").mkdir()
+    return root
+
+def _age_directories(root) -> None:
+    """Сдвигает mtime директорий в прошлое: свежие директории кеш не сохраняет (см. _RACY_WINDOW_NS)."""
+    past_ns = time.time_ns() - 60 * 10 ** 9
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, ns=(past_ns, past_ns))
+
+def _found(input_dir, **options) -> dict:
+    return {f.relative_path: f for f in InputDiscovery(str(input_dir), **options)}
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_walk_finds_input_files(input_dir, threads):
+    found = _found(input_dir, threads=threads)
+    assert set(found) == set(INPUT_FILES)
+    deep = found["part1/deep/e.docx"]
+    assert deep.relative_dir == "part1/deep"
+    assert deep.path == os.path.join(str(input_dir), "part1", "deep", "e.docx")
+    assert found["a.txt"].relative_dir == ""
+
+def test_non_recursive_walk_finds_root_files_only(input_dir):
+    assert set(_found(input_dir, recursive=False)) == {"a.txt", "B.TXT", "book.docx"}
+
+@pytest.mark.parametrize("include, exclude, expected", [
+    # Шаблоны, как и fnmatch на POSIX, чувствительны к регистру (в отличие от проверки расширения)
+    ("*.txt", None, {p for p in INPUT_FILES if p.endswith(".txt")}),
+    (None, "drafts", set(INPUT_FILES) - {"part1/drafts/old.txt", "drafts/f.txt"}),
+    (None, "drafts/**", set(INPUT_FILES) - {"drafts/f.txt"}),
+    (None, "**/tmp_*", set(INPUT_FILES) - {"part1/deep/tmp_d.txt"}),
+    ("part1/*", "**/deep/*.docx", {"part1/c.txt", "part1/drafts/old.txt", "part1/deep/tmp_d.txt"}),
+])
+@pytest.mark.parametrize("threads", [1, 4])
+def test_patterns_agree_with_selects(input_dir, include, exclude, expected, threads):
+    discovery = InputDiscovery(str(input_dir), include=include, exclude=exclude, threads=threads)
+    assert {f.relative_path for f in discovery} == expected
+    # selects() решает без обхода (для записей манифеста) так же, как обход
+    assert {p for p in INPUT_FILES + OTHER_FILES if discovery.selects(p)} == expected
+
+def test_listing_cache_reuses_unchanged_directories(input_dir, tmp_path):
+    cache_path = str(tmp_path / "listing_cache.sqlite3")
+    _age_directories(input_dir)
+    first = InputDiscovery(str(input_dir), cache_path=cache_path)
+    assert {f.relative_path for f in first} == set(INPUT_FILES)
+    assert first.stats["cached_directories"] == 0
+
+    second = InputDiscovery(str(input_dir), cache_path=cache_path)
+    assert {f.relative_path for f in second} == set(INPUT_FILES)
+    assert second.stats["cached_directories"] == second.stats["directories"] == first.stats["directories"]
+
+    # Новый файл меняет mtime своей директории: она читается заново, остальные берутся из кеша
+    (input_dir / "part2" / "new.txt").write_text("Текст.", encoding="utf-8")
+    third = InputDiscovery(str(input_dir), cache_path=cache_path)
+    assert {f.relative_path for f in third} == set(INPUT_FILES) | {"part2/new.txt"}
+    assert third.stats["cached_directories"] == third.stats["directories"] - 1
+
+def test_listing_cache_prunes_deleted_directories_and_ignores_other_inputs(input_dir, tmp_path):
+    cache_path = str(tmp_path / "listing_cache.sqlite3")
+    _age_directories(input_dir)
+    list(InputDiscovery(str(input_dir), cache_path=cache_path))
+
+    for name in os.listdir(input_dir / "drafts"):
+        os.remove(input_dir / "drafts" / name)
+    os.rmdir(input_dir / "drafts")
+    _age_directories(input_dir)
+    assert "drafts/f.txt" not in _found(input_dir, cache_path=cache_path)
+    with sqlite3.connect(cache_path) as connection:
+        directories = {row[0] for row in connection.execute("SELECT directory FROM listings")}
+    assert "drafts" not in directories and "part1/deep" in directories
+
+    # Кеш другой входной директории не используется: списки прежней директории удаляются
+    other_dir = tmp_path / "other"
+    (other_dir / "part1").mkdir(parents=True)
+    (other_dir / "part1" / "x.txt").write_text("Текст.", encoding="utf-8")
+    other = InputDiscovery(str(other_dir), cache_path=cache_path)
+    assert {f.relative_path for f in other} == {"part1/x.txt"}
+    assert other.stats["cached_directories"] == 0
+    with sqlite3.connect(cache_path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM listings WHERE directory = 'part1/deep'").fetchone()[0] == 0
+
+def test_parallel_walk_stops_when_consumer_stops(input_dir):
+    discovery = InputDiscovery(str(input_dir), threads=4)
+    iterator = iter(discovery)
+    assert next(iterator).relative_path in INPUT_FILES
+    iterator.close() # Потоки обхода останавливаются, итератор не зависает
+    assert discovery.stats["files"] == 1
+
+def test_relative_posix_path(tmp_path):
+    base_dir = str(tmp_path)
+    assert relative_posix_path(os.path.join(base_dir, "a", "b.txt"), base_dir) == "a/b.txt"
+    assert relative_posix_path(os.path.join(base_dir, "a", "b.txt"), base_dir + os.path.sep) == "a/b.txt"
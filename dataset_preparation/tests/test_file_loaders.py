@@ -0,0 +1,86 @@
+# Dream-Team-core/dataset_preparation/tests/test_file_loaders.py
+# Выделение абзацев (file_loaders): деление слишком длинных абзацев по предельной длине
+# и чтение .txt частями строк длиннее блока чтения.
+import re
+
+import pytest
+
+from dataset_preparation.src.file_loaders import (
+    _TXT_READ_BLOCK_CHARS,
+    PARAGRAPH_MODES,
+    iter_paragraphs_from_txt,
+    split_paragraph_text,
+)
+from dataset_preparation.src.text_cleaner import clean_text
+
+_SENTENCES = "Первое предложение книги. Второе, чуть длиннее первого! А это третье? «Реплика героя». "
+
+def _write_txt(tmp_path, text: str) -> str:
+    file_path = tmp_path / "input.txt"
+    file_path.write_text(text, encoding="utf-8")
+    return str(file_path)
+
+def _blank_line_paragraphs(text: str):
+    """Эталон режима "blank_line": разбиение всего текста по пустым строкам."""
+    return [paragraph for paragraph in (clean_text(part) for part in re.split(r'\n\s*\n+', text)) if paragraph]
+
+def _rejoin(pieces, cleaned: str) -> str:
+    """
+    Соединяет части абзаца так, как они шли в очищенном тексте: по пробелу деление убирает этот
+    пробел, а жесткое деление по длине - ничего. Каждая часть должна продолжать текст с места,
+    где кончилась предыдущая, иначе текст потерян или переставлен.
+    """
+    joined = ""
+    for piece in pieces:
+        separator = " " if cleaned.startswith(joined + " " + piece) else ""
+        assert cleaned.startswith(joined + separator + piece)
+        joined += separator + piece
+    return joined
+
+@pytest.mark.parametrize("text", [
+    _SENTENCES * 500,                      # границы предложений
+    "слово " * 5000,                        # только пробелы
+    "x" * 50000,                            # ни предложений, ни пробелов
+])
+@pytest.mark.parametrize("max_chars", [1, 50, 1000])
+def test_split_respects_max_chars_and_keeps_text(text, max_chars):
+    pieces = split_paragraph_text(text, mode="blank_line", max_chars=max_chars)
+    assert pieces
+    assert all(0 < len(piece) <= max_chars for piece in pieces)
+    assert _rejoin(pieces, clean_text(text)) == clean_text(text)
+
+def test_split_without_limit_keeps_paragraph():
+    text = _SENTENCES * 500
+    assert split_paragraph_text(text, mode="blank_line", max_chars=0) == [clean_text(text)]
+
+@pytest.mark.parametrize("mode", PARAGRAPH_MODES)
+def test_txt_pieces_respect_max_chars_and_keep_text(tmp_path, mode):
+    # Одна строка длиннее блока чтения, затем обычные абзацы
+    text = _SENTENCES * (2 * _TXT_READ_BLOCK_CHARS // len(_SENTENCES)) + "\n\nКороткий абзац.\n"
+    max_chars = 2000
+    pieces = list(iter_paragraphs_from_txt(_write_txt(tmp_path, text), mode=mode, max_chars=max_chars))
+    assert all(0 < len(piece) <= max_chars for piece in pieces)
+    assert pieces[-1] == "Короткий абзац."
+    assert _rejoin(pieces, clean_text(text)) == clean_text(text)
+
+@pytest.mark.parametrize("whitespace", [" ", "\t", " \t"])
+def test_txt_whitespace_run_longer_than_read_block(tmp_path, whitespace):
+    # Отрезок длиннее двух блоков: хотя бы один блок целиком состоит из пробельных символов
+    run = whitespace * (3 * _TXT_READ_BLOCK_CHARS // len(whitespace))
+    # Строка, начинающаяся с пробельного отрезка длиннее блока, продолжает абзац, а не разделяет его
+    text = "Начало абзаца\n" + run + "его продолжение.\n\n" + "Второй абзац\n" + run + "\n\nТретий абзац."
+    file_path = _write_txt(tmp_path, text)
+    expected = ["Начало абзаца его продолжение.", "Второй абзац", "Третий абзац."]
+    assert _blank_line_paragraphs(text) == expected
+    assert list(iter_paragraphs_from_txt(file_path, mode="blank_line", max_chars=0)) == expected
+    assert list(iter_paragraphs_from_txt(file_path, mode="blank_line", max_chars=10)) == [
+        "Начало", "абзаца его", "продолжени", "е.", "Второй", "абзац", "Третий", "абзац."]
+
+def test_txt_indented_line_after_whitespace_run_starts_paragraph(tmp_path):
+    run = " " * (3 * _TXT_READ_BLOCK_CHARS)
+    text = "Первый абзац\n" + run + "второй абзац с отступом\nпродолжение второго\n"
+    file_path = _write_txt(tmp_path, text)
+    assert list(iter_paragraphs_from_txt(file_path, mode="indent", max_chars=0)) == [
+        "Первый абзац", "второй абзац с отступом продолжение второго"]
+    assert list(iter_paragraphs_from_txt(file_path, mode="single_newline", max_chars=0)) == [
+        "Первый абзац", "второй абзац с отступом", "продолжение второго"]
@@ -0,0 +1,134 @@
+# Dream-Team-core/dataset_preparation/tests/test_manifest.py
+# Манифест и инкрементальная обработка (manifest, main_creator): проверка неизмененных файлов,
+# удаление результатов удаленных входов и файлы, измененные во время обработки.
+import json
+import os
+
+import pytest
+
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+from dataset_preparation.src.manifest import (
+    PIPELINE_VERSION,
+    get_manifest_path,
+    is_input_unchanged,
+    load_manifest,
+    make_manifest_entry,
+    remove_outputs_of_deleted_inputs,
+    stat_input,
+)
+
+def _write(path, text: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+def _run(input_dir, output_dir, **options) -> None:
+    run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                  verbose=False, **options)
+
+def _manifest_files(output_dir) -> dict:
+    with open(get_manifest_path(str(output_dir)), 'r', encoding='utf-8') as f:
+        return json.load(f)["files"]
+
+def _read_texts(output_file) -> list:
+    with open(output_file, 'r', encoding='utf-8') as f:
+        return [json.loads(line)["paragraph_text"] for line in f]
+
+@pytest.fixture
+def processed(tmp_path):
+    """Входной файл a.txt, его выходной файл и манифест с записью о нем."""
+    input_file = _write(tmp_path / "input" / "a.txt", "Первый абзац.\n\nВторой абзац.")
+    output_dir = str(tmp_path / "output")
+    _write(os.path.join(output_dir, "a.jsonl"), "{}\n")
+    manifest = load_manifest(output_dir)
+    manifest["files"]["a.txt"] = make_manifest_entry(input_file, "a.jsonl")
+    return input_file, output_dir, manifest
+
+def test_unchanged_input_is_skipped(processed):
+    input_file, output_dir, manifest = processed
+    assert is_input_unchanged(manifest, "a.txt", input_file, output_dir)
+
+def test_touched_input_with_same_content_is_skipped_and_entry_updated(processed):
+    input_file, output_dir, manifest = processed
+    stat = os.stat(input_file)
+    os.utime(input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert is_input_unchanged(manifest, "a.txt", input_file, output_dir)
+    assert manifest["files"]["a.txt"]["mtime_ns"] == stat.st_mtime_ns + 10 ** 9
+
+def test_changed_input_is_processed(processed):
+    input_file, output_dir, manifest = processed
+    _write(input_file, "Другой текст того же размера!!")
+    assert not is_input_unchanged(manifest, "a.txt", input_file, output_dir)
+
+def test_missing_output_or_stale_manifest_is_processed(processed):
+    input_file, output_dir, manifest = processed
+    assert not is_input_unchanged(dict(manifest, stale=True), "a.txt", input_file, output_dir)
+    os.remove(os.path.join(output_dir, "a.jsonl"))
+    assert not is_input_unchanged(manifest, "a.txt", input_file, output_dir)
+
+def test_entry_uses_stat_taken_before_reading(processed):
+    input_file, _, _ = processed
+    input_stat = stat_input(input_file)
+    _write(input_file, "Файл дописан после снимка.")
+    entry = make_manifest_entry(input_file, "a.jsonl", file_hash="0" * 64, input_stat=input_stat)
+    assert (entry["size"], entry["mtime_ns"]) == (input_stat["size"], input_stat["mtime_ns"])
+    assert entry["pipeline_version"] == PIPELINE_VERSION
+
+def test_settings_change_makes_manifest_stale(tmp_path):
+    input_dir, output_dir = tmp_path / "input", str(tmp_path / "output")
+    _write(input_dir / "a.txt", "Текст.")
+    _run(input_dir, output_dir)
+    with open(get_manifest_path(output_dir), 'r', encoding='utf-8') as f:
+        settings = json.load(f)["settings"]
+    assert not load_manifest(output_dir, settings=settings).get("stale")
+    changed = load_manifest(output_dir, settings=dict(settings, sentence_splitter="razdel"))
+    assert changed.get("stale") and "a.txt" in changed["files"]
+
+def test_remove_outputs_of_deleted_inputs_keeps_shared_outputs(tmp_path):
+    output_dir = str(tmp_path)
+    for name in ("a.jsonl", "b.jsonl"):
+        _write(os.path.join(output_dir, name), "{}\n")
+    manifest = {"files": {
+        "a.txt": {"output": "a.jsonl"}, "b.txt": {"output": "b.jsonl"},
+        "b.docx": {"output": "b.jsonl"}, "empty.txt": {"output": None},
+    }}
+    removed = remove_outputs_of_deleted_inputs(manifest, str(tmp_path / "input"), output_dir,
+                                               missing={"a.txt", "b.txt", "empty.txt"})
+    assert removed == 3
+    assert set(manifest["files"]) == {"b.docx"}
+    assert not os.path.exists(os.path.join(output_dir, "a.jsonl"))
+    assert os.path.exists(os.path.join(output_dir, "b.jsonl"))
+
+def test_incremental_run_skips_unchanged_and_removes_deleted(tmp_path):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write(input_dir / "a.txt", "Первый файл.")
+    _write(input_dir / "sub" / "b.txt", "Второй файл.")
+    _run(input_dir, output_dir)
+    assert set(_manifest_files(output_dir)) == {"a.txt", "sub/b.txt"}
+    first_mtime = os.stat(output_dir / "a.jsonl").st_mtime_ns
+
+    os.remove(input_dir / "sub" / "b.txt")
+    _run(input_dir, output_dir)
+    assert set(_manifest_files(output_dir)) == {"a.txt"}
+    assert os.stat(output_dir / "a.jsonl").st_mtime_ns == first_mtime
+    assert not os.path.exists(output_dir / "sub" / "b.jsonl")
+
+@pytest.mark.parametrize("io_threads", [0, 2])
+def test_input_modified_during_processing_is_processed_again(tmp_path, io_threads):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_file = _write(input_dir / "a.txt", "Старый абзац.")
+
+    def modify_on_start(event):
+        # Файл меняется, когда его абзацы уже могут быть прочитаны предзагрузкой
+        if event["type"] == "file_started":
+            with open(input_file, 'a', encoding='utf-8') as f:
+                f.write("\n\nНовый абзац.")
+
+    _run(input_dir, output_dir, io_threads=io_threads, on_event=modify_on_start)
+    assert "a.txt" not in _manifest_files(output_dir)
+
+    _run(input_dir, output_dir, io_threads=io_threads)
+    entry = _manifest_files(output_dir)["a.txt"]
+    assert (entry["size"], entry["mtime_ns"]) == (os.path.getsize(input_file), os.stat(input_file).st_mtime_ns)
+    assert _read_texts(output_dir / "a.jsonl") == ["Старый абзац.", "Новый абзац."]
@@ -0,0 +1,108 @@
+# Dream-Team-core/dataset_preparation/tests/test_ner_cache.py
+# Кеш результатов NER (ner_cache): попадания в памяти и на диске, недоступность записей
+# после смены версии моделей и вытеснение давно не использованных записей с диска.
+import itertools
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from dataset_preparation.src import ner_cache
+from dataset_preparation.src.ner_cache import (
+    clear_ner_cache,
+    configure_ner_cache,
+    get_cached_entities,
+    get_ner_cache_config,
+    get_ner_cache_stats,
+    reset_ner_cache_stats,
+    store_entities,
+)
+
+ENTITIES = [{"text": "Иван", "type": "PER", "start": 0, "end": 4}]
+
+@pytest.fixture(autouse=True)
+def restore_ner_cache():
+    """Настройки кеша - глобальное состояние процесса: после теста восстанавливаются прежние."""
+    saved_config = get_ner_cache_config()
+    clear_ner_cache()
+    reset_ner_cache_stats()
+    yield
+    configure_ner_cache(**saved_config)
+    clear_ner_cache()
+    reset_ner_cache_stats()
+
+def _disk_rows(path: str) -> int:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM ner_cache").fetchone()[0]
+
+def test_memory_hit_returns_copies():
+    configure_ner_cache(enabled=True, disk_path=None)
+    store_entities(["Иван пришел."], [ENTITIES])
+
+    found = get_cached_entities(["Иван пришел.", "Другой текст."])
+    assert found == {0: ENTITIES}
+    found[0][0]["type"] = "LOC"
+    assert get_cached_entities(["Иван пришел."]) == {0: ENTITIES}
+    stats = get_ner_cache_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (2, 0, 1)
+
+def test_disabled_cache_stores_nothing():
+    configure_ner_cache(enabled=False)
+    store_entities(["Иван пришел."], [ENTITIES])
+    assert get_cached_entities(["Иван пришел."]) == {}
+    assert get_ner_cache_stats()["memory_entries"] == 0
+
+def test_disk_hit_after_reconfigure(tmp_path):
+    disk_path = str(tmp_path / "ner_cache.sqlite")
+    configure_ner_cache(enabled=True, disk_path=disk_path)
+    store_entities(["Иван пришел.", "Маша ушла."], [ENTITIES, []])
+
+    # Новая настройка (как в следующем запуске): соединение открывается заново, память пуста
+    configure_ner_cache(enabled=True, disk_path=disk_path)
+    clear_ner_cache()
+    assert get_cached_entities(["Маша ушла.", "Иван пришел.", "Маша ушла."]) == {0: [], 1: ENTITIES, 2: []}
+    assert get_ner_cache_stats()["disk_hits"] == 3
+
+    # Найденное на диске попадает в память
+    configure_ner_cache(enabled=True, disk_path=None)
+    assert get_cached_entities(["Иван пришел."]) == {0: ENTITIES}
+    assert get_ner_cache_stats()["memory_hits"] == 1
+
+def test_model_version_change_invalidates_disk_entries(tmp_path, monkeypatch):
+    disk_path = str(tmp_path / "ner_cache.sqlite")
+    configure_ner_cache(enabled=True, disk_path=disk_path)
+    monkeypatch.setattr(ner_cache, "_model_version", "schema-1/natasha-1.0")
+    store_entities(["Иван пришел."], [ENTITIES])
+
+    clear_ner_cache()
+    monkeypatch.setattr(ner_cache, "_model_version", "schema-1/natasha-2.0")
+    assert get_cached_entities(["Иван пришел."]) == {}
+    assert get_ner_cache_stats()["misses"] == 1
+
+    monkeypatch.setattr(ner_cache, "_model_version", "schema-1/natasha-1.0")
+    assert get_cached_entities(["Иван пришел."]) == {0: ENTITIES}
+
+def test_disk_eviction_keeps_recently_used_entries(tmp_path, monkeypatch):
+    disk_path = str(tmp_path / "ner_cache.sqlite")
+    configure_ner_cache(enabled=True, disk_path=disk_path, disk_max_entries=100)
+    # Каждая вставка получает свое время последнего обращения, проверка размера - после каждой вставки
+    clock = itertools.count(1)
+    monkeypatch.setattr(ner_cache, "time", SimpleNamespace(time=lambda: float(next(clock))))
+    monkeypatch.setattr(ner_cache, "_DISK_EVICTION_CHECK_INTERVAL", 1)
+    monkeypatch.setattr(ner_cache, "_disk_inserts_since_check", 0)
+
+    texts = [f"Предложение {i}." for i in range(101)]
+    for text in texts[:100]:
+        store_entities([text], [ENTITIES])
+    assert _disk_rows(disk_path) == 100
+
+    # Первое предложение использовано недавно и переживает вытеснение
+    clear_ner_cache()
+    assert get_cached_entities(texts[:1]) == {0: ENTITIES}
+    store_entities(texts[100:], [ENTITIES])
+
+    assert _disk_rows(disk_path) == 90
+    assert get_ner_cache_stats()["disk_evictions"] == 11
+    clear_ner_cache()
+    found = get_cached_entities(texts)
+    assert set(found) == {0} | set(range(12, 101))
@@ -0,0 +1,104 @@
+# Dream-Team-core/dataset_preparation/tests/test_nlp_service.py
+# Локальный сервис анализа текста (nlp_service, nlp_client): одновременные запросы объединяются
+# в микропакеты, каждый получает свои результаты, ответы через TCP и Unix-сокет совпадают
+# с прямыми вызовами функций, ошибки запросов возвращаются клиенту.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dataset_preparation.src import nlp_service
+from dataset_preparation.src.dialogue_identifier import extract_dialogue_info
+from dataset_preparation.src.ner_extractor import extract_entities
+from dataset_preparation.src.nlp_client import NLPServiceClient
+from dataset_preparation.src.nlp_service import MicroBatcher, NLPService
+from dataset_preparation.src.sentence_splitter import split_text_into_sentences
+
+SENTENCES = [
+    "«Привет! Как дела?», – спросил Иван.",
+    "Он ответил: «Все отлично!»",
+    "– Добрый день, – сказал он.",
+    "Это обычное предложение без диалога.",
+]
+PARAGRAPH = "«Пойдем», – согласилась Маша. Они вышли из дома в Москве и пошли к реке."
+
+def test_concurrent_requests_share_batches():
+    batcher = MicroBatcher(batch_window=0.2, max_batch_size=100)
+    try:
+        # Запросы отправляются одновременно: все они укладываются в окно первого
+        futures = [batcher.submit("dialogue", [sentence] * (number + 1)) for number, sentence in enumerate(SENTENCES)]
+        for number, (sentence, future) in enumerate(zip(SENTENCES, futures)):
+            assert future.result(timeout=10) == [extract_dialogue_info(sentence)] * (number + 1)
+        stats = batcher.stats()
+        assert (stats["requests"], stats["batches"], stats["texts"], stats["largest_batch"]) == (4, 1, 10, 10)
+    finally:
+        batcher.close()
+
+def test_batch_size_limit_and_errors(monkeypatch):
+    def failing_split(texts):
+        raise RuntimeError("модель недоступна")
+    monkeypatch.setitem(nlp_service.OPERATIONS, "split", failing_split)
+
+    batcher = MicroBatcher(batch_window=0.2, max_batch_size=2)
+    try:
+        futures = [batcher.submit("dialogue", [sentence]) for sentence in SENTENCES]
+        failed = batcher.submit("split", ["Текст."])
+        assert [future.result(timeout=10)[0] for future in futures] == [extract_dialogue_info(s) for s in SENTENCES]
+        with pytest.raises(RuntimeError, match="модель недоступна"):
+            failed.result(timeout=10)
+        assert batcher.stats()["largest_batch"] <= 2
+        with pytest.raises(ValueError):
+            batcher.submit("translate", ["Текст."])
+    finally:
+        batcher.close()
+
+@pytest.fixture(params=["tcp", "unix"])
+def client(request, tmp_path):
+    """Клиент сервиса, запущенного в фоновом потоке на свободном порту или на Unix-сокете."""
+    if request.param == "tcp":
+        service = NLPService(port=0)
+    else:
+        service = NLPService(unix_socket=str(tmp_path / "nlp.sock"))
+    with service:
+        service_client = NLPServiceClient(service.address, timeout=30)
+        yield service_client
+        service_client.close()
+    if request.param == "unix":
+        assert not (tmp_path / "nlp.sock").exists()
+
+def test_service_results_match_direct_calls(client):
+    assert client.split_text_into_sentences(PARAGRAPH) == split_text_into_sentences(PARAGRAPH)
+    assert client.extract_dialogue_info_batch(SENTENCES) == [extract_dialogue_info(s) for s in SENTENCES]
+    assert client.extract_entities(PARAGRAPH) == extract_entities(PARAGRAPH)
+    analyzed = client.analyze_paragraph(PARAGRAPH)
+    assert [sentence["text"] for sentence in analyzed] == split_text_into_sentences(PARAGRAPH)
+    assert [sentence["dialogue_info"] for sentence in analyzed] == [extract_dialogue_info(s["text"]) for s in analyzed]
+    assert {entity["text"] for sentence in analyzed for entity in sentence["entities"]} >= {"Маша"}
+    assert client.split_text_into_sentences_batch([]) == []
+    health = client.health()
+    assert health["status"] == "ok" and health["stats"]["requests"] >= 4
+
+def test_concurrent_clients_from_threads(client):
+    barrier = threading.Barrier(8)
+
+    def call(sentence):
+        barrier.wait(timeout=10)
+        return client.extract_dialogue_info(sentence)
+
+    with ThreadPoolExecutor(8) as executor:
+        sentences = [SENTENCES[number % len(SENTENCES)] for number in range(8)]
+        assert list(executor.map(call, sentences)) == [extract_dialogue_info(s) for s in sentences]
+
+def test_request_errors_are_reported(client):
+    with pytest.raises(RuntimeError, match="404"):
+        client._call("translate", "Текст.")
+    with pytest.raises(RuntimeError, match="400"):
+        client._request("POST", "/split", {"texts": "не список"})
+    # После ошибки соединение продолжает работать
+    assert client.extract_dialogue_info(SENTENCES[0]) == extract_dialogue_info(SENTENCES[0])
+
+def test_client_address_errors(tmp_path):
+    with pytest.raises(ValueError):
+        NLPServiceClient("ftp://localhost:21")
+    with pytest.raises(OSError):
+        NLPServiceClient(f"unix:{tmp_path / 'missing.sock'}", timeout=1).health()
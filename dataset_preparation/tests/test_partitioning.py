@@ -0,0 +1,122 @@
+# Dream-Team-core/dataset_preparation/tests/test_partitioning.py
+# Распределенная сборка (partitioning): разделы, собранные по отдельности и объединенные
+# merge_partitions(), дают тот же результат, что и сборка всего корпуса; verify_partitions()
+# находит потерянные, лишние и несовместимые разделы, и тогда объединение ничего не пишет.
+import filecmp
+import hashlib
+import json
+import os
+
+import pytest
+
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+from dataset_preparation.src.manifest import get_manifest_path
+from dataset_preparation.src.partitioning import (
+    check_partition,
+    merge_partitions,
+    partition_of,
+    verify_partitions,
+)
+from dataset_preparation.src.sharding import iter_shard_records
+
+PARTITIONS = 3
+
+def _write_inputs(input_dir) -> None:
+    for i in range(12):
+        path = input_dir / ("part_two" if i % 3 == 0 else "") / f"chapter_{i}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n\n".join(f"Глава {i}, абзац {j}. Князь Андрей молчал." for j in range(3)), encoding="utf-8")
+    (input_dir / "empty.txt").write_text("\n", encoding="utf-8")
+
+def _run(input_dir, output_dir, **options) -> None:
+    run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                  verbose=False, **options)
+
+def _manifest_files(output_dir) -> dict:
+    with open(get_manifest_path(str(output_dir)), 'r', encoding='utf-8') as f:
+        return json.load(f)["files"]
+
+def _build_partitions(tmp_path, **options) -> list:
+    input_dir = tmp_path / "input"
+    partition_dirs = [tmp_path / f"partition_{index}" for index in range(PARTITIONS)]
+    for index, partition_dir in enumerate(partition_dirs):
+        _run(input_dir, partition_dir, partition_index=index, partition_count=PARTITIONS, **options)
+    return [str(partition_dir) for partition_dir in partition_dirs]
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Входной корпус: 12 файлов в корне и в подпапке и один пустой файл."""
+    _write_inputs(tmp_path / "input")
+    return tmp_path / "input"
+
+def test_partition_assignment_is_stable_and_covers_all_partitions():
+    paths = [f"part_two/chapter_{i}.txt" for i in range(200)]
+    assignment = [partition_of(path, PARTITIONS) for path in paths]
+    assert set(assignment) == set(range(PARTITIONS))
+    # SHA-1 от пути, а не hash(): значение не зависит от процесса
+    assert partition_of("chapter_1.txt", 1000) == int.from_bytes(
+        hashlib.sha1(b"chapter_1.txt").digest()[:8], 'big') % 1000
+    with pytest.raises(ValueError):
+        check_partition(3, 3)
+    with pytest.raises(ValueError):
+        check_partition(0, 0)
+
+def test_merged_mirror_layout_matches_single_build(tmp_path, corpus):
+    _run(corpus, tmp_path / "single")
+    partition_dirs = _build_partitions(tmp_path)
+    for partition_dir in partition_dirs:
+        assert _manifest_files(partition_dir) # Каждому разделу досталось хотя бы несколько файлов
+
+    report = merge_partitions(partition_dirs, str(tmp_path / "merged"))
+    assert report["ok"], report["errors"]
+    assert report["files"] == 13
+    single, merged = _manifest_files(tmp_path / "single"), _manifest_files(tmp_path / "merged")
+    assert merged == single
+    assert merged["empty.txt"]["output"] is None
+    for entry in single.values():
+        if entry["output"] is not None:
+            assert filecmp.cmp(tmp_path / "single" / entry["output"], tmp_path / "merged" / entry["output"], shallow=False)
+            assert os.path.exists(tmp_path / "merged" / (entry["output"] + ".idx"))
+
+    # Объединенный результат обновляется инкрементально, как обычная сборка: ничего не обрабатывается заново
+    started = []
+    _run(corpus, tmp_path / "merged", on_event=lambda event: started.append(event) if event["type"] == "file_started" else None)
+    assert started == []
+
+def test_merged_shards_match_single_build(tmp_path, corpus):
+    options = {"output_layout": "shards", "max_shard_bytes": 2000}
+    _run(corpus, tmp_path / "single", **options)
+    report = merge_partitions(_build_partitions(tmp_path, **options), str(tmp_path / "merged"), max_shard_bytes=2000)
+    assert report["ok"], report["errors"]
+    for relative_input_path, entry in _manifest_files(tmp_path / "single").items():
+        if entry["output"] is not None:
+            assert (list(iter_shard_records(str(tmp_path / "merged"), [relative_input_path]))
+                    == list(iter_shard_records(str(tmp_path / "single"), [relative_input_path])))
+
+def test_verify_reports_missing_duplicated_and_incompatible_partitions(tmp_path, corpus):
+    partition_dirs = _build_partitions(tmp_path)
+
+    report = verify_partitions(partition_dirs[:2])
+    assert not report["ok"] and any("Не хватает разделов: 2" in error for error in report["errors"])
+
+    report = verify_partitions(partition_dirs + partition_dirs[:1])
+    assert not report["ok"] and report["duplicated"] == sorted(_manifest_files(partition_dirs[0]))
+
+    # Потерянный результат одного из файлов
+    lost_input, lost_entry = next((path, entry) for path, entry in sorted(_manifest_files(partition_dirs[1]).items())
+                                  if entry["output"] is not None)
+    os.remove(os.path.join(partition_dirs[1], *lost_entry["output"].split('/')))
+    report = verify_partitions(partition_dirs)
+    assert not report["ok"] and report["missing"] == [lost_input]
+
+    # Раздел, собранный с другими настройками, несовместим с остальными; объединение ничего не пишет
+    _run(corpus, partition_dirs[1], partition_index=1, partition_count=PARTITIONS, output_format="msgpack")
+    report = merge_partitions(partition_dirs, str(tmp_path / "merged"))
+    assert not report["ok"] and any("настройки конвейера" in error for error in report["errors"])
+    assert not os.path.exists(tmp_path / "merged")
+
+def test_merge_refuses_existing_output(tmp_path, corpus):
+    partition_dirs = _build_partitions(tmp_path)
+    _run(corpus, tmp_path / "existing")
+    report = merge_partitions(partition_dirs, str(tmp_path / "existing"))
+    assert not report["ok"] and any("уже содержит манифест" in error for error in report["errors"])
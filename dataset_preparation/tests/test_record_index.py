@@ -0,0 +1,93 @@
+# Dream-Team-core/dataset_preparation/tests/test_record_index.py
+# Индекс смещений записей (record_index): индекс, записанный при обработке, совпадает с построенным
+# по готовому файлу; запись по id и по номеру, выборки по датасету и категории, устаревший индекс.
+import filecmp
+import os
+import random
+
+import pytest
+
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+from dataset_preparation.src.record_index import (
+    DatasetIndex,
+    RecordIndex,
+    build_offset_index,
+    get_index_path,
+)
+from dataset_preparation.src.serialization import iter_records
+
+def _write_inputs(input_dir) -> None:
+    for relative_path, paragraphs_count in (("a.txt", 5), ("poems/b.txt", 3), ("poems/c.txt", 4)):
+        path = input_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n\n".join(f"Абзац {i} файла {relative_path}." for i in range(paragraphs_count)),
+                        encoding="utf-8")
+
+@pytest.fixture(params=["jsonl", "msgpack"])
+def processed(request, tmp_path):
+    """Выходная директория с проиндексированными результатами трех входных файлов."""
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write_inputs(input_dir)
+    run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                  verbose=False, output_format=request.param)
+    return output_dir, "." + request.param
+
+def test_index_written_during_processing_matches_rebuilt(processed, tmp_path):
+    output_dir, extension = processed
+    data_path = str(output_dir / "poems" / ("c" + extension))
+    rebuilt_path = str(tmp_path / "rebuilt.idx")
+    assert build_offset_index(data_path, rebuilt_path) == 4
+    assert filecmp.cmp(get_index_path(data_path), rebuilt_path, shallow=False)
+
+def test_record_index_by_number_and_id(processed):
+    output_dir, extension = processed
+    data_path = str(output_dir / ("a" + extension))
+    records = list(iter_records(data_path))
+    with RecordIndex(data_path) as record_index:
+        assert len(record_index) == len(records) == 5
+        assert (record_index.source_file, record_index.category) == ("a.txt", "")
+        assert [record_index.record(i) for i in range(5)] == records
+        for number, record in enumerate(records):
+            assert record_index.find(record["id"]) == number
+            assert record_index.get(record["id"]) == record
+        assert record_index.get("a_paragraph_999") is None
+        with pytest.raises(IndexError):
+            record_index.record(5)
+        assert all(record in records for record in record_index.sample(10, rng=random.Random(0)))
+
+def test_dataset_index_lookups_and_samples(processed):
+    output_dir, _ = processed
+    with DatasetIndex(str(output_dir)) as dataset_index:
+        assert len(dataset_index) == 12
+        assert dataset_index.categories() == ["", "poems"]
+        assert dataset_index.get("b_paragraph_2")["paragraph_text"] == "Абзац 2 файла poems/b.txt."
+        assert dataset_index.get("b_paragraph_3") is None
+        assert len(list(dataset_index.iter_category("poems"))) == 7
+        assert [r["paragraph_index"] for r in dataset_index.iter_source_file("c.txt", "poems")] == [0, 1, 2, 3]
+        sampled = dataset_index.sample(50, category="poems", rng=random.Random(1))
+        assert len(sampled) == 50 and {r["category"] for r in sampled} == {"poems"}
+        assert {r["source_file"] for r in sampled} == {"b.txt", "c.txt"}
+        assert dataset_index.sample(5, category="missing") == []
+
+def test_blank_lines_in_jsonl_are_skipped(tmp_path):
+    data_path = tmp_path / "manual.jsonl"
+    data_path.write_bytes(b'\n{"id": "manual_paragraph_0", "source_file": "manual.txt", "category": null}\n\n'
+                          b'{"id": "manual_paragraph_1"}\n  \n')
+    assert build_offset_index(str(data_path)) == 2
+    with RecordIndex(str(data_path)) as record_index:
+        assert record_index.get("manual_paragraph_1") == {"id": "manual_paragraph_1"}
+        assert record_index.record(0)["source_file"] == "manual.txt"
+
+def test_stale_or_unsupported_index_is_rejected(processed, tmp_path):
+    output_dir, extension = processed
+    data_path = str(output_dir / ("a" + extension))
+    with open(data_path, 'ab') as f:
+        f.write(b"\n")
+    with pytest.raises(ValueError):
+        RecordIndex(data_path)
+
+    compressed_path = tmp_path / "data.jsonl.gz"
+    compressed_path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        build_offset_index(str(compressed_path))
+    assert not os.path.exists(get_index_path(str(compressed_path)))
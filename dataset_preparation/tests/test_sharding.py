@@ -0,0 +1,107 @@
+# Dream-Team-core/dataset_preparation/tests/test_sharding.py
+# Раскладка вывода в шарды (sharding): записи, прочитанные по индексу шардов, совпадают с раскладкой
+# "mirror"; шарды ограничены по размеру; повторная обработка и удаление входных файлов обновляют индекс.
+import gzip
+import json
+import os
+
+import pytest
+
+from dataset_preparation.src.main_creator import run_dataset_creation_pipeline
+from dataset_preparation.src.manifest import get_manifest_path
+from dataset_preparation.src.sharding import ShardStore, get_shard_index_path, iter_shard_records
+
+MAX_SHARD_BYTES = 1500
+
+def _write_inputs(input_dir, files_count: int = 6) -> None:
+    for i in range(files_count):
+        path = input_dir / ("sub" if i % 2 else "") / f"book_{i}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        paragraphs = [f"Глава {i}, абзац {j}. Иван сказал, что уедет в Москву {j} раз." for j in range(12)]
+        path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+def _run(input_dir, output_dir, **options) -> None:
+    run_dataset_creation_pipeline(str(input_dir), str(output_dir), stages="split", use_ner_cache=False,
+                                  verbose=False, **options)
+
+def _read_jsonl(path) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def _shard_index(output_dir) -> dict:
+    with open(get_shard_index_path(str(output_dir)), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_shards_match_mirror_layout(tmp_path, compression):
+    input_dir, mirror_dir, shards_dir = tmp_path / "input", tmp_path / "mirror", tmp_path / "sharded"
+    _write_inputs(input_dir)
+    _run(input_dir, mirror_dir)
+    _run(input_dir, shards_dir, output_layout="shards", compression=compression, max_shard_bytes=MAX_SHARD_BYTES)
+
+    index = _shard_index(shards_dir)
+    with open(get_manifest_path(str(mirror_dir)), 'r', encoding='utf-8') as f:
+        mirror_files = json.load(f)["files"]
+    assert set(index["sources"]) == set(mirror_files)
+    for relative_input_path, entry in mirror_files.items():
+        mirror_records = _read_jsonl(mirror_dir / entry["output"])
+        assert list(iter_shard_records(str(shards_dir), [relative_input_path])) == mirror_records
+        assert index["sources"][relative_input_path]["records"] == len(mirror_records)
+
+    assert len(index["shards"]) > 1
+    for shard_name, shard in index["shards"].items():
+        size = os.path.getsize(shards_dir / "shards" / shard_name)
+        assert size == shard["bytes"]
+        assert size <= MAX_SHARD_BYTES or len(shard["sources"]) == 1
+    # Временные сегменты обработчиков удаляются после запуска
+    assert not os.path.exists(shards_dir / "shards" / "_segments")
+
+def test_incremental_run_replaces_changed_and_prunes_deleted_sources(tmp_path):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    _write_inputs(input_dir)
+    options = {"output_layout": "shards", "max_shard_bytes": MAX_SHARD_BYTES}
+    _run(input_dir, output_dir, **options)
+    first_index = _shard_index(output_dir)
+
+    (input_dir / "book_0.txt").write_text("Новый текст первой книги.", encoding="utf-8")
+    os.remove(input_dir / "sub" / "book_1.txt")
+    _run(input_dir, output_dir, **options)
+
+    index = _shard_index(output_dir)
+    assert set(index["sources"]) == set(first_index["sources"]) - {"sub/book_1.txt"}
+    assert [r["paragraph_text"] for r in iter_shard_records(str(output_dir), ["book_0.txt"])] == ["Новый текст первой книги."]
+    # Неизмененные файлы не переписываются: их сегменты остаются на прежних местах
+    for unchanged in ("book_2.txt", "sub/book_3.txt"):
+        assert index["sources"][unchanged] == first_index["sources"][unchanged]
+    # Прежний сегмент измененного файла остается в шарде "мертвыми" байтами
+    store = ShardStore(str(output_dir), max_shard_bytes=MAX_SHARD_BYTES)
+    assert store.dead_bytes() > 0
+
+def _write_segment(path, texts) -> str:
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for text in texts:
+            f.write(json.dumps({"paragraph_text": text}, ensure_ascii=False) + "\n")
+    return str(path)
+
+def test_store_drops_shard_without_live_sources_and_reloads_index(tmp_path):
+    output_dir = str(tmp_path)
+    os.makedirs(tmp_path / "shards") # Директорию шардов создает main_creator вместе с директорией сегментов
+    store = ShardStore(output_dir, max_shard_bytes=1)
+    for name in ("a", "b"):
+        store.add_source(f"{name}.txt", _write_segment(tmp_path / f"{name}.seg", [name + "1", name + "2"]),
+                         records=2, category=None, source_file=f"{name}.txt")
+    # Сегмент больше предела занимает шард целиком
+    assert sorted(store.shards) == ["shard-00000.jsonl.gz", "shard-00001.jsonl.gz"]
+
+    store.remove_source("a.txt")
+    assert sorted(store.shards) == ["shard-00001.jsonl.gz"]
+    assert not os.path.exists(tmp_path / "shards" / "shard-00000.jsonl.gz")
+    store.save()
+
+    reloaded = ShardStore(output_dir, max_shard_bytes=1)
+    assert reloaded.sources == store.sources
+    assert [r["paragraph_text"] for r in reloaded.iter_records()] == ["b1", "b2"]
+
+    # Индекс с другим сжатием не используется: шарды создаются заново
+    assert ShardStore(output_dir, compression="zstd").sources == {}
+    assert not os.path.exists(tmp_path / "shards" / "shard-00001.jsonl.gz")
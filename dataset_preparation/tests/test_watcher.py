@@ -0,0 +1,64 @@
+# Dream-Team-core/dataset_preparation/tests/test_watcher.py
+# Режим наблюдения (watcher): файл, дописанный во время цикла обработки, обрабатывается заново
+# в следующем цикле, и результат соответствует итоговому содержимому файла.
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import pytest
+
+from dataset_preparation.src.manifest import get_manifest_path
+from dataset_preparation.src.watcher import watch_input_dir
+
+_TIMEOUT_SECONDS = 30
+
+def _read_texts(output_file: str) -> list:
+    with open(output_file, 'r', encoding='utf-8') as f:
+        return [json.loads(line)["paragraph_text"] for line in f]
+
+def _manifest_entry(output_dir: str, relative_path: str) -> Optional[dict]:
+    try:
+        with open(get_manifest_path(output_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)["files"].get(relative_path)
+    except (OSError, ValueError):
+        return None
+
+@pytest.mark.parametrize("backend", ["polling", "inotify"])
+def test_file_written_during_processing_is_reprocessed(tmp_path, backend):
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    input_file = input_dir / "a.txt"
+    input_file.write_text("Начало книги.", encoding="utf-8")
+    appended = threading.Event()
+
+    def write_during_processing(event):
+        # Запись в файл продолжается, пока первый цикл его обрабатывает
+        if event["type"] == "file_started" and not appended.is_set():
+            with open(input_file, 'a', encoding='utf-8') as f:
+                f.write("\n\nПродолжение книги.")
+            appended.set()
+
+    stop = threading.Event()
+    cycles = []
+    thread = threading.Thread(target=lambda: cycles.append(watch_input_dir(
+        str(input_dir), str(output_dir), backend=backend, debounce_seconds=0.2, poll_interval=0.05,
+        stop_event=stop, stages="split", use_ner_cache=False, verbose=False, on_event=write_during_processing)))
+    thread.start()
+    try:
+        # Первый цикл не записывает измененный файл в манифест: запись появляется только после
+        # повторной обработки в следующем цикле
+        deadline = time.monotonic() + _TIMEOUT_SECONDS
+        while time.monotonic() < deadline and _manifest_entry(str(output_dir), "a.txt") is None:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join(_TIMEOUT_SECONDS)
+
+    assert appended.is_set()
+    assert cycles and cycles[0] >= 2
+    entry = _manifest_entry(str(output_dir), "a.txt")
+    stat = os.stat(input_file)
+    assert (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+    assert _read_texts(str(output_dir / "a.jsonl")) == ["Начало книги.", "Продолжение книги."]